@@ -436,6 +436,29 @@ def create_app():
     scheduler.add_job(
         reconciliar_pendentes, "cron", hour=3, minute=0, args=[app]
     )
+    from services.email_outbox_service import drenar_outbox
+    scheduler.add_job(
+        drenar_outbox,
+        "interval",
+        seconds=app.config.get("OUTBOX_INTERVALO_SEGUNDOS", 15),
+        args=[app],
+        id="email_outbox",
+        max_instances=1,
+        coalesce=True,
+    )
+    from services.bi_cache import bi_cache
+    with app.app_context():
+        bi_cache.preparar()
+    from services.bi_fatos_service import atualizar_fatos_job
+    scheduler.add_job(
+        atualizar_fatos_job,
+        "interval",
+        minutes=app.config.get("BI_FATOS_INTERVALO_MINUTOS", 15),
+        args=[app],
+        id="bi_fatos_diarios",
+        max_instances=1,
+        coalesce=True,
+    )
     scheduler.start()
     
     # Inicializar scheduler de lembretes
@@ -120,6 +120,28 @@ class Config:
     MAIL_PASSWORD = MAILJET_SECRET_KEY
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", MAIL_USERNAME)
 
+    # Outbox de e-mails: intervalo do worker, tamanho do lote, limite de
+    # envios por segundo (0 = sem limite) e tentativas antes do dead-letter
+    OUTBOX_INTERVALO_SEGUNDOS = int(os.getenv("OUTBOX_INTERVALO_SEGUNDOS", "15"))
+    OUTBOX_LOTE = int(os.getenv("OUTBOX_LOTE", "100"))
+    OUTBOX_TAXA_POR_SEGUNDO = float(os.getenv("OUTBOX_TAXA_POR_SEGUNDO", "0"))
+    OUTBOX_MAX_TENTATIVAS = int(os.getenv("OUTBOX_MAX_TENTATIVAS", "5"))
+
+    # Fatos diários de BI: intervalo do job e dias sempre recalculados
+    BI_FATOS_INTERVALO_MINUTOS = int(os.getenv("BI_FATOS_INTERVALO_MINUTOS", "15"))
+    BI_FATOS_JANELA_DIAS = int(os.getenv("BI_FATOS_JANELA_DIAS", "7"))
+
+    # Cache de BI: LRU local (TTL/tamanho) na frente do Redis compartilhado
+    BI_CACHE_REDIS_URL = os.getenv("BI_CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+    BI_CACHE_TTL = int(os.getenv("BI_CACHE_TTL", "3600"))
+    # Sem Redis a invalidação não sai do processo: TTL curto limita a defasagem
+    BI_CACHE_TTL_MEMORIA = int(os.getenv("BI_CACHE_TTL_MEMORIA", "60"))
+    BI_CACHE_LOCAL_TTL = int(os.getenv("BI_CACHE_LOCAL_TTL", "60"))
+    BI_CACHE_LOCAL_MAX = int(os.getenv("BI_CACHE_LOCAL_MAX", "512"))
+
+    # Votação: "1" mantém os totais de voting_result a cada voto salvo
+    VOTING_RESULTADOS_INCREMENTAIS = os.getenv("VOTING_RESULTADOS_INCREMENTAIS") == "1"
+
     # ------------------------------------------------------------------ #
     #  reCAPTCHA                                                         #
     # ------------------------------------------------------------------ #
@@ -150,6 +172,25 @@ class Config:
     )
     UPLOADS_ROOT = os.path.join(STATIC_ROOT, "uploads")
     BANNERS_ROOT = os.path.join(STATIC_ROOT, "banners")
+    # Binários da /api/binarios: "disco" (UPLOADS_ROOT/binarios) ou "blocos" (banco)
+    BINARIOS_ARMAZENAMENTO = os.getenv("BINARIOS_ARMAZENAMENTO", "disco")
+    BINARIOS_BLOCO_BYTES = int(os.getenv("BINARIOS_BLOCO_BYTES", str(512 * 1024)))
+
+    # ------------------------------------------------------------------ #
+    #  Geração de certificados em lote                                   #
+    # ------------------------------------------------------------------ #
+    # Processos usados para renderizar shards de certificados em paralelo
+    CERTIFICADOS_WORKERS = int(os.getenv("CERTIFICADOS_WORKERS", "0")) or None
+    # Abaixo deste número de participantes a geração continua serial
+    CERTIFICADOS_PARALELO_MINIMO = int(os.getenv("CERTIFICADOS_PARALELO_MINIMO", "500"))
+
+    # ------------------------------------------------------------------ #
+    #  Importação de usuários por planilha                               #
+    # ------------------------------------------------------------------ #
+    # Linhas por lote (uma consulta de duplicados e um INSERT por lote)
+    IMPORTACAO_USUARIOS_LOTE = int(os.getenv("IMPORTACAO_USUARIOS_LOTE", "1000"))
+    # Processos para gerar hashes de senha/código em lote (importações)
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", "0")) or None
 
     # ------------------------------------------------------------------ #
     #  Configurações do servidor                                         #
@@ -0,0 +1,67 @@
+"""add partial unique indexes for QR check-ins
+
+Revision ID: a7c1e93b5d20
+Revises: 0e79ba45ccfe
+Create Date: 2026-10-18 09:12:41.512093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c1e93b5d20'
+down_revision = '0e79ba45ccfe'
+branch_labels = None
+depends_on = None
+
+
+INDICES = (
+    ("uq_checkin_qr_oficina", "oficina_id", "QR-OFICINA"),
+    ("uq_checkin_qr_evento", "evento_id", "QR-EVENTO"),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("checkin"):
+        return
+    existentes = {ix["name"] for ix in inspector.get_indexes("checkin")}
+
+    for nome, coluna, palavra_chave in INDICES:
+        if nome in existentes:
+            continue
+        # Remove duplicatas antigas, mantendo o primeiro check-in
+        op.execute(
+            sa.text(
+                f"""
+                DELETE FROM checkin
+                WHERE palavra_chave = :palavra_chave
+                  AND id NOT IN (
+                      SELECT MIN(id) FROM checkin
+                      WHERE palavra_chave = :palavra_chave
+                      GROUP BY usuario_id, {coluna}
+                  )
+                """
+            ).bindparams(palavra_chave=palavra_chave)
+        )
+        op.create_index(
+            nome,
+            "checkin",
+            ["usuario_id", coluna],
+            unique=True,
+            postgresql_where=sa.text(f"palavra_chave = '{palavra_chave}'"),
+            sqlite_where=sa.text(f"palavra_chave = '{palavra_chave}'"),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("checkin"):
+        return
+    existentes = {ix["name"] for ix in inspector.get_indexes("checkin")}
+    for nome, _, _ in INDICES:
+        if nome in existentes:
+            op.drop_index(nome, table_name="checkin")
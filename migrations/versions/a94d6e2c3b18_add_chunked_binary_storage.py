@@ -0,0 +1,76 @@
+"""add content-addressed chunked storage for arquivo_binario
+
+Revision ID: a94d6e2c3b18
+Revises: f3c8a1d5b927
+Create Date: 2026-10-18 23:18:44.902517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a94d6e2c3b18'
+down_revision = 'f3c8a1d5b927'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("conteudo_binario"):
+        op.create_table(
+            "conteudo_binario",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("sha256", sa.String(length=64), nullable=False),
+            sa.Column("tamanho", sa.BigInteger(), nullable=False),
+            sa.Column("armazenamento", sa.String(length=10), nullable=False),
+            sa.Column("tamanho_bloco", sa.Integer(), nullable=True),
+            sa.Column("caminho", sa.String(length=255), nullable=True),
+            sa.Column("criado_em", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("sha256"),
+        )
+    if not inspector.has_table("bloco_binario"):
+        op.create_table(
+            "bloco_binario",
+            sa.Column("conteudo_id", sa.Integer(), nullable=False),
+            sa.Column("indice", sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column("dados", sa.LargeBinary(), nullable=False),
+            sa.ForeignKeyConstraint(["conteudo_id"], ["conteudo_binario.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("conteudo_id", "indice"),
+        )
+
+    if not inspector.has_table("arquivo_binario"):
+        return
+    colunas = {c["name"] for c in inspector.get_columns("arquivo_binario")}
+    with op.batch_alter_table("arquivo_binario", schema=None) as batch_op:
+        if "conteudo_id" not in colunas:
+            batch_op.add_column(sa.Column("conteudo_id", sa.Integer(), nullable=True))
+            batch_op.create_index("ix_arquivo_binario_conteudo_id", ["conteudo_id"])
+            batch_op.create_foreign_key(
+                "fk_arquivo_binario_conteudo_id_conteudo_binario",
+                "conteudo_binario",
+                ["conteudo_id"],
+                ["id"],
+            )
+        batch_op.alter_column("conteudo", existing_type=sa.LargeBinary(), nullable=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("arquivo_binario"):
+        colunas = {c["name"] for c in inspector.get_columns("arquivo_binario")}
+        if "conteudo_id" in colunas:
+            with op.batch_alter_table("arquivo_binario", schema=None) as batch_op:
+                batch_op.drop_constraint(
+                    "fk_arquivo_binario_conteudo_id_conteudo_binario", type_="foreignkey"
+                )
+                batch_op.drop_index("ix_arquivo_binario_conteudo_id")
+                batch_op.drop_column("conteudo_id")
+    if inspector.has_table("bloco_binario"):
+        op.drop_table("bloco_binario")
+    if inspector.has_table("conteudo_binario"):
+        op.drop_table("conteudo_binario")
@@ -0,0 +1,53 @@
+"""materialize checkin.cliente_id and index the client feed
+
+Revision ID: b3d8f2a61c47
+Revises: a7c1e93b5d20
+Create Date: 2026-10-18 18:05:27.331842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d8f2a61c47'
+down_revision = 'a7c1e93b5d20'
+branch_labels = None
+depends_on = None
+
+
+INDICE = "ix_checkin_cliente_id_id"
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("checkin"):
+        return
+
+    # Check-ins antigos sem cliente: herda da oficina, do evento ou do usuário
+    op.execute(
+        """
+        UPDATE checkin
+        SET cliente_id = COALESCE(
+            (SELECT oficina.cliente_id FROM oficina WHERE oficina.id = checkin.oficina_id),
+            (SELECT evento.cliente_id FROM evento WHERE evento.id = checkin.evento_id),
+            (SELECT usuario.cliente_id FROM usuario WHERE usuario.id = checkin.usuario_id)
+        )
+        WHERE cliente_id IS NULL
+        """
+    )
+
+    existentes = {ix["name"] for ix in inspector.get_indexes("checkin")}
+    if INDICE not in existentes:
+        op.create_index(INDICE, "checkin", ["cliente_id", "id"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("checkin"):
+        return
+    existentes = {ix["name"] for ix in inspector.get_indexes("checkin")}
+    if INDICE in existentes:
+        op.drop_index(INDICE, table_name="checkin")
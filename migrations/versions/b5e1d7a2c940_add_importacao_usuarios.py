@@ -0,0 +1,42 @@
+"""add importacao_usuarios for background spreadsheet imports
+
+Revision ID: b5e1d7a2c940
+Revises: a94d6e2c3b18
+Create Date: 2026-10-18 23:52:10.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e1d7a2c940'
+down_revision = 'a94d6e2c3b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table("importacao_usuarios"):
+        return
+    op.create_table(
+        "importacao_usuarios",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("arquivo_nome", sa.String(length=255), nullable=False),
+        sa.Column("solicitante", sa.String(length=50), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("linhas_processadas", sa.Integer(), nullable=False),
+        sa.Column("importados", sa.Integer(), nullable=False),
+        sa.Column("erros", sa.Integer(), nullable=False),
+        sa.Column("relatorio_erros", sa.String(length=255), nullable=True),
+        sa.Column("mensagem", sa.Text(), nullable=True),
+        sa.Column("criado_em", sa.DateTime(), nullable=False),
+        sa.Column("iniciado_em", sa.DateTime(), nullable=True),
+        sa.Column("concluido_em", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("importacao_usuarios")
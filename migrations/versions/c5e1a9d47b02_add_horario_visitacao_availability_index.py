@@ -0,0 +1,43 @@
+"""add composite availability index on horario_visitacao
+
+Revision ID: c5e1a9d47b02
+Revises: b3d8f2a61c47
+Create Date: 2026-10-18 19:02:14.087311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e1a9d47b02'
+down_revision = 'b3d8f2a61c47'
+branch_labels = None
+depends_on = None
+
+
+INDICE = "ix_horario_visitacao_evento_data_vagas"
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("horario_visitacao"):
+        return
+    existentes = {ix["name"] for ix in inspector.get_indexes("horario_visitacao")}
+    if INDICE not in existentes:
+        op.create_index(
+            INDICE,
+            "horario_visitacao",
+            ["evento_id", "data", "vagas_disponiveis"],
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("horario_visitacao"):
+        return
+    existentes = {ix["name"] for ix in inspector.get_indexes("horario_visitacao")}
+    if INDICE in existentes:
+        op.drop_index(INDICE, table_name="horario_visitacao")
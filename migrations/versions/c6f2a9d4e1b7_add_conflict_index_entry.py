@@ -0,0 +1,36 @@
+"""add conflict_index_entry for persisted reviewer conflict keys
+
+Revision ID: c6f2a9d4e1b7
+Revises: b5e1d7a2c940
+Create Date: 2026-10-19 01:14:37.902115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f2a9d4e1b7'
+down_revision = 'b5e1d7a2c940'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table("conflict_index_entry"):
+        return
+    op.create_table(
+        "conflict_index_entry",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entity_type", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("keys", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("entity_type", "entity_id", name="uq_conflict_index_entity"),
+    )
+
+
+def downgrade():
+    op.drop_table("conflict_index_entry")
@@ -0,0 +1,54 @@
+"""add unique index on bi_fato_diario (cliente, evento, dia)
+
+Revision ID: d7a3e5b2c8f4
+Revises: c6f2a9d4e1b7
+Create Date: 2026-10-18 23:52:41.318570
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3e5b2c8f4'
+down_revision = 'c6f2a9d4e1b7'
+branch_labels = None
+depends_on = None
+
+
+INDICE = "uq_bi_fato_diario_cliente_evento_dia"
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("bi_fato_diario"):
+        return
+    if INDICE in {ix["name"] for ix in inspector.get_indexes("bi_fato_diario")}:
+        return
+    # Remove fatos duplicados por execuções concorrentes; a próxima atualização recalcula a janela
+    op.execute(
+        """
+        DELETE FROM bi_fato_diario
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM bi_fato_diario
+            GROUP BY cliente_id, COALESCE(evento_id, 0), dia
+        )
+        """
+    )
+    # evento_id nulo (fatos sem evento) não conflitaria num índice comum
+    op.create_index(
+        INDICE,
+        "bi_fato_diario",
+        ["cliente_id", sa.text("COALESCE(evento_id, 0)"), "dia"],
+        unique=True,
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("bi_fato_diario"):
+        return
+    if INDICE in {ix["name"] for ix in inspector.get_indexes("bi_fato_diario")}:
+        op.drop_index(INDICE, table_name="bi_fato_diario")
@@ -0,0 +1,59 @@
+"""create email_outbox table
+
+Revision ID: d7a4c2e9f813
+Revises: c5e1a9d47b02
+Create Date: 2026-10-18 20:11:37.402918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a4c2e9f813'
+down_revision = 'c5e1a9d47b02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("email_outbox"):
+        return
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("destinatario", sa.String(length=255), nullable=False),
+        sa.Column("nome_destinatario", sa.String(length=255), nullable=True),
+        sa.Column("assunto", sa.String(length=500), nullable=False),
+        sa.Column("corpo_texto", sa.Text(), nullable=True),
+        sa.Column("corpo_html", sa.Text(), nullable=True),
+        sa.Column("template_path", sa.String(length=255), nullable=True),
+        sa.Column("template_context", sa.JSON(), nullable=True),
+        sa.Column("anexos", sa.JSON(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("tentativas", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_tentativas", sa.Integer(), nullable=False, server_default="5"),
+        sa.Column("disponivel_em", sa.DateTime(), nullable=False),
+        sa.Column("bloqueado_em", sa.DateTime(), nullable=True),
+        sa.Column("ultimo_erro", sa.Text(), nullable=True),
+        sa.Column("message_id", sa.String(length=255), nullable=True),
+        sa.Column("criado_em", sa.DateTime(), nullable=False),
+        sa.Column("enviado_em", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_email_outbox")),
+    )
+    op.create_index(
+        "ix_email_outbox_status_disponivel",
+        "email_outbox",
+        ["status", "disponivel_em"],
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("email_outbox"):
+        return
+    op.drop_index("ix_email_outbox_status_disponivel", table_name="email_outbox")
+    op.drop_table("email_outbox")
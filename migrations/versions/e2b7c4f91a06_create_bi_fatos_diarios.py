@@ -0,0 +1,84 @@
+"""create BI daily fact tables
+
+Revision ID: e2b7c4f91a06
+Revises: d7a4c2e9f813
+Create Date: 2026-10-18 21:04:52.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c4f91a06'
+down_revision = 'd7a4c2e9f813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("bi_fato_diario"):
+        op.create_table(
+            "bi_fato_diario",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("cliente_id", sa.Integer(), nullable=False),
+            sa.Column("evento_id", sa.Integer(), nullable=True),
+            sa.Column("dia", sa.Date(), nullable=False),
+            sa.Column("inscricoes", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("pagamentos_aprovados", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("receita", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("checkins", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("feedbacks", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("soma_notas", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("atualizado_em", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(
+                ["cliente_id"], ["cliente.id"], name=op.f("fk_bi_fato_diario_cliente_id_cliente")
+            ),
+            sa.ForeignKeyConstraint(
+                ["evento_id"], ["evento.id"], name=op.f("fk_bi_fato_diario_evento_id_evento")
+            ),
+            sa.PrimaryKeyConstraint("id", name=op.f("pk_bi_fato_diario")),
+        )
+        op.create_index(
+            "ix_bi_fato_diario_cliente_dia", "bi_fato_diario", ["cliente_id", "dia"]
+        )
+    if not inspector.has_table("bi_participante_mensal"):
+        op.create_table(
+            "bi_participante_mensal",
+            sa.Column("cliente_id", sa.Integer(), nullable=False),
+            sa.Column("mes", sa.Date(), nullable=False),
+            sa.Column("usuario_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(
+                ["cliente_id"], ["cliente.id"],
+                name=op.f("fk_bi_participante_mensal_cliente_id_cliente"),
+            ),
+            sa.ForeignKeyConstraint(
+                ["usuario_id"], ["usuario.id"],
+                name=op.f("fk_bi_participante_mensal_usuario_id_usuario"),
+            ),
+            sa.PrimaryKeyConstraint(
+                "cliente_id", "mes", "usuario_id", name=op.f("pk_bi_participante_mensal")
+            ),
+        )
+    if not inspector.has_table("bi_marca_atualizacao"):
+        op.create_table(
+            "bi_marca_atualizacao",
+            sa.Column("fonte", sa.String(length=50), nullable=False),
+            sa.Column("ultimo_id", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("atualizado_em", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("fonte", name=op.f("pk_bi_marca_atualizacao")),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("bi_marca_atualizacao"):
+        op.drop_table("bi_marca_atualizacao")
+    if inspector.has_table("bi_participante_mensal"):
+        op.drop_table("bi_participante_mensal")
+    if inspector.has_table("bi_fato_diario"):
+        op.drop_index("ix_bi_fato_diario_cliente_dia", table_name="bi_fato_diario")
+        op.drop_table("bi_fato_diario")
@@ -0,0 +1,53 @@
+"""add unique index on voting_result (event, category, work)
+
+Revision ID: f3c8a1d5b927
+Revises: e2b7c4f91a06
+Create Date: 2026-10-18 22:31:07.640218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a1d5b927'
+down_revision = 'e2b7c4f91a06'
+branch_labels = None
+depends_on = None
+
+
+INDICE = "uq_voting_result_evento_categoria_trabalho"
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("voting_result"):
+        return
+    if INDICE in {ix["name"] for ix in inspector.get_indexes("voting_result")}:
+        return
+    # Remove resultados duplicados, mantendo o primeiro; a próxima apuração recalcula
+    op.execute(
+        """
+        DELETE FROM voting_result
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM voting_result
+            GROUP BY voting_event_id, category_id, work_id
+        )
+        """
+    )
+    op.create_index(
+        INDICE,
+        "voting_result",
+        ["voting_event_id", "category_id", "work_id"],
+        unique=True,
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("voting_result"):
+        return
+    if INDICE in {ix["name"] for ix in inspector.get_indexes("voting_result")}:
+        op.drop_index(INDICE, table_name="voting_result")
@@ -11,6 +11,7 @@ from .submission_system import (
     AutoDistributionLog as DistributionLog,
     ImportedSubmission,
     SpreadsheetMapping,
+    ConflictIndexEntry,
 )  # noqa: F401
 from .material import *  # noqa: F401,F403
 from .compra import *  # noqa: F401,F403
@@ -50,3 +51,5 @@ from .reminder import (
     TipoLembrete,
     StatusLembrete,
 )
+from .email_outbox import EmailOutbox
+from .importacao_usuarios import ImportacaoUsuarios
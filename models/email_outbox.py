@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from extensions import db
+
+
+class EmailOutbox(db.Model):
+    """E-mail a enviar, gravado na mesma transação da operação que o gerou.
+
+    As linhas são drenadas em lotes por ``services.email_outbox_service``.
+    Anexos são guardados por referência (caminhos de arquivo), não o conteúdo.
+    """
+
+    __tablename__ = "email_outbox"
+
+    PENDENTE = "pendente"
+    ENVIANDO = "enviando"
+    ENVIADO = "enviado"
+    # Esgotou as tentativas (dead-letter); só volta à fila manualmente
+    MORTO = "morto"
+
+    id = db.Column(db.Integer, primary_key=True)
+    destinatario = db.Column(db.String(255), nullable=False)
+    nome_destinatario = db.Column(db.String(255), nullable=True)
+    assunto = db.Column(db.String(500), nullable=False)
+    corpo_texto = db.Column(db.Text, nullable=True)
+    corpo_html = db.Column(db.Text, nullable=True)
+    template_path = db.Column(db.String(255), nullable=True)
+    template_context = db.Column(db.JSON, nullable=True)
+    anexos = db.Column(db.JSON, nullable=True)
+
+    status = db.Column(db.String(20), nullable=False, default=PENDENTE)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    max_tentativas = db.Column(db.Integer, nullable=False, default=5)
+    disponivel_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    bloqueado_em = db.Column(db.DateTime, nullable=True)
+    ultimo_erro = db.Column(db.Text, nullable=True)
+    message_id = db.Column(db.String(255), nullable=True)
+
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    enviado_em = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_email_outbox_status_disponivel", "status", "disponivel_em"),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox {self.id} {self.destinatario} {self.status}>"
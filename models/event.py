@@ -371,6 +371,27 @@ class RegraInscricaoEvento(db.Model):
 
 class Checkin(db.Model):
     __tablename__ = "checkin"
+    # Impede check-ins duplicados via QR mesmo com leitores concorrentes
+    __table_args__ = (
+        db.Index(
+            "uq_checkin_qr_oficina",
+            "usuario_id",
+            "oficina_id",
+            unique=True,
+            postgresql_where=db.text("palavra_chave = 'QR-OFICINA'"),
+            sqlite_where=db.text("palavra_chave = 'QR-OFICINA'"),
+        ),
+        db.Index(
+            "uq_checkin_qr_evento",
+            "usuario_id",
+            "evento_id",
+            unique=True,
+            postgresql_where=db.text("palavra_chave = 'QR-EVENTO'"),
+            sqlite_where=db.text("palavra_chave = 'QR-EVENTO'"),
+        ),
+        # Feed incremental por cliente (cliente_id = :id AND id > :cursor)
+        db.Index("ix_checkin_cliente_id_id", "cliente_id", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(
@@ -435,6 +456,29 @@ class Checkin(db.Model):
         return self.turno_legacy
 
 
+@db.event.listens_for(Checkin, "before_insert")
+def _preencher_cliente_checkin(mapper, connection, target):
+    """Materializa ``cliente_id`` a partir da oficina, do evento ou do usuário."""
+    if target.cliente_id is not None:
+        return
+    tabelas = db.metadata.tables
+    origens = (
+        ("oficina", target.oficina_id),
+        ("evento", target.evento_id),
+        ("usuario", target.usuario_id),
+    )
+    for nome, chave in origens:
+        if chave is None:
+            continue
+        tabela = tabelas[nome]
+        cliente_id = connection.execute(
+            db.select(tabela.c.cliente_id).where(tabela.c.id == chave)
+        ).scalar()
+        if cliente_id is not None:
+            target.cliente_id = cliente_id
+            return
+
+
 # =================================
 #            FEEDBACK
 # =================================
@@ -990,6 +1034,15 @@ class HorarioVisitacao(db.Model):
     """Slots de horários disponíveis para agendamento."""
 
     __tablename__ = "horario_visitacao"
+    # Consultas de disponibilidade por evento e período
+    __table_args__ = (
+        db.Index(
+            "ix_horario_visitacao_evento_data_vagas",
+            "evento_id",
+            "data",
+            "vagas_disponiveis",
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     evento_id = db.Column(db.Integer, db.ForeignKey("evento.id"), nullable=False)
@@ -1349,6 +1402,37 @@ class LoteTipoInscricao(db.Model):
 # =================================
 #            ARQUIVO BINÁRIO
 # =================================
+class ConteudoBinario(db.Model):
+    """Conteúdo de arquivo endereçado pelo SHA-256, compartilhado entre uploads iguais."""
+
+    __tablename__ = "conteudo_binario"
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, unique=True)
+    tamanho = db.Column(db.BigInteger, nullable=False)
+    # 'disco' (UPLOADS_ROOT/binarios) ou 'blocos' (linhas em bloco_binario)
+    armazenamento = db.Column(db.String(10), nullable=False)
+    tamanho_bloco = db.Column(db.Integer, nullable=True)
+    # Caminho relativo a UPLOADS_ROOT/binarios (só no armazenamento em disco)
+    caminho = db.Column(db.String(255), nullable=True)
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ConteudoBinario {self.sha256[:12]} {self.armazenamento}>"
+
+
+class BlocoBinario(db.Model):
+    """Fatia de um ``ConteudoBinario`` guardado no banco."""
+
+    __tablename__ = "bloco_binario"
+
+    conteudo_id = db.Column(
+        db.Integer, db.ForeignKey("conteudo_binario.id", ondelete="CASCADE"), primary_key=True
+    )
+    indice = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    dados = db.Column(db.LargeBinary, nullable=False)
+
+
 class ArquivoBinario(db.Model):
     """Modelo para armazenar arquivos binários no banco de dados."""
 
@@ -1356,10 +1440,14 @@ class ArquivoBinario(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(255), nullable=False)
-    conteudo = db.Column(db.LargeBinary, nullable=False)
+    # Legado: arquivos antigos têm o conteúdo inteiro aqui; os novos usam conteudo_binario
+    conteudo = db.Column(db.LargeBinary, nullable=True)
+    conteudo_id = db.Column(db.Integer, db.ForeignKey("conteudo_binario.id"), nullable=True, index=True)
     mimetype = db.Column(db.String(255), nullable=False)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    conteudo_binario = db.relationship("ConteudoBinario", lazy="joined")
+
     def __repr__(self):
         return f"<ArquivoBinario id={self.id} nome={self.nome}>"
 
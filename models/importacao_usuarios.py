@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from extensions import db
+
+
+class ImportacaoUsuarios(db.Model):
+    """Importação de usuários por planilha executada em segundo plano.
+
+    O progresso fica na própria linha para que qualquer worker possa responder
+    à consulta de status. Os erros por linha vão para um CSV em
+    ``UPLOAD_FOLDER/importacoes`` (``relatorio_erros``).
+    """
+
+    __tablename__ = "importacao_usuarios"
+
+    PENDENTE = "pendente"
+    PROCESSANDO = "processando"
+    CONCLUIDA = "concluida"
+    FALHOU = "falhou"
+
+    id = db.Column(db.Integer, primary_key=True)
+    arquivo_nome = db.Column(db.String(255), nullable=False)
+    # "<tipo>:<id>" de quem enviou; usuários e clientes têm ids independentes
+    solicitante = db.Column(db.String(50), nullable=True)
+
+    status = db.Column(db.String(20), nullable=False, default=PENDENTE)
+    linhas_processadas = db.Column(db.Integer, nullable=False, default=0)
+    importados = db.Column(db.Integer, nullable=False, default=0)
+    erros = db.Column(db.Integer, nullable=False, default=0)
+    relatorio_erros = db.Column(db.String(255), nullable=True)
+    mensagem = db.Column(db.Text, nullable=True)
+
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    iniciado_em = db.Column(db.DateTime, nullable=True)
+    concluido_em = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "arquivo": self.arquivo_nome,
+            "status": self.status,
+            "linhas_processadas": self.linhas_processadas,
+            "importados": self.importados,
+            "erros": self.erros,
+            "mensagem": self.mensagem,
+            "criado_em": self.criado_em.isoformat() if self.criado_em else None,
+            "iniciado_em": self.iniciado_em.isoformat() if self.iniciado_em else None,
+            "concluido_em": self.concluido_em.isoformat() if self.concluido_em else None,
+        }
+
+    def __repr__(self):
+        return f"<ImportacaoUsuarios {self.id} {self.status}>"
@@ -305,3 +305,60 @@ class AlertasBI(db.Model):
     def set_canais_notificacao(self, canais):
         """Define canais a partir de lista Python"""
         self.canais_notificacao = json.dumps(canais)
+
+class FatoDiarioBI(db.Model):
+    """Fato diário de BI: totais por cliente, evento e dia.
+
+    Mantido por ``services.bi_fatos_service``; as análises de tendência leem
+    dias daqui em vez de varrer inscrições, check-ins e feedbacks.
+    """
+    __tablename__ = 'bi_fato_diario'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('cliente.id'), nullable=False)
+    evento_id = db.Column(db.Integer, db.ForeignKey('evento.id'), nullable=True)
+    dia = db.Column(db.Date, nullable=False)
+
+    inscricoes = db.Column(db.Integer, nullable=False, default=0)
+    pagamentos_aprovados = db.Column(db.Integer, nullable=False, default=0)
+    receita = db.Column(db.Float, nullable=False, default=0.0)
+    checkins = db.Column(db.Integer, nullable=False, default=0)
+    feedbacks = db.Column(db.Integer, nullable=False, default=0)
+    soma_notas = db.Column(db.Integer, nullable=False, default=0)
+
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_bi_fato_diario_cliente_dia', 'cliente_id', 'dia'),
+        # Um fato por cliente, evento e dia; evento nulo conta como 0 para conflitar
+        db.Index(
+            'uq_bi_fato_diario_cliente_evento_dia',
+            'cliente_id', text('COALESCE(evento_id, 0)'), 'dia',
+            unique=True,
+        ),
+    )
+
+    def __repr__(self):
+        return f"<FatoDiarioBI cliente={self.cliente_id} evento={self.evento_id} dia={self.dia}>"
+
+class ParticipanteMensalBI(db.Model):
+    """Meses em que cada participante se inscreveu em algo do cliente (base da retenção)"""
+    __tablename__ = 'bi_participante_mensal'
+
+    cliente_id = db.Column(db.Integer, db.ForeignKey('cliente.id'), primary_key=True)
+    mes = db.Column(db.Date, primary_key=True)  # primeiro dia do mês
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), primary_key=True)
+
+    def __repr__(self):
+        return f"<ParticipanteMensalBI cliente={self.cliente_id} mes={self.mes} usuario={self.usuario_id}>"
+
+class MarcaAtualizacaoBI(db.Model):
+    """Watermark da atualização incremental: último id processado por tabela de origem"""
+    __tablename__ = 'bi_marca_atualizacao'
+
+    fonte = db.Column(db.String(50), primary_key=True)
+    ultimo_id = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<MarcaAtualizacaoBI {self.fonte}={self.ultimo_id}>"
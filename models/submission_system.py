@@ -105,7 +105,7 @@ class DistributionConfig(db.Model):
     
     # Configurações básicas
     reviewers_per_submission = db.Column(db.Integer, default=2)
-    distribution_mode = db.Column(db.String(50), default="balanced")  # balanced | stratified | random
+    distribution_mode = db.Column(db.String(50), default="balanced")  # balanced | stratified | random | optimal
     blind_type = db.Column(db.String(20), default="single")  # single | double | open
     
     # Configurações avançadas
@@ -253,4 +253,32 @@ class SpreadsheetMapping(db.Model):
     creator = db.relationship("Usuario", backref=db.backref("created_mappings", lazy=True))
     
     def __repr__(self):
-        return f"<SpreadsheetMapping {self.name} evento={self.evento_id}>"
\ No newline at end of file
+        return f"<SpreadsheetMapping {self.name} evento={self.evento_id}>"
+
+
+class ConflictIndexEntry(db.Model):
+    """Chaves de conflito de interesse já normalizadas de uma submissão ou revisor.
+
+    ``keys`` guarda digests de e-mails, domínios, instituições e ids de autor;
+    nas entradas de revisor entram também as exclusões configuradas no perfil.
+    Revisores são identificados pelo ``usuario_id``. Mantida por
+    ``services.conflict_index``, que apaga a entrada quando a origem muda.
+    """
+
+    __tablename__ = "conflict_index_entry"
+    __table_args__ = (
+        db.UniqueConstraint("entity_type", "entity_id", name="uq_conflict_index_entity"),
+        {"extend_existing": True},
+    )
+
+    SUBMISSION = "submission"
+    REVIEWER = "reviewer"
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)  # submission | reviewer
+    entity_id = db.Column(db.Integer, nullable=False)
+    keys = db.Column(db.JSON, nullable=False, default=list)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ConflictIndexEntry {self.entity_type}={self.entity_id} keys={len(self.keys or [])}>"
\ No newline at end of file
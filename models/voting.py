@@ -240,7 +240,17 @@ class VotingResult(db.Model):
     """Resultados calculados de uma votação."""
     
     __tablename__ = "voting_result"
-    __table_args__ = {"extend_existing": True}
+    # Uma linha por (votação, categoria, trabalho): alvo do upsert da apuração
+    __table_args__ = (
+        db.Index(
+            "uq_voting_result_evento_categoria_trabalho",
+            "voting_event_id",
+            "category_id",
+            "work_id",
+            unique=True,
+        ),
+        {"extend_existing": True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     voting_event_id = db.Column(db.Integer, db.ForeignKey("voting_event.id"), nullable=False)
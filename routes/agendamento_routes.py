@@ -11,6 +11,14 @@ from werkzeug.security import generate_password_hash
 from extensions import db
 from services.mailjet_service import send_via_mailjet
 from services import pdf_service
+from services.disponibilidade_service import horarios_disponiveis as consultar_disponibilidade
+from services.planejamento_horarios_service import gerar_horarios
+from services.reserva_vagas_service import (
+    VagasInsuficientesError,
+    encerrar_agendamento,
+    liberar_vagas,
+    reservar_vagas,
+)
 from mailjet_rest.client import ApiError
 import logging
 from utils import endpoints
@@ -1907,72 +1915,31 @@ def gerar_horarios_agendamento(evento_id):
                 config=config,
             )
 
-        # Converter dias da semana do formulário (0=Domingo … 6=Sábado)
-        # para os valores usados por datetime.weekday() (0=Segunda … 6=Domingo)
-        dias_permitidos = [
-            (int(dia) + 6) % 7 for dia in config.dias_semana.split(',')
-        ]
+        # Pré-visualização: apenas contagens, nada é gravado
+        dry_run = request.form.get('acao') == 'preview'
 
-        def tem_conflito(intervalos, inicio, fim):
-            for ini_exist, fim_exist in intervalos:
-                if inicio < fim_exist and fim > ini_exist:
-                    return True
-            return False
-
-        # Gerar horários
-        data_atual = data_inicial
-        horarios_criados = 0
-
-        while data_atual <= data_final:
-            intervalos_existentes = [
-                (h.horario_inicio, h.horario_fim)
-                for h in HorarioVisitacao.query.filter_by(
-                    evento_id=evento_id, data=data_atual
-                ).all()
-            ]
-
-            if data_atual.weekday() in dias_permitidos:
-                horario_atual = datetime.combine(
-                    data_atual, config.horario_inicio
+        try:
+            resumo = gerar_horarios(
+                evento_id, config, data_inicial, data_final, dry_run=dry_run
+            )
+            if dry_run:
+                if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                    return jsonify(resumo)
+                flash(
+                    f"{resumo['criados']} horários seriam criados em {resumo['dias']} dia(s); "
+                    f"{resumo['conflitos']} conflitam com horários existentes.",
+                    'info',
                 )
-                hora_final = datetime.combine(
-                    data_atual, config.horario_fim
+                return render_template(
+                    'gerar_horarios_agendamento.html',
+                    evento=evento,
+                    config=config,
+                    preview=resumo,
                 )
 
-                while horario_atual < hora_final:
-                    horario_fim = horario_atual + timedelta(
-                        minutes=config.intervalo_minutos
-                    )
-                    if horario_fim > hora_final:
-                        horario_fim = hora_final
-
-                    if not tem_conflito(
-                        intervalos_existentes,
-                        horario_atual.time(),
-                        horario_fim.time(),
-                    ):
-                        novo_horario = HorarioVisitacao(
-                            evento_id=evento_id,
-                            data=data_atual,
-                            horario_inicio=horario_atual.time(),
-                            horario_fim=horario_fim.time(),
-                            capacidade_total=config.capacidade_padrao,
-                            vagas_disponiveis=config.capacidade_padrao,
-                        )
-                        db.session.add(novo_horario)
-                        horarios_criados += 1
-                        intervalos_existentes.append(
-                            (horario_atual.time(), horario_fim.time())
-                        )
-
-                    horario_atual = horario_fim
-
-            data_atual += timedelta(days=1)
-
-        try:
             db.session.commit()
             flash(
-                f'{horarios_criados} horários de visitação foram criados com sucesso!',
+                f"{resumo['criados']} horários de visitação foram criados com sucesso!",
                 'success',
             )
             return redirect(
@@ -2306,10 +2273,8 @@ def criar_agendamento():
                             raise ValueError(
                                 'Horário não pertence ao evento selecionado.'
                             )
-                        if quantidade > horario.vagas_disponiveis:
-                            raise ValueError(
-                                f"Não há vagas suficientes! Disponíveis: {horario.vagas_disponiveis}"
-                            )
+                        # Levanta VagasInsuficientesError (ValueError) sem saldo
+                        reservar_vagas(horario.id, quantidade)
 
                         agendamento = AgendamentoVisita(
                             horario_id=horario.id,
@@ -2332,7 +2297,6 @@ def criar_agendamento():
                             compromisso_4=True,
                             status='pendente',
                         )
-                        horario.vagas_disponiveis -= quantidade
                         db.session.add(agendamento)
                 except ValueError as exc:
                     form_erro = str(exc)
@@ -2373,48 +2337,32 @@ def criar_agendamento():
 def horarios_disponiveis():
     """
     API para obter horários disponíveis para agendamento, baseado em evento e data.
+
+    Aceita ``data`` (um dia) ou ``inicio``/``fim`` (período) e responde 304
+    quando o ``If-None-Match`` ainda corresponde aos horários atuais.
     """
-    evento_id = request.args.get('evento_id')
-    data = request.args.get('data')
+    evento_id = request.args.get('evento_id', type=int)
+    data = _data_param('data')
+    inicio = _data_param('inicio') or data
+    fim = _data_param('fim') or data
     
     # Verificar se os parâmetros foram fornecidos
-    if not evento_id or not data:
+    if not evento_id or not (inicio and fim):
         return jsonify({
             'success': False,
             'message': 'Parâmetros evento_id e data são obrigatórios'
         }), 400
     
     try:
-        # Como não sabemos a estrutura exata do seu modelo de Horario,
-        # vamos retornar dados simulados para teste
-        # Em uma implementação real, você buscaria horários do banco de dados
-        
-        # Simular alguns horários como exemplo
-        horarios_exemplo = [
-            {
-                'id': 1,
-                'horario_inicio': '08:00',
-                'horario_fim': '10:00',
-                'vagas_disponiveis': 30
-            },
-            {
-                'id': 2,
-                'horario_inicio': '10:30',
-                'horario_fim': '12:30',
-                'vagas_disponiveis': 25
-            },
-            {
-                'id': 3,
-                'horario_inicio': '14:00',
-                'horario_fim': '16:00',
-                'vagas_disponiveis': 20
-            }
-        ]
-        
-        return jsonify({
+        disponibilidade = consultar_disponibilidade(evento_id, inicio, fim)
+        if disponibilidade.etag in request.if_none_match:
+            return _nao_modificado(disponibilidade.etag)
+
+        resposta = jsonify({
             'success': True,
-            'horarios': horarios_exemplo
+            'horarios': disponibilidade.horarios
         })
+        return _com_etag(resposta, disponibilidade.etag)
         
     except Exception as e:
         return jsonify({
@@ -4724,23 +4672,21 @@ def atualizar_status_agendamento(agendamento_id):
 
     # Atualizar o status
     if novo_status:
+        # Controle automático de vagas (UPDATE condicional no horário)
+        if novo_status == 'confirmado' and status_anterior != 'confirmado' and agendamento.horario_id:
+            try:
+                reservar_vagas(agendamento.horario_id, agendamento.quantidade_alunos)
+            except VagasInsuficientesError as exc:
+                db.session.rollback()
+                if request.method == 'POST' and not request.is_json:
+                    flash(str(exc), 'danger')
+                    return redirect(url_for('agendamento_routes.listar_agendamentos'))
+                return jsonify({"erro": str(exc)}), 409
+        elif novo_status in ['cancelado', 'recusado'] and status_anterior not in ['cancelado', 'recusado']:
+            # Restaurar vagas ao cancelar ou recusar (uma única vez)
+            encerrar_agendamento(agendamento, novo_status)
+
         agendamento.status = novo_status
-        
-        # Controle automático de vagas
-        horario = agendamento.horario
-        if horario:
-            if novo_status == 'confirmado' and status_anterior != 'confirmado':
-                # Reduzir vagas disponíveis ao confirmar
-                horario.vagas_disponiveis = max(
-                    horario.vagas_disponiveis - agendamento.quantidade_alunos,
-                    0
-                )
-            elif novo_status in ['cancelado', 'recusado'] and status_anterior not in ['cancelado', 'recusado']:
-                # Restaurar vagas ao cancelar ou recusar
-                horario.vagas_disponiveis = min(
-                    horario.vagas_disponiveis + agendamento.quantidade_alunos,
-                    horario.capacidade_total,
-                )
 
         # Atualizar campos específicos por status
         if novo_status in ['cancelado', 'recusado']:
@@ -5331,11 +5277,6 @@ def agendar_visita(horario_id):
             flash('Quantidade de alunos inválida.', 'danger')
             return redirect(url_for('agendamento_routes.agendar_visita', horario_id=horario_id))
 
-        # Validar vagas disponíveis
-        if quantidade_alunos > horario.vagas_disponiveis:
-            flash('Quantidade de alunos excede vagas disponíveis.', 'danger')
-            return redirect(url_for('agendamento_routes.agendar_visita', horario_id=horario_id))
-
         # Validar usuário/cliente
         professor_id = None
         cliente_id = None
@@ -5373,15 +5314,17 @@ def agendar_visita(horario_id):
             municipio=cidade,
         )
 
-        # Reduzir vagas disponíveis
-        horario.vagas_disponiveis -= quantidade_alunos
-
         try:
+            # Reserva atômica: falha se outro agendamento levou as vagas
+            reservar_vagas(horario.id, quantidade_alunos)
             db.session.add(novo_agendamento)
-            db.session.add(horario)
             db.session.commit()
             flash('Agendamento realizado com sucesso!', 'success')
             return redirect(url_for('dashboard_participante_routes.dashboard_participante'))
+        except VagasInsuficientesError:
+            db.session.rollback()
+            flash('Quantidade de alunos excede vagas disponíveis.', 'danger')
+            return redirect(url_for('agendamento_routes.agendar_visita', horario_id=horario_id))
         except Exception as e:
             db.session.rollback()
             flash(f'Erro ao agendar: {str(e)}', 'danger')
@@ -5676,11 +5619,7 @@ def cancelar_agendamento(agendamento_id):
         flash('Você não tem permissão para cancelar este agendamento.', 'danger')
         return redirect(url_for(endpoints.DASHBOARD))
 
-    agendamento.status = 'cancelado'
-    agendamento.data_cancelamento = datetime.utcnow()
-
-    horario = agendamento.horario
-    horario.vagas_disponiveis += agendamento.quantidade_alunos
+    encerrar_agendamento(agendamento)
 
     try:
         db.session.commit()
@@ -5912,15 +5851,16 @@ def aprovar_agendamento_cliente(agendamento_id):
         flash('Este agendamento não está pendente de aprovação!', 'warning')
         return redirect(url_for('agendamento_routes.meus_agendamentos_cliente'))
 
-    horario = agendamento.horario
-    if horario.vagas_disponiveis < agendamento.quantidade_alunos:
+    try:
+        reservar_vagas(agendamento.horario_id, agendamento.quantidade_alunos)
+    except VagasInsuficientesError:
+        db.session.rollback()
         flash('Não há vagas suficientes para confirmar este agendamento.', 'danger')
         return redirect(url_for('agendamento_routes.meus_agendamentos_cliente'))
 
     try:
         agendamento.status = 'confirmado'
         agendamento.data_confirmacao = datetime.utcnow()
-        horario.vagas_disponiveis -= agendamento.quantidade_alunos
         db.session.commit()
         NotificacaoAgendamentoService.enviar_email_confirmacao(agendamento)
         flash('Agendamento aprovado com sucesso!', 'success')
@@ -5968,7 +5908,7 @@ def remover_aluno_cliente(agendamento_id, aluno_id):
 
         # Atualizar quantidade de alunos e vagas disponíveis
         agendamento.quantidade_alunos -= 1
-        agendamento.horario.vagas_disponiveis += 1
+        liberar_vagas(agendamento.horario_id, 1)
 
         db.session.commit()
 
@@ -6002,13 +5942,8 @@ def negar_agendamento_cliente(agendamento_id):
         return redirect(url_for('agendamento_routes.meus_agendamentos_cliente'))
 
     try:
-        # Cancelar agendamento e liberar vagas
-        agendamento.status = 'cancelado'
-        agendamento.data_cancelamento = datetime.utcnow()
-        
-        # Liberar vagas no horário
-        if agendamento.horario:
-            agendamento.horario.vagas_disponiveis += agendamento.quantidade_alunos
+        # Cancelar agendamento e liberar vagas no horário
+        encerrar_agendamento(agendamento)
         
         db.session.commit()
         flash('Agendamento negado com sucesso!', 'success')
@@ -6059,8 +5994,11 @@ def adicionar_alunos_cliente(agendamento_id):
                 flash('Tipo e descrição da necessidade especial são obrigatórios quando marcado!', 'danger')
                 return redirect(url_for('agendamento_routes.adicionar_alunos_cliente', agendamento_id=agendamento_id))
             
-            # Verificar se ainda há vagas disponíveis
-            if agendamento.horario.vagas_disponiveis <= 0:
+            # Reservar a vaga do novo aluno (falha se o horário lotou)
+            try:
+                reservar_vagas(agendamento.horario_id, 1)
+            except VagasInsuficientesError:
+                db.session.rollback()
                 flash('Não há mais vagas disponíveis para este horário!', 'warning')
                 return redirect(url_for('agendamento_routes.adicionar_alunos_cliente', agendamento_id=agendamento_id))
             
@@ -6086,7 +6024,6 @@ def adicionar_alunos_cliente(agendamento_id):
             
             # Atualizar contadores
             agendamento.quantidade_alunos += 1
-            agendamento.horario.vagas_disponiveis -= 1
             
             db.session.commit()
             flash('Aluno adicionado com sucesso!', 'success')
@@ -6158,10 +6095,8 @@ def processar_lote_agendamentos():
                         contador_erro += 1
                 elif acao == 'cancelar':
                     if agendamento.status in ['pendente', 'confirmado']:
-                        agendamento.status = 'cancelado'
-                        # Liberar vagas
-                        if agendamento.horario:
-                            agendamento.horario.vagas_disponiveis += agendamento.quantidade_alunos
+                        # Cancela e libera vagas
+                        encerrar_agendamento(agendamento)
                         contador_sucesso += 1
                     else:
                         contador_erro += 1
@@ -6243,12 +6178,8 @@ def cancelar_agendamento_professor(agendamento_id):
             flash(f'Atenção! Cancelamento fora do prazo. Você ficará bloqueado por {config.tempo_bloqueio} dias para novos agendamentos neste evento.', 'warning')
     
     if request.method == 'POST':
-        # Restaurar vagas
-        horario.vagas_disponiveis += agendamento.quantidade_alunos
-        
-        # Cancelar agendamento
-        agendamento.status = 'cancelado'
-        agendamento.data_cancelamento = datetime.utcnow()
+        # Cancelar agendamento e restaurar vagas
+        encerrar_agendamento(agendamento)
         
         try:
             db.session.commit()
@@ -6289,9 +6220,7 @@ def cancelar_agendamento_participante(agendamento_id):
     horario = agendamento.horario
 
     if request.method == 'POST':
-        horario.vagas_disponiveis += agendamento.quantidade_alunos
-        agendamento.status = 'cancelado'
-        agendamento.data_cancelamento = datetime.utcnow()
+        encerrar_agendamento(agendamento)
         try:
             db.session.commit()
             flash('Agendamento cancelado com sucesso!', 'success')
@@ -6349,9 +6278,7 @@ def cancelar_agendamento_cliente(agendamento_id):
             flash('Cancelamento fora do prazo estabelecido!', 'warning')
 
     if request.method == 'POST':
-        horario.vagas_disponiveis += agendamento.quantidade_alunos
-        agendamento.status = 'cancelado'
-        agendamento.data_cancelamento = datetime.utcnow()
+        encerrar_agendamento(agendamento)
         try:
             db.session.commit()
             flash('Agendamento cancelado com sucesso!', 'success')
@@ -6509,23 +6436,50 @@ def horarios_disponiveis_api():
     if bloqueio:
         return jsonify({"error": "Você não tem permissão para visualizar este evento"}), 403
 
-    horarios = HorarioVisitacao.query.filter(
-        HorarioVisitacao.evento_id == evento_id,
-        HorarioVisitacao.vagas_disponiveis > 0
-    ).all()
+    # Janela pedida pelo calendário (FullCalendar envia start/end);
+    # sem parâmetros, os próximos 90 dias
+    inicio = _data_param('start') or _data_param('inicio') or date.today()
+    fim = _data_param('end') or _data_param('fim') or inicio + timedelta(days=90)
 
-    eventos = []
+    disponibilidade = consultar_disponibilidade(evento_id, inicio, fim)
+    if disponibilidade.etag in request.if_none_match:
+        return _nao_modificado(disponibilidade.etag)
+
+    # Monta a URL uma vez e só troca o id em cada horário
+    url_base = url_for('agendamento_routes.agendar_visita', horario_id=0).rsplit('/', 1)[0]
+    eventos = [
+        {
+            "id": horario["id"],
+            "title": f"Disponível ({horario['vagas_disponiveis']} vagas)",
+            "start": f"{horario['data']}T{horario['horario_inicio']}:00",
+            "end": f"{horario['data']}T{horario['horario_fim']}:00",
+            "url": f"{url_base}/{horario['id']}",
+        }
+        for horario in disponibilidade.horarios
+    ]
+
+    return _com_etag(jsonify(eventos), disponibilidade.etag)
+
+
+def _data_param(nome):
+    """Lê um parâmetro de data (``YYYY-MM-DD`` ou ISO com horário) da query string."""
+    valor = (request.args.get(nome) or '').strip()
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor[:10])
+    except ValueError:
+        return None
+
+
+def _com_etag(resposta, etag):
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    return resposta
 
-    for horario in horarios:
-        eventos.append({
-            "id": horario.id,
-            "title": f"Disponível ({horario.vagas_disponiveis} vagas)",
-            "start": f"{horario.data}T{horario.horario_inicio}",
-            "end": f"{horario.data}T{horario.horario_fim}",
-            "url": url_for('agendamento_routes.agendar_visita', horario_id=horario.id)
-        })
 
-    return jsonify(eventos)
+def _nao_modificado(etag):
+    return _com_etag(Response(status=304), etag)
 @agendamento_routes.route("/importar_oficinas", methods=["POST"])
 @login_required
 def importar_oficinas():
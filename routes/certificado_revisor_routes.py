@@ -35,6 +35,7 @@ from models import (
     RespostaFormulario,
 )
 from services.pdf_service import gerar_certificado_revisor_pdf
+from services.email_outbox_service import enfileirar_mensagem
 from services.email_service import EmailService
 from utils.auth import cliente_required, admin_required
 from utils import endpoints
@@ -494,18 +495,14 @@ def enviar_email_certificado_revisor(certificado_id):
         if not certificado.arquivo_path or not os.path.exists(certificado.arquivo_path):
             pdf_path = gerar_certificado_revisor_pdf(certificado)
             certificado.arquivo_path = pdf_path
-            db.session.commit()
-        
-        # Enviar email
-        email_service = EmailService()
-        sucesso = email_service.enviar_certificado_revisor(certificado)
         
-        if sucesso:
-            flash('Certificado enviado por email com sucesso!', 'success')
-        else:
-            flash('Erro ao enviar email. Tente novamente.', 'danger')
+        # Enfileira o email junto com o caminho do PDF
+        _enfileirar_certificado(certificado)
+        db.session.commit()
+        flash('Certificado enviado por email com sucesso!', 'success')
             
     except Exception as e:
+        db.session.rollback()
         current_app.logger.error(f"Erro ao enviar email do certificado: {e}")
         flash('Erro ao enviar email. Tente novamente.', 'danger')
     
@@ -534,8 +531,6 @@ def enviar_todos_certificados_email(evento_id):
     enviados = 0
     erros = 0
     
-    email_service = EmailService()
-    
     for certificado in certificados:
         try:
             # Gerar PDF se não existir
@@ -543,12 +538,8 @@ def enviar_todos_certificados_email(evento_id):
                 pdf_path = gerar_certificado_revisor_pdf(certificado)
                 certificado.arquivo_path = pdf_path
             
-            # Enviar email
-            sucesso = email_service.enviar_certificado_revisor(certificado)
-            if sucesso:
-                enviados += 1
-            else:
-                erros += 1
+            _enfileirar_certificado(certificado)
+            enviados += 1
                 
         except Exception as e:
             current_app.logger.error(f"Erro ao enviar email do certificado {certificado.id}: {e}")
@@ -758,6 +749,22 @@ def debug_certificado_revisor(evento_id):
 
 # Funções auxiliares
 
+def _enfileirar_certificado(certificado):
+    """Grava o email do certificado na outbox; o PDF é lido só no envio."""
+    anexos = None
+    if certificado.arquivo_path and os.path.exists(certificado.arquivo_path):
+        anexos = [{
+            "path": certificado.arquivo_path,
+            "filename": f"certificado_revisor_{certificado.revisor.nome.replace(' ', '_')}.pdf",
+        }]
+    else:
+        current_app.logger.warning(f"Arquivo de certificado não encontrado: {certificado.arquivo_path}")
+    return enfileirar_mensagem(
+        **EmailService.mensagem_certificado_revisor(certificado),
+        attachments=anexos,
+    )
+
+
 def _get_revisores_aprovados(evento_id):
     """Busca revisores aprovados para um evento."""
     from models.review import revisor_process_evento_association
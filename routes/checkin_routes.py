@@ -10,10 +10,9 @@ from flask import (
 )
 from flask_login import login_required, current_user
 from extensions import db, socketio
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 from utils import endpoints
-from sqlalchemy import tuple_
 
 
 logger = logging.getLogger(__name__)
@@ -29,6 +28,20 @@ from models import (
 )
 from models.atividade_multipla_data import AtividadeMultiplaData, AtividadeData, CheckinAtividade, FrequenciaAtividade
 from utils import formatar_brasilia, determinar_turno
+from services.checkin_service import (
+    aquecer_cache_evento,
+    carregar_inscricoes_lote,
+    contar_checkins_lote,
+    estatisticas_latencia,
+    planejar_checkins_lote,
+    processar_leitura_qr,
+    registrar_checkins_lote,
+    feed_checkins,
+    invalidar_feed,
+    remover_checkins_lote,
+    sincronizar_leituras,
+    MAX_LEITURAS_LOTE,
+)
 from .agendamento_routes import agendamento_routes  # Needed for URL generation  # noqa: F401
 
 logger = logging.getLogger(__name__)
@@ -259,89 +272,47 @@ def checkins_lote():
         flash('Selecione um turno válido para deletar check-ins.', 'warning')
         return redirect(request.referrer or url_for('inscricao_routes.gerenciar_inscricoes'))
 
-    inscricoes = []
+    inscricao_ids = oficina_ids = None
     if escopo == 'selecionados':
         inscricao_ids = request.form.getlist('inscricao_ids')
         if not inscricao_ids:
             flash('Selecione ao menos uma inscrição.', 'warning')
             return redirect(request.referrer or url_for('inscricao_routes.gerenciar_inscricoes'))
-        inscricoes = (
-            Inscricao.query
-            .join(Oficina, Inscricao.oficina_id == Oficina.id)
-            .filter(
-                Inscricao.id.in_(inscricao_ids),
-                Oficina.cliente_id == current_user.id
-            )
-            .all()
-        )
     else:
         oficina_ids = request.form.getlist('oficina_ids')
         if not oficina_ids:
             flash('Selecione ao menos uma oficina.', 'warning')
             return redirect(request.referrer or url_for('inscricao_routes.gerenciar_inscricoes'))
-        inscricoes = (
-            Inscricao.query
-            .join(Oficina, Inscricao.oficina_id == Oficina.id)
-            .filter(
-                Inscricao.oficina_id.in_(oficina_ids),
-                Oficina.cliente_id == current_user.id
-            )
-            .all()
-        )
+
+    inscricoes = carregar_inscricoes_lote(
+        current_user.id, inscricao_ids=inscricao_ids, oficina_ids=oficina_ids
+    )
+    xhr = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
     if not inscricoes:
+        if xhr:
+            return jsonify({'success': True, 'criados': 0, 'ignorados': 0, 'removidos': 0})
         flash('Nenhuma inscrição encontrada para os filtros escolhidos.', 'info')
         return redirect(request.referrer or url_for('inscricao_routes.gerenciar_inscricoes'))
 
     if acao == 'registrar':
-        total_criados = 0
-        total_ignorados = 0
-        for insc in inscricoes:
-            oficina = insc.oficina
-            for t in turnos:
-                existente = Checkin.query.filter_by(
-                    usuario_id=insc.usuario_id,
-                    oficina_id=insc.oficina_id,
-                    turno=t,
-                ).first()
-                if existente:
-                    total_ignorados += 1
-                    continue
-                novo = Checkin(
-                    usuario_id=insc.usuario_id,
-                    oficina_id=insc.oficina_id,
-                    palavra_chave=f"manual-{t}",
-                    cliente_id=oficina.cliente_id if oficina else current_user.id,
-                    evento_id=oficina.evento_id if oficina else None,
-                    turno=t,
-                    data_hora=data_hora,
-                )
-                db.session.add(novo)
-                total_criados += 1
-
+        totais = registrar_checkins_lote(inscricoes, turnos, data_hora)
         db.session.commit()
+        if xhr:
+            return jsonify({'success': True, **totais})
         flash(
-            f"Check-ins registrados: {total_criados}. Ignorados: {total_ignorados}.",
+            f"Check-ins registrados: {totais['criados']}. Ignorados: {totais['ignorados']}.",
             "success",
         )
         return redirect(request.referrer or url_for('inscricao_routes.gerenciar_inscricoes'))
 
-    total_removidos = 0
-    for insc in inscricoes:
-        query = Checkin.query.filter_by(
-            usuario_id=insc.usuario_id,
-            oficina_id=insc.oficina_id,
-        )
-        # Para deletar, se "todos", remove inclusive check-ins sem turno (QR/manual antigo)
-        if turno and turno != 'todos':
-            query = query.filter(Checkin.turno.in_(turnos))
-        if data_hora:
-            inicio = data_hora.replace(second=0, microsecond=0)
-            fim = inicio + timedelta(minutes=1)
-            query = query.filter(Checkin.data_hora >= inicio, Checkin.data_hora < fim)
-        total_removidos += query.delete(synchronize_session=False)
+    turnos_remocao = turnos if turno and turno != 'todos' else None
+    total_removidos = remover_checkins_lote(inscricoes, turnos_remocao, data_hora)
 
     db.session.commit()
+    invalidar_feed(current_user.id)
+    if xhr:
+        return jsonify({'success': True, 'removidos': total_removidos})
     if total_removidos:
         flash(f"Check-ins removidos: {total_removidos}.", "success")
     else:
@@ -369,51 +340,34 @@ def checkins_lote_preview():
         except ValueError:
             return jsonify({'success': False, 'message': 'Data/Hora inválida.'}), 400
 
-    inscricoes = []
+    inscricao_ids = oficina_ids = None
     if escopo == 'selecionados':
         inscricao_ids = request.form.getlist('inscricao_ids')
         if not inscricao_ids:
             return jsonify({'success': False, 'message': 'Selecione ao menos uma inscrição.'}), 400
-        inscricoes = (
-            Inscricao.query
-            .join(Oficina, Inscricao.oficina_id == Oficina.id)
-            .filter(
-                Inscricao.id.in_(inscricao_ids),
-                Oficina.cliente_id == current_user.id
-            )
-            .all()
-        )
     elif escopo == 'oficinas':
         oficina_ids = request.form.getlist('oficina_ids')
         if not oficina_ids:
             return jsonify({'success': False, 'message': 'Selecione ao menos uma oficina.'}), 400
-        inscricoes = (
-            Inscricao.query
-            .join(Oficina, Inscricao.oficina_id == Oficina.id)
-            .filter(
-                Inscricao.oficina_id.in_(oficina_ids),
-                Oficina.cliente_id == current_user.id
-            )
-            .all()
-        )
     else:
         return jsonify({'success': False, 'message': 'Selecione o escopo da ação.'}), 400
 
+    inscricoes = carregar_inscricoes_lote(
+        current_user.id, inscricao_ids=inscricao_ids, oficina_ids=oficina_ids
+    )
     if not inscricoes:
-        return jsonify({'success': True, 'count': 0})
-
-    pares = {(i.usuario_id, i.oficina_id) for i in inscricoes}
-    query = Checkin.query.filter(tuple_(Checkin.usuario_id, Checkin.oficina_id).in_(list(pares)))
+        return jsonify({'success': True, 'count': 0, 'a_registrar': 0, 'ja_registrados': 0})
 
-    if turno and turno != 'todos':
-        query = query.filter(Checkin.turno.in_(turnos))
-    if data_hora:
-        inicio = data_hora.replace(second=0, microsecond=0)
-        fim = inicio + timedelta(minutes=1)
-        query = query.filter(Checkin.data_hora >= inicio, Checkin.data_hora < fim)
+    turnos_remocao = turnos if turno and turno != 'todos' else None
+    resposta = {
+        'success': True,
+        'count': contar_checkins_lote(inscricoes, turnos_remocao, data_hora),
+    }
+    if turnos:
+        faltantes, ignorados = planejar_checkins_lote(inscricoes, turnos)
+        resposta.update(a_registrar=len(faltantes), ja_registrados=ignorados)
+    return jsonify(resposta)
 
-    return jsonify({'success': True, 'count': query.count()})
-
 @checkin_routes.route('/checkin/<int:oficina_id>', methods=['GET', 'POST'])
 @login_required
 def checkin(oficina_id):
@@ -577,68 +531,64 @@ def leitor_checkin_json():
         return jsonify(status='error',
                        message='Token não fornecido!'), 400
 
-    # procura a inscrição pelo token
-    inscricao = Inscricao.query.filter_by(qr_code_token=token).first()
-    if not inscricao:
-        return jsonify(status='error',
-                       message='Inscrição não encontrada.'), 404
+    # token → inscrição/oficina/evento em uma consulta; insert idempotente
+    resultado = processar_leitura_qr(token, current_user.id)
+    if resultado.status != 'success':
+        return jsonify(**resultado.to_dict()), resultado.http_status
 
-    if inscricao.cliente_id != current_user.id:
-        return jsonify(status='error',
-                       message='Esta inscrição não pertence a um evento ou atividade sua!'), 403
+    db.session.commit()
 
-    cliente_id = inscricao.oficina.cliente_id if inscricao.oficina_id else inscricao.cliente_id
-    sala_cliente = f"cliente_{cliente_id}"     # sala usada no Socket.IO
+    # emite apenas para quem estiver na sala do cliente
+    socketio.emit('novo_checkin', resultado.payload,
+                  namespace='/checkins', room=f"cliente_{resultado.cliente_id}")
 
-    # ---------- OFICINA ----------
-    if inscricao.oficina_id:
-        if Checkin.query.filter_by(usuario_id=inscricao.usuario_id,
-                                   oficina_id=inscricao.oficina_id).first():
-            return jsonify(status='warning',
-                           message='Check‑in da oficina já foi realizado!')
-
-        novo = Checkin(usuario_id = inscricao.usuario_id,
-                       oficina_id = inscricao.oficina_id,
-                       evento_id  = inscricao.oficina.evento_id,
-                       cliente_id = cliente_id,          # ★ grava aqui
-                       palavra_chave = "QR-OFICINA")
-    # ---------- EVENTO ----------
-    elif inscricao.evento_id:
-        # evita duplicidade
-        if Checkin.query.filter_by(usuario_id=inscricao.usuario_id,
-                                   evento_id=inscricao.evento_id).first():
-            return jsonify(status='warning',
-                           message='Check‑in do evento já foi realizado!')
-
-        novo = Checkin(usuario_id = inscricao.usuario_id,
-                       evento_id  = inscricao.evento_id,
-                       cliente_id = cliente_id,          # ★ grava aqui
-                       palavra_chave = "QR-EVENTO")
-    else:
+    return jsonify(**resultado.to_dict())
+
+
+@checkin_routes.route('/leitor_checkin_json/lote', methods=['POST'])
+@login_required
+def leitor_checkin_lote():
+    """
+    Sincroniza as leituras que o leitor acumulou offline.
+
+    Espera ``{"leituras": [{"token", "scanned_at", "device_id"}, ...]}``,
+    grava tudo em uma transação e devolve o resultado de cada leitura.
+    Os novos check-ins saem em um único ``novo_checkin`` por sala.
+    """
+    data = request.get_json(silent=True) or {}
+    leituras = data.get('leituras') if isinstance(data, dict) else data
+    if not isinstance(leituras, list) or not leituras:
+        return jsonify(status='error',
+                       message='Nenhuma leitura enviada!'), 400
+    if len(leituras) > MAX_LEITURAS_LOTE:
         return jsonify(status='error',
-                       message='Inscrição sem evento ou oficina.'), 400
+                       message=f'Envie no máximo {MAX_LEITURAS_LOTE} leituras por vez.'), 413
 
-    db.session.add(novo)
-    db.session.commit()
+    try:
+        resultados, novos_por_cliente = sincronizar_leituras(leituras, current_user.id)
+    except Exception:
+        logger.exception("Erro ao sincronizar leituras offline")
+        return jsonify(status='error',
+                       message='Erro ao sincronizar as leituras.'), 500
 
-    # prepara carga para front‑end
-    payload = {
-        'participante': inscricao.usuario.nome,
-        'data_hora'   : novo.data_hora.strftime('%d/%m/%Y %H:%M:%S'),
-        'turno'       : determinar_turno(novo.data_hora)
-    }
-    if novo.evento_id:
-        payload['evento'] = inscricao.evento.nome
-    else:
-        payload['oficina'] = inscricao.oficina.titulo
+    for cliente_id, checkins in novos_por_cliente.items():
+        socketio.emit('novo_checkin', {'checkins': checkins},
+                      namespace='/checkins', room=f"cliente_{cliente_id}")
+
+    return jsonify(
+        status='success',
+        resultados=resultados,
+        criados=sum(len(c) for c in novos_por_cliente.values()),
+    )
 
-    # emite apenas para quem estiver na sala do cliente
-    socketio.emit('novo_checkin', payload,
-                  namespace='/checkins', room=sala_cliente)
 
-    return jsonify(status='success',
-                   message='Check‑in realizado com sucesso!',
-                   **payload)
+@checkin_routes.route('/leitor_checkin_json/metricas', methods=['GET'])
+@login_required
+def leitor_checkin_metricas():
+    """Latência (p50/p99) das últimas leituras de QR Code neste processo."""
+    if current_user.tipo not in ('admin', 'cliente'):
+        return jsonify(status='error', message='Acesso negado!'), 403
+    return jsonify(status='success', **estatisticas_latencia())
 
 
 
@@ -698,58 +648,48 @@ def lista_checkins_json():
     """
     Retorna os últimos check‑ins do cliente logado em formato JSON.
     Identifica se o check‑in é de evento ou de oficina.
-    """
-    from sqlalchemy import or_
 
-    base_query = Checkin.query.outerjoin(Checkin.oficina).outerjoin(Checkin.usuario)
-
-    if current_user.is_cliente():
-        base_query = base_query.filter(
-            or_(
-                Usuario.cliente_id == current_user.id,
-                Oficina.cliente_id == current_user.id,
-                Checkin.cliente_id == current_user.id,
-            )
-        )
-
-    checkins = (
-        base_query
-        .order_by(Checkin.data_hora.desc())
-        .limit(50)
-        .all()
-    )
+    Com ``?since_id=`` devolve apenas os check‑ins posteriores ao cursor;
+    ``cursor`` na resposta é o valor a enviar no próximo poll.
+    """
+    since_id = request.args.get('since_id', type=int)
+    cliente_id = current_user.id if current_user.is_cliente() else None
+    itens, cursor = feed_checkins(cliente_id, since_id=since_id)
 
     resultado = []
-    for c in checkins:
-        data_formatada = formatar_brasilia(c.data_hora)
-        turno = determinar_turno(c.data_hora)
+    for c in itens:
+        data_formatada = formatar_brasilia(c['data_hora'])
+        turno = determinar_turno(c['data_hora'])
 
-        if c.oficina_id:
+        if c['oficina_id']:
             resultado.append({
-                'participante': c.usuario.nome,
-                'oficina'     : c.oficina.titulo if c.oficina else "Oficina Desconhecida",
+                'id'          : c['id'],
+                'participante': c['participante'],
+                'oficina'     : c['oficina'] or "Oficina Desconhecida",
                 'data_hora'   : data_formatada,
                 'turno'       : turno,
                 'tipo_checkin': 'oficina'
             })
-        elif c.evento_id:
+        elif c['evento_id']:
             resultado.append({
-                'participante': c.usuario.nome,
-                'evento'      : c.evento.nome if c.evento else "Evento Desconhecido",
+                'id'          : c['id'],
+                'participante': c['participante'],
+                'evento'      : c['evento'] or "Evento Desconhecido",
                 'data_hora'   : data_formatada,
                 'turno'       : turno,
                 'tipo_checkin': 'evento'
             })
         else:
             resultado.append({
-                'participante': c.usuario.nome,
+                'id'          : c['id'],
+                'participante': c['participante'],
                 'atividade'   : "N/A",
                 'data_hora'   : data_formatada,
                 'turno'       : turno,
                 'tipo_checkin': 'nenhum'
             })
 
-    return jsonify(status='success', checkins=resultado)
+    return jsonify(status='success', checkins=resultado, cursor=cursor)
 
 
 @checkin_routes.route('/fazer_checkin/<int:agendamento_id>')
@@ -883,6 +823,13 @@ def admin_scan():
         flash('Acesso negado!', 'danger')
         return redirect(url_for(endpoints.DASHBOARD))
 
+    # Pré-carrega os tokens do evento para que as leituras não consultem o banco
+    evento_id = request.args.get('evento_id', type=int)
+    if evento_id:
+        evento = Evento.query.get(evento_id)
+        if evento and (current_user.tipo == 'admin' or evento.cliente_id == current_user.id):
+            aquecer_cache_evento(evento_id)
+
     return render_template('checkin/scan_qr.html')
 
 
@@ -18,7 +18,7 @@ from utils.barema import normalize_barema_requisitos
 from collections import defaultdict
 
 logger = logging.getLogger(__name__)
-from sqlalchemy import func, and_, or_, desc
+from sqlalchemy import func, and_, desc
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
@@ -46,6 +46,7 @@ from models.avaliacao import AvaliacaoBarema, AvaliacaoCriterio
 from models.event import RespostaFormulario
 from models.review import Submission, Assignment
 from routes.revisor_routes import resolve_categoria_trabalho
+from services import dashboard_stats_service
 
 # Modelos opcionais usados no dashboard de agendamentos. Em alguns ambientes
 # eles podem não estar disponíveis (por exemplo, em testes ou em instalações
@@ -136,148 +137,34 @@ def dashboard_cliente():
             # sem_inscricao não soma vagas
         data['total_vagas'] = total_vagas
 
-        total_inscricoes = Inscricao.query.join(Oficina).filter(
-            (Oficina.cliente_id == current_user.id) | (Oficina.cliente_id.is_(None))
-        ).count()
-        data['total_inscricoes'] = total_inscricoes
+        estatisticas = dashboard_stats_service.estatisticas_cliente(current_user.id)
+        data.update(estatisticas)
+        total_inscricoes = estatisticas['total_inscricoes']
         percentual_adesao = (
             (total_inscricoes / total_vagas) * 100 if total_vagas > 0 else 0
         )
         data['percentual_adesao'] = min(100, percentual_adesao)
 
-        checkins_via_qr = (
-            Checkin.query
-            .outerjoin(Checkin.oficina)
-            .outerjoin(Checkin.usuario)
-            .filter(
-                Checkin.palavra_chave.in_(['QR-AUTO', 'QR-EVENTO', 'QR-OFICINA']),
-                or_(
-                    Usuario.cliente_id == current_user.id,
-                    Oficina.cliente_id == current_user.id,
-                    Checkin.cliente_id == current_user.id,
-                ),
-            )
-            .order_by(Checkin.data_hora.desc())
-            .all()
+        # Listas paginadas; as páginas seguintes vêm de
+        # /dashboard_cliente/checkins_qr e /dashboard_cliente/inscritos
+        pagina_checkins = dashboard_stats_service.paginar_checkins_qr(
+            current_user.id, request.args.get('pagina_checkins', 1, type=int)
         )
-        data['checkins_via_qr'] = checkins_via_qr
-
-        inscritos = Inscricao.query.filter(
-            (Inscricao.cliente_id == current_user.id)
-            | (Inscricao.cliente_id.is_(None))
-        ).all()
-        data['inscritos'] = inscritos
-
-        eventos_ativos = Evento.query.filter_by(cliente_id=current_user.id).all()
-        data['eventos_ativos'] = eventos_ativos
-        data['total_eventos'] = len(eventos_ativos)
-
-        agendamentos_totais = db.session.query(
-            func.count(AgendamentoVisita.id)
-        ).join(
-            HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-        ).join(
-            Evento, HorarioVisitacao.evento_id == Evento.id
-        ).filter(
-            Evento.cliente_id == current_user.id
-        ).scalar() or 0
-        data['agendamentos_totais'] = agendamentos_totais
+        data['checkins_via_qr'] = pagina_checkins.items
+        data['checkins_via_qr_paginacao'] = pagina_checkins
 
-        agendamentos_confirmados = db.session.query(
-            func.count(AgendamentoVisita.id)
-        ).join(
-            HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-        ).join(
-            Evento, HorarioVisitacao.evento_id == Evento.id
-        ).filter(
-            Evento.cliente_id == current_user.id,
-            AgendamentoVisita.status == 'confirmado',
-        ).scalar() or 0
-        data['agendamentos_confirmados'] = agendamentos_confirmados
+        pagina_inscritos = dashboard_stats_service.paginar_inscritos(
+            current_user.id, request.args.get('pagina_inscritos', 1, type=int)
+        )
+        data['inscritos'] = pagina_inscritos.items
+        data['inscritos_paginacao'] = pagina_inscritos
 
-        agendamentos_realizados = db.session.query(
-            func.count(AgendamentoVisita.id)
-        ).join(
-            HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-        ).join(
-            Evento, HorarioVisitacao.evento_id == Evento.id
-        ).filter(
-            Evento.cliente_id == current_user.id,
-            AgendamentoVisita.status == 'realizado',
-        ).scalar() or 0
-        data['agendamentos_realizados'] = agendamentos_realizados
-
-        agendamentos_cancelados = db.session.query(
-            func.count(AgendamentoVisita.id)
-        ).join(
-            HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-        ).join(
-            Evento, HorarioVisitacao.evento_id == Evento.id
-        ).filter(
-            Evento.cliente_id == current_user.id,
-            AgendamentoVisita.status == 'cancelado',
-        ).scalar() or 0
-        data['agendamentos_cancelados'] = agendamentos_cancelados
-
-        total_visitantes = db.session.query(
-            func.sum(AgendamentoVisita.quantidade_alunos)
-        ).join(
-            HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-        ).join(
-            Evento, HorarioVisitacao.evento_id == Evento.id
-        ).filter(
-            Evento.cliente_id == current_user.id,
-            AgendamentoVisita.status.in_(['confirmado', 'realizado']),
-        ).scalar() or 0
-        data['total_visitantes'] = total_visitantes
+        data['eventos_ativos'] = eventos
+        data['total_eventos'] = len(eventos)
 
         hoje = datetime.utcnow().date()
-        agendamentos_hoje = AgendamentoVisita.query.join(
-            HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-        ).join(
-            Evento, HorarioVisitacao.evento_id == Evento.id
-        ).filter(
-            Evento.cliente_id == current_user.id,
-            HorarioVisitacao.data == hoje,
-            AgendamentoVisita.status.in_(['pendente', 'confirmado']),
-        ).order_by(
-            HorarioVisitacao.horario_inicio
-        ).all()
-        data['agendamentos_hoje'] = agendamentos_hoje
-
-        data_limite = hoje + timedelta(days=7)
-        proximos_agendamentos = AgendamentoVisita.query.join(
-            HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-        ).join(
-            Evento, HorarioVisitacao.evento_id == Evento.id
-        ).filter(
-            Evento.cliente_id == current_user.id,
-            HorarioVisitacao.data > hoje,
-            HorarioVisitacao.data <= data_limite,
-            AgendamentoVisita.status.in_(['pendente', 'confirmado']),
-        ).order_by(
-            HorarioVisitacao.data,
-            HorarioVisitacao.horario_inicio,
-        ).limit(5).all()
-        data['proximos_agendamentos'] = proximos_agendamentos
-
-        ocupacao_query = db.session.query(
-            func.sum(
-                HorarioVisitacao.capacidade_total - HorarioVisitacao.vagas_disponiveis
-            ).label('ocupadas'),
-            func.sum(HorarioVisitacao.capacidade_total).label('total'),
-        ).join(
-            Evento, HorarioVisitacao.evento_id == Evento.id
-        ).filter(
-            Evento.cliente_id == current_user.id,
-            HorarioVisitacao.data >= hoje,
-        ).first()
-        if (
-            ocupacao_query and ocupacao_query.total and ocupacao_query.total > 0
-        ):
-            data['ocupacao_media'] = (
-                ocupacao_query.ocupadas / ocupacao_query.total
-            ) * 100
+        data['agendamentos_hoje'] = _agendamentos_hoje(current_user.id, hoje)
+        data['proximos_agendamentos'] = _proximos_agendamentos(current_user.id, hoje)
 
         config_cliente = ConfiguracaoCliente.query.filter_by(
             cliente_id=current_user.id
@@ -423,7 +310,44 @@ def _sanitize_filter_value(value):
         except (TypeError, ValueError):
             return str(value)
     return str(value).strip()
-    
+
+
+def _agendamentos_hoje(cliente_id, hoje):
+    """Agendamentos pendentes/confirmados do cliente para ``hoje``."""
+    return AgendamentoVisita.query.options(
+        joinedload(AgendamentoVisita.horario)
+    ).join(
+        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
+    ).join(
+        Evento, HorarioVisitacao.evento_id == Evento.id
+    ).filter(
+        Evento.cliente_id == cliente_id,
+        HorarioVisitacao.data == hoje,
+        AgendamentoVisita.status.in_(['pendente', 'confirmado']),
+    ).order_by(
+        HorarioVisitacao.horario_inicio
+    ).all()
+
+
+def _proximos_agendamentos(cliente_id, hoje, dias=7, limite=5):
+    """Próximos agendamentos pendentes/confirmados, excluindo ``hoje``."""
+    return AgendamentoVisita.query.options(
+        joinedload(AgendamentoVisita.horario)
+    ).join(
+        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
+    ).join(
+        Evento, HorarioVisitacao.evento_id == Evento.id
+    ).filter(
+        Evento.cliente_id == cliente_id,
+        HorarioVisitacao.data > hoje,
+        HorarioVisitacao.data <= hoje + timedelta(days=dias),
+        AgendamentoVisita.status.in_(['pendente', 'confirmado']),
+    ).order_by(
+        HorarioVisitacao.data,
+        HorarioVisitacao.horario_inicio,
+    ).limit(limite).all()
+
+
 def obter_configuracao_do_cliente(cliente_id):
     config = ConfiguracaoCliente.query.filter_by(cliente_id=cliente_id).first()
     if not config:
@@ -460,95 +384,18 @@ def dashboard_aba_agendamentos():
     ).all()
     
     # Dados para cards
-    agendamentos_totais = db.session.query(func.count(AgendamentoVisita.id)).join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id
-    ).scalar() or 0
-    
-    agendamentos_confirmados = db.session.query(func.count(AgendamentoVisita.id)).join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        AgendamentoVisita.status == 'confirmado'
-    ).scalar() or 0
-    
-    agendamentos_realizados = db.session.query(func.count(AgendamentoVisita.id)).join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        AgendamentoVisita.status == 'realizado'
-    ).scalar() or 0
-    
-    agendamentos_cancelados = db.session.query(func.count(AgendamentoVisita.id)).join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        AgendamentoVisita.status == 'cancelado'
-    ).scalar() or 0
-    
-    # Total de visitantes
-    total_visitantes = db.session.query(func.sum(AgendamentoVisita.quantidade_alunos)).join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        AgendamentoVisita.status.in_(['confirmado', 'realizado'])
-    ).scalar() or 0
-    
-    # Agendamentos para hoje
+    estatisticas = dashboard_stats_service.estatisticas_cliente(current_user.id)
+    agendamentos_totais = estatisticas['agendamentos_totais']
+    agendamentos_confirmados = estatisticas['agendamentos_confirmados']
+    agendamentos_realizados = estatisticas['agendamentos_realizados']
+    agendamentos_cancelados = estatisticas['agendamentos_cancelados']
+    total_visitantes = estatisticas['total_visitantes']
+    ocupacao_media = estatisticas['ocupacao_media']
+
     hoje = datetime.utcnow().date()
-    agendamentos_hoje = AgendamentoVisita.query.join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        HorarioVisitacao.data == hoje,
-        AgendamentoVisita.status.in_(['pendente', 'confirmado'])
-    ).order_by(
-        HorarioVisitacao.horario_inicio
-    ).all()
-    
+    agendamentos_hoje = _agendamentos_hoje(current_user.id, hoje)
     # Próximos agendamentos (próximos 7 dias, excluindo hoje)
-    data_limite = hoje + timedelta(days=7)
-    proximos_agendamentos = AgendamentoVisita.query.join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        HorarioVisitacao.data > hoje,
-        HorarioVisitacao.data <= data_limite,
-        AgendamentoVisita.status.in_(['pendente', 'confirmado'])
-    ).order_by(
-        HorarioVisitacao.data,
-        HorarioVisitacao.horario_inicio
-    ).limit(5).all()
-    
-    # Calcular ocupação média (vagas preenchidas / capacidade total) 
-    ocupacao_query = db.session.query(
-        func.sum(HorarioVisitacao.capacidade_total - HorarioVisitacao.vagas_disponiveis).label('ocupadas'),
-        func.sum(HorarioVisitacao.capacidade_total).label('total')
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        HorarioVisitacao.data >= hoje
-    ).first()
-    
-    ocupacao_media = 0
-    if ocupacao_query and ocupacao_query.total and ocupacao_query.total > 0:
-        ocupacao_media = (ocupacao_query.ocupadas / ocupacao_query.total) * 100
+    proximos_agendamentos = _proximos_agendamentos(current_user.id, hoje)
     
     # Se for uma requisição AJAX, retornar JSON com os dados
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -590,19 +437,8 @@ def dashboard_aba_agendamentos_hoje():
     if current_user.tipo != 'cliente':
         return jsonify(error='Acesso negado'), 403
     
-    hoje = datetime.utcnow().date()
-    agendamentos_hoje = AgendamentoVisita.query.join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        HorarioVisitacao.data == hoje,
-        AgendamentoVisita.status.in_(['pendente', 'confirmado'])
-    ).order_by(
-        HorarioVisitacao.horario_inicio
-    ).all()
-    
+    agendamentos_hoje = _agendamentos_hoje(current_user.id, datetime.utcnow().date())
+
     return render_template(
         'partials/agendamentos_hoje_lista.html',
         agendamentos_hoje=agendamentos_hoje
@@ -617,27 +453,75 @@ def dashboard_aba_proximos_agendamentos():
     if current_user.tipo != 'cliente':
         return jsonify(error='Acesso negado'), 403
     
-    hoje = datetime.utcnow().date()
-    data_limite = hoje + timedelta(days=7)
-    proximos_agendamentos = AgendamentoVisita.query.join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        HorarioVisitacao.data > hoje,
-        HorarioVisitacao.data <= data_limite,
-        AgendamentoVisita.status.in_(['pendente', 'confirmado'])
-    ).order_by(
-        HorarioVisitacao.data,
-        HorarioVisitacao.horario_inicio
-    ).limit(5).all()
-    
+    proximos_agendamentos = _proximos_agendamentos(current_user.id, datetime.utcnow().date())
+
     return render_template(
         'partials/proximos_agendamentos_lista.html',
         proximos_agendamentos=proximos_agendamentos
     )
 
+def _pagina_json(paginacao, itens):
+    return {
+        'itens': itens,
+        'pagina': paginacao.page,
+        'por_pagina': paginacao.per_page,
+        'total': paginacao.total,
+        'paginas': paginacao.pages,
+    }
+
+
+@dashboard_routes.route('/dashboard_cliente/checkins_qr')
+@login_required
+def dashboard_cliente_checkins_qr():
+    """Página de check-ins via QR do cliente (JSON)."""
+    if current_user.tipo != 'cliente':
+        return jsonify(error='Acesso negado'), 403
+
+    paginacao = dashboard_stats_service.paginar_checkins_qr(
+        current_user.id,
+        request.args.get('pagina', 1, type=int),
+        min(request.args.get('por_pagina', dashboard_stats_service.POR_PAGINA, type=int), 100),
+    )
+    itens = [
+        {
+            'id': c.id,
+            'participante': c.usuario.nome if c.usuario else None,
+            'atividade': (
+                c.oficina.titulo if c.oficina else (c.evento.nome if c.evento else None)
+            ),
+            'palavra_chave': c.palavra_chave,
+            'data_hora': c.data_hora.isoformat() if c.data_hora else None,
+        }
+        for c in paginacao.items
+    ]
+    return jsonify(_pagina_json(paginacao, itens))
+
+
+@dashboard_routes.route('/dashboard_cliente/inscritos')
+@login_required
+def dashboard_cliente_inscritos():
+    """Página de inscritos do cliente (JSON)."""
+    if current_user.tipo != 'cliente':
+        return jsonify(error='Acesso negado'), 403
+
+    paginacao = dashboard_stats_service.paginar_inscritos(
+        current_user.id,
+        request.args.get('pagina', 1, type=int),
+        min(request.args.get('por_pagina', dashboard_stats_service.POR_PAGINA, type=int), 100),
+    )
+    itens = [
+        {
+            'id': i.id,
+            'usuario_id': i.usuario_id,
+            'nome': i.usuario.nome if i.usuario else None,
+            'email': i.usuario.email if i.usuario else None,
+            'oficina_id': i.oficina_id,
+            'evento_id': i.evento_id,
+        }
+        for i in paginacao.items
+    ]
+    return jsonify(_pagina_json(paginacao, itens))
+
 @dashboard_routes.route('/dashboard_aba_financeiro')
 @login_required
 def dashboard_aba_financeiro():
@@ -703,95 +587,18 @@ def set_dashboard_agendamentos_data():
     ).all()
     
     # Dados para cards
-    agendamentos_totais = db.session.query(func.count(AgendamentoVisita.id)).join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id
-    ).scalar() or 0
-    
-    agendamentos_confirmados = db.session.query(func.count(AgendamentoVisita.id)).join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        AgendamentoVisita.status == 'confirmado'
-    ).scalar() or 0
-    
-    agendamentos_realizados = db.session.query(func.count(AgendamentoVisita.id)).join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        AgendamentoVisita.status == 'realizado'
-    ).scalar() or 0
-    
-    agendamentos_cancelados = db.session.query(func.count(AgendamentoVisita.id)).join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        AgendamentoVisita.status == 'cancelado'
-    ).scalar() or 0
-    
-    # Total de visitantes
-    total_visitantes = db.session.query(func.sum(AgendamentoVisita.quantidade_alunos)).join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        AgendamentoVisita.status.in_(['confirmado', 'realizado'])
-    ).scalar() or 0
-    
-    # Agendamentos para hoje
+    estatisticas = dashboard_stats_service.estatisticas_cliente(current_user.id)
+    agendamentos_totais = estatisticas['agendamentos_totais']
+    agendamentos_confirmados = estatisticas['agendamentos_confirmados']
+    agendamentos_realizados = estatisticas['agendamentos_realizados']
+    agendamentos_cancelados = estatisticas['agendamentos_cancelados']
+    total_visitantes = estatisticas['total_visitantes']
+    ocupacao_media = estatisticas['ocupacao_media']
+
     hoje = datetime.utcnow().date()
-    agendamentos_hoje = AgendamentoVisita.query.join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        HorarioVisitacao.data == hoje,
-        AgendamentoVisita.status.in_(['pendente', 'confirmado'])
-    ).order_by(
-        HorarioVisitacao.horario_inicio
-    ).all()
-    
+    agendamentos_hoje = _agendamentos_hoje(current_user.id, hoje)
     # Próximos agendamentos (próximos 7 dias, excluindo hoje)
-    data_limite = hoje + timedelta(days=7)
-    proximos_agendamentos = AgendamentoVisita.query.join(
-        HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        HorarioVisitacao.data > hoje,
-        HorarioVisitacao.data <= data_limite,
-        AgendamentoVisita.status.in_(['pendente', 'confirmado'])
-    ).order_by(
-        HorarioVisitacao.data,
-        HorarioVisitacao.horario_inicio
-    ).limit(5).all()
-    
-    # Calcular ocupação média (vagas preenchidas / capacidade total) 
-    ocupacao_query = db.session.query(
-        func.sum(HorarioVisitacao.capacidade_total - HorarioVisitacao.vagas_disponiveis).label('ocupadas'),
-        func.sum(HorarioVisitacao.capacidade_total).label('total')
-    ).join(
-        Evento, HorarioVisitacao.evento_id == Evento.id
-    ).filter(
-        Evento.cliente_id == current_user.id,
-        HorarioVisitacao.data >= hoje
-    ).first()
-    
-    ocupacao_media = 0
-    if ocupacao_query and ocupacao_query.total and ocupacao_query.total > 0:
-        ocupacao_media = (ocupacao_query.ocupadas / ocupacao_query.total) * 100
+    proximos_agendamentos = _proximos_agendamentos(current_user.id, hoje)
 
     # Períodos de agendamento e configuração opcional
     periodos_agendamento = []
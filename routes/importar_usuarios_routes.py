@@ -1,14 +1,11 @@
-from flask import Blueprint, request, redirect, url_for, flash
-from werkzeug.security import generate_password_hash
-from werkzeug.utils import secure_filename
+from flask import Blueprint, request, redirect, url_for, flash, jsonify, send_file, abort
+from flask_login import current_user, login_required
 from utils import endpoints
 
-import pandas as pd
-import os
-
 from extensions import db
-from models.user import Usuario
-from flask import current_app
+from models import ImportacaoUsuarios
+from services import importacao_usuarios_service
+from services.importacao_usuarios_service import ColunasAusentesError
 from utils.arquivo_utils import arquivo_permitido
 import logging
 
@@ -21,8 +18,28 @@ logger = logging.getLogger(__name__)
 importar_usuarios_routes = Blueprint('importar_usuarios_routes', __name__)
 
 
+def _quer_json():
+    return request.accept_mimetypes.best == "application/json"
+
+
+def _solicitante():
+    if getattr(current_user, "is_authenticated", False):
+        return f"{current_user.tipo}:{current_user.get_id()}"
+    return None
+
+
+def _importacao_do_usuario(importacao_id):
+    importacao = db.session.get(ImportacaoUsuarios, importacao_id)
+    if importacao is None:
+        abort(404)
+    if importacao.solicitante != _solicitante() and getattr(current_user, "tipo", None) != "admin":
+        abort(403)
+    return importacao
+
+
 @importar_usuarios_routes.route("/importar_usuarios", methods=["POST"])
 def importar_usuarios():
+    """Recebe a planilha e inicia a importação em segundo plano."""
     if "arquivo" not in request.files:
         flash("Nenhum arquivo enviado!", "danger")
         return redirect(url_for(endpoints.DASHBOARD))
@@ -30,48 +47,62 @@ def importar_usuarios():
     if arquivo.filename == "":
         flash("Nenhum arquivo selecionado.", "danger")
         return redirect(url_for(endpoints.DASHBOARD))
-    if arquivo and arquivo_permitido(arquivo.filename):
-        filename = secure_filename(arquivo.filename)
-        filepath = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
-        arquivo.save(filepath)
-        try:
-            logger.debug("Lendo o arquivo Excel...")
-            df = pd.read_excel(filepath, dtype={"cpf": str})
-            logger.debug("Colunas encontradas: %s", df.columns.tolist())
-            colunas_obrigatorias = ["nome", "cpf", "email", "senha", "formacao", "tipo"]
-            if not all(col in df.columns for col in colunas_obrigatorias):
-                flash("Erro: O arquivo deve conter as colunas: " + ", ".join(colunas_obrigatorias), "danger")
-                return redirect(url_for(endpoints.DASHBOARD))
-            total_importados = 0
-            for _, row in df.iterrows():
-                cpf_str = str(row["cpf"]).strip()
-                usuario_existente = Usuario.query.filter_by(email=row["email"]).first()
-                if usuario_existente:
-                    logger.warning("Usuário com e-mail %s já existe. Pulando...", row['email'])
-                    continue
-                usuario_existente = Usuario.query.filter_by(cpf=cpf_str).first()
-                if usuario_existente:
-                    logger.warning("Usuário com CPF %s já existe. Pulando...", cpf_str)
-                    continue
-                senha_hash = generate_password_hash(str(row["senha"]), method="pbkdf2:sha256")
-                novo_usuario = Usuario(
-                    nome=row["nome"],
-                    cpf=cpf_str,
-                    email=row["email"],
-                    senha=senha_hash,
-                    formacao=row["formacao"],
-                    tipo=row["tipo"]
-                )
-                db.session.add(novo_usuario)
-                total_importados += 1
-                logger.info("Usuário '%s' cadastrado com sucesso!", row['nome'])
-            db.session.commit()
-            flash(f"{total_importados} usuários importados com sucesso!", "success")
-        except Exception as e:
-            db.session.rollback()
-            logger.error("Erro ao importar usuários: %s", str(e))
-            flash(f"Erro ao processar o arquivo: {str(e)}", "danger")
-        os.remove(filepath)
+    if not (arquivo and arquivo_permitido(arquivo.filename)):
+        flash("Formato de arquivo inválido. Envie um arquivo Excel (.xlsx) ou CSV", "danger")
+        return redirect(url_for(endpoints.DASHBOARD))
+
+    try:
+        importacao = importacao_usuarios_service.iniciar_importacao(arquivo, _solicitante())
+    except ColunasAusentesError as e:
+        erro = f"Erro: {e}"
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erro ao importar usuários: %s", str(e))
+        erro = f"Erro ao processar o arquivo: {str(e)}"
     else:
-        flash("Formato de arquivo inválido. Envie um arquivo Excel (.xlsx)", "danger")
+        status_url = url_for("importar_usuarios_routes.status_importacao", importacao_id=importacao.id)
+        if _quer_json():
+            return jsonify({**importacao.to_dict(), "status_url": status_url}), 202
+        flash(
+            f"Importação #{importacao.id} iniciada. Acompanhe o progresso em {status_url}",
+            "info",
+        )
+        return redirect(url_for(endpoints.DASHBOARD))
+
+    if _quer_json():
+        return jsonify({"error": erro}), 400
+    flash(erro, "danger")
     return redirect(url_for(endpoints.DASHBOARD))
+
+
+@importar_usuarios_routes.route("/importar_usuarios/<int:importacao_id>", methods=["GET"])
+@login_required
+def status_importacao(importacao_id):
+    """Progresso da importação."""
+    importacao = _importacao_do_usuario(importacao_id)
+    dados = importacao.to_dict()
+    if importacao.relatorio_erros and importacao.status in (
+        ImportacaoUsuarios.CONCLUIDA, ImportacaoUsuarios.FALHOU
+    ):
+        dados["relatorio_erros_url"] = url_for(
+            "importar_usuarios_routes.relatorio_erros_importacao", importacao_id=importacao.id
+        )
+    return jsonify(dados)
+
+
+@importar_usuarios_routes.route("/importar_usuarios/<int:importacao_id>/erros", methods=["GET"])
+@login_required
+def relatorio_erros_importacao(importacao_id):
+    """CSV com as linhas rejeitadas (linha, email, cpf, motivo)."""
+    importacao = _importacao_do_usuario(importacao_id)
+    if importacao.status not in (ImportacaoUsuarios.CONCLUIDA, ImportacaoUsuarios.FALHOU):
+        return jsonify({"error": "Importação ainda em andamento"}), 409
+    caminho = importacao_usuarios_service.caminho_relatorio(importacao)
+    if caminho is None:
+        abort(404)
+    return send_file(
+        caminho,
+        mimetype="text/csv",
+        as_attachment=True,
+        download_name=f"importacao_{importacao.id}_erros.csv",
+    )
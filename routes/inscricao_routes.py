@@ -36,7 +36,8 @@ from dateutil import parser
 logger = logging.getLogger(__name__)
 from sqlalchemy import func, or_, and_
 from services.lote_service import lote_disponivel
-from utils import external_url, preco_com_taxa, gerar_comprovante_pdf, enviar_email
+from services.email_outbox_service import enfileirar_email
+from utils import external_url, preco_com_taxa, gerar_comprovante_pdf
 from forms import RegraInscricaoEventoForm
 
 
@@ -912,7 +913,7 @@ def inscrever(oficina_id):
                 oficina=oficina,
             )
 
-            enviar_email(
+            enfileirar_email(
                 destinatario=current_user.email,
                 nome_participante=current_user.nome,
                 nome_oficina=oficina.titulo,
@@ -921,7 +922,9 @@ def inscrever(oficina_id):
                 anexo_path=pdf_path,
                 corpo_html=corpo_html,
             )
+            db.session.commit()
         except Exception as e:
+            db.session.rollback()
             logger.exception("❌ ERRO ao enviar e-mail: %s", e)
             # Continuamos mesmo se houver erro no e-mail, pois a inscrição já foi
             # concluída
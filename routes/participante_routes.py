@@ -13,7 +13,7 @@ from extensions import db
 from datetime import datetime
 from services import certificado_service
 from models import Inscricao
-from utils import enviar_email
+from services.email_outbox_service import enfileirar_email
 
 
 
@@ -451,20 +451,17 @@ def inscrever(oficina_id):
     )
     
     db.session.add(nova_inscricao)
+
+    # E-mail de confirmação vai para a outbox no mesmo commit da inscrição
+    enfileirar_email(
+        destinatario=current_user.email,
+        nome_participante=current_user.nome,
+        nome_oficina=oficina.titulo,
+        assunto='Confirmação de Inscrição',
+        corpo_texto=f'Você se inscreveu com sucesso na oficina: {oficina.titulo}',
+        corpo_html=f'<p>Parabéns, {current_user.nome}!</p><p>Sua inscrição na oficina <strong>{oficina.titulo}</strong> foi confirmada.</p>'
+    )
     db.session.commit()
-    
-    # Enviar email de confirmação (pode ser assíncrono)
-    try:
-        enviar_email(
-            destinatario=current_user.email,
-            nome_participante=current_user.nome,
-            nome_oficina=oficina.titulo,
-            assunto='Confirmação de Inscrição',
-            corpo_texto=f'Você se inscreveu com sucesso na oficina: {oficina.titulo}',
-            corpo_html=f'<p>Parabéns, {current_user.nome}!</p><p>Sua inscrição na oficina <strong>{oficina.titulo}</strong> foi confirmada.</p>'
-        )
-    except Exception as e:
-        print(f"Erro ao enviar email: {e}")
 
     return jsonify({'success': True, 'message': 'Inscrição realizada com sucesso!'})
 
@@ -46,6 +46,7 @@ peer_review_routes = Blueprint(
 
 # Notificação por e-mail para revisores
 from services.review_notification_service import notify_reviewer
+from services.conflict_index import ConflictIndex, conflict_detection_enabled
 
 
 @peer_review_routes.app_context_processor
@@ -423,8 +424,9 @@ def assign_reviews():
     """Assign reviewers to submissions via JSON.
 
     Only users of type ``revisor`` with an approved ``RevisorCandidatura``
-    are eligible. The request body must map submission IDs to lists of
-    reviewer IDs.
+    are eligible, and pairs with a conflict of interest (see
+    ``services.conflict_index``) are refused. The request body must map
+    submission IDs to lists of reviewer IDs.
 
     Returns:
         dict: JSON object with success flag or error message.
@@ -441,11 +443,25 @@ def assign_reviews():
         return {"success": False}, 400
 
     invalid_reviewers: list[int] = []
+    conflitos: list[dict] = []
+
+    # Chaves de conflito de todo o pedido numa carga só
+    indice = ConflictIndex().load(
+        Submission.query.filter(Submission.id.in_(list(data))).all(),
+        Usuario.query.filter(
+            Usuario.id.in_({r for revisores in data.values() for r in revisores})
+        ).all(),
+    )
+    verificar_conflitos: dict = {}
 
     for submission_id, reviewers in data.items():
         submission = Submission.query.get(submission_id)
         if not submission:
             continue
+        if submission.evento_id not in verificar_conflitos:
+            verificar_conflitos[submission.evento_id] = conflict_detection_enabled(
+                submission.evento_id
+            )
 
         evento = Evento.query.get(submission.evento_id)
         cliente_id = evento.cliente_id if evento else None
@@ -472,6 +488,14 @@ def assign_reviews():
                 invalid_reviewers.append(reviewer_id)
                 continue
 
+            if verificar_conflitos[submission.evento_id] and indice.has_conflict(
+                submission, reviewer
+            ):
+                conflitos.append(
+                    {"submission_id": submission.id, "reviewer_id": reviewer_id}
+                )
+                continue
+
             # Cria Review + Assignment ----------------------------------
             rev = Review(
                 submission_id=submission.id,
@@ -522,6 +546,13 @@ def assign_reviews():
             "message": f"Revisores não aprovados: {invalid_reviewers}",
         }, 400
 
+    if conflitos:
+        return {
+            "success": False,
+            "message": f"Conflito de interesse: {conflitos}",
+            "conflicts": conflitos,
+        }, 400
+
     return {"success": True}
 
 
@@ -592,6 +623,9 @@ def assign_by_filters():
     random.shuffle(reviewers)
     random.shuffle(elegiveis)
 
+    indice = ConflictIndex().load(elegiveis, reviewers)
+    verificar_conflitos = {e: conflict_detection_enabled(e) for e in evento_ids}
+
     contagem_revisor = {
         r.id: Assignment.query.filter_by(reviewer_id=r.id).count() for r in reviewers
     }
@@ -608,6 +642,10 @@ def assign_by_filters():
                 ).first()
                 if existente:
                     continue
+                if verificar_conflitos.get(sub.evento_id) and indice.has_conflict(
+                    sub, reviewer
+                ):
+                    continue
                 assignment = Assignment(
                     submission_id=sub.id,
                     reviewer_id=reviewer.id,
@@ -676,9 +714,16 @@ def auto_assign(evento_id):
     for r in revisores:
         area_map.setdefault(r.formacao, []).append(r)
 
+    verificar_conflitos = conflict_detection_enabled(evento_id)
+    if verificar_conflitos:
+        indice = ConflictIndex().load(trabalhos, revisores)
+
     for t in trabalhos:
         area = t.attributes.get("area_tematica") if t.attributes else None
         revisores_area = area_map.get(area, revisores)
+        if verificar_conflitos:
+            conflitantes = indice.conflicting_reviewers(t)
+            revisores_area = [r for r in revisores_area if r.id not in conflitantes]
         selecionados = revisores_area[: config.numero_revisores]
 
         for reviewer in selecionados:
@@ -24,6 +24,7 @@ from models import (
     ParticipanteEvento,
 )
 from services.pdf_service import gerar_pdf_comprovante_agendamento
+from services.reserva_vagas_service import VagasInsuficientesError, reservar_vagas
 from . import routes
 
 # Rotas para gerenciamento de agendamentos (para professores/participantes)
@@ -276,12 +277,10 @@ def criar_agendamento_professor(horario_id):
                 compromisso_4=True,
             )
 
-            # Atualizar vagas disponíveis
-            horario.vagas_disponiveis -= quantidade_alunos
-
-            db.session.add(agendamento)
-
             try:
+                # Atualizar vagas disponíveis (falha se outro agendamento levou as vagas)
+                reservar_vagas(horario.id, quantidade_alunos)
+                db.session.add(agendamento)
                 db.session.commit()
                 flash('Agendamento realizado com sucesso!', 'success')
 
@@ -294,6 +293,9 @@ def criar_agendamento_professor(horario_id):
                         agendamento_id=agendamento.id,
                     )
                 )
+            except VagasInsuficientesError as exc:
+                db.session.rollback()
+                flash(str(exc), 'danger')
             except Exception as e:
                 db.session.rollback()
                 flash(f'Erro ao realizar agendamento: {str(e)}', 'danger')
@@ -1083,14 +1085,17 @@ def criar_agendamento_participante(horario_id):
                 compromisso_4=True,
             )
 
-            horario.vagas_disponiveis -= quantidade_alunos
-            db.session.add(agendamento)
             try:
+                reservar_vagas(horario.id, quantidade_alunos)
+                db.session.add(agendamento)
                 db.session.commit()
                 flash('Agendamento realizado com sucesso!', 'success')
                 return redirect(
                     url_for('routes.adicionar_alunos_participante', agendamento_id=agendamento.id)
                 )
+            except VagasInsuficientesError as exc:
+                db.session.rollback()
+                flash(str(exc), 'danger')
             except Exception as e:
                 db.session.rollback()
                 flash(f'Erro ao realizar agendamento: {str(e)}', 'danger')
@@ -13,9 +13,10 @@ from typing import Dict, List, Any
 from extensions import db
 from models.relatorio_bi import (
     RelatorioBI, MetricaBI, DashboardBI, WidgetBI, 
-    ExportacaoRelatorio, CacheRelatorio, AlertasBI
+    ExportacaoRelatorio, AlertasBI
 )
 from services.bi_analytics_service import BIAnalyticsService
+from services.bi_cache import bi_cache
 from services.relatorio_export_service import RelatorioExportService
 from utils.auth import dashboard_access_required
 
@@ -507,6 +508,26 @@ def api_tendencias():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@relatorio_bi_routes.route('/api/bi/geografia')
+@login_required
+@dashboard_access_required
+def api_geografia():
+    """API da análise geográfica com drill-down (evento_id, estado, data_inicio, data_fim)"""
+    try:
+        cliente_id = current_user.id if current_user.tipo != 'admin' else 1
+        filtros = request.args.to_dict()
+        
+        dados = bi_service.gerar_analise_geografica(cliente_id, filtros)
+        
+        return jsonify({
+            'success': True,
+            'dados': dados,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @relatorio_bi_routes.route('/api/bi/alertas')
 @login_required
 @dashboard_access_required
@@ -575,20 +596,29 @@ def api_widgets():
 
 # Rotas de manutenção
 
+@relatorio_bi_routes.route('/bi/manutencao')
+@login_required
+@dashboard_access_required
+def manutencao():
+    """Estatísticas do cache de BI (acertos por nível, cálculos, esperas)"""
+    return jsonify({
+        'success': True,
+        'cache': bi_cache.estatisticas(),
+        'timestamp': datetime.now().isoformat()
+    })
+
 @relatorio_bi_routes.route('/bi/manutencao/limpar-cache')
 @login_required
 @dashboard_access_required
 def limpar_cache():
     """Limpa cache de relatórios"""
     try:
-        # Remover cache expirado
-        cache_expirado = CacheRelatorio.query.filter(
-            CacheRelatorio.data_expiracao < datetime.utcnow()
-        ).delete()
-        
-        db.session.commit()
+        if current_user.tipo == 'admin':
+            bi_cache.limpar()
+        else:
+            bi_cache.invalidar_cliente(current_user.id)
         
-        flash(f'Cache limpo: {cache_expirado} registros removidos', 'success')
+        flash('Cache de relatórios limpo', 'success')
         return redirect(url_for('relatorio_bi_routes.dashboard_bi'))
         
     except Exception as e:
@@ -10,7 +10,7 @@ from flask import (
 )
 from flask_login import login_required, current_user
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, insert, update
 from models import (
     LembreteOficina, 
     LembreteEnvio, 
@@ -22,7 +22,7 @@ from models import (
     Inscricao,
     db
 )
-from services.email_service import EmailService
+from services.email_service import email_service
 import json
 import logging
 
@@ -303,7 +303,13 @@ def api_scheduler_status():
 
 
 def processar_lembrete_manual(lembrete_id):
-    """Processa o envio de um lembrete manual."""
+    """Processa o envio de um lembrete manual.
+
+    Os registros de envio são criados em um único INSERT e confirmados antes
+    do disparo, para não manter a transação aberta durante as chamadas ao
+    provedor. Os e-mails saem em lotes via ``email_service.send_bulk`` e o
+    status de cada envio é gravado com um UPDATE em massa por lote concluído.
+    """
     lembrete = LembreteOficina.query.get(lembrete_id)
     if not lembrete:
         raise Exception("Lembrete não encontrado")
@@ -317,105 +323,99 @@ def processar_lembrete_manual(lembrete_id):
     lembrete.data_envio = datetime.utcnow()
     
     # Criar registros de envio
-    envios_criados = 0
-    envios_falhas = 0
+    envio_ids = []
+    if destinatarios:
+        envio_ids = db.session.scalars(
+            insert(LembreteEnvio).returning(LembreteEnvio.id, sort_by_parameter_order=True),
+            [
+                {
+                    'lembrete_id': lembrete.id,
+                    'usuario_id': destinatario['usuario_id'],
+                    'oficina_id': destinatario['oficina_id'],
+                    'status': StatusLembrete.PENDENTE,
+                }
+                for destinatario in destinatarios
+            ],
+        ).all()
+    titulo_lembrete, mensagem = lembrete.titulo, lembrete.mensagem
+    db.session.commit()
     
-    for destinatario in destinatarios:
-        try:
-            # Criar registro de envio
-            envio = LembreteEnvio(
-                lembrete_id=lembrete.id,
-                usuario_id=destinatario['usuario_id'],
-                oficina_id=destinatario['oficina_id'],
-                status=StatusLembrete.PENDENTE
-            )
-            db.session.add(envio)
-            
-            # Enviar email
-            EmailService.enviar_lembrete_oficina(
-                destinatario=destinatario['usuario_email'],
-                nome=destinatario['usuario_nome'],
-                oficina_titulo=destinatario['oficina_titulo'],
-                titulo_lembrete=lembrete.titulo,
-                mensagem=lembrete.mensagem
-            )
-            
-            # Marcar como enviado
-            envio.status = StatusLembrete.ENVIADO
-            envio.data_envio = datetime.utcnow()
-            envios_criados += 1
-            
-        except Exception as e:
-            logger.error(f"Erro ao enviar lembrete para {destinatario['usuario_email']}: {e}")
-            envio.status = StatusLembrete.FALHOU
-            envio.erro_mensagem = str(e)
-            envios_falhas += 1
+    mensagens = [
+        {
+            'custom_id': envio_id,
+            'to': [{'email': destinatario['usuario_email'], 'name': destinatario['usuario_nome']}],
+            'subject': titulo_lembrete,
+            'template': 'emails/lembrete_oficina.html',
+            'template_context': {
+                'nome': destinatario['usuario_nome'],
+                'oficina_titulo': destinatario['oficina_titulo'],
+                'titulo_lembrete': titulo_lembrete,
+                'mensagem': mensagem,
+            },
+        }
+        for envio_id, destinatario in zip(envio_ids, destinatarios)
+    ]
+    
+    def registrar_resultados(resultados):
+        agora = datetime.utcnow()
+        db.session.execute(
+            update(LembreteEnvio),
+            [
+                {
+                    'id': int(resultado.custom_id),
+                    'status': StatusLembrete.ENVIADO if resultado.success else StatusLembrete.FALHOU,
+                    'data_envio': agora if resultado.success else None,
+                    'erro_mensagem': None if resultado.success else resultado.error,
+                }
+                for resultado in resultados
+            ],
+        )
+        db.session.commit()
+        for resultado in resultados:
+            if not resultado.success:
+                logger.error(
+                    f"Erro ao enviar lembrete para {resultado.email}: {resultado.error}"
+                )
+    
+    resultado = email_service.send_bulk(mensagens, on_batch=registrar_resultados)
     
     # Atualizar contadores finais
-    lembrete.total_enviados = envios_criados
-    lembrete.total_falhas = envios_falhas
+    lembrete.total_enviados = resultado['sent']
+    lembrete.total_falhas = resultado['failed']
     
     db.session.commit()
 
 
 def obter_destinatarios_lembrete(lembrete):
-    """Obtém lista de destinatários para um lembrete."""
-    destinatarios = []
+    """Obtém lista de destinatários (usuário e oficina) para um lembrete."""
+    consulta = (
+        db.session.query(
+            Usuario.id.label('usuario_id'),
+            Usuario.nome.label('usuario_nome'),
+            Usuario.email.label('usuario_email'),
+            Oficina.id.label('oficina_id'),
+            Oficina.titulo.label('oficina_titulo'),
+        )
+        .join(Inscricao, Inscricao.usuario_id == Usuario.id)
+        .join(Oficina, Inscricao.oficina_id == Oficina.id)
+    )
     
     if lembrete.enviar_todas_oficinas:
-        # Buscar todos os usuários inscritos em todas as oficinas do cliente
-        oficinas = Oficina.query.filter_by(cliente_id=lembrete.cliente_id).all()
-        for oficina in oficinas:
-            if hasattr(oficina, 'inscritos'):
-                for inscrito in oficina.inscritos:
-                    destinatarios.append({
-                        'usuario_id': inscrito.id,
-                        'usuario_nome': inscrito.nome,
-                        'usuario_email': inscrito.email,
-                        'oficina_id': oficina.id,
-                        'oficina_titulo': oficina.titulo
-                    })
+        # Todos os usuários inscritos em todas as oficinas do cliente
+        consulta = consulta.filter(Oficina.cliente_id == lembrete.cliente_id)
     else:
-        # Buscar usuários específicos ou oficinas específicas
+        # Oficinas específicas e/ou usuários específicos
         oficina_ids = json.loads(lembrete.oficina_ids) if lembrete.oficina_ids else []
         usuario_ids = json.loads(lembrete.usuario_ids) if lembrete.usuario_ids else []
-        
-        # Por oficinas específicas
-        for oficina_id in oficina_ids:
-            oficina = Oficina.query.get(oficina_id)
-            if oficina and hasattr(oficina, 'inscritos'):
-                for inscrito in oficina.inscritos:
-                    destinatarios.append({
-                        'usuario_id': inscrito.id,
-                        'usuario_nome': inscrito.nome,
-                        'usuario_email': inscrito.email,
-                        'oficina_id': oficina.id,
-                        'oficina_titulo': oficina.titulo
-                    })
-        
-        # Por usuários específicos
-        for usuario_id in usuario_ids:
-            usuario = Usuario.query.get(usuario_id)
-            if usuario and hasattr(usuario, 'inscricoes'):
-                for inscricao in usuario.inscricoes:
-                    destinatarios.append({
-                        'usuario_id': usuario.id,
-                        'usuario_nome': usuario.nome,
-                        'usuario_email': usuario.email,
-                        'oficina_id': inscricao.id,
-                        'oficina_titulo': inscricao.titulo
-                    })
+        filtros = []
+        if oficina_ids:
+            filtros.append(Oficina.id.in_(oficina_ids))
+        if usuario_ids:
+            filtros.append(Usuario.id.in_(usuario_ids))
+        if not filtros:
+            return []
+        consulta = consulta.filter(or_(*filtros))
     
-    # Remover duplicatas
-    destinatarios_unicos = []
-    emails_vistos = set()
-    
-    for dest in destinatarios:
-        chave = f"{dest['usuario_id']}_{dest['oficina_id']}"
-        if chave not in emails_vistos:
-            destinatarios_unicos.append(dest)
-            emails_vistos.add(chave)
-    
-    return destinatarios_unicos
-
-
+    # Um envio por par (usuário, oficina)
+    linhas = consulta.distinct().order_by(Oficina.id, Usuario.id).all()
+    return [dict(linha._mapping) for linha in linhas]
@@ -919,7 +919,6 @@ def approve(cand_id: int):
             )
         )
 
-    db.session.commit()
     if cand.email:
         send_email_task.delay(
             cand.email,
@@ -930,6 +929,7 @@ def approve(cand_id: int):
             template_path="emails/revisor_status_change.html",
             template_context={"status": cand.status, "codigo": cand.codigo},
         )
+    db.session.commit()
     msg = "Candidatura aprovada"
     if request.is_json:
         resp = {"success": True}
@@ -950,7 +950,6 @@ def reject(cand_id: int):
 
     cand: RevisorCandidatura = RevisorCandidatura.query.get_or_404(cand_id)
     cand.status = "rejeitado"
-    db.session.commit()
     if cand.email:
         send_email_task.delay(
             cand.email,
@@ -961,6 +960,7 @@ def reject(cand_id: int):
             template_path="emails/revisor_status_change.html",
             template_context={"status": cand.status, "codigo": cand.codigo},
         )
+    db.session.commit()
     if request.is_json:
         return jsonify({"success": True})
     return redirect(url_for(endpoints.DASHBOARD_CLIENTE))
@@ -1006,7 +1006,6 @@ def advance(cand_id: int):
                 db.session.add(next_status)
             next_status.status = "em_andamento"
 
-    db.session.commit()
     if cand.email:
         send_email_task.delay(
             cand.email,
@@ -1017,6 +1016,7 @@ def advance(cand_id: int):
             template_path="emails/revisor_status_change.html",
             template_context={"status": cand.status, "codigo": cand.codigo},
         )
+    db.session.commit()
     if request.is_json:
         return jsonify({"success": True, "etapa_atual": cand.etapa_atual})
     return redirect(url_for(endpoints.DASHBOARD_CLIENTE))
@@ -1734,6 +1734,7 @@ def send_email_individual(cand_id: int):
                 "nome": cand.nome or "Revisor"
             },
         )
+        db.session.commit()
         
         return jsonify({
             "success": True, 
@@ -1797,6 +1798,7 @@ def send_email_mass():
             except Exception as e:
                 erros.append(f"Erro para {cand.email}: {str(e)}")
                 current_app.logger.error(f"Erro ao enviar email para {cand.email}: {e}")
+        db.session.commit()
         
         if emails_enviados > 0:
             message = f"Emails enviados com sucesso para {emails_enviados} revisores"
@@ -209,7 +209,7 @@ def analyze_spreadsheet(evento_id):
         
         # Analisar planilha
         service = SpreadsheetService(evento_id)
-        result = service.analyze_spreadsheet(file.read(), file.filename)
+        result = service.analyze_spreadsheet(file.stream, file.filename)
         
         return jsonify(result)
         
@@ -239,7 +239,7 @@ def execute_import(evento_id):
         # Executar importação
         service = SpreadsheetService(evento_id)
         result = service.import_spreadsheet(
-            file.read(), file.filename, column_mapping, normalization_config
+            file.stream, file.filename, column_mapping, normalization_config
         )
         
         return jsonify(result)
@@ -14,7 +14,7 @@ from werkzeug.security import generate_password_hash
 from models import ConfiguracaoCliente, AuditLog
 from models.review import Submission, Review, Assignment
 from extensions import db
-from services.email_service import send_email
+from services.email_outbox_service import enfileirar_mensagem
 from services.review_notification_service import notify_reviewer
 import logging
 
@@ -39,21 +39,15 @@ def create_submission():
     submission = Submission(title=title, content=content,
                             locator=locator, code_hash=code_hash)
     db.session.add(submission)
+    # O código de acesso vai para a outbox na mesma transação da submissão
+    enfileirar_mensagem(
+        to=email,
+        subject='Submission Access Code',
+        text=f'Locator: {locator}\nAccess code: {raw_code}'
+    )
     db.session.commit()
 
 
-    try:
-        send_email(
-            to=email,
-            subject='Submission Access Code',
-            text=f'Locator: {locator}\nAccess code: {raw_code}'
-        )
-
-    except Exception as exc:
-        logger.exception("Erro ao enviar código de acesso para %s", email)
-        return jsonify({'error': 'falha ao enviar email'}), 500
-
-
     return jsonify({'locator': locator, 'code': raw_code}), 201
 
 
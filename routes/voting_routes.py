@@ -13,7 +13,7 @@ from flask import (
 )
 from flask_login import login_required, current_user
 from extensions import db
-from sqlalchemy import func, and_, or_, desc, asc
+from sqlalchemy import func, and_, or_, asc
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
@@ -37,6 +37,7 @@ from models.voting import (
     VotingResult,
     VotingAuditLog,
 )
+from services.voting_service import VotingService
 
 logger = logging.getLogger(__name__)
 
@@ -591,9 +592,11 @@ def salvar_voto():
             revisor_id=current_user.id
         ).first()
         
+        pontuacao_anterior = None
         if existing_vote:
             # Atualizar voto existente
             vote = existing_vote
+            pontuacao_anterior = vote.pontuacao_final
             # Remover respostas antigas
             VotingResponse.query.filter_by(vote_id=vote.id).delete()
         else:
@@ -631,6 +634,11 @@ def salvar_voto():
         vote.pontuacao_final = pontuacao_total
         vote.observacoes = data.get('observacoes', '')
         
+        if VotingService.incremental_results_enabled():
+            VotingService.apply_vote_to_results(
+                voting_event_id, category_id, work_id, pontuacao_anterior, pontuacao_total
+            )
+        
         db.session.commit()
         
         # Log de auditoria
@@ -809,58 +817,7 @@ def exportar_resultados(voting_event_id, formato):
 def _calcular_resultados(voting_event_id):
     """Calcula e atualiza resultados da votação."""
     try:
-        # Buscar todos os votos
-        votos = VotingVote.query.filter_by(voting_event_id=voting_event_id).all()
-        
-        # Agrupar por categoria e trabalho
-        votos_agrupados = {}
-        for voto in votos:
-            key = (voto.category_id, voto.work_id)
-            if key not in votos_agrupados:
-                votos_agrupados[key] = []
-            votos_agrupados[key].append(voto)
-        
-        # Calcular resultados
-        for (category_id, work_id), votos_grupo in votos_agrupados.items():
-            pontuacoes = [v.pontuacao_final for v in votos_grupo if v.pontuacao_final is not None]
-            
-            if pontuacoes:
-                pontuacao_total = sum(pontuacoes)
-                pontuacao_media = pontuacao_total / len(pontuacoes)
-                numero_votos = len(pontuacoes)
-                
-                # Buscar ou criar resultado
-                resultado = VotingResult.query.filter_by(
-                    voting_event_id=voting_event_id,
-                    category_id=category_id,
-                    work_id=work_id
-                ).first()
-                
-                if not resultado:
-                    resultado = VotingResult(
-                        voting_event_id=voting_event_id,
-                        category_id=category_id,
-                        work_id=work_id
-                    )
-                    db.session.add(resultado)
-                
-                resultado.pontuacao_total = pontuacao_total
-                resultado.pontuacao_media = pontuacao_media
-                resultado.numero_votos = numero_votos
-        
-        # Calcular rankings
-        categorias = VotingCategory.query.filter_by(voting_event_id=voting_event_id, ativa=True).all()
-        for categoria in categorias:
-            resultados_categoria = VotingResult.query.filter_by(
-                voting_event_id=voting_event_id,
-                category_id=categoria.id
-            ).order_by(desc(VotingResult.pontuacao_total)).all()
-            
-            for posicao, resultado in enumerate(resultados_categoria, 1):
-                resultado.posicao_ranking = posicao
-        
-        db.session.commit()
-        
+        VotingService.refresh_results(voting_event_id)
     except Exception as e:
         db.session.rollback()
         logger.error(f"Erro ao calcular resultados: {e}")
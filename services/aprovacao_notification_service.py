@@ -6,7 +6,8 @@ Serviço de notificações para o sistema de aprovação de compras.
 """
 
 from flask import current_app, render_template_string
-from services.email_service import send_email
+from extensions import db
+from services.email_outbox_service import enfileirar_mensagem
 from models.user import Usuario
 from models.compra import Compra, AprovacaoCompra, NivelAprovacao
 from datetime import datetime
@@ -119,7 +120,7 @@ class AprovacaoNotificationService:
                         url_aprovacao=url_aprovacao,
                     )
 
-                    send_email(
+                    enfileirar_mensagem(
                         to=aprovador.email,
                         subject=f'Nova Aprovação Pendente - Compra #{compra.numero_compra}',
                         html=html_content,
@@ -130,6 +131,7 @@ class AprovacaoNotificationService:
                 except Exception as e:
                     logger.error("Erro ao enviar email para %s: %s", aprovador.email, e)
             
+            db.session.commit()
             logger.info(f"Enviados {emails_enviados} emails de notificação para compra {compra_id}")
             return emails_enviados > 0
             
@@ -232,11 +234,12 @@ class AprovacaoNotificationService:
                 url_compras=url_compras,
             )
 
-            send_email(
+            enfileirar_mensagem(
                 to=solicitante.email,
                 subject=f'Compra #{compra.numero_compra} - {status.title()}',
                 html=html_content,
             )
+            db.session.commit()
             logger.info("Email de conclusão de aprovação enviado para %s", solicitante.email)
             return True
             
@@ -0,0 +1,236 @@
+"""Armazenamento de arquivos binários em fatias.
+
+O upload é lido em blocos de ``BINARIOS_BLOCO_BYTES`` com o SHA-256 calculado
+durante a leitura, então o arquivo nunca fica inteiro na memória do worker nem
+num único parâmetro do driver. O conteúdo é endereçado pelo hash: enviar de
+novo o mesmo arquivo só cria outro ``ArquivoBinario`` apontando para o mesmo
+``ConteudoBinario``.
+
+Dois backends (``BINARIOS_ARMAZENAMENTO``):
+
+* ``disco`` (padrão): ``UPLOADS_ROOT/binarios``. Como essa pasta também é
+  servida como estática, o nome em disco é aleatório (guardado em
+  ``ConteudoBinario.caminho``) e não pode ser deduzido do conteúdo.
+* ``blocos``: linhas de ``bloco_binario``, lidas uma por vez no download.
+
+Os downloads saem como resposta em streaming com ``ETag`` (o SHA-256) e
+suporte a ``Range``. Arquivos antigos, com o conteúdo em
+``arquivo_binario.conteudo``, continuam sendo servidos.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import secrets
+import tempfile
+
+from flask import request, send_file
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import ArquivoBinario, BlocoBinario, ConteudoBinario
+from services.comum import config_app, config_positivo
+
+logger = logging.getLogger(__name__)
+
+DISCO = "disco"
+BLOCOS = "blocos"
+BLOCO_PADRAO = 512 * 1024
+
+
+class ArquivoMuitoGrandeError(ValueError):
+    """O upload passou do limite configurado."""
+
+    def __init__(self, limite):
+        self.limite = limite
+        super().__init__(f"Arquivo excede o tamanho máximo de {limite // (1024 * 1024)}MB")
+
+
+def _diretorio():
+    raiz = config_app("UPLOADS_ROOT", None) or os.path.join(os.getcwd(), "static", "uploads")
+    return os.path.join(raiz, "binarios")
+
+
+def caminho_conteudo(conteudo):
+    """Caminho absoluto em disco de um ``ConteudoBinario``."""
+    return os.path.join(_diretorio(), conteudo.caminho)
+
+
+def _novo_caminho():
+    nome = secrets.token_hex(32)
+    return os.path.join(nome[:2], nome[2:4], nome)
+
+
+def _copiar_para_temporario(stream, limite, tamanho_bloco, diretorio):
+    """Copia o stream para um arquivo temporário calculando hash e tamanho."""
+    os.makedirs(diretorio, exist_ok=True)
+    resumo = hashlib.sha256()
+    tamanho = 0
+    descritor, caminho = tempfile.mkstemp(prefix=".upload-", dir=diretorio)
+    try:
+        with os.fdopen(descritor, "wb") as destino:
+            while True:
+                bloco = stream.read(tamanho_bloco)
+                if not bloco:
+                    break
+                tamanho += len(bloco)
+                if limite and tamanho > limite:
+                    raise ArquivoMuitoGrandeError(limite)
+                resumo.update(bloco)
+                destino.write(bloco)
+    except BaseException:
+        os.unlink(caminho)
+        raise
+    return caminho, resumo.hexdigest(), tamanho
+
+
+def _mover_para_disco(temporario, caminho):
+    destino = os.path.join(_diretorio(), caminho)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    # Mesmo diretório base: a troca é atômica
+    os.replace(temporario, destino)
+
+
+def _gravar_blocos(conteudo_id, temporario, tamanho_bloco):
+    with open(temporario, "rb") as origem:
+        indice = 0
+        while True:
+            dados = origem.read(tamanho_bloco)
+            if not dados:
+                break
+            db.session.execute(
+                insert(BlocoBinario), [{"conteudo_id": conteudo_id, "indice": indice, "dados": dados}]
+            )
+            indice += 1
+
+
+def _obter_ou_criar_conteudo(temporario, sha256, tamanho, armazenamento, tamanho_bloco):
+    existente = ConteudoBinario.query.filter_by(sha256=sha256).first()
+    if existente:
+        if existente.armazenamento == DISCO and not os.path.exists(caminho_conteudo(existente)):
+            logger.warning("Conteúdo %s ausente do disco; regravando a partir do upload", sha256)
+            _mover_para_disco(temporario, existente.caminho)
+        return existente
+
+    conteudo = ConteudoBinario(
+        sha256=sha256,
+        tamanho=tamanho,
+        armazenamento=armazenamento,
+        tamanho_bloco=tamanho_bloco if armazenamento == BLOCOS else None,
+        caminho=_novo_caminho() if armazenamento == DISCO else None,
+    )
+    if armazenamento == DISCO:
+        _mover_para_disco(temporario, conteudo.caminho)
+    try:
+        db.session.add(conteudo)
+        db.session.flush()
+        if armazenamento == BLOCOS:
+            _gravar_blocos(conteudo.id, temporario, tamanho_bloco)
+        db.session.commit()
+    except IntegrityError:
+        # Outro upload do mesmo conteúdo gravou primeiro
+        db.session.rollback()
+        if conteudo.caminho:
+            os.unlink(caminho_conteudo(conteudo))
+        return ConteudoBinario.query.filter_by(sha256=sha256).one()
+    return conteudo
+
+
+def salvar_upload(stream, nome, mimetype, limite=None, armazenamento=None, tamanho_bloco=None):
+    """Grava o arquivo lido de ``stream`` e devolve o ``ArquivoBinario`` (com commit).
+
+    Raises:
+        ArquivoMuitoGrandeError: se o conteúdo passar de ``limite`` bytes
+        ValueError: armazenamento desconhecido ou ``BINARIOS_BLOCO_BYTES`` não positivo
+    """
+    armazenamento = armazenamento or config_app("BINARIOS_ARMAZENAMENTO", None) or DISCO
+    if armazenamento not in (DISCO, BLOCOS):
+        raise ValueError(f"Armazenamento de binários inválido: {armazenamento}")
+    tamanho_bloco = tamanho_bloco or config_positivo("BINARIOS_BLOCO_BYTES", BLOCO_PADRAO)
+    diretorio = _diretorio() if armazenamento == DISCO else tempfile.gettempdir()
+
+    temporario, sha256, tamanho = _copiar_para_temporario(stream, limite, tamanho_bloco, diretorio)
+    try:
+        conteudo = _obter_ou_criar_conteudo(temporario, sha256, tamanho, armazenamento, tamanho_bloco)
+        arquivo = ArquivoBinario(nome=nome, mimetype=mimetype, conteudo_id=conteudo.id)
+        db.session.add(arquivo)
+        db.session.commit()
+        return arquivo
+    finally:
+        if os.path.exists(temporario):
+            os.unlink(temporario)
+
+
+class LeitorBlocos(io.RawIOBase):
+    """Arquivo somente leitura sobre ``bloco_binario``, um bloco na memória por vez.
+
+    Usa conexões próprias do engine porque a resposta é consumida depois que
+    o contexto da requisição (e a sessão) já foi encerrado.
+    """
+
+    def __init__(self, engine, conteudo):
+        super().__init__()
+        self._engine = engine
+        self._conteudo_id = conteudo.id
+        self._tamanho = conteudo.tamanho
+        self._tamanho_bloco = conteudo.tamanho_bloco
+        self._posicao = 0
+        self._bloco = (None, b"")
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._posicao
+
+    def seek(self, deslocamento, origem=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._posicao, io.SEEK_END: self._tamanho}[origem]
+        self._posicao = max(0, base + deslocamento)
+        return self._posicao
+
+    def _ler_bloco(self, indice):
+        if self._bloco[0] != indice:
+            with self._engine.connect() as conexao:
+                dados = conexao.execute(
+                    select(BlocoBinario.dados).where(
+                        BlocoBinario.conteudo_id == self._conteudo_id,
+                        BlocoBinario.indice == indice,
+                    )
+                ).scalar()
+            self._bloco = (indice, bytes(dados or b""))
+        return self._bloco[1]
+
+    def readinto(self, buffer):
+        if self._posicao >= self._tamanho:
+            return 0
+        indice, inicio = divmod(self._posicao, self._tamanho_bloco)
+        dados = self._ler_bloco(indice)[inicio:inicio + len(buffer)]
+        buffer[:len(dados)] = dados
+        self._posicao += len(dados)
+        return len(dados)
+
+
+def resposta_download(arquivo, as_attachment=True):
+    """Resposta em streaming do arquivo, com ``ETag`` e ``Range``."""
+    conteudo = arquivo.conteudo_binario
+    opcoes = {"mimetype": arquivo.mimetype, "as_attachment": as_attachment, "download_name": arquivo.nome}
+
+    if conteudo is None:
+        # Legado: conteúdo inteiro na própria linha
+        return send_file(io.BytesIO(arquivo.conteudo or b""), conditional=True, **opcoes)
+
+    if conteudo.armazenamento == DISCO:
+        return send_file(
+            caminho_conteudo(conteudo), conditional=True, etag=conteudo.sha256, **opcoes
+        )
+
+    resposta = send_file(
+        LeitorBlocos(db.engine, conteudo), conditional=False, etag=conteudo.sha256, **opcoes
+    )
+    resposta.content_length = conteudo.tamanho
+    return resposta.make_conditional(request.environ, accept_ranges=True, complete_length=conteudo.tamanho)
@@ -10,9 +10,10 @@ from models import (
 )
 from models.relatorio_bi import (
     RelatorioBI, MetricaBI, DashboardBI, WidgetBI,
-    ExportacaoRelatorio, CacheRelatorio, AlertasBI
+    ExportacaoRelatorio, AlertasBI
 )
-from sqlalchemy import func, text, and_, or_, desc, asc, case, cast
+from sqlalchemy import func, text, and_, or_, desc, asc, case, cast, select
+from sqlalchemy.orm import aliased
 from sqlalchemy.types import Float
 from datetime import datetime, timedelta, date
 import json
@@ -20,6 +21,9 @@ import hashlib
 from typing import Dict, List, Any, Optional, Tuple
 import logging
 
+from services import bi_fatos_service
+from services.bi_cache import bi_cache, etiqueta_cliente
+
 logger = logging.getLogger(__name__)
 
 class BIAnalyticsService:
@@ -33,31 +37,21 @@ class BIAnalyticsService:
         try:
             # Verificar cache primeiro
             cache_key = f"kpis_executivos_{cliente_id}_{hashlib.md5(str(filtros).encode()).hexdigest()}"
-            cached_data = self._get_cached_data(cache_key)
-            if cached_data:
-                return cached_data
             
             # Aplicar filtros base
             query_base = self._aplicar_filtros_base(cliente_id, filtros)
             
-            # KPIs principais
-            kpis = {
-                'inscricoes_totais': self._calcular_inscricoes_totais(query_base),
-                'usuarios_unicos': self._calcular_usuarios_unicos(query_base),
-                'taxa_conversao': self._calcular_taxa_conversao(query_base),
-                'receita_total': self._calcular_receita_total(query_base),
-                'ticket_medio': self._calcular_ticket_medio(query_base),
-                'taxa_presenca': self._calcular_taxa_presenca(query_base),
-                'satisfacao_media': self._calcular_satisfacao_media(query_base),
-                'nps': self._calcular_nps(query_base),
-                'crescimento_mensal': self._calcular_crescimento_mensal(query_base),
-                'retencao_participantes': self._calcular_retencao_participantes(query_base)
-            }
-            
-            # Salvar no cache
-            self._set_cached_data(cache_key, kpis, 'kpis')
+            def calcular():
+                # KPIs principais
+                return {
+                    **self._calcular_kpis_agregados(query_base),
+                    'crescimento_mensal': self._calcular_crescimento_mensal(query_base),
+                    'retencao_participantes': self._calcular_retencao_participantes(query_base)
+                }
             
-            return kpis
+            return bi_cache.obter_ou_calcular(
+                cache_key, calcular, etiquetas=[etiqueta_cliente(cliente_id)], ttl=self.cache_duration
+            )
             
         except Exception as e:
             logger.error(f"Erro ao calcular KPIs executivos: {str(e)}")
@@ -100,66 +94,167 @@ class BIAnalyticsService:
             logger.error(f"Erro ao gerar análise de tendências: {str(e)}")
             return {}
     
-    def gerar_analise_geografica(self, cliente_id: int, filtros: Dict = None) -> Dict[str, Any]:
-        """Gera análise geográfica detalhada"""
-        try:
-            # Dados por estado
-            dados_estados = db.session.query(
-                Oficina.estado,
-                func.count(Inscricao.id).label('inscricoes'),
-                func.count(Checkin.id).label('presencas'),
-                func.coalesce(func.sum(cast(InscricaoTipo.preco, Float)), 0).label('receita')
-            ).join(Inscricao, Oficina.id == Inscricao.oficina_id)\
-             .outerjoin(Checkin, Checkin.oficina_id == Oficina.id)\
-             .outerjoin(InscricaoTipo, Inscricao.tipo_inscricao_id == InscricaoTipo.id)\
-             .filter(Oficina.cliente_id == cliente_id)\
-             .group_by(Oficina.estado).all()
+    def gerar_analise_geografica(self, cliente_id: int, filtros: Dict = None) -> Dict[str, Any]:
+        """Gera análise geográfica detalhada
+
+        Inscrições, check-ins e feedbacks são agregados por oficina em
+        subconsultas separadas e só então somados por (estado, cidade), sem o
+        produto cartesiano de um JOIN direto entre as três tabelas. Aceita
+        ``evento_id``, ``estado`` (drill-down para as cidades de um estado),
+        ``data_inicio`` e ``data_fim`` nos filtros.
+        """
+        try:
+            filtros_geo = self._normalizar_filtros_geograficos(filtros)
+            cache_key = (
+                f"analise_geografica_{cliente_id}_"
+                f"{hashlib.md5(json.dumps(filtros_geo, sort_keys=True, default=str).encode()).hexdigest()}"
+            )
+            return bi_cache.obter_ou_calcular(
+                cache_key,
+                lambda: self._montar_analise_geografica(cliente_id, filtros_geo),
+                etiquetas=[etiqueta_cliente(cliente_id)],
+                ttl=self.cache_duration,
+            )
 
-            # Dados por cidade
-            dados_cidades = db.session.query(
-                Oficina.cidade,
-                Oficina.estado,
-                func.count(Inscricao.id).label('inscricoes'),
-                func.count(Checkin.id).label('presencas'),
-                func.avg(Feedback.rating).label('satisfacao_media')
-            ).join(Inscricao, Oficina.id == Inscricao.oficina_id)\
-             .outerjoin(Checkin, Checkin.oficina_id == Oficina.id)\
-             .outerjoin(Feedback, Feedback.oficina_id == Oficina.id)\
-             .filter(Oficina.cliente_id == cliente_id)\
-             .group_by(Oficina.cidade, Oficina.estado).all()
-            
-            # Rankings
-            ranking_estados = sorted(dados_estados, key=lambda x: x.inscricoes, reverse=True)
-            ranking_cidades = sorted(dados_cidades, key=lambda x: x.inscricoes, reverse=True)
-            
-            return {
-                'estados': [{
-                    'estado': item.estado,
-                    'inscricoes': item.inscricoes,
-                    'presencas': item.presencas,
-                    'receita': float(item.receita or 0),
-                    'taxa_presenca': (item.presencas / item.inscricoes * 100) if item.inscricoes > 0 else 0
-                } for item in dados_estados],
-                'cidades': [{
-                    'cidade': item.cidade,
-                    'estado': item.estado,
-                    'inscricoes': item.inscricoes,
-                    'presencas': item.presencas,
-                    'satisfacao_media': float(item.satisfacao_media or 0),
-                    'taxa_presenca': (item.presencas / item.inscricoes * 100) if item.inscricoes > 0 else 0
-                } for item in dados_cidades],
-                'rankings': {
-                    'estados': ranking_estados[:10],
-                    'cidades': ranking_cidades[:20]
-                },
-                'metricas_gerais': self._calcular_metricas_geograficas(dados_estados, dados_cidades)
-            }
-            
         except Exception as e:
             logger.error(f"Erro ao gerar análise geográfica: {str(e)}")
             db.session.rollback()
             return {}
-    
+
+    def _montar_analise_geografica(self, cliente_id: int, filtros_geo: Dict[str, Any]) -> Dict[str, Any]:
+        """Monta a análise geográfica (sem cache)"""
+        dados_cidades = self._consultar_dados_cidades(cliente_id, filtros_geo)
+
+        # Estados somados a partir das cidades (a satisfação é ponderada)
+        estados = {}
+        for item in dados_cidades:
+            estado = estados.setdefault(item.estado, {
+                'estado': item.estado, 'inscricoes': 0, 'presencas': 0,
+                'receita': 0.0, 'soma_notas': 0, 'avaliacoes': 0,
+            })
+            estado['inscricoes'] += int(item.inscricoes or 0)
+            estado['presencas'] += int(item.presencas or 0)
+            estado['receita'] += float(item.receita or 0)
+            estado['soma_notas'] += int(item.soma_notas or 0)
+            estado['avaliacoes'] += int(item.avaliacoes or 0)
+
+        lista_estados = [{
+            'estado': item['estado'],
+            'inscricoes': item['inscricoes'],
+            'presencas': item['presencas'],
+            'receita': item['receita'],
+            'satisfacao_media': item['soma_notas'] / item['avaliacoes'] if item['avaliacoes'] else 0,
+            'taxa_presenca': (item['presencas'] / item['inscricoes'] * 100) if item['inscricoes'] > 0 else 0
+        } for item in estados.values()]
+        lista_cidades = [{
+            'cidade': item.cidade,
+            'estado': item.estado,
+            'inscricoes': int(item.inscricoes or 0),
+            'presencas': int(item.presencas or 0),
+            'receita': float(item.receita or 0),
+            'satisfacao_media': int(item.soma_notas or 0) / item.avaliacoes if item.avaliacoes else 0,
+            'taxa_presenca': (int(item.presencas or 0) / item.inscricoes * 100) if item.inscricoes else 0
+        } for item in dados_cidades]
+
+        # Rankings
+        ranking_estados = sorted(lista_estados, key=lambda x: x['inscricoes'], reverse=True)
+        ranking_cidades = sorted(lista_cidades, key=lambda x: x['inscricoes'], reverse=True)
+
+        return {
+            'filtros': filtros_geo,
+            'estados': lista_estados,
+            'cidades': lista_cidades,
+            'rankings': {
+                'estados': ranking_estados[:10],
+                'cidades': ranking_cidades[:20]
+            },
+            'metricas_gerais': self._calcular_metricas_geograficas(lista_estados, lista_cidades)
+        }
+
+    def _normalizar_filtros_geograficos(self, filtros: Dict = None) -> Dict[str, Any]:
+        """Mantém só os filtros da análise geográfica, já convertidos"""
+        filtros = filtros or {}
+        normalizados = {}
+        if filtros.get('evento_id'):
+            normalizados['evento_id'] = int(filtros['evento_id'])
+        if filtros.get('estado'):
+            normalizados['estado'] = str(filtros['estado']).upper()
+        for chave in ('data_inicio', 'data_fim'):
+            valor = filtros.get(chave)
+            if isinstance(valor, str) and valor:
+                valor = datetime.fromisoformat(valor)
+            if isinstance(valor, datetime):
+                valor = valor.date()
+            if isinstance(valor, date):
+                normalizados[chave] = valor.isoformat()
+        return normalizados
+
+    def _consultar_dados_cidades(self, cliente_id: int, filtros_geo: Dict[str, Any]) -> List:
+        """Uma linha por (estado, cidade) com os totais de cada dimensão"""
+        inicio = fim = None
+        if 'data_inicio' in filtros_geo:
+            inicio = datetime.fromisoformat(filtros_geo['data_inicio'])
+        if 'data_fim' in filtros_geo:
+            # Data final inclusiva: até o início do dia seguinte
+            fim = datetime.fromisoformat(filtros_geo['data_fim']) + timedelta(days=1)
+
+        def periodo(coluna):
+            condicoes = []
+            if inicio:
+                condicoes.append(coluna >= inicio)
+            if fim:
+                condicoes.append(coluna < fim)
+            return condicoes
+
+        # Oficinas do recorte; cada subconsulta só agrega linhas delas
+        filtros_oficina = [Oficina.cliente_id == cliente_id]
+        if 'evento_id' in filtros_geo:
+            filtros_oficina.append(Oficina.evento_id == filtros_geo['evento_id'])
+        if 'estado' in filtros_geo:
+            filtros_oficina.append(Oficina.estado == filtros_geo['estado'])
+        oficinas = select(Oficina.id).where(*filtros_oficina)
+
+        inscricoes = select(
+            Inscricao.oficina_id.label('oficina_id'),
+            func.count(Inscricao.id).label('inscricoes'),
+            func.sum(case(
+                (Inscricao.status_pagamento == 'approved', cast(InscricaoTipo.preco, Float))
+            )).label('receita'),
+        ).outerjoin(InscricaoTipo, Inscricao.tipo_inscricao_id == InscricaoTipo.id)\
+         .where(Inscricao.oficina_id.in_(oficinas), *periodo(Inscricao.created_at))\
+         .group_by(Inscricao.oficina_id).subquery()
+
+        presencas = select(
+            Checkin.oficina_id.label('oficina_id'),
+            func.count(Checkin.id).label('presencas'),
+        ).where(Checkin.oficina_id.in_(oficinas), *periodo(Checkin.data_hora))\
+         .group_by(Checkin.oficina_id).subquery()
+
+        avaliacoes = select(
+            Feedback.oficina_id.label('oficina_id'),
+            func.sum(Feedback.rating).label('soma_notas'),
+            func.count(Feedback.rating).label('avaliacoes'),
+        ).where(Feedback.oficina_id.in_(oficinas), *periodo(Feedback.created_at))\
+         .group_by(Feedback.oficina_id).subquery()
+
+        total_inscricoes = func.coalesce(func.sum(inscricoes.c.inscricoes), 0)
+        query = db.session.query(
+            Oficina.estado,
+            Oficina.cidade,
+            total_inscricoes.label('inscricoes'),
+            func.coalesce(func.sum(presencas.c.presencas), 0).label('presencas'),
+            func.coalesce(func.sum(inscricoes.c.receita), 0).label('receita'),
+            func.coalesce(func.sum(avaliacoes.c.soma_notas), 0).label('soma_notas'),
+            func.coalesce(func.sum(avaliacoes.c.avaliacoes), 0).label('avaliacoes'),
+        ).outerjoin(inscricoes, inscricoes.c.oficina_id == Oficina.id)\
+         .outerjoin(presencas, presencas.c.oficina_id == Oficina.id)\
+         .outerjoin(avaliacoes, avaliacoes.c.oficina_id == Oficina.id)\
+         .filter(*filtros_oficina)
+
+        return query.group_by(Oficina.estado, Oficina.cidade)\
+            .having(total_inscricoes > 0)\
+            .order_by(Oficina.estado, Oficina.cidade).all()
+    
     def gerar_analise_qualidade(self, cliente_id: int, filtros: Dict = None) -> Dict[str, Any]:
         """Gera análise de qualidade e satisfação"""
         try:
@@ -381,120 +476,99 @@ class BIAnalyticsService:
         filtros['cliente_id'] = cliente_id
         return filtros
     
-    def _calcular_inscricoes_totais(self, query_base: Dict) -> int:
-        """Calcula total de inscrições"""
-        query = Inscricao.query.join(Oficina, Inscricao.oficina_id == Oficina.id)\
-            .filter(Oficina.cliente_id == query_base['cliente_id'])
-        
-        if 'data_inicio' in query_base:
-            query = query.filter(Inscricao.created_at >= query_base['data_inicio'])
-        if 'data_fim' in query_base:
-            query = query.filter(Inscricao.created_at <= query_base['data_fim'])
-        
-        return query.count()
-    
-    def _calcular_usuarios_unicos(self, query_base: Dict) -> int:
-        """Calcula usuários únicos"""
-        query = Inscricao.query.join(Oficina, Inscricao.oficina_id == Oficina.id)\
-            .filter(Oficina.cliente_id == query_base['cliente_id'])
-        
-        if 'data_inicio' in query_base:
-            query = query.filter(Inscricao.created_at >= query_base['data_inicio'])
-        if 'data_fim' in query_base:
-            query = query.filter(Inscricao.created_at <= query_base['data_fim'])
-        
-        return query.with_entities(Inscricao.usuario_id).distinct().count()
-    
-    def _calcular_taxa_conversao(self, query_base: Dict) -> float:
-        """Calcula taxa de conversão"""
-        inscricoes = self._calcular_inscricoes_totais(query_base)
-        confirmados = Inscricao.query.join(Oficina, Inscricao.oficina_id == Oficina.id)\
-            .filter(Oficina.cliente_id == query_base['cliente_id'])\
-            .filter(Inscricao.status_pagamento == 'approved').count()
-        
-        return (confirmados / inscricoes * 100) if inscricoes > 0 else 0
-    
-    def _calcular_receita_total(self, query_base: Dict) -> float:
-        """Calcula receita total"""
-        query = db.session.query(func.coalesce(func.sum(cast(InscricaoTipo.preco, Float)), 0.0))\
-            .join(Inscricao, Inscricao.tipo_inscricao_id == InscricaoTipo.id)\
-            .filter(Inscricao.cliente_id == query_base['cliente_id'])\
-            .filter(Inscricao.status_pagamento == 'approved')
-
-        if 'data_inicio' in query_base:
-            query = query.filter(Inscricao.created_at >= query_base['data_inicio'])
-        if 'data_fim' in query_base:
-            query = query.filter(Inscricao.created_at <= query_base['data_fim'])
-
-        return float(query.scalar() or 0)
-
-    def _calcular_ticket_medio(self, query_base: Dict) -> float:
-        """Calcula ticket médio"""
-        receita = self._calcular_receita_total(query_base)
-        transacoes = Inscricao.query.join(Oficina, Inscricao.oficina_id == Oficina.id)\
-            .filter(Oficina.cliente_id == query_base['cliente_id'])\
-            .filter(Inscricao.status_pagamento == 'approved')
-
-        if 'data_inicio' in query_base:
-            transacoes = transacoes.filter(Inscricao.created_at >= query_base['data_inicio'])
-        if 'data_fim' in query_base:
-            transacoes = transacoes.filter(Inscricao.created_at <= query_base['data_fim'])
-
-        transacoes_count = transacoes.count()
-
-        return receita / transacoes_count if transacoes_count > 0 else 0
-    
-    def _calcular_taxa_presenca(self, query_base: Dict) -> float:
-        """Calcula taxa de presença"""
-        inscricoes = self._calcular_inscricoes_totais(query_base)
-        presencas_query = Checkin.query.outerjoin(Oficina, Checkin.oficina_id == Oficina.id)\
-            .filter(
-                or_(
-                    Checkin.cliente_id == query_base['cliente_id'],
-                    Oficina.cliente_id == query_base['cliente_id']
-                )
-            )
-
-        if 'data_inicio' in query_base:
-            presencas_query = presencas_query.filter(Checkin.data_hora >= query_base['data_inicio'])
-        if 'data_fim' in query_base:
-            presencas_query = presencas_query.filter(Checkin.data_hora <= query_base['data_fim'])
-
-        presencas = presencas_query.count()
-        
-        return (presencas / inscricoes * 100) if inscricoes > 0 else 0
-    
-    def _calcular_satisfacao_media(self, query_base: Dict) -> float:
-        """Calcula satisfação média"""
-        query = Feedback.query.join(Oficina, Feedback.oficina_id == Oficina.id)\
-            .filter(Oficina.cliente_id == query_base['cliente_id'])
-        
-        if 'data_inicio' in query_base:
-            query = query.filter(Feedback.created_at >= query_base['data_inicio'])
-        if 'data_fim' in query_base:
-            query = query.filter(Feedback.created_at <= query_base['data_fim'])
-        
-        return float(query.with_entities(func.avg(Feedback.rating)).scalar() or 0)
-    
-    def _calcular_nps(self, query_base: Dict) -> int:
-        """Calcula NPS"""
-        nps_data = self._calcular_nps_detalhado(query_base['cliente_id'])
-        return nps_data['nps']
-    
-    def _calcular_nps_detalhado(self, cliente_id: int) -> Dict[str, int]:
-        """Calcula NPS detalhado"""
-        feedbacks = Feedback.query.join(Oficina, Feedback.oficina_id == Oficina.id)\
-            .filter(Oficina.cliente_id == cliente_id)\
-            .filter(Feedback.rating.isnot(None)).all()
-        
-        promotores = sum(1 for f in feedbacks if f.rating >= 4)
-        neutros = sum(1 for f in feedbacks if f.rating == 3)
-        detratores = sum(1 for f in feedbacks if f.rating <= 2)
-        total = len(feedbacks)
-        
+    def _calcular_kpis_agregados(self, query_base: Dict) -> Dict[str, Any]:
+        """Calcula os KPIs executivos em duas consultas agregadas.
+
+        A primeira percorre as inscrições uma única vez e separa, com somas
+        condicionais, o volume das oficinas do cliente (inscrições, usuários
+        únicos, aprovadas) e a receita das inscrições do cliente. A segunda
+        percorre os feedbacks do cliente (satisfação e faixas do NPS) e traz a
+        contagem de check-ins numa subconsulta escalar.
+        """
+        cliente_id = query_base['cliente_id']
+        data_inicio = query_base.get('data_inicio')
+        data_fim = query_base.get('data_fim')
+
+        da_oficina = Oficina.cliente_id == cliente_id
+        aprovada = Inscricao.status_pagamento == 'approved'
+        filtros = [or_(da_oficina, Inscricao.cliente_id == cliente_id)]
+        if data_inicio:
+            filtros.append(Inscricao.created_at >= data_inicio)
+        if data_fim:
+            filtros.append(Inscricao.created_at <= data_fim)
+
+        inscricoes, usuarios, aprovadas, receita = db.session.query(
+            func.coalesce(func.sum(case((da_oficina, 1), else_=0)), 0),
+            func.count(func.distinct(case((da_oficina, Inscricao.usuario_id)))),
+            func.coalesce(func.sum(case((and_(da_oficina, aprovada), 1), else_=0)), 0),
+            func.coalesce(func.sum(case(
+                (and_(Inscricao.cliente_id == cliente_id, aprovada), cast(InscricaoTipo.preco, Float))
+            )), 0.0),
+        ).select_from(Inscricao)\
+         .outerjoin(Oficina, Inscricao.oficina_id == Oficina.id)\
+         .outerjoin(InscricaoTipo, Inscricao.tipo_inscricao_id == InscricaoTipo.id)\
+         .filter(*filtros).one()
+
+        oficina_checkin = aliased(Oficina)
+        filtros_checkin = [or_(Checkin.cliente_id == cliente_id, oficina_checkin.cliente_id == cliente_id)]
+        if data_inicio:
+            filtros_checkin.append(Checkin.data_hora >= data_inicio)
+        if data_fim:
+            filtros_checkin.append(Checkin.data_hora <= data_fim)
+        presencas = select(func.count(Checkin.id))\
+            .select_from(Checkin)\
+            .outerjoin(oficina_checkin, Checkin.oficina_id == oficina_checkin.id)\
+            .where(*filtros_checkin)\
+            .correlate(None)\
+            .scalar_subquery()
+
+        # A satisfação respeita o período; o NPS considera todos os feedbacks
+        periodo_feedback = []
+        if data_inicio:
+            periodo_feedback.append(Feedback.created_at >= data_inicio)
+        if data_fim:
+            periodo_feedback.append(Feedback.created_at <= data_fim)
+        nota_periodo = case((and_(*periodo_feedback), Feedback.rating)) if periodo_feedback else Feedback.rating
+
+        linha = db.session.query(
+            presencas,
+            func.avg(nota_periodo),
+            *self._colunas_faixas_nps(),
+        ).select_from(Feedback)\
+         .join(Oficina, Feedback.oficina_id == Oficina.id)\
+         .filter(Oficina.cliente_id == cliente_id).one()
+        presencas, satisfacao, promotores, neutros, detratores = linha
+
+        inscricoes = int(inscricoes or 0)
+        aprovadas = int(aprovadas or 0)
+        receita = float(receita or 0)
+        return {
+            'inscricoes_totais': inscricoes,
+            'usuarios_unicos': int(usuarios or 0),
+            'taxa_conversao': (aprovadas / inscricoes * 100) if inscricoes > 0 else 0,
+            'receita_total': receita,
+            'ticket_medio': receita / aprovadas if aprovadas > 0 else 0,
+            'taxa_presenca': (int(presencas or 0) / inscricoes * 100) if inscricoes > 0 else 0,
+            'satisfacao_media': float(satisfacao or 0),
+            'nps': self._montar_nps(promotores, neutros, detratores)['nps'],
+        }
+
+    @staticmethod
+    def _colunas_faixas_nps():
+        """Promotores (4-5), neutros (3) e detratores (1-2) somados no banco"""
+        return (
+            func.coalesce(func.sum(case((Feedback.rating >= 4, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Feedback.rating == 3, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Feedback.rating <= 2, 1), else_=0)), 0),
+        )
+
+    @staticmethod
+    def _montar_nps(promotores, neutros, detratores) -> Dict[str, int]:
+        promotores, neutros, detratores = int(promotores or 0), int(neutros or 0), int(detratores or 0)
+        total = promotores + neutros + detratores
         if total == 0:
             return {'nps': 0, 'promotores': 0, 'neutros': 0, 'detratores': 0}
-        
+
         nps = ((promotores - detratores) / total) * 100
         return {
             'nps': int(nps),
@@ -502,26 +576,98 @@ class BIAnalyticsService:
             'neutros': neutros,
             'detratores': detratores
         }
-    
+
+    def _calcular_nps_detalhado(self, cliente_id: int) -> Dict[str, int]:
+        """Calcula NPS detalhado"""
+        faixas = db.session.query(*self._colunas_faixas_nps())\
+            .select_from(Feedback)\
+            .join(Oficina, Feedback.oficina_id == Oficina.id)\
+            .filter(Oficina.cliente_id == cliente_id)\
+            .filter(Feedback.rating.isnot(None)).one()
+        return self._montar_nps(*faixas)
+    
+    def _data_referencia(self, query_base: Dict) -> date:
+        """Data final da análise (``data_fim`` dos filtros ou hoje)"""
+        referencia = query_base.get('data_fim')
+        if isinstance(referencia, str) and referencia:
+            referencia = datetime.fromisoformat(referencia)
+        if isinstance(referencia, datetime):
+            return referencia.date()
+        return referencia or datetime.utcnow().date()
+
     def _calcular_crescimento_mensal(self, query_base: Dict) -> float:
-        """Calcula crescimento mensal"""
-        # Implementar cálculo de crescimento
-        return 0.0
+        """Calcula crescimento mensal
+
+        Inscrições dos últimos 30 dias contra os 30 anteriores, lidas dos
+        fatos diários.
+        """
+        fim = self._data_referencia(query_base)
+        atual = bi_fatos_service.total_inscricoes(
+            query_base['cliente_id'], fim - timedelta(days=29), fim
+        )
+        anterior = bi_fatos_service.total_inscricoes(
+            query_base['cliente_id'], fim - timedelta(days=59), fim - timedelta(days=30)
+        )
+        return ((atual - anterior) / anterior * 100) if anterior > 0 else 0.0
     
     def _calcular_retencao_participantes(self, query_base: Dict) -> float:
-        """Calcula retenção de participantes"""
-        # Implementar cálculo de retenção
-        return 0.0
+        """Calcula retenção de participantes
+
+        Percentual dos participantes do mês anterior que voltaram a se
+        inscrever no mês de referência.
+        """
+        mes_atual = self._data_referencia(query_base).replace(day=1)
+        mes_anterior = (mes_atual - timedelta(days=1)).replace(day=1)
+        return bi_fatos_service.retencao(query_base['cliente_id'], mes_anterior, mes_atual)
     
     def _obter_dados_diarios(self, cliente_id: int, data_inicio: datetime, data_fim: datetime) -> List[Dict]:
-        """Obtém dados diários para análise de tendências"""
-        # Implementar consulta de dados diários
-        return []
+        """Obtém dados diários para análise de tendências (dias sem movimento vêm zerados)"""
+        inicio = data_inicio.date() if isinstance(data_inicio, datetime) else data_inicio
+        fim = data_fim.date() if isinstance(data_fim, datetime) else data_fim
+        serie = bi_fatos_service.serie_diaria(cliente_id, inicio, fim)
+
+        dados = []
+        dia = inicio
+        while dia <= fim:
+            inscricoes, aprovados, receita, checkins, feedbacks, soma_notas = serie.get(dia, (0,) * 6)
+            feedbacks = int(feedbacks or 0)
+            dados.append({
+                'data': dia.isoformat(),
+                'inscricoes': int(inscricoes or 0),
+                'pagamentos_aprovados': int(aprovados or 0),
+                'receita': float(receita or 0),
+                'presencas': int(checkins or 0),
+                'feedbacks': feedbacks,
+                'satisfacao': int(soma_notas or 0) / feedbacks if feedbacks else 0
+            })
+            dia += timedelta(days=1)
+        return dados
     
     def _analisar_tendencia(self, dados: List[Dict], metrica: str) -> Dict[str, Any]:
-        """Analisa tendência de uma métrica"""
-        # Implementar análise de tendência
-        return {'direcao': 'estavel', 'magnitude': 0, 'confianca': 0}
+        """Analisa tendência de uma métrica
+
+        Regressão linear simples sobre a série diária: ``magnitude`` é a
+        inclinação em % da média por dia e ``confianca`` o R².
+        """
+        valores = [float(item.get(metrica) or 0) for item in dados]
+        n = len(valores)
+        if n < 2:
+            return {'direcao': 'estavel', 'magnitude': 0, 'confianca': 0}
+
+        media_x = (n - 1) / 2
+        media_y = sum(valores) / n
+        sxx = sum((x - media_x) ** 2 for x in range(n))
+        sxy = sum((x - media_x) * (y - media_y) for x, y in enumerate(valores))
+        syy = sum((y - media_y) ** 2 for y in valores)
+
+        inclinacao = sxy / sxx
+        confianca = (sxy * sxy) / (sxx * syy) if syy else 0
+        magnitude = inclinacao / media_y * 100 if media_y else 0
+        if abs(magnitude) < 1 or confianca < 0.1:
+            direcao = 'estavel'
+        else:
+            direcao = 'alta' if inclinacao > 0 else 'queda'
+        return {'direcao': direcao, 'magnitude': round(magnitude, 2), 'confianca': round(confianca, 2)}
     
     def _identificar_padroes(self, dados: List[Dict]) -> List[Dict]:
         """Identifica padrões nos dados"""
@@ -597,33 +743,3 @@ class BIAnalyticsService:
             return float(resultado or 0)
         except Exception:
             return 0.0
-    
-    def _get_cached_data(self, cache_key: str) -> Optional[Dict]:
-        """Obtém dados do cache"""
-        cache = CacheRelatorio.query.filter_by(chave_cache=cache_key).first()
-        if cache and not cache.is_expired():
-            cache.hits += 1
-            db.session.commit()
-            return cache.get_dados_dict()
-        return None
-    
-    def _set_cached_data(self, cache_key: str, dados: Dict, tipo_dados: str) -> None:
-        """Salva dados no cache"""
-        try:
-            # Remover cache expirado
-            CacheRelatorio.query.filter(CacheRelatorio.data_expiracao < datetime.utcnow()).delete()
-            
-            # Criar novo cache
-            cache = CacheRelatorio(
-                chave_cache=cache_key,
-                dados_cache=json.dumps(dados),
-                tipo_dados=tipo_dados,
-                filtros_hash=hashlib.md5(cache_key.encode()).hexdigest(),
-                data_expiracao=datetime.utcnow() + timedelta(seconds=self.cache_duration)
-            )
-            
-            db.session.add(cache)
-            db.session.commit()
-        except Exception as e:
-            logger.error(f"Erro ao salvar cache: {str(e)}")
-            db.session.rollback()
@@ -0,0 +1,368 @@
+"""Cache em dois níveis para os relatórios de BI.
+
+Um LRU com TTL por processo fica na frente de um backend compartilhado (Redis
+quando ``BI_CACHE_REDIS_URL``/``REDIS_URL`` está configurado e responde; senão
+um substituto em memória com a mesma interface). Um acerto local não toca o
+banco nem desserializa nada.
+
+``obter_ou_calcular`` faz *singleflight*: requisições simultâneas pela mesma
+chave esperam o cálculo da primeira em vez de repeti-lo — entre threads com um
+lock por chave e entre processos com um lock ``SET NX`` no backend.
+
+A invalidação é por etiqueta (``cliente:<id>``): cada etiqueta tem uma versão
+no backend que entra na chave efetiva, então ``invalidar_cliente`` é um
+``INCR`` e as entradas antigas simplesmente expiram. Outros processos percebem
+a nova versão em até ``VERSAO_TTL`` segundos.
+
+Sem Redis as versões ficam em cada processo e a invalidação não alcança os
+outros workers do gunicorn; por isso, nesse modo, o TTL cai para
+``BI_CACHE_TTL_MEMORIA`` e a subida avisa quando há vários workers.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from cachetools import TTLCache
+
+from services.comum import config_app, config_positivo
+
+logger = logging.getLogger(__name__)
+
+TTL_PADRAO = 3600
+TTL_MEMORIA_PADRAO = 60
+TTL_LOCAL_PADRAO = 60
+MAX_LOCAL_PADRAO = 512
+VERSAO_TTL = 2
+LOCK_TTL = 30
+PREFIXO = "bi"
+ETIQUETA_GLOBAL = "global"
+
+
+def etiqueta_cliente(cliente_id):
+    return f"cliente:{cliente_id}"
+
+
+class BackendMemoria:
+    """Substituto local do Redis: chave/valor com expiração, só neste processo."""
+
+    nome = "memoria"
+
+    def __init__(self):
+        self._dados = {}
+        self._lock = threading.Lock()
+
+    def _vivo(self, chave, agora):
+        item = self._dados.get(chave)
+        if item is None:
+            return None
+        valor, expira = item
+        if expira is not None and expira <= agora:
+            del self._dados[chave]
+            return None
+        return valor
+
+    def get(self, chave):
+        with self._lock:
+            return self._vivo(chave, time.monotonic())
+
+    def set(self, chave, valor, ttl=None):
+        with self._lock:
+            self._dados[chave] = (valor, time.monotonic() + ttl if ttl else None)
+
+    def add(self, chave, valor, ttl):
+        """Grava só se a chave não existir (``SET NX``)."""
+        with self._lock:
+            agora = time.monotonic()
+            if self._vivo(chave, agora) is not None:
+                return False
+            self._dados[chave] = (valor, agora + ttl)
+            return True
+
+    def delete(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def incr(self, chave):
+        with self._lock:
+            valor = int(self._vivo(chave, time.monotonic()) or 0) + 1
+            self._dados[chave] = (str(valor), None)
+            return valor
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+
+class BackendRedis:
+    """Backend compartilhado entre processos."""
+
+    nome = "redis"
+
+    def __init__(self, cliente):
+        self._redis = cliente
+
+    def get(self, chave):
+        valor = self._redis.get(chave)
+        return valor.decode("utf-8") if isinstance(valor, bytes) else valor
+
+    def set(self, chave, valor, ttl=None):
+        self._redis.set(chave, valor, ex=ttl)
+
+    def add(self, chave, valor, ttl):
+        return bool(self._redis.set(chave, valor, ex=ttl, nx=True))
+
+    def delete(self, chave):
+        self._redis.delete(chave)
+
+    def incr(self, chave):
+        return int(self._redis.incr(chave))
+
+
+def _criar_backend(url):
+    if not url:
+        return BackendMemoria()
+    try:
+        import redis
+
+        cliente = redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        cliente.ping()
+        return BackendRedis(cliente)
+    except Exception as exc:  # ImportError, ConnectionError, TimeoutError...
+        logger.warning("Redis indisponível para o cache de BI (%s); usando memória local", exc)
+        return BackendMemoria()
+
+
+def _varios_workers():
+    """Indica se o app provavelmente roda em mais de um processo (gunicorn)."""
+    try:
+        workers = int(os.environ.get("WEB_CONCURRENCY") or 0)
+    except ValueError:
+        workers = 0
+    return workers > 1 or "gunicorn" in sys.modules
+
+
+class BICache:
+    """LRU local com TTL na frente de um backend compartilhado."""
+
+    def __init__(self, backend=None, ttl=None, ttl_local=None, max_local=None):
+        self._backend = backend
+        self._ttl = ttl
+        self._ttl_local = ttl_local
+        self._max_local = max_local
+        self._local = None
+        self._versoes = TTLCache(maxsize=4096, ttl=VERSAO_TTL)
+        self._lock = threading.Lock()
+        self._em_voo = {}
+        self._stats = dict.fromkeys(
+            ("hits_local", "hits_compartilhado", "misses", "calculos", "esperas",
+             "invalidacoes", "erros_backend"),
+            0,
+        )
+
+    # ------------------------------------------------------------------
+    #  Configuração (lida do app na primeira utilização)
+    # ------------------------------------------------------------------
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = _criar_backend(config_app("BI_CACHE_REDIS_URL", None))
+                    if self._backend.nome == BackendMemoria.nome and _varios_workers():
+                        logger.warning(
+                            "Cache de BI sem Redis com vários workers: invalidações não "
+                            "alcançam os outros processos; TTL limitado a %ss",
+                            config_positivo("BI_CACHE_TTL_MEMORIA", TTL_MEMORIA_PADRAO),
+                        )
+        return self._backend
+
+    @property
+    def ttl(self):
+        if self._ttl:
+            return self._ttl
+        ttl = config_positivo("BI_CACHE_TTL", TTL_PADRAO)
+        if self.backend.nome == BackendMemoria.nome:
+            # Versões por processo: o TTL é o único limite para dados defasados
+            ttl = min(ttl, config_positivo("BI_CACHE_TTL_MEMORIA", TTL_MEMORIA_PADRAO))
+        return ttl
+
+    def preparar(self):
+        """Escolhe o backend já na subida do app, para o aviso sair no log cedo."""
+        return self.backend.nome
+
+    def _tier_local(self):
+        if self._local is None:
+            with self._lock:
+                if self._local is None:
+                    self._local = TTLCache(
+                        maxsize=self._max_local or config_positivo("BI_CACHE_LOCAL_MAX", MAX_LOCAL_PADRAO),
+                        ttl=self._ttl_local or config_positivo("BI_CACHE_LOCAL_TTL", TTL_LOCAL_PADRAO),
+                    )
+        return self._local
+
+    def _contar(self, campo, quantidade=1):
+        with self._lock:
+            self._stats[campo] += quantidade
+
+    # ------------------------------------------------------------------
+    #  Versões das etiquetas
+    # ------------------------------------------------------------------
+
+    def _versao(self, etiqueta):
+        with self._lock:
+            versao = self._versoes.get(etiqueta)
+        if versao is not None:
+            return versao
+        try:
+            versao = int(self.backend.get(f"{PREFIXO}:versao:{etiqueta}") or 0)
+        except Exception as exc:
+            self._contar("erros_backend")
+            logger.warning("Falha ao ler versão %s do cache de BI: %s", etiqueta, exc)
+            versao = 0
+        with self._lock:
+            self._versoes[etiqueta] = versao
+        return versao
+
+    def _chave_efetiva(self, chave, etiquetas):
+        versoes = ".".join(
+            f"{etiqueta}={self._versao(etiqueta)}"
+            for etiqueta in (ETIQUETA_GLOBAL, *sorted(etiquetas))
+        )
+        return f"{PREFIXO}:{versoes}:{chave}"
+
+    # ------------------------------------------------------------------
+    #  API
+    # ------------------------------------------------------------------
+
+    def obter_ou_calcular(self, chave, calcular, etiquetas=(), ttl=None):
+        """Devolve o valor em cache ou calcula uma única vez.
+
+        ``calcular`` deve devolver algo serializável em JSON; o valor devolvido
+        é compartilhado entre chamadas e não deve ser alterado.
+        """
+        efetiva = self._chave_efetiva(chave, etiquetas)
+        local = self._tier_local()
+        with self._lock:
+            valor = local.get(efetiva)
+        if valor is not None:
+            self._contar("hits_local")
+            return valor
+
+        valor = self._ler_compartilhado(efetiva)
+        if valor is not None:
+            self._contar("hits_compartilhado")
+            with self._lock:
+                local[efetiva] = valor
+            return valor
+
+        with self._lock:
+            voo = self._em_voo.get(efetiva)
+            lider = voo is None
+            if lider:
+                voo = self._em_voo[efetiva] = {"evento": threading.Event(), "valor": None}
+        if not lider:
+            self._contar("esperas")
+            voo["evento"].wait(LOCK_TTL)
+            if voo["valor"] is not None:
+                return voo["valor"]
+            return self.obter_ou_calcular(chave, calcular, etiquetas, ttl)
+
+        try:
+            valor = self._calcular_com_lock(efetiva, calcular, ttl or self.ttl)
+            voo["valor"] = valor
+            with self._lock:
+                local[efetiva] = valor
+            return valor
+        finally:
+            with self._lock:
+                self._em_voo.pop(efetiva, None)
+            voo["evento"].set()
+
+    def _calcular_com_lock(self, efetiva, calcular, ttl):
+        """Calcula segurando um lock no backend para que outros processos esperem."""
+        lock = f"{efetiva}:lock"
+        try:
+            tem_lock = self.backend.add(lock, "1", LOCK_TTL)
+        except Exception as exc:
+            self._contar("erros_backend")
+            logger.warning("Falha ao obter lock do cache de BI: %s", exc)
+            tem_lock = True
+        if not tem_lock:
+            self._contar("esperas")
+            limite = time.monotonic() + LOCK_TTL
+            while time.monotonic() < limite:
+                time.sleep(0.05)
+                valor = self._ler_compartilhado(efetiva)
+                if valor is not None:
+                    return valor
+        try:
+            self._contar("misses")
+            self._contar("calculos")
+            valor = calcular()
+            self._gravar_compartilhado(efetiva, valor, ttl)
+            return valor
+        finally:
+            if tem_lock:
+                try:
+                    self.backend.delete(lock)
+                except Exception:
+                    self._contar("erros_backend")
+
+    def _ler_compartilhado(self, efetiva):
+        try:
+            bruto = self.backend.get(efetiva)
+        except Exception as exc:
+            self._contar("erros_backend")
+            logger.warning("Falha ao ler o cache de BI: %s", exc)
+            return None
+        return json.loads(bruto) if bruto is not None else None
+
+    def _gravar_compartilhado(self, efetiva, valor, ttl):
+        try:
+            self.backend.set(efetiva, json.dumps(valor, default=str), ttl)
+        except Exception as exc:
+            self._contar("erros_backend")
+            logger.warning("Falha ao gravar no cache de BI: %s", exc)
+
+    def invalidar(self, etiqueta):
+        """Invalida todas as entradas com a etiqueta (em todos os processos)."""
+        try:
+            versao = self.backend.incr(f"{PREFIXO}:versao:{etiqueta}")
+        except Exception as exc:
+            self._contar("erros_backend")
+            logger.warning("Falha ao invalidar %s no cache de BI: %s", etiqueta, exc)
+            return
+        marcador = f"{etiqueta}="
+        with self._lock:
+            self._versoes[etiqueta] = versao
+            self._stats["invalidacoes"] += 1
+            if self._local is not None:
+                for chave in [c for c in self._local.keys() if marcador in c]:
+                    self._local.pop(chave, None)
+
+    def invalidar_cliente(self, cliente_id):
+        self.invalidar(etiqueta_cliente(cliente_id))
+
+    def limpar(self):
+        """Invalida tudo."""
+        self.invalidar(ETIQUETA_GLOBAL)
+
+    def estatisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entradas_locais"] = len(self._local) if self._local is not None else 0
+            stats["em_voo"] = len(self._em_voo)
+        consultas = stats["hits_local"] + stats["hits_compartilhado"] + stats["misses"]
+        stats["taxa_acerto"] = (
+            (stats["hits_local"] + stats["hits_compartilhado"]) / consultas * 100 if consultas else 0
+        )
+        stats["backend"] = self.backend.nome
+        return stats
+
+
+bi_cache = BICache()
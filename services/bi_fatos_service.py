@@ -0,0 +1,418 @@
+"""Tabela de fatos diários do BI com atualização incremental.
+
+``atualizar_fatos`` lê só as inscrições, check-ins e feedbacks com ``id``
+acima do watermark salvo em ``bi_marca_atualizacao``, descobre quais dias de
+quais clientes eles afetam e recalcula apenas esse intervalo de
+``bi_fato_diario`` (cliente × evento × dia).
+
+O watermark sozinho não basta: o ``id`` é atribuído no INSERT, então uma
+transação que comita depois da leitura do ``MAX(id)`` pode deixar linhas
+abaixo dele, e exclusões não mudam o máximo. Por isso os últimos
+``BI_FATOS_JANELA_DIAS`` dias são sempre recalculados a partir das três
+fontes e dos fatos já gravados (o que também pega pagamentos aprovados
+depois da inscrição). Fora da janela, só ``reconstruir_fatos`` corrige. A
+mesma passada alimenta ``bi_participante_mensal``, base da retenção.
+
+O job ``atualizar_fatos_job`` roda no APScheduler do ``app.py``, que sobe
+em cada worker do gunicorn; no PostgreSQL um advisory lock de transação
+serializa as execuções (quem não consegue o lock pula a rodada), e os fatos
+são gravados com upsert sobre ``uq_bi_fato_diario_cliente_evento_dia``.
+``reconstruir_fatos`` refaz tudo do zero.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Float, and_, case, cast, delete, func, insert, or_, select, text, tuple_
+
+from extensions import db
+from models import Checkin, Feedback, Inscricao, InscricaoTipo, Oficina
+from models.relatorio_bi import FatoDiarioBI, MarcaAtualizacaoBI, ParticipanteMensalBI
+from services.bi_cache import bi_cache
+from services.comum import config_app, insert_dialeto
+
+logger = logging.getLogger(__name__)
+
+JANELA_PADRAO_DIAS = 7
+LOTE_INSERCAO = 1000
+# Chave do pg_try_advisory_xact_lock que serializa atualizar_fatos entre workers
+CHAVE_LOCK = 7_316_402
+_CHAVE_FATO = {'cliente_id', 'evento_id', 'dia'}
+
+
+def _como_data(valor):
+    # func.date devolve texto no SQLite e date no PostgreSQL
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, str):
+        return date.fromisoformat(valor[:10])
+    return valor
+
+
+def _inicio(dia):
+    return datetime.combine(dia, datetime.min.time())
+
+
+def _fontes():
+    """Para cada tabela de origem: coluna de id, data, cliente e evento."""
+    return {
+        'inscricao': (
+            Inscricao.id,
+            Inscricao.created_at,
+            Inscricao.cliente_id,
+            func.coalesce(Inscricao.evento_id, Oficina.evento_id),
+            lambda consulta: consulta.outerjoin(Oficina, Inscricao.oficina_id == Oficina.id),
+        ),
+        'checkin': (
+            Checkin.id,
+            Checkin.data_hora,
+            func.coalesce(Checkin.cliente_id, Oficina.cliente_id),
+            func.coalesce(Checkin.evento_id, Oficina.evento_id),
+            lambda consulta: consulta.outerjoin(Oficina, Checkin.oficina_id == Oficina.id),
+        ),
+        'feedback': (
+            Feedback.id,
+            Feedback.created_at,
+            Oficina.cliente_id,
+            Oficina.evento_id,
+            lambda consulta: consulta.join(Oficina, Feedback.oficina_id == Oficina.id),
+        ),
+    }
+
+
+def _marcas():
+    return {marca.fonte: marca for marca in MarcaAtualizacaoBI.query.all()}
+
+
+def _dias_afetados(marcas):
+    """Dias por cliente tocados por linhas novas, e o novo id máximo de cada fonte."""
+    dias = defaultdict(set)
+    novos_ids = {}
+    for fonte, (coluna_id, coluna_data, cliente, _evento, juntar) in _fontes().items():
+        ultimo = marcas[fonte].ultimo_id if fonte in marcas else 0
+        maximo = db.session.execute(select(func.max(coluna_id))).scalar()
+        if not maximo or maximo <= ultimo:
+            continue
+        consulta = juntar(
+            select(cliente, func.date(coluna_data))
+            .where(coluna_id > ultimo, coluna_id <= maximo, coluna_data.isnot(None))
+            .distinct()
+        )
+        for cliente_id, dia in db.session.execute(consulta):
+            if cliente_id is not None:
+                dias[cliente_id].add(_como_data(dia))
+        novos_ids[fonte] = maximo
+    return dias, novos_ids
+
+
+def _dias_na_janela(inicio):
+    """Dias desde ``inicio`` com linhas em qualquer fonte ou com fatos já gravados.
+
+    Os fatos gravados entram para que dias cujas linhas foram todas
+    excluídas sejam zerados.
+    """
+    dias = defaultdict(set)
+    if inicio is None:
+        return dias
+    for _id, coluna_data, cliente, _evento, juntar in _fontes().values():
+        consulta = juntar(
+            select(cliente, func.date(coluna_data)).where(coluna_data >= inicio).distinct()
+        )
+        for cliente_id, dia in db.session.execute(consulta):
+            if cliente_id is not None:
+                dias[cliente_id].add(_como_data(dia))
+    consulta = select(FatoDiarioBI.cliente_id, FatoDiarioBI.dia)\
+        .where(FatoDiarioBI.dia >= inicio.date()).distinct()
+    for cliente_id, dia in db.session.execute(consulta):
+        dias[cliente_id].add(_como_data(dia))
+    return dias
+
+
+def _agregar_cliente(cliente_id, inicio, fim):
+    """Totais (evento, dia) do cliente entre ``inicio`` e ``fim`` (exclusivo)."""
+    fontes = _fontes()
+    fatos = defaultdict(lambda: {
+        'inscricoes': 0, 'pagamentos_aprovados': 0, 'receita': 0.0,
+        'checkins': 0, 'feedbacks': 0, 'soma_notas': 0,
+    })
+
+    _id, criada, cliente, evento, juntar = fontes['inscricao']
+    aprovada = Inscricao.status_pagamento == 'approved'
+    consulta = juntar(
+        select(
+            evento,
+            func.date(criada),
+            func.count(Inscricao.id),
+            func.sum(case((aprovada, 1), else_=0)),
+            func.sum(case((aprovada, cast(InscricaoTipo.preco, Float)), else_=0.0)),
+        )
+    ).outerjoin(InscricaoTipo, Inscricao.tipo_inscricao_id == InscricaoTipo.id)\
+        .where(cliente == cliente_id, criada >= inicio, criada < fim)\
+        .group_by(evento, func.date(criada))
+    for evento_id, dia, total, aprovadas, receita in db.session.execute(consulta):
+        fato = fatos[(evento_id, _como_data(dia))]
+        fato['inscricoes'] = total
+        fato['pagamentos_aprovados'] = int(aprovadas or 0)
+        fato['receita'] = float(receita or 0)
+
+    _id, quando, cliente, evento, juntar = fontes['checkin']
+    consulta = juntar(select(evento, func.date(quando), func.count(Checkin.id)))\
+        .where(cliente == cliente_id, quando >= inicio, quando < fim)\
+        .group_by(evento, func.date(quando))
+    for evento_id, dia, total in db.session.execute(consulta):
+        fatos[(evento_id, _como_data(dia))]['checkins'] = total
+
+    _id, criado, cliente, evento, juntar = fontes['feedback']
+    consulta = juntar(
+        select(evento, func.date(criado), func.count(Feedback.rating), func.sum(Feedback.rating))
+    ).where(cliente == cliente_id, criado >= inicio, criado < fim)\
+        .group_by(evento, func.date(criado))
+    for evento_id, dia, total, soma in db.session.execute(consulta):
+        fato = fatos[(evento_id, _como_data(dia))]
+        fato['feedbacks'] = total
+        fato['soma_notas'] = int(soma or 0)
+
+    return fatos
+
+
+def _intervalos(dias):
+    """Agrupa os dias em intervalos contíguos ``(primeiro, ultimo)``."""
+    intervalos = []
+    for dia in sorted(dias):
+        if intervalos and dia - intervalos[-1][1] <= timedelta(days=1):
+            intervalos[-1][1] = dia
+        else:
+            intervalos.append([dia, dia])
+    return [tuple(intervalo) for intervalo in intervalos]
+
+
+def _regravar_fatos(cliente_id, primeiro, ultimo):
+    """Substitui os fatos do cliente de ``primeiro`` a ``ultimo`` inclusive.
+
+    Com ``ON CONFLICT`` disponível, faz upsert dos fatos recalculados e apaga
+    só os que não foram regravados (``atualizado_em`` anterior a esta passada);
+    senão, apaga o intervalo e insere de novo.
+    """
+    fatos = _agregar_cliente(cliente_id, _inicio(primeiro), _inicio(ultimo + timedelta(days=1)))
+    no_intervalo = (
+        FatoDiarioBI.cliente_id == cliente_id,
+        FatoDiarioBI.dia >= primeiro,
+        FatoDiarioBI.dia <= ultimo,
+    )
+    agora = datetime.utcnow()
+    linhas = [
+        dict(valores, cliente_id=cliente_id, evento_id=evento_id, dia=dia, atualizado_em=agora)
+        for (evento_id, dia), valores in fatos.items()
+    ]
+    dialeto_insert = insert_dialeto()
+    if dialeto_insert is None:
+        db.session.execute(delete(FatoDiarioBI).where(*no_intervalo))
+        for inicio in range(0, len(linhas), LOTE_INSERCAO):
+            db.session.execute(insert(FatoDiarioBI), linhas[inicio:inicio + LOTE_INSERCAO])
+        return len(linhas)
+
+    for inicio in range(0, len(linhas), LOTE_INSERCAO):
+        stmt = dialeto_insert(FatoDiarioBI).values(linhas[inicio:inicio + LOTE_INSERCAO])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                FatoDiarioBI.cliente_id,
+                text('COALESCE(evento_id, 0)'),
+                FatoDiarioBI.dia,
+            ],
+            set_={coluna: stmt.excluded[coluna] for coluna in linhas[0] if coluna not in _CHAVE_FATO},
+        )
+        db.session.execute(stmt)
+    db.session.execute(
+        delete(FatoDiarioBI).where(
+            *no_intervalo,
+            or_(FatoDiarioBI.atualizado_em.is_(None), FatoDiarioBI.atualizado_em < agora),
+        )
+    )
+    return len(linhas)
+
+
+def _registrar_participantes(marcas, maximo, inicio):
+    """Grava os meses de atividade dos participantes das inscrições novas ou da janela.
+
+    Com ``ON CONFLICT`` disponível, ignora os já gravados no próprio INSERT,
+    então uma execução concorrente não derruba a transação com IntegrityError.
+    """
+    ultimo = marcas['inscricao'].ultimo_id if 'inscricao' in marcas else 0
+    filtros = []
+    if maximo is not None:
+        filtros.append(and_(Inscricao.id > ultimo, Inscricao.id <= maximo))
+    if inicio is not None:
+        filtros.append(Inscricao.created_at >= inicio)
+    if not filtros:
+        return 0
+    consulta = select(Inscricao.cliente_id, Inscricao.usuario_id, func.date(Inscricao.created_at))\
+        .where(or_(*filtros), Inscricao.usuario_id.isnot(None), Inscricao.created_at.isnot(None))\
+        .distinct()
+    novos = {
+        (cliente_id, _como_data(dia).replace(day=1), usuario_id)
+        for cliente_id, usuario_id, dia in db.session.execute(consulta)
+    }
+    if not novos:
+        return 0
+    pendentes = list(novos)
+    gravados = 0
+    dialeto_insert = insert_dialeto()
+    if dialeto_insert is not None:
+        for inicio in range(0, len(pendentes), LOTE_INSERCAO):
+            lote = [
+                {'cliente_id': c, 'mes': m, 'usuario_id': u}
+                for c, m, u in pendentes[inicio:inicio + LOTE_INSERCAO]
+            ]
+            resultado = db.session.execute(
+                dialeto_insert(ParticipanteMensalBI).values(lote).on_conflict_do_nothing()
+            )
+            gravados += max(resultado.rowcount, 0)
+        return gravados
+    for inicio in range(0, len(pendentes), LOTE_INSERCAO):
+        lote = pendentes[inicio:inicio + LOTE_INSERCAO]
+        existentes = set(db.session.execute(
+            select(
+                ParticipanteMensalBI.cliente_id,
+                ParticipanteMensalBI.mes,
+                ParticipanteMensalBI.usuario_id,
+            ).where(tuple_(
+                ParticipanteMensalBI.cliente_id,
+                ParticipanteMensalBI.mes,
+                ParticipanteMensalBI.usuario_id,
+            ).in_(lote))
+        ).all())
+        faltantes = [
+            {'cliente_id': c, 'mes': m, 'usuario_id': u}
+            for c, m, u in lote if (c, m, u) not in existentes
+        ]
+        if faltantes:
+            db.session.execute(insert(ParticipanteMensalBI), faltantes)
+            gravados += len(faltantes)
+    return gravados
+
+
+def _obter_lock():
+    """Advisory lock da transação no PostgreSQL; liberado no commit/rollback."""
+    if db.engine.dialect.name != 'postgresql':
+        return True
+    return bool(db.session.execute(select(func.pg_try_advisory_xact_lock(CHAVE_LOCK))).scalar())
+
+
+def atualizar_fatos(janela_dias=None, hoje=None):
+    """Atualiza os fatos diários a partir do último watermark.
+
+    Returns:
+        dict: clientes e fatos regravados, participantes-mês novos e watermarks;
+        ``ignorado`` quando outra execução detém o lock
+    """
+    janela_dias = janela_dias if janela_dias is not None else config_app(
+        'BI_FATOS_JANELA_DIAS', JANELA_PADRAO_DIAS
+    )
+    hoje = hoje or datetime.utcnow().date()
+    if not _obter_lock():
+        logger.info("Atualização dos fatos de BI já em andamento em outro processo; pulando")
+        return {'clientes': 0, 'fatos': 0, 'participantes_mes': 0, 'watermarks': {}, 'ignorado': True}
+    inicio_janela = _inicio(hoje - timedelta(days=janela_dias)) if janela_dias > 0 else None
+    marcas = _marcas()
+    dias, novos_ids = _dias_afetados(marcas)
+    for cliente_id, recentes in _dias_na_janela(inicio_janela).items():
+        dias[cliente_id].update(recentes)
+
+    fatos = 0
+    for cliente_id, dias_cliente in dias.items():
+        for primeiro, ultimo in _intervalos(dias_cliente):
+            fatos += _regravar_fatos(cliente_id, primeiro, ultimo)
+
+    participantes = _registrar_participantes(marcas, novos_ids.get('inscricao'), inicio_janela)
+
+    agora = datetime.utcnow()
+    for fonte, maximo in novos_ids.items():
+        marca = marcas.get(fonte) or MarcaAtualizacaoBI(fonte=fonte)
+        marca.ultimo_id = maximo
+        marca.atualizado_em = agora
+        db.session.add(marca)
+    db.session.commit()
+    # KPIs e séries em cache dos clientes regravados ficaram defasados
+    for cliente_id in dias:
+        bi_cache.invalidar_cliente(cliente_id)
+
+    resumo = {
+        'clientes': len(dias),
+        'fatos': fatos,
+        'participantes_mes': participantes,
+        'watermarks': dict(novos_ids),
+    }
+    logger.info("Fatos diários de BI atualizados: %s", resumo)
+    return resumo
+
+
+def reconstruir_fatos():
+    """Apaga fatos, participantes-mês e watermarks e recalcula tudo.
+
+    A limpeza e o recálculo comitam juntos, sob o mesmo lock da atualização.
+    """
+    if not _obter_lock():
+        raise RuntimeError("Atualização dos fatos de BI em andamento; tente novamente")
+    db.session.execute(delete(FatoDiarioBI))
+    db.session.execute(delete(ParticipanteMensalBI))
+    db.session.execute(delete(MarcaAtualizacaoBI))
+    return atualizar_fatos(janela_dias=0)
+
+
+def atualizar_fatos_job(app):
+    """Job do scheduler."""
+    with app.app_context():
+        try:
+            atualizar_fatos()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Erro ao atualizar os fatos diários de BI")
+        finally:
+            db.session.remove()
+
+
+def serie_diaria(cliente_id, inicio, fim):
+    """Totais por dia do cliente (somando os eventos), de ``inicio`` a ``fim`` inclusive."""
+    linhas = db.session.execute(
+        select(
+            FatoDiarioBI.dia,
+            func.sum(FatoDiarioBI.inscricoes),
+            func.sum(FatoDiarioBI.pagamentos_aprovados),
+            func.sum(FatoDiarioBI.receita),
+            func.sum(FatoDiarioBI.checkins),
+            func.sum(FatoDiarioBI.feedbacks),
+            func.sum(FatoDiarioBI.soma_notas),
+        )
+        .where(FatoDiarioBI.cliente_id == cliente_id, FatoDiarioBI.dia >= inicio, FatoDiarioBI.dia <= fim)
+        .group_by(FatoDiarioBI.dia)
+    ).all()
+    return {_como_data(linha[0]): linha[1:] for linha in linhas}
+
+
+def total_inscricoes(cliente_id, inicio, fim):
+    """Inscrições do cliente entre ``inicio`` e ``fim`` inclusive."""
+    return int(db.session.execute(
+        select(func.coalesce(func.sum(FatoDiarioBI.inscricoes), 0))
+        .where(FatoDiarioBI.cliente_id == cliente_id, FatoDiarioBI.dia >= inicio, FatoDiarioBI.dia <= fim)
+    ).scalar() or 0)
+
+
+def retencao(cliente_id, mes_anterior, mes_atual):
+    """Percentual dos participantes de ``mes_anterior`` que voltaram em ``mes_atual``."""
+    anterior = select(ParticipanteMensalBI.usuario_id).where(
+        ParticipanteMensalBI.cliente_id == cliente_id, ParticipanteMensalBI.mes == mes_anterior
+    )
+    total = db.session.execute(select(func.count()).select_from(anterior.subquery())).scalar() or 0
+    if not total:
+        return 0.0
+    voltaram = db.session.execute(
+        select(func.count(ParticipanteMensalBI.usuario_id)).where(
+            and_(
+                ParticipanteMensalBI.cliente_id == cliente_id,
+                ParticipanteMensalBI.mes == mes_atual,
+                ParticipanteMensalBI.usuario_id.in_(anterior),
+            )
+        )
+    ).scalar() or 0
+    return voltaram / total * 100
@@ -0,0 +1,194 @@
+"""Benchmark dos KPIs executivos sobre uma base sintética.
+
+Cria um banco (SQLite em arquivo temporário, ou a URI informada) com clientes,
+oficinas, usuários e ``total`` inscrições, mais check-ins e feedbacks
+proporcionais, e mede ``BIAnalyticsService._calcular_kpis_agregados`` contra o
+cálculo antigo de uma consulta por KPI.
+
+Uso::
+
+    from services.bi_kpi_benchmark import benchmark_kpis
+    benchmark_kpis(total=1_000_000)
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import Float, cast, event, func, insert, or_
+
+from extensions import db
+from models import Checkin, Cliente, Feedback, Inscricao, InscricaoTipo, Oficina, Usuario
+from services.bi_analytics_service import BIAnalyticsService
+
+STATUS = ("approved", "approved", "approved", "pending", "rejected")
+
+
+def _inserir(modelo, linhas, lote):
+    for inicio in range(0, len(linhas), lote):
+        db.session.execute(insert(modelo), linhas[inicio:inicio + lote])
+    db.session.commit()
+
+
+def popular_base(total, clientes=5, oficinas_por_cliente=20, usuarios=50_000,
+                 taxa_checkin=0.3, taxa_feedback=0.05, lote=20_000, semente=42):
+    """Insere a base sintética em lotes via ``INSERT`` do Core."""
+    aleatorio = random.Random(semente)
+    inicio = datetime(2024, 1, 1)
+
+    _inserir(Cliente, [
+        {"id": c, "nome": f"Cliente {c}", "email": f"cliente{c}@bench", "senha": "x"}
+        for c in range(1, clientes + 1)
+    ], lote)
+    oficinas = [
+        {
+            "id": (c - 1) * oficinas_por_cliente + o,
+            "titulo": f"Oficina {c}.{o}", "descricao": "-", "vagas": 1000,
+            "carga_horaria": "4", "estado": "SP", "cidade": "SP", "cliente_id": c,
+        }
+        for c in range(1, clientes + 1)
+        for o in range(1, oficinas_por_cliente + 1)
+    ]
+    _inserir(Oficina, oficinas, lote)
+    _inserir(InscricaoTipo, [
+        {"id": o["id"], "oficina_id": o["id"], "nome": "Geral", "preco": 50 + o["id"] % 5 * 10}
+        for o in oficinas
+    ], lote)
+    _inserir(Usuario, [
+        {
+            "id": u, "nome": f"U{u}", "cpf": str(u), "email": f"u{u}@bench",
+            "senha": "x", "formacao": "-", "tipo": "participante",
+        }
+        for u in range(1, usuarios + 1)
+    ], lote)
+
+    for comeco in range(0, total, lote):
+        inscricoes, checkins, feedbacks = [], [], []
+        for i in range(comeco, min(total, comeco + lote)):
+            oficina = oficinas[aleatorio.randrange(len(oficinas))]
+            usuario = aleatorio.randint(1, usuarios)
+            quando = inicio + timedelta(minutes=i)
+            inscricoes.append({
+                "usuario_id": usuario, "cliente_id": oficina["cliente_id"],
+                "oficina_id": oficina["id"], "tipo_inscricao_id": oficina["id"],
+                "status_pagamento": aleatorio.choice(STATUS), "created_at": quando,
+            })
+            if aleatorio.random() < taxa_checkin:
+                checkins.append({
+                    "usuario_id": usuario, "oficina_id": oficina["id"],
+                    "cliente_id": oficina["cliente_id"], "palavra_chave": "manual",
+                    "data_hora": quando,
+                })
+            if aleatorio.random() < taxa_feedback:
+                feedbacks.append({
+                    "usuario_id": usuario, "oficina_id": oficina["id"],
+                    "rating": aleatorio.randint(1, 5), "created_at": quando,
+                })
+        db.session.execute(insert(Inscricao), inscricoes)
+        if checkins:
+            db.session.execute(insert(Checkin), checkins)
+        if feedbacks:
+            db.session.execute(insert(Feedback), feedbacks)
+        db.session.commit()
+
+
+def kpis_consultas_separadas(servico, cliente_id):
+    """Referência: o cálculo anterior, com uma consulta por KPI."""
+    def inscricoes_cliente():
+        return Inscricao.query.join(Oficina, Inscricao.oficina_id == Oficina.id)\
+            .filter(Oficina.cliente_id == cliente_id)
+
+    def receita():
+        return float(db.session.query(func.coalesce(func.sum(cast(InscricaoTipo.preco, Float)), 0.0))
+                     .join(Inscricao, Inscricao.tipo_inscricao_id == InscricaoTipo.id)
+                     .filter(Inscricao.cliente_id == cliente_id)
+                     .filter(Inscricao.status_pagamento == 'approved').scalar() or 0)
+
+    total = inscricoes_cliente().count()
+    aprovadas = inscricoes_cliente().filter(Inscricao.status_pagamento == 'approved').count()
+    receita_total = receita()
+    presencas = Checkin.query.outerjoin(Oficina, Checkin.oficina_id == Oficina.id)\
+        .filter(or_(Checkin.cliente_id == cliente_id, Oficina.cliente_id == cliente_id)).count()
+    feedbacks = Feedback.query.join(Oficina, Feedback.oficina_id == Oficina.id)\
+        .filter(Oficina.cliente_id == cliente_id)
+    notas = [f.rating for f in feedbacks.filter(Feedback.rating.isnot(None)).all()]
+    return {
+        'inscricoes_totais': inscricoes_cliente().count(),
+        'usuarios_unicos': inscricoes_cliente().with_entities(Inscricao.usuario_id).distinct().count(),
+        'taxa_conversao': (aprovadas / total * 100) if total else 0,
+        'receita_total': receita(),
+        'ticket_medio': receita_total / aprovadas if aprovadas else 0,
+        'taxa_presenca': (presencas / inscricoes_cliente().count() * 100) if total else 0,
+        'satisfacao_media': float(feedbacks.with_entities(func.avg(Feedback.rating)).scalar() or 0),
+        'nps': servico._montar_nps(
+            sum(1 for n in notas if n >= 4),
+            sum(1 for n in notas if n == 3),
+            sum(1 for n in notas if n <= 2),
+        )['nps'],
+    }
+
+
+def _medir(funcao):
+    consultas = []
+
+    def contar(*_args):
+        consultas.append(1)
+
+    event.listen(db.engine, "before_cursor_execute", contar)
+    try:
+        inicio = time.perf_counter()
+        resultado = funcao()
+        segundos = time.perf_counter() - inicio
+    finally:
+        event.remove(db.engine, "before_cursor_execute", contar)
+    return resultado, round(segundos, 3), len(consultas)
+
+
+def benchmark_kpis(total=1_000_000, uri=None, cliente_id=1, **opcoes):
+    """Popula a base sintética e compara os dois cálculos de KPIs.
+
+    Returns:
+        dict: segundos e consultas de cada abordagem, tempo de carga e os KPIs
+    """
+    diretorio = None
+    if uri is None:
+        diretorio = tempfile.mkdtemp(prefix="bi_kpis_")
+        uri = "sqlite:///" + os.path.join(diretorio, "bench.db")
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    servico = BIAnalyticsService()
+    with app.app_context():
+        db.create_all()
+        inicio = time.perf_counter()
+        popular_base(total, **opcoes)
+        carga = time.perf_counter() - inicio
+
+        query_base = {'cliente_id': cliente_id}
+        agregado, segundos_agregado, consultas_agregado = _medir(
+            lambda: servico._calcular_kpis_agregados(query_base)
+        )
+        separado, segundos_separado, consultas_separado = _medir(
+            lambda: kpis_consultas_separadas(servico, cliente_id)
+        )
+        db.session.remove()
+        if diretorio:
+            db.engine.dispose()
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+    return {
+        "inscricoes": total,
+        "segundos_carga": round(carga, 1),
+        "agregado": {"segundos": segundos_agregado, "consultas": consultas_agregado},
+        "consultas_separadas": {"segundos": segundos_separado, "consultas": consultas_separado},
+        "kpis": agregado,
+        "kpis_iguais": all(
+            abs(float(agregado[chave]) - float(valor)) < 1e-6 for chave, valor in separado.items()
+        ),
+    }
@@ -0,0 +1,496 @@
+"""Renderização em lote de certificados.
+
+Em vez de reabrir fundo, logo e assinatura a cada inscrito, o motor carrega as
+imagens de cada cliente uma única vez e as registra como um Form XObject
+compartilhado: cada página apenas referencia o layout e desenha o texto do
+participante. O texto do template também é compilado antes do laço.
+
+Para eventos grandes a lista de participantes é dividida em shards renderizados
+em um ``ProcessPoolExecutor`` (um canvas por processo) e os resultados são
+mesclados em um único PDF ou compactados em um ZIP com um arquivo por usuário.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from types import SimpleNamespace
+
+from services.comum import config_app
+from services.pdf_service import _profile, caminho_absoluto_arquivo
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_RE = re.compile(r"\{([A-Z_]+)\}")
+
+TEXTO_PADRAO_OFICINA = (
+    "Certificamos que {NOME_PARTICIPANTE} participou da oficina {LISTA_OFICINAS}, "
+    "com uma carga horária total de {CARGA_HORARIA} horas nas datas {DATAS_OFICINAS}."
+)
+TEXTO_PADRAO_EVENTO = (
+    "Certificamos que {NOME_PARTICIPANTE} participou das atividades {LISTA_OFICINAS}, "
+    "com carga horária total de {CARGA_HORARIA} horas nas datas {DATAS_OFICINAS}. {TEXTO_PERSONALIZADO}"
+)
+
+# Valores padrão quando ``CERTIFICADOS_WORKERS``/``CERTIFICADOS_PARALELO_MINIMO``
+# não estão configurados.
+WORKERS_PADRAO = min(os.cpu_count() or 1, 8)
+PARALELO_MINIMO_PADRAO = 500
+
+# Geometria herdada de ``gerar_certificados_pdf``.
+LOGO_LARGURA = 180
+LOGO_ALTURA = 100
+MARGEM_INFERIOR = 50
+ASSINATURA_LARGURA = 200
+ASSINATURA_ALTURA = 60
+
+
+class TemplateCompilado:
+    """Template de certificado pré-processado em trechos literais e placeholders."""
+
+    def __init__(self, texto):
+        self.texto = texto or ""
+        self._partes = []
+        posicao = 0
+        for match in PLACEHOLDER_RE.finditer(self.texto):
+            if match.start() > posicao:
+                self._partes.append((self.texto[posicao:match.start()], None))
+            self._partes.append((match.group(0), match.group(1)))
+            posicao = match.end()
+        if posicao < len(self.texto):
+            self._partes.append((self.texto[posicao:], None))
+
+    @property
+    def placeholders(self):
+        return {nome for _, nome in self._partes if nome}
+
+    def renderizar(self, contexto):
+        """Substitui os placeholders conhecidos; os desconhecidos ficam intactos."""
+        return "".join(
+            str(contexto[nome]) if nome and nome in contexto else literal
+            for literal, nome in self._partes
+        )
+
+
+@lru_cache(maxsize=64)
+def compilar_template(texto):
+    """Retorna o ``TemplateCompilado`` de ``texto``, reaproveitando compilações."""
+    return TemplateCompilado(texto)
+
+
+class CertificadoLoteRenderer:
+    """Gera um único PDF com várias páginas de certificado.
+
+    O layout fixo de cada cliente (fundo, título, logo e assinatura) é desenhado
+    uma vez em um Form XObject e reutilizado por todas as páginas, de modo que
+    cada imagem aparece apenas uma vez no arquivo final.
+    """
+
+    def __init__(self, pdf_path, pagesize=None, alinhamento=None):
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.pdfgen import canvas
+
+        self.pdf_path = pdf_path
+        self.pagesize = pagesize or landscape(A4)
+        self.width, self.height = self.pagesize
+        self.canvas = canvas.Canvas(pdf_path, pagesize=self.pagesize, pageCompression=1)
+        self.paginas = 0
+        self._layouts = {}
+
+        styles = getSampleStyleSheet()
+        self.estilo_paragrafo = ParagraphStyle(
+            'EstiloCertificado',
+            parent=styles['Normal'],
+            fontSize=14,
+            leading=18,
+            alignment=TA_CENTER if alinhamento is None else alinhamento,
+            spaceAfter=12
+        )
+
+    @staticmethod
+    def _carregar_imagem(caminho_relativo):
+        from reportlab.lib.utils import ImageReader
+
+        if not caminho_relativo:
+            return None
+        # Caminhos já resolvidos (ex.: em processos filhos, sem app context)
+        if os.path.isabs(caminho_relativo):
+            caminho = caminho_relativo if os.path.exists(caminho_relativo) else None
+        else:
+            caminho = caminho_absoluto_arquivo(caminho_relativo)
+        if not caminho:
+            return None
+        try:
+            return ImageReader(caminho)
+        except Exception as e:
+            logger.warning("Imagem de certificado inválida %s: %s", caminho, e)
+            return None
+
+    def _registrar_layout(self, cliente):
+        """Desenha o layout fixo do cliente como Form XObject e retorna seu nome."""
+        chave = getattr(cliente, 'id', None)
+        if chave in self._layouts:
+            return self._layouts[chave]
+
+        nome = f"layout_certificado_{chave if chave is not None else 'padrao'}"
+        fundo = self._carregar_imagem(getattr(cliente, 'fundo_certificado', None))
+        logo = self._carregar_imagem(getattr(cliente, 'logo_certificado', None))
+        assinatura = self._carregar_imagem(getattr(cliente, 'assinatura_certificado', None))
+
+        c = self.canvas
+        width, height = self.width, self.height
+        c.beginForm(nome)
+
+        if fundo:
+            c.drawImage(fundo, 0, 0, width=width, height=height)
+
+        c.setFont("Helvetica-Bold", 24)
+        titulo = "CERTIFICADO"
+        titulo_largura = c.stringWidth(titulo, "Helvetica-Bold", 24)
+        c.drawString((width - titulo_largura) / 2, height * 0.75, titulo)
+
+        if logo:
+            c.drawImage(
+                logo,
+                (width - LOGO_LARGURA) / 2,
+                MARGEM_INFERIOR,
+                width=LOGO_LARGURA,
+                height=LOGO_ALTURA,
+                preserveAspectRatio=True
+            )
+
+        if assinatura:
+            assinatura_posicao_y = MARGEM_INFERIOR + LOGO_ALTURA + 20 if logo else 30
+            c.drawImage(
+                assinatura,
+                (width - ASSINATURA_LARGURA) / 2,
+                assinatura_posicao_y,
+                width=ASSINATURA_LARGURA,
+                height=ASSINATURA_ALTURA,
+                preserveAspectRatio=True,
+                mask='auto'
+            )
+
+        c.endForm()
+        self._layouts[chave] = nome
+        return nome
+
+    def adicionar_pagina(self, cliente, texto):
+        """Adiciona uma página com o layout do cliente e o texto já renderizado."""
+        from reportlab.platypus import Frame, Paragraph
+
+        layout = self._registrar_layout(cliente)
+        c = self.canvas
+        c.doForm(layout)
+
+        paragrafo = Paragraph('<br/>'.join(texto.split('\n')), self.estilo_paragrafo)
+        margem_lateral = self.width * 0.15
+        frame = Frame(
+            margem_lateral,
+            self.height * 0.4,
+            self.width - 2 * margem_lateral,
+            self.height * 0.3,
+            showBoundary=0
+        )
+        frame.addFromList([paragrafo], c)
+
+        c.showPage()
+        self.paginas += 1
+
+    def salvar(self):
+        self.canvas.save()
+        return self.pdf_path
+
+
+def _texto_template_oficina(oficina):
+    from models import CertificadoTemplate
+
+    template = CertificadoTemplate.query.filter_by(cliente_id=oficina.cliente_id, ativo=True).first()
+    cliente = oficina.cliente
+
+    if template and template.conteudo:
+        return template.conteudo
+    if cliente and cliente.texto_personalizado:
+        return cliente.texto_personalizado
+    return TEXTO_PADRAO_OFICINA
+
+
+def _datas_oficina(oficina):
+    dias = getattr(oficina, 'dias', None)
+    if not dias:
+        return ''
+    return ', '.join(dia.data.strftime('%d/%m/%Y') for dia in sorted(dias, key=lambda x: x.data))
+
+
+def renderizar_certificados(cliente, texto_template, contextos, pdf_path, alinhamento=None):
+    """Renderiza uma página por contexto usando um único template compilado.
+
+    Args:
+        cliente: Objeto com as imagens do certificado (pode ser ``None``)
+        texto_template: Texto com placeholders ``{NOME_PARTICIPANTE}`` etc.
+        contextos: Iterável de dicionários placeholder -> valor
+        pdf_path: Caminho do PDF de saída
+        alinhamento: Alinhamento do texto (``reportlab.lib.enums``); centralizado por padrão
+
+    Returns:
+        int: Número de páginas geradas
+    """
+    template = compilar_template(texto_template)
+    renderer = CertificadoLoteRenderer(pdf_path, alinhamento=alinhamento)
+    for contexto in contextos:
+        renderer.adicionar_pagina(cliente, template.renderizar(contexto))
+    renderer.salvar()
+    return renderer.paginas
+
+
+# ------------------------------- #
+# Geração paralela
+# ------------------------------- #
+def workers_configurados(workers=None):
+    """Número de processos para a geração paralela (``CERTIFICADOS_WORKERS``)."""
+    workers = workers or config_app("CERTIFICADOS_WORKERS", None) or WORKERS_PADRAO
+    return max(1, int(workers))
+
+
+def deve_paralelizar(total, workers):
+    """Indica se ``total`` certificados justificam o custo de um pool de processos."""
+    minimo = int(config_app("CERTIFICADOS_PARALELO_MINIMO", PARALELO_MINIMO_PADRAO))
+    return workers > 1 and total >= max(minimo, 2)
+
+
+def resolver_recursos_cliente(cliente):
+    """Cópia serializável do cliente com os caminhos de imagem já absolutos.
+
+    Os processos filhos não têm app context, então ``caminho_absoluto_arquivo``
+    precisa ser resolvido antes de distribuir o trabalho.
+    """
+    if cliente is None:
+        return None
+    return SimpleNamespace(
+        id=getattr(cliente, 'id', None),
+        fundo_certificado=caminho_absoluto_arquivo(getattr(cliente, 'fundo_certificado', None)),
+        logo_certificado=caminho_absoluto_arquivo(getattr(cliente, 'logo_certificado', None)),
+        assinatura_certificado=caminho_absoluto_arquivo(getattr(cliente, 'assinatura_certificado', None)),
+    )
+
+
+def _dividir_em_shards(itens, quantidade):
+    tamanho = max(1, math.ceil(len(itens) / max(1, quantidade)))
+    return [itens[i:i + tamanho] for i in range(0, len(itens), tamanho)]
+
+
+def _sha256_arquivo(caminho):
+    digest = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def _renderizar_shard(cliente, texto_template, contextos, pdf_path, alinhamento):
+    """Executado no processo filho: um canvas ReportLab por shard."""
+    renderizar_certificados(cliente, texto_template, contextos, pdf_path, alinhamento)
+    return pdf_path
+
+
+def _renderizar_individuais(cliente, texto_template, itens, alinhamento):
+    """Executado no processo filho: um PDF por ``(pdf_path, contexto)``."""
+    resultados = []
+    for pdf_path, contexto in itens:
+        renderizar_certificados(cliente, texto_template, [contexto], pdf_path, alinhamento)
+        resultados.append((pdf_path, _sha256_arquivo(pdf_path)))
+    return resultados
+
+
+def _executar_em_pool(funcao, tarefas, workers):
+    if workers <= 1 or len(tarefas) <= 1:
+        return [funcao(*tarefa) for tarefa in tarefas]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tarefas))) as executor:
+        futuros = [executor.submit(funcao, *tarefa) for tarefa in tarefas]
+        return [futuro.result() for futuro in futuros]
+
+
+def _import_pypdf():
+    try:
+        from pypdf import PdfWriter
+        return PdfWriter
+    except ImportError as e:
+        raise RuntimeError(
+            "pypdf não está instalado; necessário para mesclar os shards de certificados. "
+            "Instale com: pip install pypdf (ou use modo='zip')."
+        ) from e
+
+
+def mesclar_pdfs(partes, destino):
+    """Concatena PDFs copiando os objetos de página, sem re-renderizar o conteúdo."""
+    PdfWriter = _import_pypdf()
+    writer = PdfWriter()
+    for parte in partes:
+        writer.append(parte)
+    with open(destino, 'wb') as f:
+        writer.write(f)
+    return destino
+
+
+def gerar_arquivos_individuais(cliente, texto_template, itens, workers=None, alinhamento=None):
+    """Gera um PDF por participante distribuindo os arquivos entre processos.
+
+    Args:
+        cliente: Cliente (ou o retorno de ``resolver_recursos_cliente``)
+        texto_template: Texto com placeholders
+        itens: Lista de tuplas ``(pdf_path, contexto)``
+        workers: Número de processos; usa ``CERTIFICADOS_WORKERS`` se omitido
+
+    Returns:
+        list: Tuplas ``(pdf_path, sha256)`` na mesma ordem de ``itens``
+    """
+    itens = list(itens)
+    workers = workers_configurados(workers)
+    if workers > 1:
+        cliente = resolver_recursos_cliente(cliente)
+    tarefas = [
+        (cliente, texto_template, shard, alinhamento)
+        for shard in _dividir_em_shards(itens, workers)
+    ]
+    resultados = []
+    for parcial in _executar_em_pool(_renderizar_individuais, tarefas, workers):
+        resultados.extend(parcial)
+    return resultados
+
+
+@_profile
+def renderizar_certificados_paralelo(cliente, texto_template, contextos, destino,
+                                     modo="pdf", workers=None, alinhamento=None):
+    """Renderiza certificados em shards paralelos.
+
+    Args:
+        cliente: Objeto com as imagens do certificado
+        texto_template: Texto com placeholders
+        contextos: Lista de dicionários placeholder -> valor. No modo ``zip``
+            a chave opcional ``ARQUIVO`` define o nome de cada PDF
+        destino: Caminho do PDF mesclado (``modo='pdf'``) ou do ZIP (``modo='zip'``)
+        modo: ``'pdf'`` para um único arquivo ou ``'zip'`` para um PDF por usuário
+        workers: Número de processos; usa ``CERTIFICADOS_WORKERS`` se omitido
+
+    Returns:
+        str: Caminho de ``destino``
+    """
+    if modo not in ("pdf", "zip"):
+        raise ValueError(f"Modo de geração inválido: {modo}")
+
+    contextos = list(contextos)
+    workers = workers_configurados(workers)
+    recursos = resolver_recursos_cliente(cliente)
+    tmp_dir = tempfile.mkdtemp(prefix="certificados_")
+
+    try:
+        if modo == "zip":
+            itens = [
+                (os.path.join(tmp_dir, f"{i:06d}.pdf"), contexto)
+                for i, contexto in enumerate(contextos)
+            ]
+            gerados = gerar_arquivos_individuais(recursos, texto_template, itens, workers, alinhamento)
+            # PDFs já são comprimidos: armazenar sem recompressão
+            with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_STORED) as zf:
+                for (pdf_path, _), contexto in zip(gerados, contextos):
+                    nome = contexto.get("ARQUIVO") or os.path.basename(pdf_path)
+                    zf.write(pdf_path, arcname=nome)
+        else:
+            shards = _dividir_em_shards(contextos, workers)
+            tarefas = [
+                (recursos, texto_template, shard, os.path.join(tmp_dir, f"shard_{i:03d}.pdf"), alinhamento)
+                for i, shard in enumerate(shards)
+            ]
+            partes = _executar_em_pool(_renderizar_shard, tarefas, workers)
+            if len(partes) == 1:
+                shutil.move(partes[0], destino)
+            elif partes:
+                mesclar_pdfs(partes, destino)
+            else:
+                renderizar_certificados(recursos, texto_template, [], destino, alinhamento)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    logger.info(
+        "Certificados gerados em paralelo: %d contextos, %d workers, modo=%s",
+        len(contextos), workers, modo,
+    )
+    return destino
+
+
+def renderizar_certificados_oficina(oficina, inscritos, pdf_path, workers=None):
+    """Gera os certificados de ``inscritos`` de uma oficina em um único PDF.
+
+    Acima de ``CERTIFICADOS_PARALELO_MINIMO`` inscritos a renderização é
+    dividida entre ``CERTIFICADOS_WORKERS`` processos.
+    """
+    contexto_oficina = {
+        "CARGA_HORARIA": str(oficina.carga_horaria),
+        "LISTA_OFICINAS": oficina.titulo,
+        "DATAS_OFICINAS": _datas_oficina(oficina),
+    }
+    contextos = [
+        dict(contexto_oficina, NOME_PARTICIPANTE=inscricao.usuario.nome)
+        for inscricao in inscritos
+    ]
+    texto = _texto_template_oficina(oficina)
+
+    workers = workers_configurados(workers)
+    if deve_paralelizar(len(contextos), workers):
+        renderizar_certificados_paralelo(oficina.cliente, texto, contextos, pdf_path, workers=workers)
+    else:
+        renderizar_certificados(oficina.cliente, texto, contextos, pdf_path)
+    return pdf_path
+
+
+@_profile
+def benchmark_certificados(total=1000, cliente=None, texto_template=None, pdf_path=None):
+    """Mede a geração em lote com participantes sintéticos.
+
+    Returns:
+        dict: ``paginas``, ``segundos``, ``paginas_por_segundo`` e ``tamanho_bytes``
+    """
+    cliente = cliente or SimpleNamespace(
+        id=None, fundo_certificado=None, logo_certificado=None, assinatura_certificado=None
+    )
+    remover = pdf_path is None
+    if remover:
+        fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+
+    contextos = (
+        {
+            "NOME_PARTICIPANTE": f"Participante {i}",
+            "CARGA_HORARIA": "8",
+            "LISTA_OFICINAS": "Oficina de Benchmark",
+            "DATAS_OFICINAS": "01/01/2025",
+        }
+        for i in range(total)
+    )
+
+    try:
+        inicio = time.perf_counter()
+        paginas = renderizar_certificados(cliente, texto_template or TEXTO_PADRAO_OFICINA, contextos, pdf_path)
+        duracao = time.perf_counter() - inicio
+        tamanho = os.path.getsize(pdf_path)
+    finally:
+        if remover and os.path.exists(pdf_path):
+            os.remove(pdf_path)
+
+    resultado = {
+        "paginas": paginas,
+        "segundos": round(duracao, 3),
+        "paginas_por_segundo": round(paginas / duracao, 1) if duracao else 0.0,
+        "tamanho_bytes": tamanho,
+    }
+    logger.info("Benchmark de certificados: %s", resultado)
+    return resultado
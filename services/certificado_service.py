@@ -6,14 +6,22 @@ from models.certificado import (
     SolicitacaoCertificado, CertificadoTemplateAvancado
 )
 from models.event import ConfiguracaoCertificadoAvancada
-from models.atividade_multipla_data import AtividadeMultiplaData, FrequenciaAtividade
+from models.atividade_multipla_data import AtividadeData, AtividadeMultiplaData, FrequenciaAtividade
 from extensions import db
-from sqlalchemy import func
+from sqlalchemy import func, or_, select
 from datetime import datetime
 import hashlib
 import os
-from services.pdf_service import gerar_certificado_personalizado
-from flask import current_app
+import threading
+from reportlab.lib.enums import TA_JUSTIFY
+from services.certificado_lote_service import (
+    TEXTO_PADRAO_EVENTO,
+    deve_paralelizar,
+    gerar_arquivos_individuais,
+    renderizar_certificados,
+    workers_configurados,
+)
+from flask import current_app, has_request_context
 import logging
 import re
 
@@ -77,8 +85,14 @@ def verificar_criterios_certificado(usuario_id, evento_id):
     return len(pendencias) == 0, pendencias
 
 
-def gerar_certificados_automaticos(evento_id):
-    """Gera certificados automaticamente para participantes elegíveis."""
+def gerar_certificados_automaticos(evento_id, workers=None):
+    """Gera certificados automaticamente para participantes elegíveis.
+
+    Quando há participantes suficientes (``CERTIFICADOS_PARALELO_MINIMO``) os
+    PDFs são renderizados em paralelo por ``CERTIFICADOS_WORKERS`` processos.
+    Dentro de uma requisição esse lote roda numa thread em segundo plano e a
+    função devolve lista vazia; os certificados aparecem quando ela termina.
+    """
     try:
         config = CertificadoConfig.query.filter_by(evento_id=evento_id).first()
         if not config or not config.liberacao_automatica:
@@ -92,11 +106,26 @@ def gerar_certificados_automaticos(evento_id):
 
         # Buscar participantes elegíveis
         participantes_elegíveis = _buscar_participantes_elegiveis(evento_id, config)
+
+        workers = workers_configurados(workers)
+        if deve_paralelizar(len(participantes_elegíveis), workers):
+            if has_request_context():
+                threading.Thread(
+                    target=_gerar_certificados_em_segundo_plano,
+                    args=(current_app._get_current_object(), evento_id, participantes_elegíveis, workers),
+                    name=f"certificados-evento-{evento_id}",
+                    daemon=True,
+                ).start()
+                return []
+            return _gerar_certificados_em_lote(evento, participantes_elegíveis, config, workers)
+
         certificados_gerados = []
 
-        for usuario_id in participantes_elegíveis:
+        for usuario_id, carga_horaria in participantes_elegíveis.items():
             try:
-                certificado = _gerar_certificado_participante(usuario_id, evento_id, config)
+                certificado = _gerar_certificado_participante(
+                    usuario_id, evento_id, config, carga_horaria=carga_horaria
+                )
                 if certificado:
                     certificados_gerados.append(certificado)
                     
@@ -116,34 +145,131 @@ def gerar_certificados_automaticos(evento_id):
         return []
 
 
+def _filtrar_usuarios(consulta, coluna, usuario_ids):
+    if usuario_ids is None:
+        return consulta
+    return consulta.where(coluna.in_(usuario_ids))
+
+
+def _pendencias_por_participante(evento_id, usuario_ids=None):
+    """Critérios de ``verificar_criterios_certificado`` para o evento inteiro.
+
+    Faz as mesmas verificações com consultas agrupadas por usuário em vez de
+    consultas por participante.
+
+    Returns:
+        dict: ``usuario_id`` -> lista de pendências (vazia se elegível)
+    """
+    checkins = dict(db.session.execute(
+        _filtrar_usuarios(
+            select(Checkin.usuario_id, func.count(Checkin.id))
+            .where(Checkin.evento_id == evento_id)
+            .group_by(Checkin.usuario_id),
+            Checkin.usuario_id, usuario_ids,
+        )
+    ).all())
+    if usuario_ids is None:
+        usuario_ids = list(checkins)
+        participantes = select(Checkin.usuario_id).where(Checkin.evento_id == evento_id)
+    else:
+        participantes = list(usuario_ids)
+    pendencias = {usuario_id: [] for usuario_id in usuario_ids}
+
+    config = ConfiguracaoCertificadoEvento.query.filter_by(evento_id=evento_id).first()
+    if not config or not pendencias:
+        return pendencias
+
+    if config.checkins_minimos:
+        for usuario_id, lista in pendencias.items():
+            total = checkins.get(usuario_id, 0)
+            if total < config.checkins_minimos:
+                lista.append(f"Mínimo de {config.checkins_minimos} check-ins (atual {total})")
+
+    obrigatorias = config.get_oficinas_obrigatorias_list()
+    if obrigatorias:
+        titulos = dict(db.session.execute(
+            select(Oficina.id, Oficina.titulo).where(Oficina.id.in_(obrigatorias))
+        ).all())
+        presentes = set(db.session.execute(
+            select(Checkin.usuario_id, Checkin.oficina_id)
+            .where(Checkin.oficina_id.in_(obrigatorias), Checkin.usuario_id.in_(participantes))
+            .distinct()
+        ).all())
+        for usuario_id, lista in pendencias.items():
+            for oficina_id in obrigatorias:
+                if (usuario_id, oficina_id) not in presentes:
+                    lista.append(f"Participar da oficina '{titulos.get(oficina_id, oficina_id)}'")
+
+    if config.percentual_minimo:
+        total_oficinas = db.session.execute(
+            select(func.count(Oficina.id)).where(Oficina.evento_id == evento_id)
+        ).scalar()
+        if total_oficinas:
+            presencas = dict(db.session.execute(
+                select(Checkin.usuario_id, func.count(func.distinct(Checkin.oficina_id)))
+                .join(Oficina, Checkin.oficina_id == Oficina.id)
+                .where(Oficina.evento_id == evento_id, Checkin.usuario_id.in_(participantes))
+                .group_by(Checkin.usuario_id)
+            ).all())
+            for usuario_id, lista in pendencias.items():
+                percentual = (presencas.get(usuario_id, 0) / total_oficinas) * 100
+                if percentual < config.percentual_minimo:
+                    lista.append(
+                        f"Participação mínima de {config.percentual_minimo}% (atual {int(percentual)}%)"
+                    )
+
+    return pendencias
+
+
+def avaliar_participantes_evento(evento_id, usuario_ids=None):
+    """Elegibilidade e carga horária de todos os participantes do evento.
+
+    Sem ``usuario_ids`` avalia todos os usuários com check-in no evento. O
+    número de consultas não depende da quantidade de participantes.
+
+    Returns:
+        dict: ``usuario_id`` -> ``{"criterios_ok", "pendencias",
+        "tem_certificado", "carga_horaria"}``
+    """
+    pendencias = _pendencias_por_participante(evento_id, usuario_ids)
+    if not pendencias:
+        return {}
+    participantes = list(pendencias) if usuario_ids is not None else None
+    com_certificado = set(db.session.execute(
+        _filtrar_usuarios(
+            select(CertificadoParticipante.usuario_id).where(
+                CertificadoParticipante.evento_id == evento_id,
+                CertificadoParticipante.tipo == 'geral',
+            ),
+            CertificadoParticipante.usuario_id, participantes,
+        )
+    ).scalars())
+    cargas = _cargas_horarias_evento(evento_id, participantes)
+    return {
+        usuario_id: {
+            "criterios_ok": not lista,
+            "pendencias": lista,
+            "tem_certificado": usuario_id in com_certificado,
+            "carga_horaria": cargas.get(usuario_id, 0),
+        }
+        for usuario_id, lista in pendencias.items()
+    }
+
+
 def _buscar_participantes_elegiveis(evento_id, config):
-    """Busca participantes que atendem aos critérios para certificado."""
-    # Buscar todos os usuários que participaram do evento
-    participantes = db.session.query(Checkin.usuario_id).filter(
-        Checkin.evento_id == evento_id
-    ).distinct().all()
-    
-    elegíveis = []
-    for (usuario_id,) in participantes:
-        # Verificar se já tem certificado
-        certificado_existente = CertificadoParticipante.query.filter_by(
-            usuario_id=usuario_id,
-            evento_id=evento_id,
-            tipo='geral'
-        ).first()
-        
-        if certificado_existente:
-            continue
-            
-        # Verificar critérios
-        criterios_ok, _ = verificar_criterios_certificado(usuario_id, evento_id)
-        if criterios_ok:
-            elegíveis.append(usuario_id)
-            
-    return elegíveis
+    """Busca participantes que atendem aos critérios e ainda não têm certificado.
 
+    Returns:
+        dict: ``usuario_id`` -> carga horária, pronto para a emissão em lote
+    """
+    return {
+        usuario_id: avaliacao["carga_horaria"]
+        for usuario_id, avaliacao in avaliar_participantes_evento(evento_id).items()
+        if avaliacao["criterios_ok"] and not avaliacao["tem_certificado"]
+    }
 
-def _gerar_certificado_participante(usuario_id, evento_id, config):
+
+def _gerar_certificado_participante(usuario_id, evento_id, config, carga_horaria=None):
     """Gera certificado individual para um participante."""
     try:
         usuario = Usuario.query.get(usuario_id)
@@ -153,7 +279,8 @@ def _gerar_certificado_participante(usuario_id, evento_id, config):
             return None
             
         # Calcular carga horária
-        carga_horaria = _calcular_carga_horaria_participante(usuario_id, evento_id)
+        if carga_horaria is None:
+            carga_horaria = _calcular_carga_horaria_participante(usuario_id, evento_id)
         
         # Buscar template
         template = _buscar_template_certificado(evento.cliente_id)
@@ -188,34 +315,205 @@ def _gerar_certificado_participante(usuario_id, evento_id, config):
         return None
 
 
-def _calcular_carga_horaria_participante(usuario_id, evento_id):
-    """Calcula a carga horária total do participante no evento."""
-    # Carga horária de oficinas tradicionais
-    oficinas_participadas = db.session.query(Oficina).join(
-        Checkin, Oficina.id == Checkin.oficina_id
-    ).filter(
-        Checkin.usuario_id == usuario_id,
-        Oficina.evento_id == evento_id
+def _gerar_certificados_em_segundo_plano(app, evento_id, cargas_horarias, workers):
+    with app.app_context():
+        try:
+            evento = Evento.query.get(evento_id)
+            config = CertificadoConfig.query.filter_by(evento_id=evento_id).first()
+            if evento and config:
+                _gerar_certificados_em_lote(evento, cargas_horarias, config, workers)
+        finally:
+            db.session.remove()
+
+
+def _conteudo_certificado(template, cliente):
+    """Texto do template; sem ele, o texto personalizado do cliente ou o padrão."""
+    conteudo = template.conteudo_html if hasattr(template, 'conteudo_html') else template.conteudo
+    if not conteudo:
+        conteudo = (cliente.texto_personalizado if cliente else None) or TEXTO_PADRAO_EVENTO
+    return conteudo
+
+
+def _contexto_certificado(usuario, oficinas, carga_horaria):
+    """Placeholders do certificado de evento de um participante."""
+    return {
+        "NOME_PARTICIPANTE": usuario.nome,
+        "CARGA_HORARIA": str(carga_horaria),
+        "LISTA_OFICINAS": ', '.join(of.titulo for of in oficinas),
+        "TEXTO_PERSONALIZADO": '',
+        "DATAS_OFICINAS": '',
+    }
+
+
+def _gerar_certificados_em_lote(evento, cargas_horarias, config, workers):
+    """Renderiza os certificados em processos paralelos e grava os registros de uma vez.
+
+    ``cargas_horarias`` mapeia ``usuario_id`` para a carga horária já calculada.
+    Usa o mesmo ``renderizar_certificados`` do caminho individual
+    (``_gerar_arquivo_certificado``), então o layout é idêntico.
+    """
+    template = _buscar_template_certificado(evento.cliente_id)
+    if not template:
+        logger.warning(f"Nenhum template encontrado para cliente {evento.cliente_id}")
+        return []
+
+    cliente = evento.cliente
+    conteudo = _conteudo_certificado(template, cliente)
+
+    usuario_ids = list(cargas_horarias)
+    usuarios = {
+        u.id: u for u in Usuario.query.filter(Usuario.id.in_(usuario_ids)).all()
+    }
+    oficinas_por_usuario = {}
+    linhas = (
+        db.session.query(Checkin.usuario_id, Oficina)
+        .join(Oficina, Oficina.id == Checkin.oficina_id)
+        .filter(Checkin.usuario_id.in_(usuario_ids), Oficina.evento_id == evento.id)
+        .all()
+    )
+    for usuario_id, oficina in linhas:
+        oficinas_por_usuario.setdefault(usuario_id, {})[oficina.id] = oficina
+
+    certificados_dir = os.path.join(current_app.static_folder, 'certificados')
+    os.makedirs(certificados_dir, exist_ok=True)
+    carimbo = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    itens = []
+    registros = []
+    for usuario_id in usuario_ids:
+        usuario = usuarios.get(usuario_id)
+        if not usuario:
+            continue
+        oficinas = list(oficinas_por_usuario.get(usuario_id, {}).values())
+        carga_horaria = cargas_horarias[usuario_id]
+        filename = f"certificado_{usuario.id}_{evento.id}_{carimbo}.pdf"
+        itens.append((
+            os.path.join(certificados_dir, filename),
+            _contexto_certificado(usuario, oficinas, carga_horaria),
+        ))
+        registros.append((usuario_id, carga_horaria, f"certificados/{filename}"))
+
+    try:
+        gerados = gerar_arquivos_individuais(cliente, conteudo, itens, workers, alinhamento=TA_JUSTIFY)
+    except Exception as e:
+        logger.error(f"Erro na renderização paralela de certificados: {str(e)}")
+        return []
+
+    certificados = []
+    notificacoes = []
+    for (usuario_id, carga_horaria, arquivo_path), (_, hash_arquivo) in zip(registros, gerados):
+        certificados.append(CertificadoParticipante(
+            usuario_id=usuario_id,
+            evento_id=evento.id,
+            tipo='geral',
+            titulo=f"Certificado de Participação - {evento.nome}",
+            carga_horaria=carga_horaria,
+            liberado=True,
+            data_liberacao=datetime.utcnow(),
+            arquivo_path=arquivo_path,
+            hash_verificacao=hash_arquivo
+        ))
+        if config.notificar_participantes:
+            notificacoes.append(_montar_notificacao_certificado(evento, usuario_id, 'liberacao'))
+
+    try:
+        db.session.add_all(certificados + notificacoes)
+        db.session.commit()
+    except Exception as e:
+        logger.error(f"Erro ao gravar certificados gerados em lote: {str(e)}")
+        db.session.rollback()
+        return []
+
+    logger.info(
+        f"Gerados {len(certificados)} certificados para evento {evento.id} "
+        f"com {workers} processos"
+    )
+    return certificados
+
+
+def _carga_horaria_da_data(carga_horaria_data, carga_horaria_total, total_datas):
+    """Mesma regra de ``AtividadeData.get_carga_horaria`` sobre colunas já lidas."""
+    if carga_horaria_data:
+        try:
+            return float(carga_horaria_data)
+        except ValueError:
+            pass
+    if not total_datas:
+        return 0
+    try:
+        return float(carga_horaria_total) / total_datas
+    except (TypeError, ValueError):
+        return 0
+
+
+def _cargas_horarias_evento(evento_id, usuario_ids=None):
+    """Carga horária de cada participante do evento em duas consultas.
+
+    Soma as oficinas com check-in e a frequência nas atividades de múltiplas
+    datas (dia inteiro ou manhã e tarde contam a data inteira; um turno, metade).
+
+    Returns:
+        dict: ``usuario_id`` -> carga horária
+    """
+    cargas = {}
+
+    oficinas = db.session.execute(
+        _filtrar_usuarios(
+            select(Checkin.usuario_id, Oficina.id, Oficina.carga_horaria)
+            .join(Oficina, Oficina.id == Checkin.oficina_id)
+            .where(Oficina.evento_id == evento_id)
+            .distinct(),
+            Checkin.usuario_id, usuario_ids,
+        )
     ).all()
+    for usuario_id, _, carga_horaria in oficinas:
+        cargas[usuario_id] = cargas.get(usuario_id, 0) + _parse_carga_horaria(carga_horaria)
 
-    carga_horaria_oficinas = sum(_parse_carga_horaria(oficina.carga_horaria) for oficina in oficinas_participadas)
-    
-    # Carga horária de atividades com múltiplas datas
-    atividades_multiplas = db.session.query(AtividadeMultiplaData).filter(
+    total_datas = (
+        select(AtividadeData.atividade_id, func.count(AtividadeData.id).label("total"))
+        .group_by(AtividadeData.atividade_id)
+        .subquery()
+    )
+    atividades_evento = select(AtividadeMultiplaData.id).where(
         AtividadeMultiplaData.evento_id == evento_id
+    )
+    frequencias = db.session.execute(
+        _filtrar_usuarios(
+            select(
+                FrequenciaAtividade.usuario_id,
+                FrequenciaAtividade.presente_dia_inteiro,
+                FrequenciaAtividade.presente_manha,
+                FrequenciaAtividade.presente_tarde,
+                AtividadeData.carga_horaria_data,
+                AtividadeMultiplaData.carga_horaria_total,
+                total_datas.c.total,
+            )
+            .join(AtividadeData, AtividadeData.id == FrequenciaAtividade.data_atividade_id)
+            .join(AtividadeMultiplaData, AtividadeMultiplaData.id == AtividadeData.atividade_id)
+            .outerjoin(total_datas, total_datas.c.atividade_id == AtividadeData.atividade_id)
+            .where(
+                FrequenciaAtividade.atividade_id.in_(atividades_evento),
+                or_(
+                    FrequenciaAtividade.presente_dia_inteiro.is_(True),
+                    FrequenciaAtividade.presente_manha.is_(True),
+                    FrequenciaAtividade.presente_tarde.is_(True),
+                ),
+            ),
+            FrequenciaAtividade.usuario_id, usuario_ids,
+        )
     ).all()
-    
-    carga_horaria_atividades_multiplas = 0
-    for atividade in atividades_multiplas:
-        frequencias = FrequenciaAtividade.query.filter_by(
-            atividade_id=atividade.id,
-            usuario_id=usuario_id
-        ).all()
-        
-        if frequencias:
-            carga_horaria_atividades_multiplas += sum(freq.get_carga_horaria_presenca() for freq in frequencias)
+    for usuario_id, dia_inteiro, manha, tarde, carga_data, carga_total, datas in frequencias:
+        carga = _carga_horaria_da_data(carga_data, carga_total, datas)
+        if not (dia_inteiro or (manha and tarde)):
+            carga = carga / 2
+        cargas[usuario_id] = cargas.get(usuario_id, 0) + carga
+
+    return cargas
 
-    return carga_horaria_oficinas + carga_horaria_atividades_multiplas
+
+def _calcular_carga_horaria_participante(usuario_id, evento_id):
+    """Calcula a carga horária total do participante no evento."""
+    return _cargas_horarias_evento(evento_id, [usuario_id]).get(usuario_id, 0)
 
 
 def calcular_atividades_participadas(usuario_id, evento_id, config=None):
@@ -339,14 +637,6 @@ def _gerar_arquivo_certificado(usuario, evento, carga_horaria, template):
         filename = f"certificado_{usuario.id}_{evento.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         arquivo_path = os.path.join(certificados_dir, filename)
         
-        # Gerar PDF usando o serviço existente
-        if hasattr(template, 'conteudo_html'):
-            # Template avançado
-            conteudo = template.conteudo_html
-        else:
-            # Template simples
-            conteudo = template.conteudo
-            
         # Buscar oficinas participadas
         oficinas = db.session.query(Oficina).join(
             Checkin, Oficina.id == Checkin.oficina_id
@@ -355,14 +645,14 @@ def _gerar_arquivo_certificado(usuario, evento, carga_horaria, template):
             Oficina.evento_id == evento.id
         ).all()
         
-        # Gerar certificado personalizado
-        pdf_path = gerar_certificado_personalizado(
-            usuario, oficinas, carga_horaria, '', conteudo, evento.cliente
+        # Mesmo renderizador e alinhamento da emissão em lote
+        renderizar_certificados(
+            evento.cliente,
+            _conteudo_certificado(template, evento.cliente),
+            [_contexto_certificado(usuario, oficinas, carga_horaria)],
+            arquivo_path,
+            alinhamento=TA_JUSTIFY,
         )
-        
-        # Mover para local definitivo
-        if pdf_path != arquivo_path:
-            os.rename(pdf_path, arquivo_path)
             
         return f"certificados/{filename}"
         
@@ -383,24 +673,28 @@ def _gerar_hash_certificado(arquivo_path):
         return None
 
 
+def _montar_notificacao_certificado(evento, usuario_id, tipo):
+    """Monta (sem persistir) a notificação sobre certificado."""
+    mensagens = {
+        'liberacao': f"Seu certificado do evento '{evento.nome}' está disponível para download!",
+        'aprovacao': f"Sua solicitação de certificado para '{evento.nome}' foi aprovada!",
+        'rejeicao': f"Sua solicitação de certificado para '{evento.nome}' foi rejeitada."
+    }
+
+    return NotificacaoCertificado(
+        usuario_id=usuario_id,
+        evento_id=evento.id,
+        tipo=tipo,
+        titulo=f"Certificado - {evento.nome}",
+        mensagem=mensagens.get(tipo, "Atualização sobre seu certificado")
+    )
+
+
 def _criar_notificacao_certificado(usuario_id, evento_id, tipo):
     """Cria notificação sobre certificado."""
     try:
         evento = Evento.query.get(evento_id)
-        
-        mensagens = {
-            'liberacao': f"Seu certificado do evento '{evento.nome}' está disponível para download!",
-            'aprovacao': f"Sua solicitação de certificado para '{evento.nome}' foi aprovada!",
-            'rejeicao': f"Sua solicitação de certificado para '{evento.nome}' foi rejeitada."
-        }
-        
-        notificacao = NotificacaoCertificado(
-            usuario_id=usuario_id,
-            evento_id=evento_id,
-            tipo=tipo,
-            titulo=f"Certificado - {evento.nome}",
-            mensagem=mensagens.get(tipo, "Atualização sobre seu certificado")
-        )
+        notificacao = _montar_notificacao_certificado(evento, usuario_id, tipo)
         
         db.session.add(notificacao)
         db.session.commit()
@@ -0,0 +1,716 @@
+"""Caminho rápido para check-in via QR Code.
+
+Resolve token → (usuário, oficina/evento, cliente) em uma única consulta com
+joins (ou a partir de um cache em processo aquecido por evento) e grava o
+check-in com ``INSERT ... SELECT FROM inscricao ... ON CONFLICT DO NOTHING``.
+O ``SELECT`` relê a inscrição pelo token, então uma inscrição removida ou com
+token regenerado não gera check-in mesmo que outro worker ainda a tenha em
+cache; neste processo o cache é limpo no commit que a altera. A deduplicação
+entre leitores concorrentes fica a cargo dos índices únicos parciais
+``uq_checkin_qr_oficina``/``uq_checkin_qr_evento``.
+
+Também concentra as operações em lote de ``checkins_lote``: uma consulta
+para os check-ins existentes, um ``INSERT`` em massa e um único ``DELETE``,
+a sincronização das leituras feitas offline pelos leitores e o feed
+incremental de check-ins por cliente (``lista_checkins_json``).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from cachetools import TTLCache
+from sqlalchemy import and_, event, exists, func, inspect, insert, literal, or_, select, tuple_
+from sqlalchemy.orm import Session, joinedload, load_only
+
+from extensions import db
+from models import Checkin, Evento, Inscricao, Oficina, Usuario
+from services.comum import insert_dialeto
+from utils.time_helpers import determinar_turno
+
+logger = logging.getLogger(__name__)
+
+PALAVRA_CHAVE_OFICINA = "QR-OFICINA"
+PALAVRA_CHAVE_EVENTO = "QR-EVENTO"
+
+# Cache de tokens resolvidos. O INSERT relê a inscrição, então uma entrada
+# velha no máximo resulta em "inscrição não encontrada", nunca em check-in.
+_CACHE_TTL = 15 * 60
+_cache_tokens = TTLCache(maxsize=50000, ttl=_CACHE_TTL)
+_cache_lock = threading.Lock()
+
+_CHAVE_SESSAO = "checkin_tokens_alterados"
+_CAMPOS_TOKEN = ("qr_code_token", "usuario_id", "oficina_id", "evento_id", "cliente_id")
+
+# Resultados de leituras offline já sincronizadas, por chave de idempotência
+_IDEMPOTENCIA_TTL = 24 * 60 * 60
+_sincronizadas = TTLCache(maxsize=100000, ttl=_IDEMPOTENCIA_TTL)
+
+# Máximo de leituras aceitas por requisição de sincronização
+MAX_LEITURAS_LOTE = 500
+
+# Janela deslizante das últimas leituras para p50/p99
+_latencias = deque(maxlen=2000)
+_latencias_lock = threading.Lock()
+
+
+class ResultadoCheckin:
+    """Resultado de uma leitura: ``status`` é ``success``, ``warning`` ou ``error``."""
+
+    def __init__(self, status, message, http_status=200, payload=None, cliente_id=None):
+        self.status = status
+        self.message = message
+        self.http_status = http_status
+        self.payload = payload or {}
+        self.cliente_id = cliente_id
+
+    def to_dict(self):
+        return dict(status=self.status, message=self.message, **self.payload)
+
+
+def _consulta_token():
+    return (
+        db.session.query(
+            Inscricao.qr_code_token.label("token"),
+            Inscricao.usuario_id,
+            Inscricao.oficina_id,
+            Inscricao.evento_id,
+            Inscricao.cliente_id,
+            Usuario.nome.label("usuario_nome"),
+            Oficina.titulo.label("oficina_titulo"),
+            Oficina.evento_id.label("oficina_evento_id"),
+            Oficina.cliente_id.label("oficina_cliente_id"),
+            Evento.nome.label("evento_nome"),
+        )
+        .join(Usuario, Usuario.id == Inscricao.usuario_id)
+        .outerjoin(Oficina, Oficina.id == Inscricao.oficina_id)
+        .outerjoin(Evento, Evento.id == Inscricao.evento_id)
+    )
+
+
+def _como_dict(linha):
+    dados = dict(linha._mapping)
+    # Mesma regra de antes: check-ins de oficina pertencem ao cliente da oficina
+    dados["checkin_cliente_id"] = (
+        dados["oficina_cliente_id"] if dados["oficina_id"] else dados["cliente_id"]
+    )
+    return dados
+
+
+def resolver_token(token):
+    """Retorna os dados da inscrição do ``token`` (cache ou uma consulta)."""
+    with _cache_lock:
+        dados = _cache_tokens.get(token)
+    if dados is not None:
+        return dados
+
+    linha = _consulta_token().filter(Inscricao.qr_code_token == token).first()
+    if not linha:
+        return None
+    dados = _como_dict(linha)
+    with _cache_lock:
+        _cache_tokens[token] = dados
+    return dados
+
+
+def resolver_tokens(tokens):
+    """Versão em lote de ``resolver_token``: uma consulta para os tokens fora do cache."""
+    encontrados = {}
+    with _cache_lock:
+        for token in tokens:
+            dados = _cache_tokens.get(token)
+            if dados is not None:
+                encontrados[token] = dados
+    faltantes = [t for t in set(tokens) if t not in encontrados]
+    for bloco in _em_blocos(faltantes):
+        linhas = _consulta_token().filter(Inscricao.qr_code_token.in_(bloco)).all()
+        with _cache_lock:
+            for linha in linhas:
+                dados = _como_dict(linha)
+                _cache_tokens[linha.token] = dados
+                encontrados[linha.token] = dados
+    return encontrados
+
+
+def aquecer_cache_evento(evento_id):
+    """Carrega no cache todos os tokens do evento e de suas oficinas."""
+    linhas = (
+        _consulta_token()
+        .filter(
+            Inscricao.qr_code_token.isnot(None),
+            (Inscricao.evento_id == evento_id) | (Oficina.evento_id == evento_id),
+        )
+        .all()
+    )
+    with _cache_lock:
+        for linha in linhas:
+            _cache_tokens[linha.token] = _como_dict(linha)
+    logger.info("Cache de check-in aquecido: %d tokens do evento %s", len(linhas), evento_id)
+    return len(linhas)
+
+
+def invalidar_token(token):
+    with _cache_lock:
+        _cache_tokens.pop(token, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_tokens_alterados(sessao, contexto):
+    tokens = set()
+    for objeto in sessao.deleted:
+        if isinstance(objeto, Inscricao):
+            tokens.update(inspect(objeto).attrs.qr_code_token.history.sum() or ())
+    for objeto in sessao.dirty:
+        if not isinstance(objeto, Inscricao):
+            continue
+        atributos = inspect(objeto).attrs
+        if any(atributos[campo].history.has_changes() for campo in _CAMPOS_TOKEN):
+            # Token antigo e atual: ambos podem estar em cache
+            tokens.update(atributos.qr_code_token.history.sum() or ())
+    tokens.discard(None)
+    if tokens:
+        sessao.info.setdefault(_CHAVE_SESSAO, set()).update(tokens)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_tokens_apos_commit(sessao):
+    for token in sessao.info.pop(_CHAVE_SESSAO, ()):
+        invalidar_token(token)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_tokens_apos_rollback(sessao, transacao_anterior):
+    if transacao_anterior.parent is None:
+        sessao.info.pop(_CHAVE_SESSAO, None)
+
+
+def inserir_checkin_unico(token, usuario_id, cliente_id, palavra_chave, oficina_id=None, evento_id=None,
+                          data_hora=None):
+    """Insere o check-in se ainda não houver um para (usuário, oficina/evento).
+
+    Executa um único ``INSERT ... SELECT FROM inscricao WHERE NOT EXISTS ...
+    ON CONFLICT DO NOTHING RETURNING``: a linha só sai se a inscrição do
+    ``token`` ainda existir para o mesmo usuário e oficina/evento. Retorna
+    ``(id, data_hora)`` ou ``None`` se nada foi inserido.
+    """
+    tabela = Checkin.__table__
+    inscricao = Inscricao.__table__
+    data_hora = data_hora or datetime.utcnow()
+    if oficina_id:
+        alvo = tabela.c.oficina_id == oficina_id
+        alvo_inscricao = inscricao.c.oficina_id == oficina_id
+    else:
+        alvo = tabela.c.evento_id == evento_id
+        alvo_inscricao = inscricao.c.evento_id == evento_id
+
+    ja_existe = exists().where(tabela.c.usuario_id == usuario_id, alvo)
+    colunas = ["usuario_id", "oficina_id", "evento_id", "cliente_id", "palavra_chave", "data_hora"]
+    origem = select(
+        inscricao.c.usuario_id,
+        literal(oficina_id, type_=tabela.c.oficina_id.type),
+        literal(evento_id, type_=tabela.c.evento_id.type),
+        literal(cliente_id, type_=tabela.c.cliente_id.type),
+        literal(palavra_chave),
+        literal(data_hora, type_=tabela.c.data_hora.type),
+    ).where(
+        inscricao.c.qr_code_token == token,
+        inscricao.c.usuario_id == usuario_id,
+        alvo_inscricao,
+        ~ja_existe,
+    )
+
+    dialeto_insert = insert_dialeto()
+    if dialeto_insert is None:
+        # Dialetos sem ON CONFLICT: a guarda NOT EXISTS ainda evita duplicatas
+        stmt = tabela.insert().from_select(colunas, origem)
+        resultado = db.session.execute(stmt)
+        if not resultado.rowcount:
+            return None
+        return resultado.inserted_primary_key[0], data_hora
+
+    stmt = (
+        dialeto_insert(tabela)
+        .from_select(colunas, origem)
+        .on_conflict_do_nothing()
+        .returning(tabela.c.id, tabela.c.data_hora)
+    )
+    linha = db.session.execute(stmt).first()
+    return (linha.id, linha.data_hora) if linha else None
+
+
+def registrar_latencia(segundos):
+    with _latencias_lock:
+        _latencias.append(segundos)
+
+
+def estatisticas_latencia():
+    """p50/p99 (em ms) das últimas leituras de QR Code."""
+    with _latencias_lock:
+        amostras = sorted(_latencias)
+    if not amostras:
+        return {"leituras": 0, "p50_ms": None, "p99_ms": None, "max_ms": None}
+
+    def percentil(p):
+        indice = min(len(amostras) - 1, int(round(p / 100 * (len(amostras) - 1))))
+        return round(amostras[indice] * 1000, 2)
+
+    return {
+        "leituras": len(amostras),
+        "p50_ms": percentil(50),
+        "p99_ms": percentil(99),
+        "max_ms": round(amostras[-1] * 1000, 2),
+    }
+
+
+def _inscricao_vigente(dados):
+    return db.session.query(
+        exists().where(
+            Inscricao.qr_code_token == dados["token"],
+            Inscricao.usuario_id == dados["usuario_id"],
+        )
+    ).scalar()
+
+
+def _registrar_checkin(dados, cliente_id, data_hora=None):
+    """Grava o check-in de uma inscrição já resolvida (sem commit)."""
+    if not dados:
+        return ResultadoCheckin('error', 'Inscrição não encontrada.', 404)
+
+    if dados["cliente_id"] != cliente_id:
+        return ResultadoCheckin(
+            'error', 'Esta inscrição não pertence a um evento ou atividade sua!', 403
+        )
+
+    checkin_cliente_id = dados["checkin_cliente_id"]
+    if dados["oficina_id"]:
+        inserido = inserir_checkin_unico(
+            dados["token"], dados["usuario_id"], checkin_cliente_id, PALAVRA_CHAVE_OFICINA,
+            oficina_id=dados["oficina_id"], evento_id=dados["oficina_evento_id"],
+            data_hora=data_hora,
+        )
+        duplicado = 'Check‑in da oficina já foi realizado!'
+    elif dados["evento_id"]:
+        inserido = inserir_checkin_unico(
+            dados["token"], dados["usuario_id"], checkin_cliente_id, PALAVRA_CHAVE_EVENTO,
+            evento_id=dados["evento_id"], data_hora=data_hora,
+        )
+        duplicado = 'Check‑in do evento já foi realizado!'
+    else:
+        return ResultadoCheckin('error', 'Inscrição sem evento ou oficina.', 400)
+
+    if not inserido:
+        if _inscricao_vigente(dados):
+            return ResultadoCheckin('warning', duplicado)
+        # Cancelada ou com token regenerado em outro worker: o cache estava velho
+        invalidar_token(dados["token"])
+        return ResultadoCheckin('error', 'Inscrição não encontrada.', 404)
+
+    _, data_hora = inserido
+    payload = {
+        'participante': dados["usuario_nome"],
+        'data_hora': data_hora.strftime('%d/%m/%Y %H:%M:%S'),
+        'turno': determinar_turno(data_hora),
+    }
+    if dados["oficina_id"]:
+        payload['oficina'] = dados["oficina_titulo"]
+    else:
+        payload['evento'] = dados["evento_nome"]
+
+    return ResultadoCheckin(
+        'success', 'Check‑in realizado com sucesso!', payload=payload,
+        cliente_id=checkin_cliente_id,
+    )
+
+
+def processar_leitura_qr(token, cliente_id):
+    """Registra o check-in do ``token`` lido pelo cliente ``cliente_id``.
+
+    O commit fica a cargo do chamador.
+    """
+    inicio = time.perf_counter()
+    try:
+        return _registrar_checkin(resolver_token(token), cliente_id)
+    finally:
+        registrar_latencia(time.perf_counter() - inicio)
+
+
+# ------------------------------- #
+# Sincronização de leituras offline
+# ------------------------------- #
+def _converter_scanned_at(valor, agora):
+    """Converte ``scanned_at`` (ISO 8601 ou epoch em ms) para UTC ingênuo.
+
+    Valores ausentes, inválidos ou no futuro viram ``agora``.
+    """
+    if valor in (None, ""):
+        return agora
+    try:
+        if isinstance(valor, (int, float)):
+            momento = datetime.fromtimestamp(valor / 1000, tz=timezone.utc)
+        else:
+            momento = datetime.fromisoformat(str(valor).strip().replace("Z", "+00:00"))
+    except (ValueError, OverflowError, OSError):
+        return agora
+    if momento.tzinfo is not None:
+        momento = momento.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(momento, agora)
+
+
+def chave_idempotencia(leitura):
+    """Chave enviada pelo leitor ou derivada de ``device_id``/``token``/``scanned_at``."""
+    chave = leitura.get("idempotency_key")
+    if chave:
+        return str(chave)
+    return f"{leitura.get('device_id') or ''}:{leitura.get('token')}:{leitura.get('scanned_at') or ''}"
+
+
+def sincronizar_leituras(leituras, cliente_id):
+    """Registra em uma única transação as leituras feitas offline pelos leitores.
+
+    Cada item tem ``{token, scanned_at, device_id}`` (e opcionalmente
+    ``idempotency_key``). Reenvios de uma chave já sincronizada devolvem o
+    resultado original sem tocar no banco. Faz o commit ao final.
+
+    Returns:
+        tuple: ``(resultados, novos_por_cliente)`` onde ``resultados`` segue a
+        ordem de ``leituras`` e ``novos_por_cliente`` agrupa os payloads dos
+        check-ins criados por ``cliente_id`` para um único emit por sala.
+    """
+    agora = datetime.utcnow()
+    resultados = [None] * len(leituras)
+    pendentes = []
+    chaves_lote = {}
+
+    for indice, leitura in enumerate(leituras):
+        token = (leitura.get("token") or "").strip() if isinstance(leitura, dict) else ""
+        if not token:
+            resultados[indice] = {
+                "token": None, "status": "error", "message": "Token não fornecido!",
+            }
+            continue
+        chave = chave_idempotencia(leitura)
+        with _cache_lock:
+            anterior = _sincronizadas.get(chave)
+        if anterior is not None:
+            resultados[indice] = dict(anterior, duplicada=True)
+        elif chave in chaves_lote:
+            # Mesma leitura repetida dentro do lote: reaproveita o resultado
+            pendentes.append((indice, leitura, token, chave, chaves_lote[chave]))
+        else:
+            chaves_lote[chave] = indice
+            pendentes.append((indice, leitura, token, chave, None))
+
+    dados_tokens = resolver_tokens([p[2] for p in pendentes if p[4] is None])
+    novos_por_cliente = {}
+    confirmadas = {}
+    try:
+        for indice, leitura, token, chave, original in pendentes:
+            if original is not None:
+                continue
+            resultado = _registrar_checkin(
+                dados_tokens.get(token), cliente_id,
+                data_hora=_converter_scanned_at(leitura.get("scanned_at"), agora),
+            )
+            saida = dict(resultado.to_dict(), token=token, device_id=leitura.get("device_id"))
+            resultados[indice] = saida
+            if resultado.status == "success":
+                novos_por_cliente.setdefault(resultado.cliente_id, []).append(resultado.payload)
+            # Erros de validação não são memorizados: o token pode ser corrigido
+            if resultado.status != "error":
+                confirmadas[chave] = saida
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for indice, _, _, _, original in pendentes:
+        if original is not None:
+            resultados[indice] = dict(resultados[original], duplicada=True)
+    with _cache_lock:
+        _sincronizadas.update(confirmadas)
+
+    return resultados, novos_por_cliente
+
+
+# ------------------------------- #
+# Check-ins em lote
+# ------------------------------- #
+# Pares (usuario_id, oficina_id) por comando IN; mantém os parâmetros abaixo
+# do limite dos drivers mesmo para oficinas muito grandes.
+_TAMANHO_LOTE_PARES = 5000
+
+
+def _em_blocos(itens, tamanho=_TAMANHO_LOTE_PARES):
+    itens = list(itens)
+    for i in range(0, len(itens), tamanho):
+        yield itens[i:i + tamanho]
+
+
+def carregar_inscricoes_lote(cliente_id, inscricao_ids=None, oficina_ids=None):
+    """Retorna ``{(usuario_id, oficina_id): (cliente_id, evento_id)}`` das inscrições.
+
+    Apenas colunas são lidas (sem instanciar ``Inscricao``/``Oficina``).
+    """
+    query = (
+        db.session.query(
+            Inscricao.usuario_id,
+            Inscricao.oficina_id,
+            Oficina.cliente_id,
+            Oficina.evento_id,
+        )
+        .join(Oficina, Inscricao.oficina_id == Oficina.id)
+        .filter(Oficina.cliente_id == cliente_id)
+    )
+    if inscricao_ids is not None:
+        query = query.filter(Inscricao.id.in_(inscricao_ids))
+    if oficina_ids is not None:
+        query = query.filter(Inscricao.oficina_id.in_(oficina_ids))
+
+    return {
+        (usuario_id, oficina_id): (oficina_cliente_id or cliente_id, evento_id)
+        for usuario_id, oficina_id, oficina_cliente_id, evento_id in query.all()
+    }
+
+
+def _checkins_existentes(pares, turnos):
+    """Conjunto de ``(usuario_id, oficina_id, turno)`` já registrados."""
+    existentes = set()
+    for bloco in _em_blocos(pares):
+        linhas = (
+            db.session.query(Checkin.usuario_id, Checkin.oficina_id, Checkin.turno)
+            .filter(
+                tuple_(Checkin.usuario_id, Checkin.oficina_id).in_(bloco),
+                Checkin.turno.in_(turnos),
+            )
+            .all()
+        )
+        existentes.update(linhas)
+    return existentes
+
+
+def planejar_checkins_lote(inscricoes, turnos):
+    """Separa os check-ins a criar dos que já existem.
+
+    Args:
+        inscricoes: Retorno de ``carregar_inscricoes_lote``
+        turnos: Turnos a registrar
+
+    Returns:
+        tuple: ``(faltantes, total_ignorados)`` onde ``faltantes`` é uma lista
+        de ``(usuario_id, oficina_id, turno)``
+    """
+    existentes = _checkins_existentes(list(inscricoes), turnos)
+    faltantes = [
+        (usuario_id, oficina_id, turno)
+        for (usuario_id, oficina_id) in inscricoes
+        for turno in turnos
+        if (usuario_id, oficina_id, turno) not in existentes
+    ]
+    total = len(inscricoes) * len(turnos)
+    return faltantes, total - len(faltantes)
+
+
+def registrar_checkins_lote(inscricoes, turnos, data_hora):
+    """Registra os check-ins faltantes com um único ``INSERT`` em massa.
+
+    O commit fica a cargo do chamador.
+
+    Returns:
+        dict: ``criados`` e ``ignorados``
+    """
+    faltantes, ignorados = planejar_checkins_lote(inscricoes, turnos)
+    if faltantes:
+        db.session.execute(
+            insert(Checkin.__table__),
+            [
+                {
+                    "usuario_id": usuario_id,
+                    "oficina_id": oficina_id,
+                    "palavra_chave": f"manual-{turno}",
+                    "cliente_id": inscricoes[(usuario_id, oficina_id)][0],
+                    "evento_id": inscricoes[(usuario_id, oficina_id)][1],
+                    "turno": turno,
+                    "data_hora": data_hora,
+                }
+                for usuario_id, oficina_id, turno in faltantes
+            ],
+        )
+    return {"criados": len(faltantes), "ignorados": ignorados}
+
+
+def _filtros_remocao(bloco, turnos=None, data_hora=None):
+    filtros = [tuple_(Checkin.usuario_id, Checkin.oficina_id).in_(bloco)]
+    # Sem turno específico remove inclusive check-ins sem turno (QR/manual antigo)
+    if turnos:
+        filtros.append(Checkin.turno.in_(turnos))
+    if data_hora:
+        inicio = data_hora.replace(second=0, microsecond=0)
+        fim = inicio + timedelta(minutes=1)
+        filtros.extend([Checkin.data_hora >= inicio, Checkin.data_hora < fim])
+    return filtros
+
+
+def contar_checkins_lote(inscricoes, turnos=None, data_hora=None):
+    """Quantidade de check-ins que ``remover_checkins_lote`` apagaria."""
+    return sum(
+        db.session.query(func.count(Checkin.id)).filter(*_filtros_remocao(bloco, turnos, data_hora)).scalar()
+        for bloco in _em_blocos(inscricoes)
+    )
+
+
+def remover_checkins_lote(inscricoes, turnos=None, data_hora=None):
+    """Remove os check-ins dos pares com um ``DELETE ... WHERE (usuario_id, oficina_id) IN``.
+
+    O commit fica a cargo do chamador. Retorna o número de linhas removidas.
+    """
+    tabela = Checkin.__table__
+    removidos = 0
+    for bloco in _em_blocos(inscricoes):
+        resultado = db.session.execute(tabela.delete().where(*_filtros_remocao(bloco, turnos, data_hora)))
+        removidos += resultado.rowcount or 0
+    return removidos
+
+
+# ------------------------------- #
+# Feed incremental de check-ins
+# ------------------------------- #
+FEED_LIMITE = 50
+_FEED_CAPACIDADE = 200
+# Polls de vários painéis do mesmo cliente dentro desta janela não vão ao banco
+_FEED_INTERVALO_MINIMO = 1.0
+# Recarga completa periódica para refletir remoções feitas fora deste módulo
+_FEED_TTL = 5 * 60
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+class _BufferFeed:
+    """Últimos check-ins de um cliente, em ordem crescente de ``id``."""
+
+    def __init__(self):
+        self.itens = deque(maxlen=_FEED_CAPACIDADE)
+        self.ultimo_id = None
+        # Todo check-in com id maior que este está no buffer
+        self.coberto_desde = 0
+        self.consultado_em = 0.0
+        self.recarregado_em = 0.0
+        self.lock = threading.Lock()
+
+
+def _consulta_feed(cliente_id):
+    query = Checkin.query.options(
+        load_only(Checkin.id, Checkin.data_hora, Checkin.oficina_id, Checkin.evento_id),
+        joinedload(Checkin.usuario).load_only(Usuario.nome),
+        joinedload(Checkin.oficina).load_only(Oficina.titulo),
+        joinedload(Checkin.evento).load_only(Evento.nome),
+    )
+    if cliente_id is not None:
+        # ix_checkin_cliente_id_id cobre o caso comum; check-ins antigos sem
+        # cliente materializado caem no cliente do usuário, como em
+        # dashboard_stats_service.paginar_checkins_qr
+        query = query.outerjoin(Usuario, Checkin.usuario_id == Usuario.id).filter(
+            or_(
+                Checkin.cliente_id == cliente_id,
+                and_(Checkin.cliente_id.is_(None), Usuario.cliente_id == cliente_id),
+            )
+        )
+    return query
+
+
+def _item_feed(checkin):
+    return {
+        "id": checkin.id,
+        "data_hora": checkin.data_hora,
+        "participante": checkin.usuario.nome if checkin.usuario else None,
+        "oficina_id": checkin.oficina_id,
+        "oficina": checkin.oficina.titulo if checkin.oficina else None,
+        "evento_id": checkin.evento_id,
+        "evento": checkin.evento.nome if checkin.evento else None,
+    }
+
+
+def _atualizar_buffer(buffer, cliente_id):
+    agora = time.monotonic()
+    if buffer.ultimo_id is not None and agora - buffer.consultado_em < _FEED_INTERVALO_MINIMO:
+        return
+
+    query = _consulta_feed(cliente_id)
+    novos = None
+    if buffer.ultimo_id is not None and agora - buffer.recarregado_em < _FEED_TTL:
+        novos = (
+            query.filter(Checkin.id > buffer.ultimo_id)
+            .order_by(Checkin.id)
+            .limit(_FEED_CAPACIDADE + 1)
+            .all()
+        )
+        if len(novos) > _FEED_CAPACIDADE:
+            # Lacuna maior que o buffer: recarrega só os mais recentes
+            novos = None
+    if novos is None:
+        buffer.itens.clear()
+        novos = query.order_by(Checkin.id.desc()).limit(_FEED_CAPACIDADE).all()
+        novos.reverse()
+        buffer.ultimo_id = 0
+        buffer.coberto_desde = 0
+        buffer.recarregado_em = agora
+
+    for checkin in novos:
+        buffer.itens.append(_item_feed(checkin))
+    if novos:
+        buffer.ultimo_id = novos[-1].id
+    if len(buffer.itens) == _FEED_CAPACIDADE:
+        buffer.coberto_desde = buffer.itens[0]["id"] - 1
+    buffer.consultado_em = agora
+
+
+def feed_checkins(cliente_id, since_id=None, limite=FEED_LIMITE):
+    """Check-ins do cliente (``None`` = todos) mais novos que ``since_id``.
+
+    Cada cliente tem um buffer circular com os últimos check-ins; um poll só
+    consulta ``cliente_id = :id AND id > :ultimo_id`` e responde a partir do
+    buffer. Clientes atrasados além da capacidade do buffer caem em uma
+    consulta direta.
+
+    A ordem é a do ``id`` (ordem de gravação), não a de ``data_hora``: o
+    cursor ``since_id`` só é monotônico assim, e um check-in gravado com
+    ``data_hora`` retroativa (ex.: sincronização offline) aparece no feed
+    quando chega em vez de ficar escondido atrás do cursor.
+
+    Returns:
+        tuple: ``(itens, cursor)`` com os itens do mais novo para o mais antigo
+        e o maior ``id`` conhecido para o próximo ``since_id``.
+    """
+    with _feeds_lock:
+        buffer = _feeds.setdefault(cliente_id, _BufferFeed())
+
+    with buffer.lock:
+        _atualizar_buffer(buffer, cliente_id)
+        itens = list(buffer.itens)
+        cursor = buffer.ultimo_id or 0
+        coberto_desde = buffer.coberto_desde
+
+    if since_id is None:
+        return list(reversed(itens[-limite:])), cursor
+
+    if since_id >= coberto_desde:
+        delta = [item for item in itens if item["id"] > since_id]
+    else:
+        delta = [
+            _item_feed(c)
+            for c in _consulta_feed(cliente_id)
+            .filter(Checkin.id > since_id)
+            .order_by(Checkin.id.desc())
+            .limit(limite)
+            .all()
+        ][::-1]
+    return list(reversed(delta[-limite:])), cursor
+
+
+def invalidar_feed(cliente_id=None):
+    """Descarta o buffer do cliente (e o global) após remoções de check-ins."""
+    with _feeds_lock:
+        _feeds.pop(cliente_id, None)
+        _feeds.pop(None, None)
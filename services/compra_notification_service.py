@@ -9,7 +9,7 @@ from models.compra import Compra
 from models.user import Usuario
 from models.material import Polo
 from models.orcamento import Orcamento
-from services.email_service import send_email
+from services.email_outbox_service import enfileirar_mensagem
 
 logger = logging.getLogger(__name__)
 
@@ -125,11 +125,12 @@ class CompraNotificationService:
             html_content = CompraNotificationService._get_template_orcamento_excedido().render(**template_data)
             
             for destinatario in destinatarios:
-                send_email(
+                enfileirar_mensagem(
                     to=destinatario.email,
                     subject=subject,
                     html=html_content
                 )
+            db.session.commit()
                 
             logger.info(f"Alerta de orçamento excedido enviado para {len(destinatarios)} destinatários")
             
@@ -158,11 +159,12 @@ class CompraNotificationService:
             html_content = CompraNotificationService._get_template_orcamento_proximo_limite().render(**template_data)
             
             for destinatario in destinatarios:
-                send_email(
+                enfileirar_mensagem(
                     to=destinatario.email,
                     subject=subject,
                     html=html_content
                 )
+            db.session.commit()
                 
             logger.info(f"Alerta de orçamento próximo ao limite enviado para {len(destinatarios)} destinatários")
             
@@ -205,11 +207,12 @@ class CompraNotificationService:
                 html_content = CompraNotificationService._get_template_compras_pendentes().render(**template_data)
                 
                 for destinatario in destinatarios:
-                    send_email(
+                    enfileirar_mensagem(
                         to=destinatario.email,
                         subject=subject,
                         html=html_content
                     )
+                db.session.commit()
                     
                 logger.info(f"Alerta de compras pendentes enviado para {polo_nome}")
                 
@@ -252,11 +255,12 @@ class CompraNotificationService:
                 html_content = CompraNotificationService._get_template_prestacoes_atrasadas().render(**template_data)
                 
                 for destinatario in destinatarios:
-                    send_email(
+                    enfileirar_mensagem(
                         to=destinatario.email,
                         subject=subject,
                         html=html_content
                     )
+                db.session.commit()
                     
                 logger.info(f"Alerta de prestações atrasadas enviado para {polo_nome}")
                 
@@ -0,0 +1,39 @@
+"""Utilitários compartilhados pelos serviços."""
+
+from flask import current_app, has_app_context
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db
+
+
+def config_app(chave, padrao):
+    """Valor de ``current_app.config``; ``padrao`` se ausente, ``None`` ou fora do app.
+
+    Valores falsos explícitos (``0``, ``""``) são devolvidos como estão.
+    """
+    if has_app_context():
+        valor = current_app.config.get(chave)
+        return padrao if valor is None else valor
+    return padrao
+
+
+def insert_dialeto():
+    """``insert`` do dialeto com ``ON CONFLICT`` (PostgreSQL/SQLite), ou ``None``."""
+    nome = db.engine.dialect.name
+    if nome == "postgresql":
+        return postgresql.insert
+    if nome == "sqlite":
+        return sqlite.insert
+    return None
+
+
+def config_positivo(chave, padrao):
+    """``config_app`` para tamanhos e lotes: ``0`` ou negativo é erro de configuração.
+
+    Raises:
+        ValueError: Se o valor configurado não for positivo
+    """
+    valor = config_app(chave, padrao)
+    if valor <= 0:
+        raise ValueError(f"{chave} deve ser positivo (recebido {valor!r})")
+    return valor
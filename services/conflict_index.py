@@ -0,0 +1,314 @@
+"""Índice de conflitos de interesse entre submissões e revisores.
+
+Cada submissão e cada revisor viram um conjunto de chaves normalizadas:
+
+* ``u:<id>`` do autor (submissão) ou do próprio revisor;
+* ``e:<email>`` do autor (``Usuario.email`` e ``attributes.author_email``)
+  ou do revisor;
+* ``d:<domínio>`` desses e-mails, exceto provedores públicos (gmail etc.),
+  que não indicam vínculo;
+* ``i:<instituição>`` sem acentos, caixa e espaços repetidos.
+
+O revisor recebe também as exclusões do perfil (``excluded_authors`` por id
+ou e-mail e ``excluded_institutions``). Há conflito quando os conjuntos se
+cruzam, o que reduz a checagem de cada par a uma interseção de conjuntos
+pequenos, e a matriz de um lote inteiro sai de um índice invertido
+chave → revisores, sem percorrer todos os pares.
+
+As chaves são guardadas como digests em ``conflict_index_entry`` e
+reaproveitadas entre execuções (distribuições, rebalanceamento e atribuições
+manuais). Alterações via ORM nas origens (autor, atributos e e-mail da
+submissão, perfil do revisor, e-mail do usuário) apagam as entradas afetadas
+no ``after_flush``; a próxima carga as recalcula.
+"""
+
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from sqlalchemy import and_, delete, event, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models.review import Submission
+from models.submission_system import ConflictIndexEntry, DistributionConfig, ReviewerProfile
+from models.user import Usuario
+from services.comum import insert_dialeto
+
+# Domínios de e-mail pessoais: compartilhá-los não é conflito
+PUBLIC_EMAIL_DOMAINS = frozenset({
+    "gmail.com", "googlemail.com", "hotmail.com", "hotmail.com.br", "outlook.com",
+    "outlook.com.br", "live.com", "msn.com", "yahoo.com", "yahoo.com.br", "icloud.com",
+    "me.com", "aol.com", "bol.com.br", "uol.com.br", "terra.com.br", "ig.com.br",
+    "protonmail.com", "proton.me",
+})
+
+# Limite de parâmetros por IN, abaixo do máximo do SQLite
+LOAD_CHUNK = 500
+
+_EMAIL_SEPARATORS = re.compile(r"[;,\s]+")
+_SUBMISSION_FIELDS = ("author_id", "attributes")
+_REVIEWER_FIELDS = ("usuario_id", "institution", "excluded_institutions", "excluded_authors")
+
+
+def normalize_email(value) -> Optional[str]:
+    if not value or "@" not in str(value):
+        return None
+    return str(value).strip().lower()
+
+
+def normalize_institution(value) -> Optional[str]:
+    if not value:
+        return None
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = " ".join(text.lower().split())
+    return text or None
+
+
+def _digest(token: str) -> str:
+    return hashlib.blake2b(token.encode(), digest_size=8).hexdigest()
+
+
+def _email_tokens(emails: Iterable) -> Set[str]:
+    tokens = set()
+    for raw in emails:
+        for part in _EMAIL_SEPARATORS.split(str(raw or "")):
+            email = normalize_email(part)
+            if not email:
+                continue
+            tokens.add(f"e:{email}")
+            domain = email.rsplit("@", 1)[1]
+            if domain and domain not in PUBLIC_EMAIL_DOMAINS:
+                tokens.add(f"d:{domain}")
+    return tokens
+
+
+def submission_keys(submission: Submission, author_email: Optional[str] = None) -> Set[str]:
+    """Chaves (digests) da submissão; ``author_email`` é o e-mail do ``author_id``."""
+    attributes = submission.attributes or {}
+    tokens = _email_tokens([author_email, attributes.get("author_email")])
+    if submission.author_id is not None:
+        tokens.add(f"u:{submission.author_id}")
+    institution = normalize_institution(attributes.get("institution"))
+    if institution:
+        tokens.add(f"i:{institution}")
+    return {_digest(t) for t in tokens}
+
+
+def reviewer_keys(usuario_id: int, email: Optional[str], profile: Optional[ReviewerProfile] = None) -> Set[str]:
+    """Chaves (digests) do revisor, incluindo as exclusões do perfil."""
+    tokens = _email_tokens([email])
+    tokens.add(f"u:{usuario_id}")
+    if profile is not None:
+        institutions = [profile.institution, *(profile.excluded_institutions or [])]
+        tokens.update(f"i:{i}" for i in map(normalize_institution, institutions) if i)
+        for author in profile.excluded_authors or []:
+            if isinstance(author, int) or str(author).strip().isdigit():
+                tokens.add(f"u:{int(author)}")
+            else:
+                tokens.update(t for t in _email_tokens([author]) if t.startswith("e:"))
+    return {_digest(t) for t in tokens}
+
+
+def _reviewer_user_id(reviewer) -> int:
+    return reviewer.usuario_id if isinstance(reviewer, ReviewerProfile) else reviewer.id
+
+
+def conflict_detection_enabled(evento_id) -> bool:
+    """``enable_conflict_detection`` do evento (ligado quando não há configuração)."""
+    enabled = db.session.execute(
+        select(DistributionConfig.enable_conflict_detection).where(DistributionConfig.evento_id == evento_id)
+    ).scalar()
+    return enabled is not False
+
+
+class ConflictIndex:
+    """Chaves de conflito carregadas para uma execução.
+
+    ``load`` aceita submissões e revisores (``ReviewerProfile`` ou ``Usuario``)
+    e só calcula, numa consulta por tipo, as chaves ainda não persistidas.
+    ``has_conflict`` carrega sob demanda o que faltar.
+    """
+
+    def __init__(self):
+        self._submission_keys: Dict[int, frozenset] = {}
+        self._reviewer_keys: Dict[int, frozenset] = {}
+        self._reviewers_by_key: Dict[str, Set[int]] = defaultdict(set)
+        self.stats = {"reused": 0, "computed": 0}
+
+    def load(self, submissions: Iterable[Submission] = (), reviewers: Iterable = ()) -> "ConflictIndex":
+        submissions = {s.id: s for s in submissions if s.id not in self._submission_keys}
+        reviewers = {_reviewer_user_id(r): r for r in reviewers}
+        reviewers = {uid: r for uid, r in reviewers.items() if uid not in self._reviewer_keys}
+        if not submissions and not reviewers:
+            return self
+
+        stored = self._load_stored(ConflictIndexEntry.SUBMISSION, submissions)
+        stored.update(self._load_stored(ConflictIndexEntry.REVIEWER, reviewers))
+        computed = self._compute_submissions(
+            [s for s in submissions.values() if (ConflictIndexEntry.SUBMISSION, s.id) not in stored]
+        )
+        computed.update(self._compute_reviewers(
+            {uid: r for uid, r in reviewers.items() if (ConflictIndexEntry.REVIEWER, uid) not in stored}
+        ))
+        self._persist(computed)
+        self.stats["reused"] += len(stored)
+        self.stats["computed"] += len(computed)
+
+        for (entity_type, entity_id), keys in {**stored, **computed}.items():
+            keys = frozenset(keys)
+            if entity_type == ConflictIndexEntry.SUBMISSION:
+                self._submission_keys[entity_id] = keys
+            else:
+                self._reviewer_keys[entity_id] = keys
+                for key in keys:
+                    self._reviewers_by_key[key].add(entity_id)
+        return self
+
+    def _load_stored(self, entity_type: str, entities: Dict) -> Dict:
+        stored = {}
+        ids = list(entities)
+        for start in range(0, len(ids), LOAD_CHUNK):
+            rows = db.session.execute(
+                select(ConflictIndexEntry.entity_id, ConflictIndexEntry.keys).where(
+                    ConflictIndexEntry.entity_type == entity_type,
+                    ConflictIndexEntry.entity_id.in_(ids[start:start + LOAD_CHUNK]),
+                )
+            )
+            stored.update({(entity_type, entity_id): keys or [] for entity_id, keys in rows})
+        return stored
+
+    def _compute_submissions(self, submissions: List[Submission]) -> Dict:
+        author_ids = {s.author_id for s in submissions if s.author_id is not None}
+        emails = self._emails(author_ids)
+        return {
+            (ConflictIndexEntry.SUBMISSION, s.id): submission_keys(s, emails.get(s.author_id))
+            for s in submissions
+        }
+
+    def _compute_reviewers(self, reviewers: Dict) -> Dict:
+        if not reviewers:
+            return {}
+        emails = self._emails(reviewers)
+        profiles = {uid: r for uid, r in reviewers.items() if isinstance(r, ReviewerProfile)}
+        missing = [uid for uid in reviewers if uid not in profiles]
+        for start in range(0, len(missing), LOAD_CHUNK):
+            profiles.update(
+                (p.usuario_id, p) for p in ReviewerProfile.query.filter(
+                    ReviewerProfile.usuario_id.in_(missing[start:start + LOAD_CHUNK])
+                )
+            )
+        return {
+            (ConflictIndexEntry.REVIEWER, uid): reviewer_keys(uid, emails.get(uid), profiles.get(uid))
+            for uid in reviewers
+        }
+
+    @staticmethod
+    def _emails(usuario_ids) -> Dict[int, str]:
+        ids = list(usuario_ids)
+        emails = {}
+        for start in range(0, len(ids), LOAD_CHUNK):
+            emails.update(db.session.execute(
+                select(Usuario.id, Usuario.email).where(Usuario.id.in_(ids[start:start + LOAD_CHUNK]))
+            ).all())
+        return emails
+
+    @staticmethod
+    def _persist(computed: Dict):
+        if not computed:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {"entity_type": entity_type, "entity_id": entity_id, "keys": sorted(keys), "updated_at": now}
+            for (entity_type, entity_id), keys in computed.items()
+        ]
+        table = ConflictIndexEntry.__table__
+        dialeto_insert = insert_dialeto()
+        for start in range(0, len(rows), LOAD_CHUNK):
+            chunk = rows[start:start + LOAD_CHUNK]
+            if dialeto_insert is None:
+                db.session.execute(table.insert(), chunk)
+                continue
+            # Outra execução pode ter gravado a mesma entidade nesse meio tempo
+            stmt = dialeto_insert(table).values(chunk)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=["entity_type", "entity_id"],
+                set_={"keys": stmt.excluded["keys"], "updated_at": stmt.excluded["updated_at"]},
+            ))
+
+    def has_conflict(self, submission: Submission, reviewer) -> bool:
+        usuario_id = _reviewer_user_id(reviewer)
+        if submission.id not in self._submission_keys or usuario_id not in self._reviewer_keys:
+            self.load([submission], [reviewer])
+        return not self._submission_keys[submission.id].isdisjoint(self._reviewer_keys[usuario_id])
+
+    def conflicting_reviewers(self, submission: Submission, reviewers: Iterable = ()) -> Set[int]:
+        """``usuario_id`` dos revisores carregados (e de ``reviewers``) em conflito com a submissão."""
+        self.load([submission], reviewers)
+        conflicting = set()
+        for key in self._submission_keys[submission.id]:
+            conflicting |= self._reviewers_by_key.get(key, set())
+        return conflicting
+
+    def matrix(self, submissions: List[Submission], reviewers: List) -> np.ndarray:
+        """Matriz booleana submissões × revisores, preenchida só nos pares em conflito."""
+        self.load(submissions, reviewers)
+        conflicts = np.zeros((len(submissions), len(reviewers)), dtype=bool)
+        columns = defaultdict(list)
+        for j, reviewer in enumerate(reviewers):
+            for key in self._reviewer_keys[_reviewer_user_id(reviewer)]:
+                columns[key].append(j)
+        for i, submission in enumerate(submissions):
+            for key in self._submission_keys[submission.id]:
+                if key in columns:
+                    conflicts[i, columns[key]] = True
+        return conflicts
+
+
+def _changed(objeto, fields) -> bool:
+    attrs = inspect(objeto).attrs
+    return any(attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(Session, "after_flush")
+def _apagar_entradas_alteradas(sessao, contexto):
+    submissoes, revisores, usuarios = set(), set(), set()
+    for objeto in sessao.dirty:
+        if isinstance(objeto, Submission) and _changed(objeto, _SUBMISSION_FIELDS):
+            submissoes.add(objeto.id)
+        elif isinstance(objeto, ReviewerProfile) and _changed(objeto, _REVIEWER_FIELDS):
+            revisores.add(objeto.usuario_id)
+            # Perfil transferido: o usuário anterior perde as exclusões
+            revisores.update(inspect(objeto).attrs.usuario_id.history.deleted or ())
+        elif isinstance(objeto, Usuario) and _changed(objeto, ("email",)):
+            usuarios.add(objeto.id)
+    for objeto in sessao.deleted:
+        if isinstance(objeto, Submission):
+            submissoes.add(objeto.id)
+        elif isinstance(objeto, (ReviewerProfile, Usuario)):
+            revisores.add(_reviewer_user_id(objeto))
+    # Perfil novo substitui as chaves calculadas só com o e-mail do usuário
+    revisores.update(o.usuario_id for o in sessao.new if isinstance(o, ReviewerProfile))
+    revisores.discard(None)
+    if not (submissoes or revisores or usuarios):
+        return
+
+    tabela = ConflictIndexEntry.__table__
+    condicoes = []
+    if submissoes:
+        condicoes.append(and_(tabela.c.entity_type == ConflictIndexEntry.SUBMISSION,
+                              tabela.c.entity_id.in_(submissoes)))
+    if revisores | usuarios:
+        condicoes.append(and_(tabela.c.entity_type == ConflictIndexEntry.REVIEWER,
+                              tabela.c.entity_id.in_(revisores | usuarios)))
+    if usuarios:
+        condicoes.append(and_(
+            tabela.c.entity_type == ConflictIndexEntry.SUBMISSION,
+            tabela.c.entity_id.in_(select(Submission.id).where(Submission.author_id.in_(usuarios))),
+        ))
+    sessao.connection().execute(delete(tabela).where(or_(*condicoes)))
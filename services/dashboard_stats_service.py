@@ -0,0 +1,243 @@
+"""Estatísticas do dashboard do cliente em poucas consultas agregadas.
+
+Os contadores de agendamentos (totais, confirmados, realizados, cancelados e
+visitantes) saem de um único ``GROUP BY status``; ocupação e total de
+inscrições vêm de um ``SELECT`` com subconsultas escalares. O pacote resultante
+fica em cache por cliente com TTL curto e é descartado quando uma transação que
+alterou agendamentos, horários ou inscrições do cliente é confirmada:
+alterações via ORM são detectadas no ``after_flush`` e os ``UPDATE`` diretos
+(reserva de vagas) chamam ``marcar_evento``.
+
+As listas de check-ins via QR e de inscritos são paginadas em vez de carregadas
+por completo.
+"""
+
+import logging
+import threading
+from datetime import datetime
+
+from cachetools import TTLCache
+from sqlalchemy import and_, event, func, or_, select
+from sqlalchemy.orm import Session, joinedload
+
+from extensions import db
+from models import (
+    AgendamentoVisita,
+    Checkin,
+    Evento,
+    HorarioVisitacao,
+    Inscricao,
+    Oficina,
+    Usuario,
+)
+
+logger = logging.getLogger(__name__)
+
+POR_PAGINA = 20
+PALAVRAS_QR = ("QR-AUTO", "QR-EVENTO", "QR-OFICINA")
+
+_CACHE_TTL = 30
+_cache = TTLCache(maxsize=1024, ttl=_CACHE_TTL)
+_cache_lock = threading.Lock()
+_estatisticas = {"hits": 0, "misses": 0, "invalidacoes": 0}
+
+_CHAVE_SESSAO = "dashboard_clientes_alterados"
+
+
+def _contagens_agendamentos(cliente_id):
+    linhas = db.session.execute(
+        select(
+            AgendamentoVisita.status,
+            func.count(AgendamentoVisita.id),
+            func.coalesce(func.sum(AgendamentoVisita.quantidade_alunos), 0),
+        )
+        .join(HorarioVisitacao, AgendamentoVisita.horario_id == HorarioVisitacao.id)
+        .join(Evento, HorarioVisitacao.evento_id == Evento.id)
+        .where(Evento.cliente_id == cliente_id)
+        .group_by(AgendamentoVisita.status)
+    ).all()
+    por_status = {status: (total, alunos) for status, total, alunos in linhas}
+    return {
+        "agendamentos_totais": sum(total for total, _ in por_status.values()),
+        "agendamentos_confirmados": por_status.get("confirmado", (0, 0))[0],
+        "agendamentos_realizados": por_status.get("realizado", (0, 0))[0],
+        "agendamentos_cancelados": por_status.get("cancelado", (0, 0))[0],
+        "total_visitantes": sum(
+            int(por_status.get(status, (0, 0))[1]) for status in ("confirmado", "realizado")
+        ),
+    }
+
+
+def _ocupacao_e_inscricoes(cliente_id, hoje):
+    horarios = (
+        select(HorarioVisitacao.capacidade_total, HorarioVisitacao.vagas_disponiveis)
+        .join(Evento, HorarioVisitacao.evento_id == Evento.id)
+        .where(Evento.cliente_id == cliente_id, HorarioVisitacao.data >= hoje)
+        .subquery()
+    )
+    ocupadas = select(
+        func.sum(horarios.c.capacidade_total - horarios.c.vagas_disponiveis)
+    ).scalar_subquery()
+    capacidade = select(func.sum(horarios.c.capacidade_total)).scalar_subquery()
+    inscricoes = (
+        select(func.count(Inscricao.id))
+        .join(Oficina, Inscricao.oficina_id == Oficina.id)
+        .where(or_(Oficina.cliente_id == cliente_id, Oficina.cliente_id.is_(None)))
+        .scalar_subquery()
+    )
+    linha = db.session.execute(select(ocupadas, capacidade, inscricoes)).one()
+    ocupadas, capacidade, total_inscricoes = linha
+    ocupacao = (ocupadas / capacidade) * 100 if capacidade else 0
+    return {"ocupacao_media": ocupacao, "total_inscricoes": total_inscricoes or 0}
+
+
+def estatisticas_cliente(cliente_id, hoje=None):
+    """Pacote de contadores do dashboard do cliente.
+
+    Returns:
+        dict: ``agendamentos_totais``, ``agendamentos_confirmados``,
+        ``agendamentos_realizados``, ``agendamentos_cancelados``,
+        ``total_visitantes``, ``ocupacao_media`` e ``total_inscricoes``
+    """
+    hoje = hoje or datetime.utcnow().date()
+    chave = (cliente_id, hoje)
+    with _cache_lock:
+        pacote = _cache.get(chave)
+        _estatisticas["hits" if pacote is not None else "misses"] += 1
+    if pacote is not None:
+        return dict(pacote)
+
+    pacote = _contagens_agendamentos(cliente_id)
+    pacote.update(_ocupacao_e_inscricoes(cliente_id, hoje))
+    with _cache_lock:
+        _cache[chave] = pacote
+    return dict(pacote)
+
+
+def paginar_checkins_qr(cliente_id, pagina=1, por_pagina=POR_PAGINA):
+    """Check-ins via QR do cliente, mais recentes primeiro.
+
+    Usa o ``Checkin.cliente_id`` materializado; o cliente do usuário só é
+    consultado para check-ins antigos sem cliente.
+    """
+    consulta = (
+        Checkin.query.options(
+            joinedload(Checkin.usuario), joinedload(Checkin.oficina), joinedload(Checkin.evento)
+        )
+        .outerjoin(Usuario, Checkin.usuario_id == Usuario.id)
+        .filter(
+            Checkin.palavra_chave.in_(PALAVRAS_QR),
+            or_(
+                Checkin.cliente_id == cliente_id,
+                and_(Checkin.cliente_id.is_(None), Usuario.cliente_id == cliente_id),
+            ),
+        )
+        .order_by(Checkin.data_hora.desc(), Checkin.id.desc())
+    )
+    return consulta.paginate(page=pagina, per_page=por_pagina, error_out=False)
+
+
+def paginar_inscritos(cliente_id, pagina=1, por_pagina=POR_PAGINA):
+    """Inscrições em oficinas ou eventos do cliente, mais recentes primeiro.
+
+    A posse vem da oficina ou do evento (o da inscrição ou o da oficina), não
+    de ``Inscricao.cliente_id``: a lista expõe nome e e-mail dos inscritos.
+    """
+    consulta = (
+        Inscricao.query.options(joinedload(Inscricao.usuario))
+        .outerjoin(Oficina, Inscricao.oficina_id == Oficina.id)
+        .outerjoin(Evento, Evento.id == func.coalesce(Inscricao.evento_id, Oficina.evento_id))
+        .filter(or_(Oficina.cliente_id == cliente_id, Evento.cliente_id == cliente_id))
+        .order_by(Inscricao.id.desc())
+    )
+    return consulta.paginate(page=pagina, per_page=por_pagina, error_out=False)
+
+
+def invalidar_cliente(cliente_id):
+    """Descarta o pacote em cache do cliente."""
+    with _cache_lock:
+        for chave in [c for c in _cache.keys() if c[0] == cliente_id]:
+            _cache.pop(chave, None)
+        _estatisticas["invalidacoes"] += 1
+
+
+def marcar_cliente(cliente_id, sessao=None):
+    """Agenda a invalidação do cliente para depois do commit da sessão."""
+    if cliente_id is None:
+        return
+    sessao = sessao or db.session
+    sessao.info.setdefault(_CHAVE_SESSAO, set()).add(cliente_id)
+
+
+def _clientes_dos_eventos(sessao, evento_ids=(), horario_ids=(), oficina_ids=()):
+    consultas = []
+    if evento_ids:
+        consultas.append(select(Evento.cliente_id).where(Evento.id.in_(evento_ids)))
+    if horario_ids:
+        consultas.append(
+            select(Evento.cliente_id)
+            .join(HorarioVisitacao, HorarioVisitacao.evento_id == Evento.id)
+            .where(HorarioVisitacao.id.in_(horario_ids))
+        )
+    if oficina_ids:
+        consultas.append(select(Oficina.cliente_id).where(Oficina.id.in_(oficina_ids)))
+    clientes = set()
+    for consulta in consultas:
+        clientes.update(sessao.execute(consulta).scalars())
+    clientes.discard(None)
+    return clientes
+
+
+def marcar_evento(evento_id, sessao=None):
+    """Como ``marcar_cliente``, a partir do evento (usado nos ``UPDATE`` diretos)."""
+    if evento_id is None:
+        return
+    sessao = sessao or db.session
+    for cliente_id in _clientes_dos_eventos(sessao, evento_ids=[evento_id]):
+        marcar_cliente(cliente_id, sessao)
+
+
+def marcar_horario(horario_id, sessao=None):
+    """Como ``marcar_evento``, a partir do horário de visitação."""
+    if horario_id is None:
+        return
+    sessao = sessao or db.session
+    for cliente_id in _clientes_dos_eventos(sessao, horario_ids=[horario_id]):
+        marcar_cliente(cliente_id, sessao)
+
+
+def estatisticas_cache():
+    with _cache_lock:
+        return dict(_estatisticas, entradas=len(_cache))
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_clientes_alterados(sessao, contexto):
+    evento_ids, horario_ids, oficina_ids = set(), set(), set()
+    for objeto in (*sessao.new, *sessao.dirty, *sessao.deleted):
+        if isinstance(objeto, AgendamentoVisita):
+            marcar_cliente(objeto.cliente_id, sessao)
+            if objeto.horario_id is not None:
+                horario_ids.add(objeto.horario_id)
+        elif isinstance(objeto, HorarioVisitacao):
+            if objeto.evento_id is not None:
+                evento_ids.add(objeto.evento_id)
+        elif isinstance(objeto, Inscricao):
+            marcar_cliente(objeto.cliente_id, sessao)
+            if objeto.oficina_id is not None:
+                oficina_ids.add(objeto.oficina_id)
+    if evento_ids or horario_ids or oficina_ids:
+        for cliente_id in _clientes_dos_eventos(sessao, evento_ids, horario_ids, oficina_ids):
+            marcar_cliente(cliente_id, sessao)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(sessao):
+    for cliente_id in sessao.info.pop(_CHAVE_SESSAO, ()):
+        invalidar_cliente(cliente_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_apos_rollback(sessao, transacao_anterior):
+    if transacao_anterior.parent is None:
+        sessao.info.pop(_CHAVE_SESSAO, None)
@@ -0,0 +1,132 @@
+"""Disponibilidade de horários de visitação por evento e período.
+
+As consultas usam o índice ``ix_horario_visitacao_evento_data_vagas``
+(``evento_id, data, vagas_disponiveis``) e o resultado de cada
+``(evento, início, fim)`` fica em cache com um ETag calculado sobre o
+conteúdo, de modo que o ETag é o mesmo em todos os processos.
+
+O cache de um evento é descartado quando uma transação que alterou seus
+horários é confirmada: alterações via ORM são detectadas no ``after_flush`` e
+os ``UPDATE`` diretos (reserva de vagas, geração em lote) chamam
+``marcar_alteracao``. O TTL curto cobre alterações feitas em outros processos.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import namedtuple
+
+from cachetools import TTLCache
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import HorarioVisitacao
+
+logger = logging.getLogger(__name__)
+
+_CACHE_TTL = 60
+_cache = TTLCache(maxsize=2048, ttl=_CACHE_TTL)
+_cache_lock = threading.Lock()
+_estatisticas = {"hits": 0, "misses": 0, "invalidacoes": 0}
+
+_CHAVE_SESSAO = "disponibilidade_eventos_alterados"
+
+Disponibilidade = namedtuple("Disponibilidade", "horarios etag")
+
+
+def _consultar(evento_id, inicio, fim):
+    tabela = HorarioVisitacao.__table__
+    filtros = [
+        tabela.c.evento_id == evento_id,
+        tabela.c.vagas_disponiveis > 0,
+        tabela.c.fechado.is_(False),
+    ]
+    if inicio:
+        filtros.append(tabela.c.data >= inicio)
+    if fim:
+        filtros.append(tabela.c.data <= fim)
+    linhas = db.session.execute(
+        select(
+            tabela.c.id,
+            tabela.c.data,
+            tabela.c.horario_inicio,
+            tabela.c.horario_fim,
+            tabela.c.vagas_disponiveis,
+        )
+        .where(*filtros)
+        .order_by(tabela.c.data, tabela.c.horario_inicio)
+    ).all()
+    return [
+        {
+            "id": linha.id,
+            "data": linha.data.isoformat(),
+            "horario_inicio": linha.horario_inicio.strftime("%H:%M"),
+            "horario_fim": linha.horario_fim.strftime("%H:%M"),
+            "vagas_disponiveis": linha.vagas_disponiveis,
+        }
+        for linha in linhas
+    ]
+
+
+def horarios_disponiveis(evento_id, inicio=None, fim=None):
+    """Horários com vagas do evento entre ``inicio`` e ``fim`` (datas, inclusivo).
+
+    Returns:
+        Disponibilidade: ``horarios`` (lista de dicts) e ``etag``
+    """
+    chave = (evento_id, inicio, fim)
+    with _cache_lock:
+        snapshot = _cache.get(chave)
+        _estatisticas["hits" if snapshot is not None else "misses"] += 1
+    if snapshot is not None:
+        return snapshot
+
+    horarios = _consultar(evento_id, inicio, fim)
+    conteudo = json.dumps(horarios, sort_keys=True, separators=(",", ":"))
+    etag = hashlib.sha1(f"{evento_id}:{conteudo}".encode()).hexdigest()
+    snapshot = Disponibilidade(horarios, etag)
+    with _cache_lock:
+        _cache[chave] = snapshot
+    return snapshot
+
+
+def invalidar_evento(evento_id):
+    """Descarta todos os períodos em cache do evento."""
+    with _cache_lock:
+        for chave in [c for c in _cache.keys() if c[0] == evento_id]:
+            _cache.pop(chave, None)
+        _estatisticas["invalidacoes"] += 1
+
+
+def marcar_alteracao(evento_id, sessao=None):
+    """Agenda a invalidação do evento para depois do commit da sessão."""
+    if evento_id is None:
+        return
+    sessao = sessao or db.session
+    sessao.info.setdefault(_CHAVE_SESSAO, set()).add(evento_id)
+
+
+def estatisticas_cache():
+    with _cache_lock:
+        return dict(_estatisticas, entradas=len(_cache))
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_horarios_alterados(sessao, contexto):
+    for objeto in (*sessao.new, *sessao.dirty, *sessao.deleted):
+        if isinstance(objeto, HorarioVisitacao):
+            marcar_alteracao(objeto.evento_id, sessao)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(sessao):
+    for evento_id in sessao.info.pop(_CHAVE_SESSAO, ()):
+        invalidar_evento(evento_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_apos_rollback(sessao, transacao_anterior):
+    if transacao_anterior.parent is None:
+        sessao.info.pop(_CHAVE_SESSAO, None)
@@ -0,0 +1,180 @@
+"""Benchmark dos modos de distribuição automática num evento sintético.
+
+Cria num SQLite temporário ``submissoes`` trabalhos e ``revisores`` perfis com
+preferências por categoria, carga inicial, instituições e autores em comum
+(para gerar conflitos), e roda ``_execute_distribution`` em cada modo a
+partir do mesmo estado. Os modos gulosos (``balanced``, ``stratified`` e
+``random``) servem de referência para o ``optimal``.
+
+Todos os modos são avaliados pela mesma régua: a soma dos scores de
+``_score_matrix`` (afinidade e disponibilidade), essa soma menos o custo de
+carga que o ``optimal`` minimiza, a variância da carga final dos revisores,
+as vagas que ficaram em aberto e os pares em conflito que escaparam. O ``_save_assignments`` fica de fora da
+medição porque não depende do modo.
+
+Uso::
+
+    from services.distribution_benchmark import benchmark_distribuicao
+    benchmark_distribuicao(submissoes=2_000, revisores=300)
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from flask import Flask
+
+from extensions import db
+from models.review import Submission
+from models.submission_system import (
+    AutoDistributionLog,
+    DistributionConfig,
+    ReviewerPreference,
+    ReviewerProfile,
+    SubmissionCategory,
+)
+from models.user import Usuario
+from services.distribution_service import LOAD_PENALTY_WEIGHT, DistributionService
+
+MODOS = ("balanced", "stratified", "random", "optimal")
+
+
+def criar_evento_sintetico(evento_id, submissoes, revisores, categorias=12, reviewers_per_submission=2,
+                           max_assignments=15, semente=42):
+    """Popula o evento com revisores, preferências e submissões aleatórias."""
+    aleatorio = random.Random(semente)
+    nomes = [f"area {n}" for n in range(categorias)]
+    instituicoes = [f"Universidade {n}" for n in range(max(1, revisores // 5))]
+
+    db.session.add(DistributionConfig(
+        evento_id=evento_id, reviewers_per_submission=reviewers_per_submission,
+        distribution_mode="balanced", enable_conflict_detection=True, fallback_to_random=True,
+    ))
+    categorias_db = [
+        SubmissionCategory(evento_id=evento_id, name=nome.title(), normalized_name=nome) for nome in nomes
+    ]
+    # O e-mail institucional do revisor segue a instituição (conflito por domínio)
+    vinculos = [aleatorio.randrange(len(instituicoes)) for _ in range(revisores)]
+    usuarios = [
+        Usuario(nome=f"Revisor {n}", cpf=f"{n:011d}", email=f"revisor{n}@universidade{k}.test", senha="x",
+                formacao="-", tipo="revisor")
+        for n, k in enumerate(vinculos)
+    ]
+    db.session.add_all(categorias_db + usuarios)
+    db.session.flush()
+
+    perfis = [
+        ReviewerProfile(
+            usuario_id=usuario.id, evento_id=evento_id, max_assignments=max_assignments,
+            current_load=aleatorio.randrange(0, 4), available=True,
+            institution=instituicoes[k], excluded_authors=[],
+        )
+        for usuario, k in zip(usuarios, vinculos)
+    ]
+    db.session.add_all(perfis)
+    db.session.flush()
+    for perfil in perfis:
+        for categoria in aleatorio.sample(categorias_db, k=min(3, len(categorias_db))):
+            db.session.add(ReviewerPreference(
+                reviewer_profile_id=perfil.id, category_id=categoria.id,
+                affinity_level=aleatorio.randint(1, 3),
+            ))
+
+    for n in range(submissoes):
+        # Uma fração dos trabalhos tem um revisor como autor ou vem da instituição de um revisor
+        autor = aleatorio.choice(usuarios).id if aleatorio.random() < 0.05 else None
+        atributos = {"category": aleatorio.choice(nomes)}
+        if aleatorio.random() < 0.2:
+            atributos["institution"] = aleatorio.choice(instituicoes)
+        db.session.add(Submission(
+            title=f"Trabalho {n}", code_hash="x", evento_id=evento_id, author_id=autor, attributes=atributos,
+        ))
+    db.session.commit()
+
+
+def _avaliar(servico, submissoes, revisores, atribuicoes, cargas_iniciais):
+    linhas = {s.id: i for i, s in enumerate(submissoes)}
+    colunas = {r.usuario_id: j for j, r in enumerate(revisores)}
+    scores = servico._score_matrix(submissoes, revisores)
+    conflitos = servico._conflict_matrix(submissoes, revisores)
+
+    pares = np.zeros(scores.shape, dtype=bool)
+    for atribuicao in atribuicoes:
+        pares[linhas[atribuicao["submission_id"]], colunas[atribuicao["reviewer_id"]]] = True
+    novas = pares.sum(axis=0)
+    cargas = cargas_iniciais + novas
+    maximos = np.array([r.max_assignments for r in revisores])
+    vagas = len(submissoes) * servico.config.reviewers_per_submission
+    # Mesmo custo de carga que o modo optimal minimiza
+    penalidade = LOAD_PENALTY_WEIGHT * (novas * cargas_iniciais + novas * (novas - 1) / 2) / np.maximum(maximos, 1)
+    return {
+        "objetivo": round(float(scores[pares].sum()), 2),
+        "objetivo_com_carga": round(float(scores[pares].sum() - penalidade.sum()), 2),
+        "variancia_carga": round(float(cargas.var()), 3),
+        "carga_maxima": int(cargas.max()),
+        "acima_do_limite": int((cargas > maximos).sum()),
+        "vagas_em_aberto": vagas - int(pares.sum()),
+        "pares_em_conflito": int((pares & conflitos).sum()),
+    }
+
+
+def benchmark_distribuicao(submissoes=2_000, revisores=300, categorias=12, reviewers_per_submission=2,
+                           max_assignments=15, modos=MODOS, semente=42):
+    """Roda cada modo sobre o mesmo evento sintético e compara tempo e qualidade.
+
+    Returns:
+        dict: por modo, segundos de ``_execute_distribution`` e as métricas de ``_avaliar``
+    """
+    diretorio = tempfile.mkdtemp(prefix="distribuicao_")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(diretorio, "bench.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    resultados = {}
+    evento_id = 1
+    try:
+        with app.app_context():
+            db.create_all()
+            criar_evento_sintetico(evento_id, submissoes, revisores, categorias,
+                                   reviewers_per_submission, max_assignments, semente)
+            for modo in modos:
+                servico = DistributionService(evento_id)
+                servico.config.distribution_mode = modo
+                servico.log_entry = AutoDistributionLog(
+                    evento_id=evento_id, total_submissions=submissoes, total_assignments=0,
+                    conflicts_detected=0, fallback_assignments=0, failed_assignments=0,
+                )
+                trabalhos = Submission.query.filter_by(evento_id=evento_id).order_by(Submission.id).all()
+                perfis = servico._load_available_reviewers()
+                cargas_iniciais = np.array([r.current_load for r in perfis])
+                random.seed(semente)
+
+                inicio = time.perf_counter()
+                atribuicoes = servico._execute_distribution(trabalhos, perfis)
+                segundos = time.perf_counter() - inicio
+
+                # A régua usa a carga de antes da distribuição
+                for perfil, carga in zip(perfis, cargas_iniciais):
+                    perfil.current_load = int(carga)
+                resultados[modo] = {
+                    "segundos": round(segundos, 3),
+                    "atribuicoes": len(atribuicoes),
+                    **_avaliar(servico, trabalhos, perfis, atribuicoes, cargas_iniciais),
+                }
+                if modo == "optimal":
+                    resultados[modo]["solver"] = servico.solver_stats
+                db.session.rollback()
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    return {
+        "submissoes": submissoes,
+        "revisores": revisores,
+        "reviewers_per_submission": reviewers_per_submission,
+        "modos": resultados,
+    }
@@ -1,9 +1,12 @@
 import random
 import logging
+import time
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 from collections import defaultdict
 
+import numpy as np
+
 from extensions import db
 from models.submission_system import (
     ReviewerProfile,
@@ -12,11 +15,18 @@ from models.submission_system import (
     AutoDistributionLog,
     SubmissionCategory,
 )
-from models.review import Submission, Assignment
+from models.review import Submission, Assignment, Review
 from models.user import Usuario
+from services.conflict_index import ConflictIndex
+from services.distribution_solver import solve_assignment
 
 logger = logging.getLogger(__name__)
 
+# Peso da carga no modo "optimal": custo marginal de cada nova atribuição é
+# LOAD_PENALTY_WEIGHT * carga / max_assignments. Com 0.75 o benchmark mantém a
+# variância de carga do modo "balanced" com soma de scores maior.
+LOAD_PENALTY_WEIGHT = 0.75
+
 
 class DistributionService:
     """Serviço para distribuição automática de trabalhos para revisores."""
@@ -25,6 +35,8 @@ class DistributionService:
         self.evento_id = evento_id
         self.config = self._load_config()
         self.log_entry = None
+        self.solver_stats = None
+        self.conflict_index = ConflictIndex()
     
     def _load_config(self) -> DistributionConfig:
         """Carrega a configuração de distribuição do evento."""
@@ -77,10 +89,14 @@ class DistributionService:
             
             # Finalizar log
             self.log_entry.total_assignments = len(assignments)
+            details = {"conflict_index": dict(self.conflict_index.stats)}
+            if self.solver_stats:
+                details["solver"] = self.solver_stats
+            self.log_entry.distribution_details = details
             self.log_entry.mark_completed()
             db.session.commit()
             
-            return {
+            result = {
                 "success": True,
                 "total_submissions": len(submissions),
                 "total_assignments": len(assignments),
@@ -88,6 +104,9 @@ class DistributionService:
                 "conflicts_detected": self.log_entry.conflicts_detected,
                 "fallback_assignments": self.log_entry.fallback_assignments
             }
+            if self.solver_stats:
+                result["solver"] = self.solver_stats
+            return result
             
         except Exception as e:
             logger.error(f"Erro na distribuição: {str(e)}")
@@ -126,10 +145,16 @@ class DistributionService:
     
     def _execute_distribution(self, submissions: List[Submission], reviewers: List[ReviewerProfile]) -> List[Dict]:
         """Executa a distribuição baseada no modo configurado."""
+        if self.config.enable_conflict_detection:
+            # Chaves de conflito de todo o lote de uma vez; os laços só consultam
+            self.conflict_index.load(submissions, reviewers)
+        
         if self.config.distribution_mode == "stratified":
             return self._stratified_distribution(submissions, reviewers)
         elif self.config.distribution_mode == "balanced":
             return self._balanced_distribution(submissions, reviewers)
+        elif self.config.distribution_mode == "optimal":
+            return self._optimal_distribution(submissions, reviewers)
         else:  # random
             return self._random_distribution(submissions, reviewers)
     
@@ -268,6 +293,95 @@ class DistributionService:
         
         return assignments
     
+    def _optimal_distribution(self, submissions: List[Submission], reviewers: List[ReviewerProfile]) -> List[Dict]:
+        """Distribuição ótima global por fluxo de custo mínimo.
+        
+        Maximiza a soma dos scores de adequação menos uma penalidade de carga
+        crescente por revisor. ``reviewers_per_submission``,
+        ``max_assignments`` e os conflitos são restrições rígidas: pares em
+        conflito nem entram no grafo e vagas sem revisor elegível ficam em
+        aberto (contadas em ``failed_assignments``).
+        """
+        start = time.perf_counter()
+        reviewers = [r for r in reviewers if r.can_accept_assignment]
+        scores = self._score_matrix(submissions, reviewers)
+        conflicts = self._conflict_matrix(submissions, reviewers)
+        self.log_entry.conflicts_detected += int(conflicts.sum())
+        
+        current_load = np.array([r.current_load or 0 for r in reviewers], dtype=float)
+        max_assignments = np.array([r.max_assignments or 0 for r in reviewers], dtype=float)
+        scale = np.maximum(max_assignments, 1)
+        weight = LOAD_PENALTY_WEIGHT if self.config.enable_load_balancing is not False else 0.0
+        assigned, unfilled = solve_assignment(
+            np.where(conflicts, np.inf, 1.0 - scores),
+            self.config.reviewers_per_submission,
+            max_assignments - current_load,
+            load_base=weight * current_load / scale,
+            load_step=weight / scale,
+        )
+        
+        assignments = []
+        for i, j in zip(*np.nonzero(assigned)):
+            assignments.append({
+                "submission_id": submissions[i].id,
+                "reviewer_id": reviewers[j].usuario_id,
+                "score": round(float(scores[i, j]), 4),
+                "assignment_type": "optimal"
+            })
+        
+        new_load = assigned.sum(axis=0)
+        for reviewer, added in zip(reviewers, new_load):
+            reviewer.current_load = (reviewer.current_load or 0) + int(added)
+        self.log_entry.failed_assignments += int(unfilled.sum())
+        
+        final_load = current_load + new_load
+        penalty = weight * (new_load * current_load + new_load * (new_load - 1) / 2) / scale
+        self.solver_stats = {
+            "objective": round(float(scores[assigned].sum()), 4),
+            "load_penalty": round(float(penalty.sum()), 4),
+            "load_variance": round(float(final_load.var()), 4) if len(reviewers) else 0.0,
+            "unfilled_slots": int(unfilled.sum()),
+            "solve_seconds": round(time.perf_counter() - start, 4),
+        }
+        return assignments
+    
+    def _score_matrix(self, submissions: List[Submission], reviewers: List[ReviewerProfile]) -> np.ndarray:
+        """Score de _calculate_reviewer_score para todos os pares, sem a penalidade de carga.
+        
+        As afinidades vêm numa única consulta e viram uma matriz categoria ×
+        revisor, indexada pela categoria de cada submissão.
+        """
+        categories = [self._get_submission_category(s) for s in submissions]
+        category_index = {name: n for n, name in enumerate(dict.fromkeys(categories))}
+        reviewer_index = {r.id: j for j, r in enumerate(reviewers)}
+        
+        affinity = np.zeros((len(category_index), len(reviewers)))
+        seen = set()
+        if reviewer_index:
+            preferences = db.session.query(
+                ReviewerPreference.reviewer_profile_id,
+                SubmissionCategory.normalized_name,
+                ReviewerPreference.affinity_level,
+            ).join(SubmissionCategory, ReviewerPreference.category_id == SubmissionCategory.id).filter(
+                ReviewerPreference.reviewer_profile_id.in_(list(reviewer_index))
+            ).order_by(ReviewerPreference.id)
+            for profile_id, name, level in preferences:
+                # Como no laço de _calculate_reviewer_score, vale a primeira preferência da categoria
+                if name not in category_index or (profile_id, name) in seen:
+                    continue
+                seen.add((profile_id, name))
+                affinity[category_index[name], reviewer_index[profile_id]] = (level or 0) / 3.0
+        
+        availability = np.array([r.availability_percentage / 100 for r in reviewers], dtype=float)
+        rows = np.array([category_index[c] for c in categories], dtype=int)
+        return np.clip(availability * 0.3 + affinity[rows] * 0.7, 0.0, 1.0)
+    
+    def _conflict_matrix(self, submissions: List[Submission], reviewers: List[ReviewerProfile]) -> np.ndarray:
+        """Matriz booleana com as mesmas regras de _has_conflict para todos os pares."""
+        if not self.config.enable_conflict_detection or not submissions or not reviewers:
+            return np.zeros((len(submissions), len(reviewers)), dtype=bool)
+        return self.conflict_index.matrix(submissions, reviewers)
+    
     def _calculate_reviewer_score(self, submission: Submission, reviewer: ReviewerProfile, category: str) -> float:
         """Calcula score de adequação do revisor para a submissão."""
         score = 0.0
@@ -319,25 +433,14 @@ class DistributionService:
         return mappings.get(normalized, normalized)
     
     def _has_conflict(self, submission: Submission, reviewer: ReviewerProfile) -> bool:
-        """Verifica se há conflito de interesse."""
+        """Verifica se há conflito de interesse.
+        
+        Mesmo autor, mesmo e-mail ou domínio institucional, mesma instituição
+        ou exclusões do perfil do revisor; consulta o índice de conflitos.
+        """
         if not self.config.enable_conflict_detection:
             return False
-        
-        # Conflito por autor (mesmo usuário)
-        if submission.author_id == reviewer.usuario_id:
-            return True
-        
-        # Conflito por instituição
-        if reviewer.institution and hasattr(submission, 'attributes'):
-            submission_institution = submission.attributes.get('institution', '')
-            if submission_institution and submission_institution.lower() == reviewer.institution.lower():
-                return True
-        
-        # Conflitos explícitos configurados
-        if submission.author_id in reviewer.excluded_authors:
-            return True
-        
-        return False
+        return self.conflict_index.has_conflict(submission, reviewer)
     
     def _fallback_assignment(self, submission: Submission, reviewers: List[ReviewerProfile], 
                            assignments: List[Dict], current_assigned: int):
@@ -345,9 +448,13 @@ class DistributionService:
         needed = self.config.reviewers_per_submission - current_assigned
         
         # Tentar revisores com menor carga, mesmo que não tenham afinidade
+        conflicting = (
+            self.conflict_index.conflicting_reviewers(submission, reviewers)
+            if self.config.enable_conflict_detection else set()
+        )
         available_reviewers = [
             r for r in reviewers 
-            if r.can_accept_assignment and not self._has_conflict(submission, r)
+            if r.can_accept_assignment and r.usuario_id not in conflicting
         ]
         
         # Ordenar por carga atual (menor primeiro)
@@ -420,5 +527,33 @@ class DistributionService:
     def rebalance_assignments(self) -> Dict:
         """Rebalanceia atribuições existentes para melhor distribuição."""
         # Implementar lógica de rebalanceamento
-        # Por enquanto, retorna estatísticas atuais
-        return self.get_distribution_stats()
\ No newline at end of file
+        # Por enquanto, retorna estatísticas atuais e os pareceres em conflito
+        stats = self.get_distribution_stats()
+        if self.config.enable_conflict_detection:
+            stats["conflicting_reviews"] = self._conflicting_reviews()
+        return stats
+    
+    def _conflicting_reviews(self) -> List[Dict]:
+        """Pareceres do evento atribuídos a revisores em conflito com a submissão."""
+        reviews = db.session.query(Review.id, Review.submission_id, Review.reviewer_id).join(
+            Submission, Review.submission_id == Submission.id
+        ).filter(
+            Submission.evento_id == self.evento_id,
+            Review.reviewer_id.isnot(None)
+        ).all()
+        if not reviews:
+            return []
+        
+        submissions = {s.id: s for s in Submission.query.filter(
+            Submission.id.in_({submission_id for _, submission_id, _ in reviews})
+        )}
+        reviewers = {u.id: u for u in Usuario.query.filter(
+            Usuario.id.in_({reviewer_id for _, _, reviewer_id in reviews})
+        )}
+        self.conflict_index.load(submissions.values(), reviewers.values())
+        return [
+            {"review_id": review_id, "submission_id": submission_id, "reviewer_id": reviewer_id}
+            for review_id, submission_id, reviewer_id in reviews
+            if reviewer_id in reviewers
+            and self.conflict_index.has_conflict(submissions[submission_id], reviewers[reviewer_id])
+        ]
\ No newline at end of file
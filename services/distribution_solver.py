@@ -0,0 +1,205 @@
+"""Atribuição ótima de revisores a submissões por fluxo de custo mínimo.
+
+A distribuição é modelada como um fluxo: cada submissão precisa de
+``demand`` revisores, cada par (submissão, revisor) permitido é um arco de
+capacidade 1 com o custo da matriz e cada revisor escoa até ``capacity``
+atribuições para o sorvedouro com custo marginal crescente (a carga), o que
+espalha o trabalho em vez de concentrá-lo nos revisores de maior score.
+
+Submissões com a mesma linha de custos (mesma categoria e mesmos conflitos)
+são indistinguíveis para o fluxo, então viram um único nó com demanda somada
+e arcos de capacidade igual ao tamanho do grupo. O fluxo do grupo é depois
+repartido entre as submissões em rodízio, o que mantém revisores distintos
+por submissão. Em eventos reais isso reduz milhares de linhas a algumas
+dezenas.
+
+O algoritmo é o de caminhos mínimos sucessivos com potenciais, no formato do
+método húngaro para matrizes retangulares: para cada unidade de demanda um
+Dijkstra sobre custos reduzidos (não negativos) encontra o caminho de aumento
+mais barato, que pode remanejar revisores de outros grupos. Cada linha é
+relaxada de uma vez com NumPy e a busca para assim que o sorvedouro é
+alcançado.
+
+Quando todas as vagas podem ser preenchidas o resultado é ótimo: minimiza a
+soma dos custos dos pares mais o custo de carga. Se faltar revisor elegível
+para alguma submissão, ela fica com vagas em aberto (``unfilled``) e o
+número total de pares continua sendo o máximo possível.
+"""
+
+import heapq
+from typing import Tuple
+
+import numpy as np
+
+
+class AssignmentSolver:
+    """Fluxo entre grupos de submissões e revisores, com o estado mantido entre aumentos.
+
+    ``multiplicity`` é o número de submissões de cada grupo: o limite de
+    unidades que um mesmo revisor pode receber do grupo (uma por submissão).
+    """
+
+    def __init__(self, costs, demand, capacity, load_base=None, load_step=None, multiplicity=None):
+        self.costs = np.asarray(costs, dtype=float)
+        if self.costs.ndim != 2:
+            raise ValueError("A matriz de custos deve ter duas dimensões")
+        if (self.costs[np.isfinite(self.costs)] < 0).any():
+            raise ValueError("Os custos devem ser não negativos")
+        self.n_groups, self.n_reviewers = self.costs.shape
+
+        self.demand = np.broadcast_to(np.asarray(demand, dtype=int), (self.n_groups,))
+        self.multiplicity = (
+            np.ones(self.n_groups, dtype=int) if multiplicity is None else np.asarray(multiplicity, dtype=int)
+        )
+        self.capacity = np.maximum(np.asarray(capacity, dtype=int), 0)
+        zeros = np.zeros(self.n_reviewers)
+        self.load_base = zeros if load_base is None else np.asarray(load_base, dtype=float)
+        self.load_step = zeros if load_step is None else np.asarray(load_step, dtype=float)
+        if (self.load_base < 0).any() or (self.load_step < 0).any():
+            raise ValueError("O custo de carga deve ser não negativo e crescente")
+
+        self.flow = np.zeros(self.costs.shape, dtype=int)
+        self.load = np.zeros(self.n_reviewers, dtype=int)
+        self.unfilled = np.zeros(self.n_groups, dtype=int)
+        # Custos dos arcos com folga; arcos saturados viram inf
+        self._free_costs = self.costs.copy()
+        self._by_reviewer = [set() for _ in range(self.n_reviewers)]
+        # Potenciais: custo reduzido de u→v = custo + pot[u] - pot[v]. O do
+        # sorvedouro fica fixo em zero.
+        self._pot_group = np.zeros(self.n_groups)
+        self._pot_reviewer = np.zeros(self.n_reviewers)
+
+    def solve(self) -> "AssignmentSolver":
+        for source in range(self.n_groups):
+            for filled in range(int(self.demand[source])):
+                if not self._augment(source):
+                    self.unfilled[source] = self.demand[source] - filled
+                    break
+        return self
+
+    def _augment(self, source: int) -> bool:
+        """Busca o caminho mínimo de ``source`` ao sorvedouro e empurra uma unidade."""
+        pot_group, pot_reviewer = self._pot_group, self._pot_reviewer
+        # Rótulos provisórios dos revisores abertos. Um revisor fechado vai a
+        # inf aqui e em ``closed_offset``, o que o exclui da relaxação sem máscara.
+        open_reviewer = np.full(self.n_reviewers, np.inf)
+        closed_offset = -pot_reviewer
+        final_reviewer = np.full(self.n_reviewers, np.nan)
+        pred_reviewer = np.full(self.n_reviewers, -1)
+        dist_group = {}
+        pred_group = {}
+        tentative = {source: 0.0}
+        heap = [(0.0, source)]
+        best, best_reviewer = np.inf, -1
+        sink_reduced = np.where(
+            self.load < self.capacity, self.load_base + self.load_step * self.load + pot_reviewer, np.inf
+        )
+
+        while True:
+            reviewer = int(open_reviewer.argmin())
+            next_reviewer = open_reviewer[reviewer]
+            while heap and heap[0][1] in dist_group:
+                heapq.heappop(heap)
+            next_group = heap[0][0] if heap else np.inf
+            if min(next_reviewer, next_group) >= best:
+                break
+
+            if next_group <= next_reviewer:
+                # Grupo: relaxa a linha inteira de uma vez
+                distance, group = heapq.heappop(heap)
+                dist_group[group] = distance
+                reduced = self._free_costs[group] + closed_offset
+                reduced += distance + pot_group[group]
+                better = reduced < open_reviewer
+                np.putmask(open_reviewer, better, reduced)
+                np.putmask(pred_reviewer, better, group)
+                # O sorvedouro é relaxado junto, sem esperar o revisor ser fechado
+                to_sink = reduced + sink_reduced
+                candidate = int(to_sink.argmin())
+                if to_sink[candidate] < best:
+                    best, best_reviewer = to_sink[candidate], candidate
+                continue
+
+            # Revisor: devolve unidades aos grupos que o usam para buscarem outro
+            final_reviewer[reviewer] = next_reviewer
+            open_reviewer[reviewer] = np.inf
+            closed_offset[reviewer] = np.inf
+            for group in self._by_reviewer[reviewer]:
+                if group in dist_group:
+                    continue
+                distance = next_reviewer - self.costs[group, reviewer] + pot_reviewer[reviewer] - pot_group[group]
+                if distance < tentative.get(group, np.inf):
+                    tentative[group] = distance
+                    pred_group[group] = reviewer
+                    heapq.heappush(heap, (distance, group))
+
+        if best_reviewer < 0:
+            return False
+
+        # Nós fechados recebem d - D; os demais ficam como estão, o que mantém
+        # todos os custos reduzidos não negativos.
+        for group, distance in dist_group.items():
+            pot_group[group] += distance - best
+        closed = ~np.isnan(final_reviewer)
+        pot_reviewer[closed] += final_reviewer[closed] - best
+
+        reviewer = best_reviewer
+        self.load[reviewer] += 1
+        while True:
+            group = int(pred_reviewer[reviewer])
+            self._push(group, reviewer, 1)
+            if group == source:
+                break
+            reviewer = pred_group[group]
+            self._push(group, reviewer, -1)
+        return True
+
+    def _push(self, group: int, reviewer: int, units: int):
+        self.flow[group, reviewer] += units
+        flow = self.flow[group, reviewer]
+        if flow:
+            self._by_reviewer[reviewer].add(group)
+        else:
+            self._by_reviewer[reviewer].discard(group)
+        saturated = flow >= self.multiplicity[group]
+        self._free_costs[group, reviewer] = np.inf if saturated else self.costs[group, reviewer]
+
+
+def solve_assignment(costs, demand, capacity, load_base=None, load_step=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Resolve a atribuição de custo mínimo.
+
+    Args:
+        costs: matriz submissões × revisores de custos não negativos;
+            ``np.inf`` marca pares proibidos (conflitos, revisor indisponível).
+        demand: revisores por submissão (escalar ou vetor).
+        capacity: atribuições que cada revisor ainda pode receber.
+        load_base: custo da primeira atribuição nova de cada revisor.
+        load_step: quanto o custo cresce a cada atribuição nova do revisor.
+
+    Returns:
+        tuple: matriz booleana dos pares atribuídos e vagas não preenchidas por submissão
+    """
+    costs = np.asarray(costs, dtype=float)
+    n_submissions, n_reviewers = costs.shape
+    demand = np.broadcast_to(np.asarray(demand, dtype=int), (n_submissions,))
+    assigned = np.zeros(costs.shape, dtype=bool)
+    if not n_submissions or not n_reviewers:
+        return assigned, demand.copy()
+
+    keys = np.column_stack([costs, demand])
+    _, first, groups, sizes = np.unique(keys, axis=0, return_index=True, return_inverse=True, return_counts=True)
+    solver = AssignmentSolver(
+        costs[first], demand[first] * sizes, capacity, load_base, load_step, multiplicity=sizes
+    ).solve()
+
+    # Rodízio: as unidades de cada revisor (no máximo uma por submissão do
+    # grupo) vão para submissões consecutivas, que nunca se repetem.
+    members = np.argsort(groups.ravel(), kind="stable")
+    start = 0
+    for group, size in enumerate(sizes):
+        rows = members[start:start + size]
+        start += size
+        reviewers = np.repeat(np.arange(n_reviewers), solver.flow[group])
+        assigned[rows[np.arange(len(reviewers)) % size], reviewers] = True
+
+    return assigned, demand - assigned.sum(axis=1)
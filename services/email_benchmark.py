@@ -0,0 +1,173 @@
+"""Benchmark do envio em lote contra um servidor HTTP local que imita o Mailjet.
+
+O ``MailjetStandIn`` responde ``POST /v3.1/send`` como a API v3.1 (um status
+por mensagem, na ordem do pedido), com latência configurável e, opcionalmente,
+alguns ``429`` iniciais para exercitar o retry. Nenhum e-mail sai da máquina.
+
+Uso::
+
+    from services.email_benchmark import benchmark_send_bulk
+    benchmark_send_bulk(total=5000, latencia=0.05)
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services.email_service import EmailService, Recipient
+
+
+class MailjetStandIn:
+    """Servidor local com a forma de resposta do ``/v3.1/send``."""
+
+    def __init__(self, latencia=0.0, falhas_429=0):
+        self.latencia = latencia
+        self.falhas_429 = falhas_429
+        self.requisicoes = 0
+        self.mensagens = 0
+        self.rejeitadas = 0
+        self._lock = threading.Lock()
+        self._proximo_id = 0
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._servidor.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}/"
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                mensagens = json.loads(corpo or b"{}").get("Messages") or []
+                if standin.latencia:
+                    time.sleep(standin.latencia)
+                with standin._lock:
+                    standin.requisicoes += 1
+                    rejeitar = standin.rejeitadas < standin.falhas_429
+                    if rejeitar:
+                        standin.rejeitadas += 1
+                    else:
+                        standin.mensagens += len(mensagens)
+                        primeiro = standin._proximo_id
+                        standin._proximo_id += len(mensagens)
+                if rejeitar:
+                    self._responder(429, {"ErrorMessage": "Too many requests"}, {"Retry-After": "0"})
+                    return
+                self._responder(200, {
+                    "Messages": [
+                        {
+                            "Status": "success",
+                            "CustomID": mensagem.get("CustomID", ""),
+                            "To": [
+                                {"Email": destino["Email"], "MessageID": primeiro + indice}
+                                for destino in mensagem.get("To", [])
+                            ],
+                        }
+                        for indice, mensagem in enumerate(mensagens)
+                    ]
+                })
+
+            def _responder(self, status, payload, headers=None):
+                corpo = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corpo)))
+                for nome, valor in (headers or {}).items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                self.wfile.write(corpo)
+
+        return Handler
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+def _mensagens(total):
+    return [
+        {
+            "custom_id": str(indice),
+            "to": [{"email": f"participante{indice}@example.com", "name": f"Participante {indice}"}],
+            "subject": "Lembrete de oficina",
+            "html": f"<p>Olá, Participante {indice}!</p>",
+        }
+        for indice in range(total)
+    ]
+
+
+def benchmark_send_bulk(total=5000, latencia=0.05, batch_size=50, max_workers=4,
+                        falhas_429=0, amostra_sequencial=100):
+    """Compara ``send_bulk`` com o envio de uma mensagem por chamada.
+
+    O envio sequencial é medido numa amostra de ``amostra_sequencial``
+    mensagens e extrapolado para ``total``.
+
+    Returns:
+        dict: segundos e mensagens por segundo do lote, requisições feitas,
+        falhas, 429 injetados e a estimativa do envio sequencial
+    """
+    from mailjet_rest import Client
+
+    servico = EmailService()
+    remetente = Recipient("bench@example.com")
+    mensagens = _mensagens(total)
+
+    with MailjetStandIn(latencia=latencia, falhas_429=falhas_429) as standin:
+        client = Client(auth=("bench", "bench"), version="v3.1", api_url=standin.url)
+
+        inicio = time.perf_counter()
+        resultado = servico.send_bulk(
+            mensagens,
+            sender=remetente,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            backoff=0,
+            client=client,
+        )
+        segundos_lote = time.perf_counter() - inicio
+        requisicoes_lote = standin.requisicoes
+
+        sequencial = 0.0
+        amostra = mensagens[:amostra_sequencial]
+        if amostra:
+            inicio = time.perf_counter()
+            for mensagem in amostra:
+                servico._send_mailjet(
+                    client=client,
+                    sender=remetente,
+                    to=servico._normalise_recipients(mensagem["to"]),
+                    subject=mensagem["subject"],
+                    text=None,
+                    html=mensagem["html"],
+                    attachments=[],
+                    cc=[],
+                    bcc=[],
+                    reply_to=None,
+                )
+            sequencial = (time.perf_counter() - inicio) / len(amostra) * total
+
+    return {
+        "mensagens": total,
+        "enviadas": resultado["sent"],
+        "falhas": resultado["failed"],
+        "lotes": resultado["batches"],
+        "requisicoes": requisicoes_lote,
+        "respostas_429": standin.rejeitadas,
+        "segundos": round(segundos_lote, 3),
+        "mensagens_por_segundo": round(total / segundos_lote, 1) if segundos_lote else None,
+        "segundos_sequencial_estimado": round(sequencial, 3),
+    }
@@ -0,0 +1,334 @@
+"""Outbox persistente de e-mails.
+
+``enfileirar_email`` grava a mensagem na tabela ``email_outbox`` dentro da
+transação corrente: se a operação da rota for desfeita, o e-mail também é, e
+o request não espera pelo provedor. O worker (``drenar_outbox``, agendado no
+APScheduler do ``app.py``) reivindica lotes com ``SELECT ... FOR UPDATE SKIP
+LOCKED``, o que permite vários processos drenando ao mesmo tempo, e entrega
+tudo via ``email_service.send_bulk``.
+
+Falhas voltam para a fila com backoff exponencial; depois de
+``max_tentativas`` a linha vai para ``morto`` (dead-letter) e só volta com
+``reprocessar_mortos``. Linhas presas em ``enviando`` por um worker que caiu
+são retomadas depois de ``LEASE``.
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+
+from extensions import db
+from models import EmailOutbox
+from services.comum import config_app, config_positivo
+from services.email_service import corpo_html_padrao, email_service
+
+logger = logging.getLogger(__name__)
+
+LOTE_PADRAO = 100
+MAX_TENTATIVAS_PADRAO = 5
+LEASE = timedelta(minutes=10)
+BACKOFF_BASE_SEGUNDOS = 60
+BACKOFF_MAXIMO_SEGUNDOS = 6 * 60 * 60
+
+
+def _serializavel(contexto):
+    """Contexto de template como JSON puro (datas e objetos viram texto)."""
+    if not contexto:
+        return None
+    return json.loads(json.dumps(contexto, default=str))
+
+
+def enfileirar_email(destinatario, nome_participante="", nome_oficina="", assunto="",
+                     corpo_texto="", anexo_path=None, corpo_html=None, template_path=None,
+                     template_context=None, *, max_tentativas=None, sessao=None):
+    """Grava um e-mail na outbox sem fazer commit.
+
+    Aceita os mesmos argumentos de ``utils.enviar_email``; o commit da rota
+    confirma o envio junto com o restante da operação.
+
+    Returns:
+        EmailOutbox: Linha adicionada à sessão
+    """
+    if corpo_html is None and not template_path:
+        corpo_html = corpo_html_padrao(nome_participante, nome_oficina)
+    return enfileirar_mensagem(
+        to=(destinatario, nome_participante or None),
+        subject=assunto,
+        text=corpo_texto,
+        html=corpo_html,
+        template=template_path,
+        template_context=template_context,
+        attachments=[anexo_path] if anexo_path else None,
+        max_tentativas=max_tentativas,
+        sessao=sessao,
+    )
+
+
+def enfileirar_mensagem(*, subject, to, text=None, html=None, template=None,
+                        template_context=None, attachments=None, max_tentativas=None,
+                        sessao=None):
+    """Grava na outbox, sem commit, com a interface de ``send_email``.
+
+    ``to`` é um e-mail ou uma tupla ``(email, nome)``. Diferente de
+    ``enfileirar_email``, não há HTML padrão, e os anexos precisam ser
+    caminhos de arquivo, ou ``{"path": ..., "filename": ...}`` para enviar
+    com outro nome: o conteúdo é lido só na hora do envio.
+
+    Returns:
+        EmailOutbox: Linha adicionada à sessão
+    """
+    destinatario, nome = to if isinstance(to, (tuple, list)) else (to, None)
+    mensagem = EmailOutbox(
+        destinatario=destinatario,
+        nome_destinatario=nome or None,
+        assunto=subject,
+        corpo_texto=text or None,
+        corpo_html=html,
+        template_path=template,
+        template_context=_serializavel(template_context),
+        anexos=[
+            dict(anexo, path=str(anexo["path"])) if isinstance(anexo, dict) else str(anexo)
+            for anexo in attachments
+        ] if attachments else None,
+        status=EmailOutbox.PENDENTE,
+        max_tentativas=max_tentativas or config_positivo("OUTBOX_MAX_TENTATIVAS", MAX_TENTATIVAS_PADRAO),
+        disponivel_em=datetime.utcnow(),
+    )
+    (sessao or db.session).add(mensagem)
+    return mensagem
+
+
+class LimitadorTaxa:
+    """Balde de fichas simples: no máximo ``taxa`` envios por segundo."""
+
+    def __init__(self, taxa):
+        self.taxa = taxa
+        self.capacidade = max(1.0, float(taxa))
+        self._fichas = self.capacidade
+        self._atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self, quantidade=1):
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._fichas = min(
+                    self.capacidade, self._fichas + (agora - self._atualizado) * self.taxa
+                )
+                self._atualizado = agora
+                if self._fichas >= quantidade:
+                    self._fichas -= quantidade
+                    return
+                espera = (quantidade - self._fichas) / self.taxa
+            time.sleep(espera)
+
+
+_limitadores = {}
+_limitadores_lock = threading.Lock()
+
+
+def _limitador(taxa):
+    if not taxa:
+        return None
+    with _limitadores_lock:
+        if taxa not in _limitadores:
+            _limitadores[taxa] = LimitadorTaxa(taxa)
+        return _limitadores[taxa]
+
+
+def _backoff(tentativas):
+    return timedelta(
+        seconds=min(BACKOFF_MAXIMO_SEGUNDOS, BACKOFF_BASE_SEGUNDOS * 2 ** max(0, tentativas - 1))
+    )
+
+
+def _reivindicar(limite, agora):
+    """Marca até ``limite`` linhas como ``enviando`` e as devolve (já com commit)."""
+    disponiveis = or_(
+        and_(EmailOutbox.status == EmailOutbox.PENDENTE, EmailOutbox.disponivel_em <= agora),
+        and_(EmailOutbox.status == EmailOutbox.ENVIANDO, EmailOutbox.bloqueado_em < agora - LEASE),
+    )
+    ids = db.session.execute(
+        select(EmailOutbox.id)
+        .where(disponiveis)
+        .order_by(EmailOutbox.disponivel_em, EmailOutbox.id)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        db.session.rollback()
+        return []
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(ids))
+        .values(
+            status=EmailOutbox.ENVIANDO,
+            bloqueado_em=agora,
+            tentativas=EmailOutbox.tentativas + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    linhas = db.session.execute(
+        select(
+            EmailOutbox.id,
+            EmailOutbox.destinatario,
+            EmailOutbox.nome_destinatario,
+            EmailOutbox.assunto,
+            EmailOutbox.corpo_texto,
+            EmailOutbox.corpo_html,
+            EmailOutbox.template_path,
+            EmailOutbox.template_context,
+            EmailOutbox.anexos,
+            EmailOutbox.tentativas,
+            EmailOutbox.max_tentativas,
+        )
+        .where(EmailOutbox.id.in_(ids))
+        .order_by(EmailOutbox.id)
+    ).all()
+    # Libera os locks antes de falar com o provedor
+    db.session.commit()
+    return linhas
+
+
+def _como_mensagem(linha):
+    mensagem = {
+        "custom_id": linha.id,
+        "to": [{"email": linha.destinatario, "name": linha.nome_destinatario}],
+        "subject": linha.assunto,
+        "text": linha.corpo_texto,
+        "html": linha.corpo_html,
+        "attachments": linha.anexos,
+    }
+    if not linha.corpo_html and linha.template_path:
+        mensagem["template"] = linha.template_path
+        mensagem["template_context"] = linha.template_context or {}
+    return mensagem
+
+
+def processar_outbox(limite=None, taxa=None):
+    """Reivindica e envia um lote da outbox.
+
+    Args:
+        limite: Máximo de mensagens no lote (padrão ``OUTBOX_LOTE``)
+        taxa: Envios por segundo (padrão ``OUTBOX_TAXA_POR_SEGUNDO``; 0 = livre)
+
+    Returns:
+        dict: ``reivindicados``, ``enviados``, ``reagendados`` e ``mortos``
+
+    Raises:
+        ValueError: ``OUTBOX_LOTE`` não positivo ou taxa negativa
+    """
+    limite = limite or config_positivo("OUTBOX_LOTE", LOTE_PADRAO)
+    taxa = taxa if taxa is not None else config_app("OUTBOX_TAXA_POR_SEGUNDO", 0)
+    if taxa < 0:
+        raise ValueError(f"OUTBOX_TAXA_POR_SEGUNDO não pode ser negativa (recebido {taxa!r})")
+    resumo = {"reivindicados": 0, "enviados": 0, "reagendados": 0, "mortos": 0}
+
+    linhas = _reivindicar(limite, datetime.utcnow())
+    if not linhas:
+        return resumo
+    resumo["reivindicados"] = len(linhas)
+    por_id = {linha.id: linha for linha in linhas}
+
+    mensagens = [_como_mensagem(linha) for linha in linhas]
+    limitador = _limitador(taxa)
+    # Com limite de taxa, cada fatia tem no máximo um segundo de envios
+    fatia = max(1, int(taxa)) if limitador else len(mensagens)
+    resultados = []
+    for inicio in range(0, len(mensagens), fatia):
+        parte = mensagens[inicio:inicio + fatia]
+        if limitador:
+            limitador.aguardar(len(parte))
+        resultados.extend(email_service.send_bulk(parte)["results"])
+
+    agora = datetime.utcnow()
+    atualizacoes = []
+    for resultado in resultados:
+        linha = por_id[resultado.custom_id]
+        if resultado.success:
+            status, erro, disponivel_em = EmailOutbox.ENVIADO, None, agora
+            resumo["enviados"] += 1
+        elif linha.tentativas >= linha.max_tentativas:
+            status, erro, disponivel_em = EmailOutbox.MORTO, resultado.error, agora
+            resumo["mortos"] += 1
+            logger.error(
+                "E-mail %s para %s movido para dead-letter: %s",
+                linha.id, linha.destinatario, resultado.error,
+            )
+        else:
+            status, erro = EmailOutbox.PENDENTE, resultado.error
+            disponivel_em = agora + _backoff(linha.tentativas)
+            resumo["reagendados"] += 1
+        atualizacoes.append({
+            "id": linha.id,
+            "status": status,
+            "ultimo_erro": erro,
+            "disponivel_em": disponivel_em,
+            "bloqueado_em": None,
+            "message_id": str(resultado.message_id) if resultado.message_id else None,
+            "enviado_em": agora if resultado.success else None,
+        })
+    db.session.execute(update(EmailOutbox), atualizacoes)
+    db.session.commit()
+    logger.info("Outbox: %s", resumo)
+    return resumo
+
+
+def drenar_outbox(app, max_lotes=10):
+    """Job do scheduler: processa lotes até esvaziar a fila ou ``max_lotes``."""
+    with app.app_context():
+        try:
+            limite = config_positivo("OUTBOX_LOTE", LOTE_PADRAO)
+            for _ in range(max_lotes):
+                resumo = processar_outbox(limite)
+                if resumo["reivindicados"] < limite:
+                    break
+        except Exception:
+            db.session.rollback()
+            logger.exception("Erro ao drenar a outbox de e-mails")
+        finally:
+            db.session.remove()
+
+
+def reprocessar_mortos(ids=None):
+    """Devolve mensagens do dead-letter à fila, zerando as tentativas.
+
+    Returns:
+        int: Quantidade de mensagens reenfileiradas
+    """
+    stmt = (
+        update(EmailOutbox)
+        .where(EmailOutbox.status == EmailOutbox.MORTO)
+        .values(
+            status=EmailOutbox.PENDENTE,
+            tentativas=0,
+            disponivel_em=datetime.utcnow(),
+            ultimo_erro=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if ids:
+        stmt = stmt.where(EmailOutbox.id.in_(ids))
+    resultado = db.session.execute(stmt)
+    db.session.commit()
+    return resultado.rowcount or 0
+
+
+def estatisticas_outbox():
+    """Quantidade de mensagens por status e idade da pendência mais antiga."""
+    contagens = dict(
+        db.session.execute(
+            select(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status)
+        ).all()
+    )
+    mais_antiga = db.session.execute(
+        select(func.min(EmailOutbox.criado_em)).where(EmailOutbox.status == EmailOutbox.PENDENTE)
+    ).scalar()
+    return {
+        "por_status": contagens,
+        "pendente_mais_antiga": mais_antiga.isoformat() if mais_antiga else None,
+    }
@@ -6,12 +6,17 @@ import base64
 import logging
 import mimetypes
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 from flask import current_app, has_app_context, render_template
 from flask_mail import Message
+from jinja2 import TemplateNotFound
 
 from extensions import mail
 
@@ -20,6 +25,12 @@ logger = logging.getLogger(__name__)
 RecipientInput = Union[str, Tuple[str, str], Dict[str, Any]]
 AttachmentInput = Union[str, Tuple[str, bytes], Tuple[str, bytes, str], Dict[str, Any]]
 
+# Mailjet Send API v3.1 accepts at most 50 messages per call
+MAILJET_MAX_MESSAGES = 50
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+# Longest wait between retries of a batch; send_bulk may run inside a request
+MAILJET_MAX_RETRY_DELAY = 60.0
+
 
 @dataclass(frozen=True)
 class Recipient:
@@ -42,55 +53,89 @@ class Attachment:
     content: bytes
     content_type: str = "application/octet-stream"
 
+    @cached_property
+    def base64_content(self) -> str:
+        # Encoded once; every message sharing this attachment reuses the string
+        return base64.b64encode(self.content).decode("ascii")
+
     def as_mailjet(self) -> Dict[str, str]:
         return {
             "ContentType": self.content_type,
             "Filename": self.filename,
-            "Base64Content": base64.b64encode(self.content).decode("ascii"),
+            "Base64Content": self.base64_content,
         }
 
 
+@dataclass(frozen=True)
+class BulkResult:
+    """Outcome of one message sent through :meth:`EmailService.send_bulk`."""
+
+    custom_id: Optional[str]
+    email: Optional[str]
+    success: bool
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 1
+
+
 class EmailService:
     """Centralised email sending service with provider fallbacks."""
 
     def __init__(self) -> None:
         self._mailjet_client = None
-        self._mailjet_auth: Optional[Tuple[str, str]] = None
+        self._mailjet_auth: Optional[Tuple[Optional[str], ...]] = None
+        # (jinja env id, template name) -> (filename, mtime_ns, compiled template)
+        self._templates: Dict[Tuple[int, str], Tuple[Optional[str], Optional[int], Any]] = {}
+        self._cache_lock = threading.Lock()
+        self._cache_counters = dict.fromkeys(
+            ("template_hits", "template_misses", "attachment_hits", "attachment_misses"), 0
+        )
 
     # ------------------------------------------------------------------
     #  Public API
     # ------------------------------------------------------------------
     
     def _validate_template(self, template_path: str) -> bool:
-        """Valida se um template existe."""
+        """Valida se um template existe e compila.
+
+        O template compilado fica em cache, então validar e renderizar em
+        seguida custa uma única compilação.
+        """
         try:
-            from flask import render_template_string
-            import os
-            
-            # Verificar se o arquivo existe
-            full_path = os.path.join('templates', template_path)
-            if not os.path.exists(full_path):
-                return False
-            
-            # Tentar renderizar o template para validar sintaxe
-            with open(full_path, 'r', encoding='utf-8') as f:
-                template_content = f.read()
-            
-            # Renderizar com contexto vazio para validar sintaxe
-            render_template_string(template_content)
+            self._compiled_template(template_path)
             return True
-            
+        except TemplateNotFound:
+            return False
         except Exception as e:
             logger.error(f"Erro ao validar template {template_path}: {e}")
             return False
 
+    @staticmethod
+    def mensagem_certificado_revisor(certificado) -> Dict[str, Any]:
+        """Assunto, destinatário e template do e-mail de certificado de revisor."""
+        return {
+            "subject": f"Certificado de Revisor - {certificado.cliente.nome}",
+            "to": (certificado.revisor.email, certificado.revisor.nome),
+            "template": "email/certificado_revisor.html",
+            "template_context": {
+                'revisor_nome': certificado.revisor.nome,
+                'cliente_nome': certificado.cliente.nome,
+                'evento_nome': certificado.evento.nome if certificado.evento else '',
+                'trabalhos_revisados': certificado.trabalhos_revisados,
+                'data_liberacao': certificado.data_liberacao.strftime('%d/%m/%Y') if certificado.data_liberacao else '',
+                'titulo_certificado': certificado.titulo,
+            },
+        }
+
     def enviar_certificado_revisor(self, certificado) -> bool:
-        """Envia certificado de revisor por email."""
+        """Envia certificado de revisor por email, de forma síncrona.
+
+        As rotas usam a outbox (``mensagem_certificado_revisor`` +
+        ``enfileirar_mensagem``); este método fica para envios imediatos.
+        """
         try:
             logger.info(f"Iniciando envio de certificado para revisor: {certificado.revisor.email}")
-            
-            # Preparar dados do email
-            assunto = f"Certificado de Revisor - {certificado.cliente.nome}"
+            mensagem = self.mensagem_certificado_revisor(certificado)
             
             # Preparar anexo
             anexos = []
@@ -106,30 +151,14 @@ class EmailService:
             else:
                 logger.warning(f"Arquivo de certificado não encontrado: {certificado.arquivo_path}")
             
-            # Preparar contexto do template
-            contexto = {
-                'revisor_nome': certificado.revisor.nome,
-                'cliente_nome': certificado.cliente.nome,
-                'evento_nome': certificado.evento.nome if certificado.evento else '',
-                'trabalhos_revisados': certificado.trabalhos_revisados,
-                'data_liberacao': certificado.data_liberacao.strftime('%d/%m/%Y') if certificado.data_liberacao else '',
-                'titulo_certificado': certificado.titulo,
-            }
-            
             # Validar template
-            template_path = 'email/certificado_revisor.html'
+            template_path = mensagem["template"]
             if not self._validate_template(template_path):
                 logger.error(f"Template não encontrado: {template_path}")
                 return False
             
             # Enviar email
-            resultado = self.send_email(
-                subject=assunto,
-                to=(certificado.revisor.email, certificado.revisor.nome),
-                template=template_path,
-                template_context=contexto,
-                attachments=anexos
-            )
+            resultado = self.send_email(**mensagem, attachments=anexos)
             
             success = resultado.get('success', False)
             if success:
@@ -263,28 +292,7 @@ class EmailService:
                     corpo_html = self._render_template(template_path, template_context or {})
                 else:
                     # HTML padrão para compatibilidade
-                    corpo_html = f"""
-                    <html>
-                    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                        <div style="max-width: 600px; margin: auto; padding: 20px; border: 1px solid #ddd; border-radius: 10px;">
-                            <h2 style="color: #2C3E50; text-align: center;">Confirmação de Inscrição</h2>
-                            <p>Olá, <b>{nome_participante}</b>!</p>
-                            <p>Você se inscreveu com sucesso na oficina <b>{nome_oficina}</b>.</p>
-                            <p>Aguardamos você no evento!</p>
-
-                            <div style="padding: 15px; background-color: #f4f4f4; border-left: 5px solid #3498db;">
-                                <p><b>Detalhes da Oficina:</b></p>
-                                <p><b>Nome:</b> {nome_oficina}</p>
-                            </div>
-
-                            <p>Caso tenha dúvidas, entre em contato conosco.</p>
-                            <p style="text-align: center;">
-                                <b>Equipe Organizadora</b>
-                            </p>
-                        </div>
-                    </body>
-                    </html>
-                    """
+                    corpo_html = corpo_html_padrao(nome_participante, nome_oficina)
             
             # Preparar anexos
             attachments = [anexo_path] if anexo_path else None
@@ -309,6 +317,112 @@ class EmailService:
             logger.error(f"Erro ao enviar email unificado: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
 
+    def send_bulk(
+        self,
+        messages: Iterable[Dict[str, Any]],
+        *,
+        sender: Optional[RecipientInput] = None,
+        batch_size: int = MAILJET_MAX_MESSAGES,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_retry_delay: float = MAILJET_MAX_RETRY_DELAY,
+        on_batch: Optional[Callable[[List[BulkResult]], None]] = None,
+        client=None,
+    ) -> Dict[str, Any]:
+        """Send many independent messages, packed into Mailjet batches.
+
+        Each item of ``messages`` takes the keyword arguments of
+        :meth:`send_email` plus an optional ``custom_id`` to correlate the
+        results. Batches of up to ``batch_size`` messages (capped at the
+        Mailjet limit) are posted by at most ``max_workers`` threads; HTTP
+        429/5xx answers and transport errors are retried with exponential
+        backoff, honouring ``Retry-After``. No wait exceeds
+        ``max_retry_delay`` seconds: if the server asks for longer, the batch
+        fails right away and the caller decides when to try again.
+        ``on_batch`` runs in the caller's thread with the results of each
+        finished batch, so progress can be persisted while the other batches
+        are still in flight. An exception raised by ``on_batch`` is logged
+        and the remaining batches are still collected and returned.
+
+        A retry reposts the whole batch (up to 50 messages). After a 429
+        nothing was sent, but after a 5xx or a transport error Mailjet may
+        already have accepted part of it, so those recipients can get the
+        message twice.
+
+        Without Mailjet credentials the messages go out through a single SMTP
+        connection.
+        """
+        batch_size = max(1, min(batch_size, MAILJET_MAX_MESSAGES))
+        results: List[BulkResult] = []
+
+        def deliver(batch_results: List[BulkResult]) -> None:
+            results.extend(batch_results)
+            if on_batch and batch_results:
+                try:
+                    on_batch(batch_results)
+                except Exception:
+                    # A failing callback must not drop the batches still in flight
+                    logger.exception(
+                        "Erro no callback on_batch (%d resultados)", len(batch_results)
+                    )
+
+        prepared, rejected = self._prepare_bulk(messages, self._resolve_sender(sender))
+        deliver(rejected)
+
+        client = client or self._get_mailjet_client()
+        provider = "mailjet" if client else "smtp"
+        batches = 0
+        if prepared and client:
+            chunks = [
+                prepared[start:start + batch_size]
+                for start in range(0, len(prepared), batch_size)
+            ]
+            batches = len(chunks)
+            logger.info(
+                "Envio em lote via Mailjet: %d mensagens em %d lotes", len(prepared), batches
+            )
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, batches))) as executor:
+                futures = [
+                    executor.submit(
+                        self._post_mailjet_batch, client, chunk, max_retries, backoff,
+                        max_retry_delay,
+                    )
+                    for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    deliver(future.result())
+        elif prepared and self._can_use_smtp():
+            batches = 1
+            deliver(self._send_bulk_smtp(prepared))
+        elif prepared:
+            logger.error("Nenhum provedor de email configurado")
+            deliver([
+                BulkResult(custom_id, email, False, error="No email provider configured", attempts=0)
+                for custom_id, email, _fields in prepared
+            ])
+
+        sent = sum(1 for result in results if result.success)
+        return {
+            "success": sent == len(results),
+            "provider": provider,
+            "sent": sent,
+            "failed": len(results) - sent,
+            "batches": batches,
+            "results": results,
+        }
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters of the template and attachment caches."""
+        with self._cache_lock:
+            return dict(self._cache_counters, templates=len(self._templates))
+
+    def clear_caches(self) -> None:
+        with self._cache_lock:
+            self._templates.clear()
+            for key in self._cache_counters:
+                self._cache_counters[key] = 0
+
     # ------------------------------------------------------------------
     #  Provider helpers
     # ------------------------------------------------------------------
@@ -317,15 +431,17 @@ class EmailService:
         api_key, secret = self._mailjet_credentials()
         if not api_key or not secret:
             return None
-        if self._mailjet_client and self._mailjet_auth == (api_key, secret):
+        api_url = self._get_config().get("MAILJET_API_URL") or os.getenv("MAILJET_API_URL")
+        if self._mailjet_client and self._mailjet_auth == (api_key, secret, api_url):
             return self._mailjet_client
         try:
             from mailjet_rest import Client  # Imported lazily when available
         except ImportError:  # pragma: no cover
             logger.warning("mailjet_rest not installed; falling back to SMTP")
             return None
-        self._mailjet_client = Client(auth=(api_key, secret), version="v3.1")
-        self._mailjet_auth = (api_key, secret)
+        options = {"api_url": api_url} if api_url else {}
+        self._mailjet_client = Client(auth=(api_key, secret), version="v3.1", **options)
+        self._mailjet_auth = (api_key, secret, api_url)
         return self._mailjet_client
 
     def _mailjet_credentials(self) -> Tuple[Optional[str], Optional[str]]:
@@ -420,11 +536,85 @@ class EmailService:
         if not template:
             return None
         context = context or {}
-        return render_template(template, **context)
+        return render_template(self._compiled_template(template), **context)
+
+    def _count(self, counter: str) -> None:
+        with self._cache_lock:
+            self._cache_counters[counter] += 1
+
+    @staticmethod
+    def _mtime(filename: Optional[str]) -> Optional[int]:
+        if not filename:
+            return None
+        try:
+            return os.stat(filename).st_mtime_ns
+        except OSError:
+            return None
+
+    def _compiled_template(self, template: str):
+        """Return the compiled Jinja template, recompiling only when its file changes.
+
+        Entries are keyed by template name and validated against the file
+        mtime, so a hit costs one ``stat`` instead of a loader lookup.
+        """
+        env = current_app.jinja_env
+        key = (id(env), template)
+        with self._cache_lock:
+            cached = self._templates.get(key)
+        if cached is not None:
+            filename, mtime, compiled = cached
+            if mtime is not None and self._mtime(filename) == mtime:
+                self._count("template_hits")
+                return compiled
+        self._count("template_misses")
+        # Load through the loader so a changed file is recompiled even when
+        # Jinja's own cache has auto_reload disabled
+        compiled = env.loader.load(env, template, env.make_globals(None))
+        with self._cache_lock:
+            self._templates[key] = (compiled.filename, self._mtime(compiled.filename), compiled)
+        return compiled
+
+    def _load_attachment(
+        self,
+        item: str,
+        cache: Optional[Dict[Any, Optional[Attachment]]],
+        filename: Optional[str] = None,
+    ) -> Optional[Attachment]:
+        key = (item, filename) if filename else item
+        if cache is not None and key in cache:
+            self._count("attachment_hits")
+            return cache[key]
+        self._count("attachment_misses")
+        path = Path(item)
+        filename = filename or path.name
+        attachment = None
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError as exc:
+            logger.error("Attachment %s not found: %s", path, exc)
+        else:
+            content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            attachment = Attachment(
+                filename=filename,
+                content=content,
+                content_type=content_type,
+            )
+        if cache is not None:
+            cache[key] = attachment
+        return attachment
 
     def _normalise_attachments(
-        self, attachments: Optional[Sequence[AttachmentInput]]
+        self,
+        attachments: Optional[Sequence[AttachmentInput]],
+        cache: Optional[Dict[Any, Optional[Attachment]]] = None,
     ) -> List[Attachment]:
+        """Normalise attachment inputs into :class:`Attachment` objects.
+
+        A dict with ``path`` and no ``content`` is read from disk like a plain
+        path, but sent as ``filename`` when given. ``cache`` maps file paths
+        to loaded attachments; passing the same dict for every message of a
+        batch reads (and base64-encodes) each file once.
+        """
         if not attachments:
             return []
         results: List[Attachment] = []
@@ -435,26 +625,18 @@ class EmailService:
                 results.append(item)
                 continue
             if isinstance(item, str):
-                path = Path(item)
-                try:
-                    content = path.read_bytes()
-                except FileNotFoundError as exc:
-                    logger.error("Attachment %s not found: %s", path, exc)
-                    continue
-                content_type = (
-                    mimetypes.guess_type(path.name)[0] or "application/octet-stream"
-                )
-                results.append(
-                    Attachment(
-                        filename=path.name,
-                        content=content,
-                        content_type=content_type,
-                    )
-                )
+                attachment = self._load_attachment(item, cache)
+                if attachment:
+                    results.append(attachment)
                 continue
             if isinstance(item, dict):
                 filename = item.get("filename") or item.get("name")
                 content = item.get("content") or item.get("data")
+                if item.get("path") and not content:
+                    attachment = self._load_attachment(str(item["path"]), cache, filename)
+                    if attachment:
+                        results.append(attachment)
+                    continue
                 content_type = (
                     item.get("content_type")
                     or item.get("mimetype")
@@ -493,6 +675,160 @@ class EmailService:
                 )
         return results
 
+    def _prepare_bulk(
+        self,
+        messages: Iterable[Dict[str, Any]],
+        default_sender: Optional[Recipient],
+    ) -> Tuple[List[Tuple[Optional[str], str, Dict[str, Any]]], List[BulkResult]]:
+        """Normalise bulk messages into ``(custom_id, email, fields)`` tuples.
+
+        Messages that cannot be sent (no recipient, no sender, template
+        errors) come back as failed results instead of aborting the batch.
+        """
+        prepared: List[Tuple[Optional[str], str, Dict[str, Any]]] = []
+        rejected: List[BulkResult] = []
+        attachment_cache: Dict[str, Optional[Attachment]] = {}
+        for item in messages:
+            custom_id = item.get("custom_id")
+            recipients = self._normalise_recipients(item.get("to"))
+            email = recipients[0].email if recipients else None
+            try:
+                if not recipients:
+                    raise ValueError("Email requires at least one recipient")
+                sender = self._resolve_sender(item.get("sender")) or default_sender
+                if not sender:
+                    raise RuntimeError(
+                        "MAIL_DEFAULT_SENDER is not configured and no sender was provided."
+                    )
+                html = item.get("html") or self._render_template(
+                    item.get("template"), item.get("template_context")
+                )
+                fields = {
+                    "sender": sender,
+                    "to": recipients,
+                    "subject": item.get("subject") or "",
+                    "text": item.get("text"),
+                    "html": html,
+                    "attachments": self._normalise_attachments(
+                        item.get("attachments"), attachment_cache
+                    ),
+                    "cc": self._normalise_recipients(item.get("cc")),
+                    "bcc": self._normalise_recipients(item.get("bcc")),
+                    "reply_to": self._normalise_single_recipient(item.get("reply_to")),
+                }
+            except Exception as exc:
+                rejected.append(BulkResult(custom_id, email, False, error=str(exc), attempts=0))
+                continue
+            prepared.append((custom_id, email, fields))
+        return prepared, rejected
+
+    @staticmethod
+    def _retry_delay(response, attempt: int, backoff: float, max_delay: float) -> Optional[float]:
+        """Seconds to wait before the next attempt, or ``None`` to give up.
+
+        ``Retry-After`` is honoured up to ``max_delay``; a longer one means
+        retrying now would only be rejected again.
+        """
+        headers = getattr(response, "headers", None) or {}
+        try:
+            retry_after = max(0.0, float(headers.get("Retry-After")))
+        except (TypeError, ValueError):
+            return min(backoff * (2 ** (attempt - 1)), max_delay)
+        return retry_after if retry_after <= max_delay else None
+
+    def _post_mailjet_batch(
+        self,
+        client,
+        chunk: List[Tuple[Optional[str], str, Dict[str, Any]]],
+        max_retries: int,
+        backoff: float,
+        max_retry_delay: float = MAILJET_MAX_RETRY_DELAY,
+    ) -> List[BulkResult]:
+        payload = {
+            "Messages": [
+                self._build_mailjet_message(custom_id=custom_id, **fields)
+                for custom_id, _email, fields in chunk
+            ]
+        }
+        attempts = 0
+        while True:
+            attempts += 1
+            response = None
+            try:
+                response = client.send.create(data=payload)
+                status = getattr(response, "status_code", 200)
+                if status not in RETRYABLE_STATUS:
+                    return self._mailjet_bulk_results(chunk, response, status, attempts)
+                error = f"Mailjet HTTP {status}"
+            except Exception as exc:  # mailjet_rest raises ApiError/TimeoutError
+                error = str(exc) or exc.__class__.__name__
+            delay = None
+            if attempts <= max_retries:
+                delay = self._retry_delay(response, attempts, backoff, max_retry_delay)
+                if delay is None:
+                    error = f"{error} (Retry-After acima de {max_retry_delay:g}s)"
+            if delay is None:
+                logger.error(
+                    "Lote de %d mensagens falhou após %d tentativas: %s",
+                    len(chunk), attempts, error,
+                )
+                return [
+                    BulkResult(custom_id, email, False, error=error, attempts=attempts)
+                    for custom_id, email, _fields in chunk
+                ]
+            logger.warning("Mailjet: %s; nova tentativa em %.2fs", error, delay)
+            time.sleep(delay)
+
+    @staticmethod
+    def _mailjet_bulk_results(chunk, response, status: int, attempts: int) -> List[BulkResult]:
+        """Map the per-message statuses of a v3.1 response back to the chunk."""
+        try:
+            payload = response.json() if hasattr(response, "json") else response
+        except ValueError:
+            payload = None
+        entries = payload.get("Messages") if isinstance(payload, dict) else None
+        entries = entries or []
+        results: List[BulkResult] = []
+        for index, (custom_id, email, _fields) in enumerate(chunk):
+            entry = entries[index] if index < len(entries) else {}
+            if entry.get("Status") == "success":
+                to = entry.get("To") or [{}]
+                message_id = to[0].get("MessageID")
+                results.append(
+                    BulkResult(
+                        custom_id,
+                        email,
+                        True,
+                        message_id=str(message_id) if message_id is not None else None,
+                        attempts=attempts,
+                    )
+                )
+                continue
+            errors = entry.get("Errors") or []
+            error = errors[0].get("ErrorMessage") if errors else f"Mailjet HTTP {status}"
+            results.append(BulkResult(custom_id, email, False, error=error, attempts=attempts))
+        return results
+
+    def _send_bulk_smtp(
+        self, prepared: List[Tuple[Optional[str], str, Dict[str, Any]]]
+    ) -> List[BulkResult]:
+        results: List[BulkResult] = []
+        with mail.connect() as connection:
+            for custom_id, email, fields in prepared:
+                try:
+                    message = self._build_smtp_message(**fields)
+                    connection.send(message)
+                except Exception as exc:
+                    logger.error("Falha no envio SMTP para %s: %s", email, exc)
+                    results.append(BulkResult(custom_id, email, False, error=str(exc)))
+                else:
+                    results.append(
+                        BulkResult(
+                            custom_id, email, True, message_id=getattr(message, "msgId", None)
+                        )
+                    )
+        return results
+
     # ------------------------------------------------------------------
     #  Provider implementations
     # ------------------------------------------------------------------
@@ -510,12 +846,48 @@ class EmailService:
         cc: List[Recipient],
         bcc: List[Recipient],
         reply_to: Optional[Recipient],
+    ) -> Dict[str, Any]:
+        message = self._build_mailjet_message(
+            sender=sender,
+            to=to,
+            subject=subject,
+            text=text,
+            html=html,
+            attachments=attachments,
+            cc=cc,
+            bcc=bcc,
+            reply_to=reply_to,
+        )
+        response = client.send.create(data={"Messages": [message]})
+        logger.info(
+            "Email sent via Mailjet to %s (subject=%s)",
+            ", ".join(rec.email for rec in to),
+            subject,
+        )
+        payload = response.json() if hasattr(response, "json") else response
+        return {"provider": "mailjet", "response": payload}
+
+    def _build_mailjet_message(
+        self,
+        *,
+        sender: Recipient,
+        to: List[Recipient],
+        subject: str,
+        text: Optional[str],
+        html: Optional[str],
+        attachments: List[Attachment],
+        cc: List[Recipient],
+        bcc: List[Recipient],
+        reply_to: Optional[Recipient],
+        custom_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         message: Dict[str, Any] = {
             "From": sender.as_mailjet(),
             "To": [recipient.as_mailjet() for recipient in to],
             "Subject": subject,
         }
+        if custom_id is not None:
+            message["CustomID"] = str(custom_id)
         if text:
             message["TextPart"] = text
         if html:
@@ -528,18 +900,42 @@ class EmailService:
             message["ReplyTo"] = reply_to.as_mailjet()
         if attachments:
             message["Attachments"] = [att.as_mailjet() for att in attachments]
+        return message
 
-        response = client.send.create(data={"Messages": [message]})
+    def _send_smtp(
+        self,
+        *,
+        sender: Recipient,
+        to: List[Recipient],
+        subject: str,
+        text: Optional[str],
+        html: Optional[str],
+        attachments: List[Attachment],
+        cc: List[Recipient],
+        bcc: List[Recipient],
+        reply_to: Optional[Recipient],
+    ) -> Dict[str, Any]:
+        message = self._build_smtp_message(
+            sender=sender,
+            to=to,
+            subject=subject,
+            text=text,
+            html=html,
+            attachments=attachments,
+            cc=cc,
+            bcc=bcc,
+            reply_to=reply_to,
+        )
+        mail.send(message)
         logger.info(
-            "Email sent via Mailjet to %s (subject=%s)",
+            "Email sent via SMTP to %s (subject=%s)",
             ", ".join(rec.email for rec in to),
             subject,
         )
-        payload = response.json() if hasattr(response, "json") else response
-        return {"provider": "mailjet", "response": payload}
+        return {"provider": "smtp", "message_id": getattr(message, "message_id", None)}
 
-    def _send_smtp(
-        self,
+    @staticmethod
+    def _build_smtp_message(
         *,
         sender: Recipient,
         to: List[Recipient],
@@ -550,7 +946,7 @@ class EmailService:
         cc: List[Recipient],
         bcc: List[Recipient],
         reply_to: Optional[Recipient],
-    ) -> Dict[str, Any]:
+    ) -> Message:
         message = Message(
             subject=subject,
             recipients=[recipient.email for recipient in to],
@@ -565,14 +961,33 @@ class EmailService:
             message.html = html
         for attachment in attachments:
             message.attach(attachment.filename, attachment.content_type, attachment.content)
-
-        mail.send(message)
-        logger.info(
-            "Email sent via SMTP to %s (subject=%s)",
-            ", ".join(rec.email for rec in to),
-            subject,
-        )
-        return {"provider": "smtp", "message_id": getattr(message, "message_id", None)}
+        return message
+
+
+def corpo_html_padrao(nome_participante: str, nome_oficina: str) -> str:
+    """HTML de confirmação usado quando não há corpo nem template."""
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: auto; padding: 20px; border: 1px solid #ddd; border-radius: 10px;">
+            <h2 style="color: #2C3E50; text-align: center;">Confirmação de Inscrição</h2>
+            <p>Olá, <b>{nome_participante}</b>!</p>
+            <p>Você se inscreveu com sucesso na oficina <b>{nome_oficina}</b>.</p>
+            <p>Aguardamos você no evento!</p>
+
+            <div style="padding: 15px; background-color: #f4f4f4; border-left: 5px solid #3498db;">
+                <p><b>Detalhes da Oficina:</b></p>
+                <p><b>Nome:</b> {nome_oficina}</p>
+            </div>
+
+            <p>Caso tenha dúvidas, entre em contato conosco.</p>
+            <p style="text-align: center;">
+                <b>Equipe Organizadora</b>
+            </p>
+        </div>
+    </body>
+    </html>
+    """
 
 
 email_service = EmailService()
@@ -0,0 +1,65 @@
+"""Hashes de senha/código em lote.
+
+O KDF do Werkzeug (PBKDF2 ou scrypt) custa de dezenas a centenas de
+milissegundos por valor e segura o GIL, então importações grandes geram os
+hashes num pool de processos (``HASH_WORKERS``). Lotes pequenos continuam em
+série, sem o custo de subir o pool.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash
+
+WORKERS_PADRAO = min(os.cpu_count() or 1, 8)
+# Abaixo disso o custo de subir o pool não compensa
+PARALELO_MINIMO = 32
+
+
+def workers_configurados(workers=None):
+    """Número de processos para os hashes (``HASH_WORKERS``)."""
+    if not workers and has_app_context():
+        workers = current_app.config.get("HASH_WORKERS")
+    return max(1, int(workers or WORKERS_PADRAO))
+
+
+def gerar_hash(valor, metodo=None):
+    """``generate_password_hash`` com o método padrão do Werkzeug se ``metodo`` for None."""
+    if metodo is None:
+        return generate_password_hash(valor)
+    return generate_password_hash(valor, method=metodo)
+
+
+class GeradorHashes:
+    """Gera hashes em série ou num pool de processos criado sob demanda.
+
+    Pode ser usado como context manager para encerrar o pool no fim.
+    """
+
+    def __init__(self, workers=None, metodo=None):
+        self.workers = workers_configurados(workers)
+        self.metodo = metodo
+        self._pool = None
+
+    def gerar(self, valores):
+        """Devolve os hashes na mesma ordem de ``valores``."""
+        valores = list(valores)
+        if self.workers <= 1 or len(valores) < PARALELO_MINIMO:
+            return [gerar_hash(v, self.metodo) for v in valores]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        pedaco = max(1, len(valores) // (self.workers * 4))
+        return list(self._pool.map(gerar_hash, valores, repeat(self.metodo), chunksize=pedaco))
+
+    def fechar(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.fechar()
@@ -0,0 +1,164 @@
+"""Benchmark da importação de usuários com uma planilha sintética.
+
+Gera ``total`` linhas (xlsx em modo ``write_only`` ou csv) com uma fração de
+e-mails/CPFs repetidos e de linhas incompletas, roda
+``importacao_usuarios_service.executar_importacao`` num SQLite temporário e
+compara com o laço antigo (``pd.read_excel`` + ``iterrows`` com duas consultas
+e um hash por linha), medido numa amostra e extrapolado.
+
+O PBKDF2 padrão do Werkzeug leva centenas de milissegundos por senha, o que
+tornaria 50 mil linhas uma espera de horas nas duas abordagens. Por isso as
+medições usam ``metodo_hash`` barato e o custo do método de produção é
+estimado à parte, a partir de uma amostra de hashes, para o laço serial e para
+o pool.
+
+Uso::
+
+    from services.importacao_usuarios_benchmark import benchmark_importacao
+    benchmark_importacao(total=50_000)
+"""
+
+import csv
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from models import ImportacaoUsuarios, Usuario
+from services import importacao_usuarios_service
+from services.hash_service import workers_configurados
+from services.importacao_usuarios_service import COLUNAS_OBRIGATORIAS, METODO_HASH
+
+
+def _linhas_sinteticas(total, taxa_repetidos, taxa_incompletas, semente):
+    aleatorio = random.Random(semente)
+    for i in range(total):
+        origem = i
+        if i and aleatorio.random() < taxa_repetidos:
+            origem = aleatorio.randrange(i)
+        linha = [
+            f"Participante {i}", f"{origem:011d}", f"participante{origem}@bench.test",
+            f"senha{i}", "Licenciatura", "participante",
+        ]
+        if aleatorio.random() < taxa_incompletas:
+            linha[aleatorio.randrange(len(linha))] = None
+        yield linha
+
+
+def gerar_planilha(caminho, total, taxa_repetidos=0.01, taxa_incompletas=0.005, semente=42):
+    """Grava a planilha sintética em ``caminho`` (.xlsx ou .csv)."""
+    linhas = _linhas_sinteticas(total, taxa_repetidos, taxa_incompletas, semente)
+    if caminho.endswith(".csv"):
+        with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(COLUNAS_OBRIGATORIAS)
+            escritor.writerows(linhas)
+        return caminho
+
+    from openpyxl import Workbook
+
+    planilha = Workbook(write_only=True)
+    aba = planilha.create_sheet()
+    aba.append(list(COLUNAS_OBRIGATORIAS))
+    for linha in linhas:
+        aba.append(linha)
+    planilha.save(caminho)
+    return caminho
+
+
+def importar_laco_antigo(caminho, metodo_hash):
+    """Referência: o laço da rota antes da importação em lotes."""
+    import pandas as pd
+
+    tabela = pd.read_excel(caminho, dtype={"cpf": str}) if caminho.endswith(".xlsx") \
+        else pd.read_csv(caminho, dtype={"cpf": str})
+    importados = 0
+    for _, row in tabela.iterrows():
+        cpf_str = str(row["cpf"]).strip()
+        if Usuario.query.filter_by(email=row["email"]).first():
+            continue
+        if Usuario.query.filter_by(cpf=cpf_str).first():
+            continue
+        db.session.add(Usuario(
+            nome=row["nome"], cpf=cpf_str, email=row["email"],
+            senha=generate_password_hash(str(row["senha"]), method=metodo_hash),
+            formacao=row["formacao"], tipo=row["tipo"],
+        ))
+        importados += 1
+    db.session.commit()
+    return importados
+
+
+def _segundos_por_hash(metodo, amostra):
+    inicio = time.perf_counter()
+    for i in range(amostra):
+        generate_password_hash(f"senha{i}", method=metodo)
+    return (time.perf_counter() - inicio) / amostra
+
+
+def benchmark_importacao(total=50_000, formato="xlsx", workers=None, lote=None,
+                         metodo_hash="pbkdf2:sha256:1000", amostra_antiga=2_000, amostra_hash=5):
+    """Importa a planilha sintética e compara com o laço antigo.
+
+    Returns:
+        dict: tempos de cada abordagem, contagens e a estimativa com o hash de produção
+    """
+    workers = workers_configurados(workers)
+    diretorio = tempfile.mkdtemp(prefix="importacao_usuarios_")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(diretorio, "bench.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["UPLOAD_FOLDER"] = diretorio
+    db.init_app(app)
+    try:
+        with app.app_context():
+            db.create_all()
+            caminho = gerar_planilha(os.path.join(diretorio, f"usuarios.{formato}"), total)
+
+            importacao = ImportacaoUsuarios(arquivo_nome=os.path.basename(caminho))
+            db.session.add(importacao)
+            db.session.commit()
+            inicio = time.perf_counter()
+            importacao = importacao_usuarios_service.executar_importacao(
+                importacao.id, caminho, lote=lote, workers=workers, metodo_hash=metodo_hash,
+                remover_arquivo=False,
+            )
+            segundos_lotes = time.perf_counter() - inicio
+            resultado = importacao.to_dict()
+
+            db.session.query(Usuario).delete()
+            db.session.commit()
+            amostra = min(amostra_antiga, total)
+            caminho_amostra = gerar_planilha(os.path.join(diretorio, f"amostra.{formato}"), amostra)
+            inicio = time.perf_counter()
+            importar_laco_antigo(caminho_amostra, metodo_hash)
+            segundos_antigo = (time.perf_counter() - inicio) / amostra * total
+
+            hash_producao = _segundos_por_hash(METODO_HASH, amostra_hash)
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    importados = resultado["importados"]
+    return {
+        "linhas": total,
+        "formato": formato,
+        "workers": workers,
+        "importados": importados,
+        "erros": resultado["erros"],
+        "status": resultado["status"],
+        "segundos": round(segundos_lotes, 2),
+        "linhas_por_segundo": round(total / segundos_lotes, 1) if segundos_lotes else None,
+        "segundos_laco_antigo_estimado": round(segundos_antigo, 2),
+        "metodo_hash": metodo_hash,
+        # Com o PBKDF2 de produção o hash domina: serial no laço antigo, dividido pelo pool no novo
+        "producao_segundos_por_hash": round(hash_producao, 3),
+        "producao_laco_antigo_estimado": round(segundos_antigo + hash_producao * importados, 1),
+        "producao_lotes_estimado": round(segundos_lotes + hash_producao * importados / workers, 1),
+    }
@@ -0,0 +1,367 @@
+"""Importação de usuários por planilha (xlsx/csv) em segundo plano.
+
+A planilha é lida linha a linha (openpyxl em modo ``read_only`` ou
+``csv.reader``), nunca inteira na memória, e processada em lotes de
+``IMPORTACAO_USUARIOS_LOTE`` linhas. Por lote:
+
+* uma consulta ``IN`` traz os e-mails/CPFs que já existem no banco;
+* os hashes de senha são gerados num pool de processos (``HASH_WORKERS``,
+  ver ``services.hash_service``) — o PBKDF2 domina o custo da importação;
+* os usuários novos entram com um único ``INSERT`` multi-linha e o progresso
+  da ``ImportacaoUsuarios`` é gravado no mesmo commit.
+
+Linhas rejeitadas (campos vazios, valores longos demais, e-mail/CPF já
+cadastrado ou repetido na planilha) vão para um CSV de erros que pode ser
+baixado ao fim da importação.
+"""
+
+import csv
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+from extensions import db
+from models import ImportacaoUsuarios, Usuario
+from services.comum import config_app, config_positivo
+from services.hash_service import GeradorHashes
+
+logger = logging.getLogger(__name__)
+
+COLUNAS_OBRIGATORIAS = ("nome", "cpf", "email", "senha", "formacao", "tipo")
+CAMPOS_RELATORIO = ("linha", "email", "cpf", "motivo")
+LOTE_PADRAO = 1000
+METODO_HASH = "pbkdf2:sha256"
+
+
+class ColunasAusentesError(ValueError):
+    """A planilha não tem todas as colunas obrigatórias."""
+
+    def __init__(self, faltando):
+        self.faltando = faltando
+        super().__init__("O arquivo deve conter as colunas: " + ", ".join(COLUNAS_OBRIGATORIAS))
+
+
+def _diretorio():
+    return os.path.abspath(os.path.join((config_app("UPLOAD_FOLDER", None) or "uploads"), "importacoes"))
+
+
+def caminho_relatorio(importacao):
+    """Caminho absoluto do CSV de erros, ou ``None`` se não houve erros."""
+    if not importacao.relatorio_erros:
+        return None
+    return os.path.join(_diretorio(), importacao.relatorio_erros)
+
+
+# ----------------------------------------------------------------------
+#  Leitura da planilha
+# ----------------------------------------------------------------------
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    # Células numéricas (CPF digitado como número) chegam como float
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _linhas_xlsx(caminho):
+    from openpyxl import load_workbook
+
+    planilha = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        yield from planilha.active.iter_rows(values_only=True)
+    finally:
+        planilha.close()
+
+
+def _linhas_csv(caminho):
+    with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+        try:
+            dialeto = csv.Sniffer().sniff(arquivo.read(4096), delimiters=",;\t")
+        except csv.Error:
+            dialeto = csv.excel
+        arquivo.seek(0)
+        yield from csv.reader(arquivo, dialeto)
+
+
+def _linhas_xls(caminho):
+    # O formato binário antigo não tem leitor em streaming
+    import pandas as pd
+
+    tabela = pd.read_excel(caminho, header=None, dtype=object)
+    for valores in tabela.itertuples(index=False):
+        yield tuple(None if pd.isna(v) else v for v in valores)
+
+
+def _leitor(caminho):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == ".csv":
+        return _linhas_csv(caminho)
+    if extensao == ".xls":
+        return _linhas_xls(caminho)
+    return _linhas_xlsx(caminho)
+
+
+def _indices_colunas(cabecalho):
+    cabecalho = [_texto(c).lower() for c in cabecalho or ()]
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in cabecalho]
+    if faltando:
+        raise ColunasAusentesError(faltando)
+    return {c: cabecalho.index(c) for c in COLUNAS_OBRIGATORIAS}
+
+
+def validar_planilha(caminho):
+    """Lê só o cabeçalho.
+
+    Raises:
+        ColunasAusentesError: se faltar alguma coluna obrigatória
+    """
+    linhas = _leitor(caminho)
+    try:
+        _indices_colunas(next(linhas, None))
+    finally:
+        linhas.close()
+
+
+def ler_planilha(caminho):
+    """Itera ``(numero_linha, registro)`` pelas linhas não vazias da planilha."""
+    linhas = _leitor(caminho)
+    try:
+        indices = _indices_colunas(next(linhas, None))
+        for numero, valores in enumerate(linhas, start=2):
+            valores = valores or ()
+            registro = {
+                coluna: _texto(valores[indice]) if indice < len(valores) else ""
+                for coluna, indice in indices.items()
+            }
+            if any(registro.values()):
+                yield numero, registro
+    finally:
+        linhas.close()
+
+
+def _em_lotes(registros, tamanho):
+    while True:
+        lote = list(islice(registros, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+# ----------------------------------------------------------------------
+#  Processamento
+# ----------------------------------------------------------------------
+
+class _RelatorioErros:
+    """CSV de linhas rejeitadas, criado só quando aparece o primeiro erro."""
+
+    def __init__(self, importacao_id):
+        self.nome = f"{importacao_id}_erros.csv"
+        self.total = 0
+        self._arquivo = None
+        self._escritor = None
+
+    def registrar(self, numero, registro, motivo):
+        if self._escritor is None:
+            os.makedirs(_diretorio(), exist_ok=True)
+            self._arquivo = open(os.path.join(_diretorio(), self.nome), "w", newline="", encoding="utf-8")
+            self._escritor = csv.writer(self._arquivo)
+            self._escritor.writerow(CAMPOS_RELATORIO)
+        self._escritor.writerow((numero, registro.get("email", ""), registro.get("cpf", ""), motivo))
+        self.total += 1
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+
+
+def _limites_colunas():
+    return {c: Usuario.__table__.c[c].type.length for c in COLUNAS_OBRIGATORIAS if c != "senha"}
+
+
+def _validar(registro, limites):
+    vazios = [c for c in COLUNAS_OBRIGATORIAS if not registro[c]]
+    if vazios:
+        return "Campos obrigatórios vazios: " + ", ".join(vazios)
+    longos = [c for c, limite in limites.items() if limite and len(registro[c]) > limite]
+    if longos:
+        return "Valor longo demais em: " + ", ".join(longos)
+    return None
+
+
+def _existentes(registros):
+    emails = {r["email"] for _, r in registros}
+    cpfs = {r["cpf"] for _, r in registros}
+    linhas = db.session.execute(
+        select(Usuario.email, Usuario.cpf).where(or_(Usuario.email.in_(emails), Usuario.cpf.in_(cpfs)))
+    ).all()
+    return {e for e, _ in linhas}, {c for _, c in linhas}
+
+
+def _inserir_um_a_um(novos, relatorio):
+    """Caminho de contingência quando outro processo inseriu o mesmo e-mail/CPF."""
+    inseridos = 0
+    for numero, linha in novos:
+        try:
+            db.session.execute(insert(Usuario), [linha])
+            db.session.commit()
+            inseridos += 1
+        except IntegrityError:
+            db.session.rollback()
+            relatorio.registrar(numero, linha, "E-mail ou CPF já cadastrado")
+    return inseridos
+
+
+def _processar_lote(lote, vistos, hashes, relatorio, limites):
+    """Insere as linhas válidas do lote e devolve quantas entraram (sem commit)."""
+    validos = []
+    for numero, registro in lote:
+        motivo = _validar(registro, limites)
+        if motivo:
+            relatorio.registrar(numero, registro, motivo)
+        else:
+            validos.append((numero, registro))
+    if not validos:
+        return 0
+
+    emails_existentes, cpfs_existentes = _existentes(validos)
+    emails_vistos, cpfs_vistos = vistos
+    novos = []
+    for numero, registro in validos:
+        email, cpf = registro["email"], registro["cpf"]
+        if email in emails_vistos or cpf in cpfs_vistos:
+            motivo = "E-mail ou CPF repetido na planilha"
+        elif email in emails_existentes:
+            motivo = "E-mail já cadastrado"
+        elif cpf in cpfs_existentes:
+            motivo = "CPF já cadastrado"
+        else:
+            motivo = None
+        emails_vistos.add(email)
+        cpfs_vistos.add(cpf)
+        if motivo:
+            relatorio.registrar(numero, registro, motivo)
+        else:
+            novos.append((numero, registro))
+    if not novos:
+        return 0
+
+    senhas = hashes.gerar([registro["senha"] for _, registro in novos])
+    linhas = [
+        (numero, {**registro, "senha": senha_hash})
+        for (numero, registro), senha_hash in zip(novos, senhas)
+    ]
+    try:
+        db.session.execute(insert(Usuario), [linha for _, linha in linhas])
+        return len(linhas)
+    except IntegrityError:
+        db.session.rollback()
+        return _inserir_um_a_um(linhas, relatorio)
+
+
+def executar_importacao(importacao_id, caminho, lote=None, workers=None, metodo_hash=METODO_HASH,
+                        remover_arquivo=True):
+    """Processa a planilha de uma ``ImportacaoUsuarios`` até o fim.
+
+    Cada lote é gravado com o progresso da importação no mesmo commit, então
+    uma falha no meio deixa os lotes anteriores importados e o status
+    ``falhou`` com a mensagem do erro (inclusive ``IMPORTACAO_USUARIOS_LOTE``
+    não positivo).
+    """
+    importacao = db.session.get(ImportacaoUsuarios, importacao_id)
+    importacao.status = ImportacaoUsuarios.PROCESSANDO
+    importacao.iniciado_em = datetime.utcnow()
+    db.session.commit()
+
+    hashes = GeradorHashes(workers, metodo_hash)
+    relatorio = _RelatorioErros(importacao_id)
+    vistos = (set(), set())
+    limites = _limites_colunas()
+    try:
+        # Lote não positivo é erro de configuração: a importação falha em vez
+        # de terminar "concluída" sem ler nada
+        tamanho = int(lote or config_positivo("IMPORTACAO_USUARIOS_LOTE", LOTE_PADRAO))
+        for registros in _em_lotes(ler_planilha(caminho), tamanho):
+            erros_antes = relatorio.total
+            importados = _processar_lote(registros, vistos, hashes, relatorio, limites)
+            db.session.execute(
+                update(ImportacaoUsuarios)
+                .where(ImportacaoUsuarios.id == importacao_id)
+                .values(
+                    linhas_processadas=ImportacaoUsuarios.linhas_processadas + len(registros),
+                    importados=ImportacaoUsuarios.importados + importados,
+                    erros=ImportacaoUsuarios.erros + relatorio.total - erros_antes,
+                    relatorio_erros=relatorio.nome if relatorio.total else None,
+                )
+            )
+            db.session.commit()
+        status, mensagem = ImportacaoUsuarios.CONCLUIDA, None
+    except Exception as exc:
+        db.session.rollback()
+        logger.exception("Erro na importação de usuários %s", importacao_id)
+        status, mensagem = ImportacaoUsuarios.FALHOU, str(exc)
+    finally:
+        hashes.fechar()
+        relatorio.fechar()
+        if remover_arquivo and os.path.exists(caminho):
+            os.remove(caminho)
+
+    db.session.expire(importacao)
+    importacao.status = status
+    importacao.mensagem = mensagem
+    importacao.concluido_em = datetime.utcnow()
+    db.session.commit()
+    logger.info(
+        "Importação %s %s: %s importados, %s erros",
+        importacao_id, status, importacao.importados, importacao.erros,
+    )
+    return importacao
+
+
+def _executar_em_segundo_plano(app, importacao_id, caminho):
+    with app.app_context():
+        try:
+            executar_importacao(importacao_id, caminho)
+        finally:
+            db.session.remove()
+
+
+def iniciar_importacao(arquivo, solicitante=None):
+    """Salva o upload, valida o cabeçalho e dispara a importação numa thread.
+
+    Returns:
+        ImportacaoUsuarios: registro já gravado, com status ``pendente``
+
+    Raises:
+        ColunasAusentesError: se faltar alguma coluna obrigatória
+    """
+    nome = secure_filename(arquivo.filename)
+    os.makedirs(_diretorio(), exist_ok=True)
+    caminho = os.path.join(_diretorio(), f"{uuid.uuid4().hex}_{nome}")
+    arquivo.save(caminho)
+    try:
+        validar_planilha(caminho)
+    except Exception:
+        os.remove(caminho)
+        raise
+
+    importacao = ImportacaoUsuarios(arquivo_nome=nome, solicitante=solicitante)
+    db.session.add(importacao)
+    db.session.commit()
+
+    threading.Thread(
+        target=_executar_em_segundo_plano,
+        args=(current_app._get_current_object(), importacao.id, caminho),
+        name=f"importacao-usuarios-{importacao.id}",
+        daemon=True,
+    ).start()
+    return importacao
@@ -12,7 +12,7 @@ from models.submission_system import (
 from models.review import Assignment, Submission
 from models.user import Usuario
 from models.event import Evento
-from services.email_service import send_email
+from services.email_outbox_service import enfileirar_mensagem
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +52,7 @@ class NotificationService:
             sent_count = 0
             for admin in admins:
                 try:
-                    send_email(
+                    enfileirar_mensagem(
                         to=admin.email,
                         subject=subject,
                         html=html_content
@@ -62,6 +62,8 @@ class NotificationService:
                 except Exception as e:
                     logger.error(f"Erro ao enviar notificação para {admin.email}: {str(e)}")
             
+            db.session.commit()
+            
             return {
                 "success": True,
                 "notifications_sent": sent_count,
@@ -186,7 +188,7 @@ class NotificationService:
             sent_count = 0
             for admin in admins:
                 try:
-                    send_email(
+                    enfileirar_mensagem(
                         to=admin.email,
                         subject=subject,
                         html=html_content
@@ -195,6 +197,8 @@ class NotificationService:
                 except Exception as e:
                     logger.error(f"Erro ao enviar notificação de importação para {admin.email}: {str(e)}")
             
+            db.session.commit()
+            
             return {
                 "success": True,
                 "notifications_sent": sent_count
@@ -227,7 +231,7 @@ class NotificationService:
         html_template = self._get_reviewer_notification_template()
         html_content = html_template.render(**template_data)
         
-        send_email(
+        enfileirar_mensagem(
             to=reviewer.email,
             subject=subject,
             html=html_content
@@ -250,7 +254,7 @@ class NotificationService:
         html_template = self._get_deadline_reminder_template()
         html_content = html_template.render(**template_data)
         
-        send_email(
+        enfileirar_mensagem(
             to=reviewer.email,
             subject=subject,
             html=html_content
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional, Callable
 import multiprocessing as mp
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import time
 import logging
@@ -11,9 +12,56 @@ import hashlib
 import os
 from datetime import datetime, timedelta
 import psutil
-from memory_profiler import profile
+try:
+    from memory_profiler import profile
+except ImportError:  # pragma: no cover - dependência opcional de diagnóstico
+    def profile(func):
+        return func
 import gc
 
+
+class OperationTracker:
+    """Mede duração, linhas processadas e pico de memória de uma operação.
+
+    O pico é o maior RSS do processo entre as amostras (``sample``/``add_rows``),
+    então operações em streaming devem amostrar a cada chunk.
+    """
+
+    def __init__(self, service: 'OptimizationService', operation_name: str):
+        self.service = service
+        self.operation_name = operation_name
+        self.rows = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self._process = psutil.Process()
+        self._baseline = 0
+        self._peak = 0
+        self._start = 0.0
+
+    def __enter__(self) -> 'OperationTracker':
+        self._baseline = self._peak = self._process.memory_info().rss
+        self._start = time.perf_counter()
+        return self
+
+    def sample(self) -> None:
+        self._peak = max(self._peak, self._process.memory_info().rss)
+
+    def add_rows(self, count: int) -> None:
+        self.rows += count
+        self.sample()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.sample()
+        self.result = self.service.record_operation(
+            self.operation_name,
+            rows=self.rows,
+            seconds=time.perf_counter() - self._start,
+            peak_memory_bytes=self._peak,
+            memory_growth_bytes=self._peak - self._baseline,
+            success=exc_type is None,
+        )
+        return False
+
+
 class OptimizationService:
     """Serviço para otimização de processamento de planilhas e operações pesadas"""
     
@@ -45,7 +93,9 @@ class OptimizationService:
             'cache_hits': 0,
             'cache_misses': 0,
             'parallel_operations': 0,
-            'processing_times': []
+            'processing_times': [],
+            # Últimas operações medidas com track_operation
+            'operations': deque(maxlen=100)
         }
     
     def optimize_dataframe_processing(self, df: pd.DataFrame, 
@@ -429,9 +479,33 @@ class OptimizationService:
             'cleared_disk_files': cleared_disk
         }
     
+    def track_operation(self, operation_name: str) -> OperationTracker:
+        """Context manager que registra tempo, linhas/s e pico de memória da operação."""
+        return OperationTracker(self, operation_name)
+
+    def record_operation(self, operation_name: str, rows: int, seconds: float,
+                         peak_memory_bytes: int = 0, memory_growth_bytes: int = 0,
+                         success: bool = True) -> Dict[str, Any]:
+        """Registra uma operação medida e devolve o registro."""
+        entry = {
+            'operation': operation_name,
+            'rows': rows,
+            'seconds': round(seconds, 4),
+            'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None,
+            'peak_memory_mb': round(peak_memory_bytes / (1024 * 1024), 1),
+            'memory_growth_mb': round(memory_growth_bytes / (1024 * 1024), 1),
+            'success': success,
+            'finished_at': datetime.now().isoformat(),
+        }
+        self.performance_metrics['operations'].append(entry)
+        self.performance_metrics['total_operations'] += 1
+        self.performance_metrics['processing_times'].append(seconds)
+        return entry
+
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Retorna métricas de performance"""
         metrics = self.performance_metrics.copy()
+        metrics['operations'] = list(metrics['operations'])
         
         # Calcular estatísticas
         if metrics['processing_times']:
@@ -450,6 +524,22 @@ class OptimizationService:
         metrics['memory_usage'] = self._check_memory_usage() * 100
         metrics['cpu_count'] = mp.cpu_count()
         metrics['cache_size'] = len(self.memory_cache)
+
+        # Vazão e memória por tipo de operação
+        throughput = {}
+        for entry in metrics['operations']:
+            summary = throughput.setdefault(entry['operation'], {
+                'runs': 0, 'rows': 0, 'seconds': 0.0, 'peak_memory_mb': 0.0
+            })
+            summary['runs'] += 1
+            summary['rows'] += entry['rows']
+            summary['seconds'] += entry['seconds']
+            summary['peak_memory_mb'] = max(summary['peak_memory_mb'], entry['peak_memory_mb'])
+        for summary in throughput.values():
+            summary['rows_per_second'] = (
+                round(summary['rows'] / summary['seconds'], 1) if summary['seconds'] > 0 else None
+            )
+        metrics['throughput'] = throughput
         
         return metrics
     
@@ -486,6 +576,17 @@ class OptimizationService:
         """Executa operação com profiling de memória"""
         return operation(*args, **kwargs)
 
+_shared_service: Optional[OptimizationService] = None
+
+
+def get_optimization_service() -> OptimizationService:
+    """Instância do processo, usada pelos serviços que reportam métricas."""
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = OptimizationService()
+    return _shared_service
+
+
 # Decorador para cache automático
 def cached_operation(ttl: int = 3600):
     """Decorador para cache automático de operações"""
@@ -4835,6 +4835,9 @@ def gerar_certificados_pdf(oficina, inscritos, pdf_path):
     """
     Gera certificados em PDF para múltiplos inscritos de uma oficina.
 
+    As imagens do cliente são carregadas uma única vez e compartilhadas entre
+    as páginas (ver ``services.certificado_lote_service``).
+
     Args:
         oficina: Objeto oficina com atributos titulo, carga_horaria e cliente
         inscritos: Lista de objetos inscricao com atributo usuario
@@ -4843,121 +4846,9 @@ def gerar_certificados_pdf(oficina, inscritos, pdf_path):
     Returns:
         str: Caminho do arquivo PDF gerado
     """
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.utils import ImageReader
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import Paragraph, Frame
-    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-
-    # Obter o template de certificado
-    template = CertificadoTemplate.query.filter_by(cliente_id=oficina.cliente_id, ativo=True).first()
-    cliente = oficina.cliente
-
-    # Determinar o conteúdo do certificado
-    if template and template.conteudo:
-        texto_certificado = template.conteudo
-    elif cliente and cliente.texto_personalizado:
-        texto_certificado = cliente.texto_personalizado
-    else:
-        texto_certificado = (
-            "Certificamos que {NOME_PARTICIPANTE} participou da oficina {LISTA_OFICINAS}, "
-            "com uma carga horária total de {CARGA_HORARIA} horas nas datas {DATAS_OFICINAS}."
-        )
-    
-    datas_oficina = ', '.join(dia.data.strftime('%d/%m/%Y') for dia in sorted(oficina.dias, key=lambda x: x.data)) if hasattr(oficina, 'dias') and oficina.dias else ''
-
-    # Inicializar o canvas
-    c = canvas.Canvas(pdf_path, pagesize=landscape(A4))
-    width, height = landscape(A4)
+    from services.certificado_lote_service import renderizar_certificados_oficina
 
-    # Criar estilos de parágrafo para texto formatado
-    styles = getSampleStyleSheet()
-    estilo_paragrafo = ParagraphStyle(
-        'EstiloCertificado',
-        parent=styles['Normal'],
-        fontSize=14,
-        leading=18,
-        alignment=TA_CENTER,
-        spaceAfter=12
-    )
-
-    # Gerar um certificado para cada inscrito
-    for inscricao in inscritos:
-        # Substituir as variáveis no template
-        texto_final = (
-            texto_certificado.replace("{NOME_PARTICIPANTE}", inscricao.usuario.nome)
-                             .replace("{CARGA_HORARIA}", str(oficina.carga_horaria))
-                             .replace("{LISTA_OFICINAS}", oficina.titulo)
-                             .replace("{DATAS_OFICINAS}", datas_oficina)
-        )
-
-        # 1. Desenhar a imagem de fundo
-        fundo_path = caminho_absoluto_arquivo(cliente.fundo_certificado)
-        if fundo_path:
-            fundo = ImageReader(fundo_path)
-            c.drawImage(fundo, 0, 0, width=width, height=height)
-
-        # 2. Adicionar título
-        c.setFont("Helvetica-Bold", 24)
-        titulo = "CERTIFICADO"
-        titulo_largura = c.stringWidth(titulo, "Helvetica-Bold", 24)
-        c.drawString((width - titulo_largura) / 2, height * 0.75, titulo)
-
-        # 3. Texto principal do certificado (centralizado e formatado)
-        paragrafos = texto_final.split('\n')
-        texto_formatado = '<br/>'.join(paragrafos)
-        p = Paragraph(texto_formatado, estilo_paragrafo)
-
-        margem_lateral = width * 0.15
-        largura_texto = width - 2 * margem_lateral
-        altura_texto = height * 0.3
-        posicao_y_texto = height * 0.4
-
-        frame = Frame(margem_lateral, posicao_y_texto, largura_texto, altura_texto, showBoundary=0)
-        frame.addFromList([p], c)
-
-        # 4. Logo (posicionada na parte inferior da página)
-        logo_path = caminho_absoluto_arquivo(cliente.logo_certificado)
-        if logo_path:
-            logo_largura = 180
-            logo_altura = 100
-            margem_inferior = 50
-
-            logo = ImageReader(logo_path)
-            c.drawImage(logo,
-                      (width - logo_largura) / 2,
-                      margem_inferior,
-                      width=logo_largura,
-                      height=logo_altura,
-                      preserveAspectRatio=True)
-
-        # 5. Assinatura
-        assinatura_path = caminho_absoluto_arquivo(cliente.assinatura_certificado)
-        if assinatura_path:
-            assinatura_largura = 200
-            assinatura_altura = 60
-
-            if logo_path:
-                assinatura_posicao_y = margem_inferior + logo_altura + 20
-            else:
-                assinatura_posicao_y = 30
-
-            assinatura = ImageReader(assinatura_path)
-            c.drawImage(
-                assinatura,
-                (width - assinatura_largura) / 2,
-                assinatura_posicao_y,
-                width=assinatura_largura,
-                height=assinatura_altura,
-                preserveAspectRatio=True,
-                mask='auto'
-            )
-
-        c.showPage()
-
-    c.save()
-    return pdf_path
+    return renderizar_certificados_oficina(oficina, inscritos, pdf_path)
 
 from flask import current_app
 
@@ -10241,6 +10132,9 @@ def gerar_certificados_pdf(oficina, inscritos, pdf_path):
     """
     Gera certificados em PDF para múltiplos inscritos de uma oficina.
 
+    As imagens do cliente são carregadas uma única vez e compartilhadas entre
+    as páginas (ver ``services.certificado_lote_service``).
+
     Args:
         oficina: Objeto oficina com atributos titulo, carga_horaria e cliente
         inscritos: Lista de objetos inscricao com atributo usuario
@@ -10249,121 +10143,9 @@ def gerar_certificados_pdf(oficina, inscritos, pdf_path):
     Returns:
         str: Caminho do arquivo PDF gerado
     """
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.utils import ImageReader
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import Paragraph, Frame
-    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-
-    # Obter o template de certificado
-    template = CertificadoTemplate.query.filter_by(cliente_id=oficina.cliente_id, ativo=True).first()
-    cliente = oficina.cliente
-
-    # Determinar o conteúdo do certificado
-    if template and template.conteudo:
-        texto_certificado = template.conteudo
-    elif cliente and cliente.texto_personalizado:
-        texto_certificado = cliente.texto_personalizado
-    else:
-        texto_certificado = (
-            "Certificamos que {NOME_PARTICIPANTE} participou da oficina {LISTA_OFICINAS}, "
-            "com uma carga horária total de {CARGA_HORARIA} horas nas datas {DATAS_OFICINAS}."
-        )
-    
-    datas_oficina = ', '.join(dia.data.strftime('%d/%m/%Y') for dia in sorted(oficina.dias, key=lambda x: x.data)) if hasattr(oficina, 'dias') and oficina.dias else ''
-
-    # Inicializar o canvas
-    c = canvas.Canvas(pdf_path, pagesize=landscape(A4))
-    width, height = landscape(A4)
+    from services.certificado_lote_service import renderizar_certificados_oficina
 
-    # Criar estilos de parágrafo para texto formatado
-    styles = getSampleStyleSheet()
-    estilo_paragrafo = ParagraphStyle(
-        'EstiloCertificado',
-        parent=styles['Normal'],
-        fontSize=14,
-        leading=18,
-        alignment=TA_CENTER,
-        spaceAfter=12
-    )
-
-    # Gerar um certificado para cada inscrito
-    for inscricao in inscritos:
-        # Substituir as variáveis no template
-        texto_final = (
-            texto_certificado.replace("{NOME_PARTICIPANTE}", inscricao.usuario.nome)
-                             .replace("{CARGA_HORARIA}", str(oficina.carga_horaria))
-                             .replace("{LISTA_OFICINAS}", oficina.titulo)
-                             .replace("{DATAS_OFICINAS}", datas_oficina)
-        )
-
-        # 1. Desenhar a imagem de fundo
-        fundo_path = caminho_absoluto_arquivo(cliente.fundo_certificado)
-        if fundo_path:
-            fundo = ImageReader(fundo_path)
-            c.drawImage(fundo, 0, 0, width=width, height=height)
-
-        # 2. Adicionar título
-        c.setFont("Helvetica-Bold", 24)
-        titulo = "CERTIFICADO"
-        titulo_largura = c.stringWidth(titulo, "Helvetica-Bold", 24)
-        c.drawString((width - titulo_largura) / 2, height * 0.75, titulo)
-
-        # 3. Texto principal do certificado (centralizado e formatado)
-        paragrafos = texto_final.split('\n')
-        texto_formatado = '<br/>'.join(paragrafos)
-        p = Paragraph(texto_formatado, estilo_paragrafo)
-
-        margem_lateral = width * 0.15
-        largura_texto = width - 2 * margem_lateral
-        altura_texto = height * 0.3
-        posicao_y_texto = height * 0.4
-
-        frame = Frame(margem_lateral, posicao_y_texto, largura_texto, altura_texto, showBoundary=0)
-        frame.addFromList([p], c)
-
-        # 4. Logo (posicionada na parte inferior da página)
-        logo_path = caminho_absoluto_arquivo(cliente.logo_certificado)
-        if logo_path:
-            logo_largura = 180
-            logo_altura = 100
-            margem_inferior = 50
-
-            logo = ImageReader(logo_path)
-            c.drawImage(logo,
-                      (width - logo_largura) / 2,
-                      margem_inferior,
-                      width=logo_largura,
-                      height=logo_altura,
-                      preserveAspectRatio=True)
-
-        # 5. Assinatura
-        assinatura_path = caminho_absoluto_arquivo(cliente.assinatura_certificado)
-        if assinatura_path:
-            assinatura_largura = 200
-            assinatura_altura = 60
-
-            if logo_path:
-                assinatura_posicao_y = margem_inferior + logo_altura + 20
-            else:
-                assinatura_posicao_y = 30
-
-            assinatura = ImageReader(assinatura_path)
-            c.drawImage(
-                assinatura,
-                (width - assinatura_largura) / 2,
-                assinatura_posicao_y,
-                width=assinatura_largura,
-                height=assinatura_altura,
-                preserveAspectRatio=True,
-                mask='auto'
-            )
-
-        c.showPage()
-
-    c.save()
-    return pdf_path
+    return renderizar_certificados_oficina(oficina, inscritos, pdf_path)
 
 from flask import current_app
 
@@ -0,0 +1,162 @@
+"""Planejamento em lote dos horários de visitação de um evento.
+
+Substitui o laço dia a dia de ``gerar_horarios_agendamento``: os intervalos já
+cadastrados no período vêm de uma única consulta, a grade de candidatos é
+calculada uma vez (em minutos do dia) e reaproveitada em todos os dias
+permitidos, e os conflitos são detectados com uma varredura sobre intervalos
+ordenados. A gravação é um único ``INSERT`` em massa.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import time, timedelta
+
+from sqlalchemy import insert, select
+
+from extensions import db
+from models import HorarioVisitacao
+from services import dashboard_stats_service
+from services.disponibilidade_service import marcar_alteracao
+
+logger = logging.getLogger(__name__)
+
+
+def _minutos(t):
+    return t.hour * 60 + t.minute
+
+
+def _como_time(minutos):
+    return time(minutos // 60, minutos % 60)
+
+
+def dias_permitidos(config):
+    """Converte ``config.dias_semana`` (0=Domingo … 6=Sábado) para ``date.weekday()``."""
+    return {
+        (int(dia) + 6) % 7
+        for dia in (config.dias_semana or "").split(",")
+        if dia.strip()
+    }
+
+
+def grade_do_dia(horario_inicio, horario_fim, intervalo_minutos):
+    """Lista ordenada de ``(inicio, fim)`` em minutos; o último slot é truncado no fim."""
+    if not intervalo_minutos or intervalo_minutos <= 0:
+        return []
+    inicio, fim = _minutos(horario_inicio), _minutos(horario_fim)
+    return [
+        (atual, min(atual + intervalo_minutos, fim))
+        for atual in range(inicio, fim, intervalo_minutos)
+    ]
+
+
+def _mesclar(intervalos):
+    """Une intervalos sobrepostos; entrada e saída ordenadas por início."""
+    mesclados = []
+    for inicio, fim in intervalos:
+        if mesclados and inicio < mesclados[-1][1]:
+            if fim > mesclados[-1][1]:
+                mesclados[-1][1] = fim
+        else:
+            mesclados.append([inicio, fim])
+    return mesclados
+
+
+def livres(grade, ocupados):
+    """Slots da ``grade`` que não se sobrepõem a ``ocupados`` (ambos ordenados).
+
+    Varredura com dois ponteiros: O(len(grade) + len(ocupados)).
+    """
+    if not ocupados:
+        return list(grade)
+    bloqueios = _mesclar(ocupados)
+    resultado = []
+    j = 0
+    for inicio, fim in grade:
+        while j < len(bloqueios) and bloqueios[j][1] <= inicio:
+            j += 1
+        if j < len(bloqueios) and bloqueios[j][0] < fim:
+            continue
+        resultado.append((inicio, fim))
+    return resultado
+
+
+def _intervalos_existentes(evento_id, data_inicial, data_final):
+    """``{data: [(inicio, fim), ...]}`` em minutos, ordenados, em uma consulta."""
+    linhas = db.session.execute(
+        select(
+            HorarioVisitacao.data,
+            HorarioVisitacao.horario_inicio,
+            HorarioVisitacao.horario_fim,
+        )
+        .where(
+            HorarioVisitacao.evento_id == evento_id,
+            HorarioVisitacao.data >= data_inicial,
+            HorarioVisitacao.data <= data_final,
+        )
+        .order_by(HorarioVisitacao.data, HorarioVisitacao.horario_inicio)
+    ).all()
+    por_dia = defaultdict(list)
+    for data, inicio, fim in linhas:
+        por_dia[data].append((_minutos(inicio), _minutos(fim)))
+    return por_dia
+
+
+def planejar_horarios(evento_id, config, data_inicial, data_final):
+    """Calcula os horários a criar entre ``data_inicial`` e ``data_final``.
+
+    Returns:
+        dict: ``linhas`` (prontas para o insert), ``dias`` (dias permitidos no
+        período), ``candidatos`` e ``conflitos``
+    """
+    permitidos = dias_permitidos(config)
+    grade = grade_do_dia(config.horario_inicio, config.horario_fim, config.intervalo_minutos)
+    existentes = _intervalos_existentes(evento_id, data_inicial, data_final)
+    capacidade = config.capacidade_padrao
+
+    linhas = []
+    dias = candidatos = 0
+    data_atual = data_inicial
+    while data_atual <= data_final:
+        if data_atual.weekday() in permitidos:
+            dias += 1
+            candidatos += len(grade)
+            for inicio, fim in livres(grade, existentes.get(data_atual)):
+                linhas.append({
+                    "evento_id": evento_id,
+                    "data": data_atual,
+                    "horario_inicio": _como_time(inicio),
+                    "horario_fim": _como_time(fim),
+                    "capacidade_total": capacidade,
+                    "vagas_disponiveis": capacidade,
+                    "fechado": False,
+                })
+        data_atual += timedelta(days=1)
+
+    return {
+        "linhas": linhas,
+        "dias": dias,
+        "candidatos": candidatos,
+        "conflitos": candidatos - len(linhas),
+    }
+
+
+def gerar_horarios(evento_id, config, data_inicial, data_final, dry_run=False):
+    """Gera os horários do período com um único ``INSERT`` em massa.
+
+    Com ``dry_run=True`` apenas devolve as contagens, sem gravar. O commit
+    fica a cargo do chamador.
+
+    Returns:
+        dict: ``criados`` (ou a criar, no dry-run), ``dias``, ``candidatos``,
+        ``conflitos`` e ``dry_run``
+    """
+    plano = planejar_horarios(evento_id, config, data_inicial, data_final)
+    linhas = plano.pop("linhas")
+    if linhas and not dry_run:
+        db.session.execute(insert(HorarioVisitacao.__table__), linhas)
+        marcar_alteracao(evento_id)
+        dashboard_stats_service.marcar_evento(evento_id)
+        logger.info(
+            "%d horários de visitação criados para o evento %s", len(linhas), evento_id
+        )
+    return {"criados": len(linhas), "dry_run": dry_run, **plano}
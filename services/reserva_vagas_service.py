@@ -0,0 +1,194 @@
+"""Reserva atômica de vagas em ``HorarioVisitacao``.
+
+Em vez de ler ``vagas_disponiveis``, comparar em Python e gravar o novo valor
+(o que permite vender a mesma vaga para dois professores ao mesmo tempo), a
+reserva é um único ``UPDATE ... SET vagas_disponiveis = vagas_disponiveis - :n
+WHERE id = :id AND vagas_disponiveis >= :n``. O banco serializa as escritas na
+linha e a condição garante que o saldo nunca fica negativo.
+
+A liberação (cancelamento/recusa) também é condicional: o agendamento só muda
+para ``cancelado``/``recusado`` uma vez, então as vagas não são devolvidas em
+dobro quando dois cancelamentos chegam juntos.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import case, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from extensions import db
+from models import AgendamentoVisita, HorarioVisitacao
+from services import dashboard_stats_service
+from services.disponibilidade_service import marcar_alteracao
+
+logger = logging.getLogger(__name__)
+
+STATUS_LIBERADOS = ("cancelado", "recusado")
+
+
+class VagasInsuficientesError(ValueError):
+    """Não há vagas suficientes no horário para a reserva."""
+
+    def __init__(self, disponiveis):
+        self.disponiveis = disponiveis
+        super().__init__(f"Não há vagas suficientes! Disponíveis: {disponiveis}")
+
+
+def _sincronizar_horario(horario_id, vagas):
+    """Atualiza o objeto já carregado na sessão sem marcá-lo como alterado."""
+    horario = db.session.identity_map.get(
+        db.session.identity_key(HorarioVisitacao, horario_id)
+    )
+    if horario is not None and vagas is not None:
+        set_committed_value(horario, "vagas_disponiveis", vagas)
+
+
+def vagas_disponiveis(horario_id):
+    return db.session.execute(
+        select(HorarioVisitacao.vagas_disponiveis).where(HorarioVisitacao.id == horario_id)
+    ).scalar()
+
+
+def reservar_vagas(horario_id, quantidade):
+    """Desconta ``quantidade`` vagas do horário se houver saldo.
+
+    O commit fica a cargo do chamador.
+
+    Returns:
+        int: Vagas restantes após a reserva
+
+    Raises:
+        VagasInsuficientesError: Se o saldo atual for menor que ``quantidade``
+    """
+    tabela = HorarioVisitacao.__table__
+    stmt = (
+        update(tabela)
+        .where(tabela.c.id == horario_id, tabela.c.vagas_disponiveis >= quantidade)
+        .values(vagas_disponiveis=tabela.c.vagas_disponiveis - quantidade)
+        .returning(tabela.c.vagas_disponiveis, tabela.c.evento_id)
+    )
+    linha = db.session.execute(stmt).first()
+    if linha is None:
+        raise VagasInsuficientesError(vagas_disponiveis(horario_id) or 0)
+    restantes, evento_id = linha
+    _sincronizar_horario(horario_id, restantes)
+    marcar_alteracao(evento_id)
+    dashboard_stats_service.marcar_evento(evento_id)
+    return restantes
+
+
+def liberar_vagas(horario_id, quantidade):
+    """Devolve ``quantidade`` vagas ao horário, sem passar da capacidade total.
+
+    O commit fica a cargo do chamador. Retorna as vagas disponíveis.
+    """
+    tabela = HorarioVisitacao.__table__
+    somado = tabela.c.vagas_disponiveis + quantidade
+    stmt = (
+        update(tabela)
+        .where(tabela.c.id == horario_id)
+        .values(
+            vagas_disponiveis=case(
+                (somado > tabela.c.capacidade_total, tabela.c.capacidade_total),
+                else_=somado,
+            )
+        )
+        .returning(tabela.c.vagas_disponiveis, tabela.c.evento_id)
+    )
+    linha = db.session.execute(stmt).first()
+    if linha is None:
+        return None
+    vagas, evento_id = linha
+    _sincronizar_horario(horario_id, vagas)
+    marcar_alteracao(evento_id)
+    dashboard_stats_service.marcar_evento(evento_id)
+    return vagas
+
+
+def encerrar_agendamento(agendamento, status="cancelado", liberar=True):
+    """Cancela/recusa o agendamento uma única vez e devolve suas vagas.
+
+    A troca de status é um ``UPDATE`` condicional; se outro processo já tiver
+    cancelado o agendamento nada é devolvido. O commit fica a cargo do chamador.
+
+    Returns:
+        bool: ``True`` se este chamado fez a transição
+    """
+    tabela = AgendamentoVisita.__table__
+    agora = datetime.utcnow()
+    valores = {"status": status}
+    if status == "cancelado":
+        valores["data_cancelamento"] = agora
+    resultado = db.session.execute(
+        update(tabela)
+        .where(tabela.c.id == agendamento.id, tabela.c.status.notin_(STATUS_LIBERADOS))
+        .values(**valores)
+    )
+    if not resultado.rowcount:
+        return False
+
+    for campo, valor in valores.items():
+        set_committed_value(agendamento, campo, valor)
+    dashboard_stats_service.marcar_horario(agendamento.horario_id)
+    if liberar and agendamento.horario_id:
+        liberar_vagas(agendamento.horario_id, agendamento.quantidade_alunos)
+    return True
+
+
+def benchmark_reservas_concorrentes(horario_id, tentativas=300, quantidade=1, workers=50):
+    """Dispara ``tentativas`` reservas simultâneas no mesmo horário.
+
+    Cada tentativa usa sua própria sessão/transação, como requisições
+    concorrentes. Útil para conferir que não há overbooking.
+
+    Returns:
+        dict: confirmadas, recusadas, erros, vagas_iniciais, vagas_finais,
+        oversell, segundos e reservas_por_segundo
+    """
+    app = current_app._get_current_object()
+    vagas_iniciais = vagas_disponiveis(horario_id)
+    db.session.remove()
+
+    contagem = {"confirmadas": 0, "recusadas": 0, "erros": 0}
+    lock = threading.Lock()
+
+    def reservar(_):
+        with app.app_context():
+            try:
+                reservar_vagas(horario_id, quantidade)
+                db.session.commit()
+                chave = "confirmadas"
+            except VagasInsuficientesError:
+                db.session.rollback()
+                chave = "recusadas"
+            except Exception:
+                logger.exception("Erro na reserva concorrente")
+                db.session.rollback()
+                chave = "erros"
+            finally:
+                db.session.remove()
+        with lock:
+            contagem[chave] += 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(reservar, range(tentativas)))
+    segundos = time.perf_counter() - inicio
+
+    vagas_finais = vagas_disponiveis(horario_id)
+    vendidas = contagem["confirmadas"] * quantidade
+    return {
+        **contagem,
+        "tentativas": tentativas,
+        "vagas_iniciais": vagas_iniciais,
+        "vagas_finais": vagas_finais,
+        # Vagas vendidas além do saldo inicial ou divergência no contador
+        "oversell": max(0, vendidas - vagas_iniciais) + abs(vagas_iniciais - vendidas - vagas_finais),
+        "segundos": round(segundos, 4),
+        "reservas_por_segundo": round(tentativas / segundos, 1) if segundos else None,
+    }
@@ -1,18 +1,73 @@
 import pandas as pd
 import numpy as np
+import os
 import uuid
 import re
-from typing import Dict, List, Optional, Tuple, Any
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 from io import BytesIO
 
+from sqlalchemy import insert, select, update
+
 from extensions import db
 from models.submission_system import (
     ImportedSubmission, SpreadsheetMapping, SubmissionCategory
 )
 from models.review import Submission
 from models.user import Usuario
-from werkzeug.security import generate_password_hash
+from services.hash_service import GeradorHashes
+from services.optimization_service import get_optimization_service
+
+# Linhas lidas, normalizadas e inseridas por vez em import_spreadsheet
+IMPORT_CHUNK_SIZE = 1000
+# Linhas amostradas por analyze_spreadsheet (o total é contado à parte)
+ANALYSIS_ROWS = 100
+
+# Linhas importadas materializadas por commit em process_imported_submissions
+PROCESS_BATCH_SIZE = 500
+# None = método padrão do Werkzeug
+ACCESS_CODE_HASH_METHOD = None
+
+# Campo de ImportedSubmission -> campos do mapeamento (o primeiro presente vence)
+IMPORTED_FIELDS = {
+    "title": ("title",),
+    "authors": ("authors", "author"),
+    "author_email": ("email",),
+    "category": ("category",),
+    "modality": ("modality",),
+    "submission_type": ("type",),
+    "keywords": ("keywords",),
+    "abstract": ("abstract",),
+}
+
+SpreadsheetSource = Union[bytes, BinaryIO]
+
+
+def _cell_text(value: Any) -> Optional[str]:
+    """Valor de célula como texto (None para vazio), sem o ``.0`` de inteiros."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _column_names(header: Tuple[Any, ...]) -> List[str]:
+    """Nomes de coluna como o pandas: ``Unnamed: i`` para vazios e sufixo ``.n`` em repetidos."""
+    names = []
+    seen: Dict[str, int] = {}
+    for index, value in enumerate(header):
+        name = str(value).strip() if value is not None else f"Unnamed: {index}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
 
 
 class SpreadsheetService:
@@ -61,14 +116,20 @@ class SpreadsheetService:
             }
         }
     
-    def analyze_spreadsheet(self, file_content: bytes, filename: str) -> Dict:
-        """Analisa a estrutura da planilha e sugere mapeamentos."""
+    def analyze_spreadsheet(self, file_content: SpreadsheetSource, filename: str) -> Dict:
+        """Analisa a estrutura da planilha e sugere mapeamentos.
+
+        Só as primeiras ``ANALYSIS_ROWS`` linhas viram DataFrame; ``total_rows``
+        vem de uma contagem em streaming da planilha inteira.
+        """
         try:
-            # Detectar formato do arquivo
-            if filename.endswith('.csv'):
-                df = pd.read_csv(BytesIO(file_content), encoding='utf-8', nrows=100)
-            else:
-                df = pd.read_excel(BytesIO(file_content), nrows=100)
+            df = next(
+                self._iter_chunks(file_content, filename, ANALYSIS_ROWS, max_rows=ANALYSIS_ROWS),
+                None,
+            )
+            if df is None:
+                df = pd.DataFrame()
+            total_rows = self._count_rows(file_content, filename)
             
             # Analisar colunas
             columns_analysis = self._analyze_columns(df)
@@ -81,7 +142,7 @@ class SpreadsheetService:
             
             return {
                 "success": True,
-                "total_rows": len(df),
+                "total_rows": total_rows,
                 "columns": list(df.columns),
                 "columns_analysis": columns_analysis,
                 "suggested_mapping": suggested_mapping,
@@ -94,6 +155,104 @@ class SpreadsheetService:
                 "success": False,
                 "error": str(e)
             }
+
+    # ------------------------------------------------------------------
+    #  Leitura em chunks
+    # ------------------------------------------------------------------
+
+    def _iter_chunks(self, file_content: SpreadsheetSource, filename: str, chunk_size: int,
+                     max_rows: Optional[int] = None, as_text: bool = False) -> Iterator[pd.DataFrame]:
+        """Lê a planilha em DataFrames de até ``chunk_size`` linhas.
+
+        CSV usa ``read_csv(chunksize=...)`` e XLSX o modo ``read_only`` do
+        openpyxl, então só um chunk fica na memória. O índice segue a posição
+        da linha de dados na planilha (0 = primeira linha após o cabeçalho).
+        Com ``as_text`` os valores chegam como ``str`` ou ``None``.
+        """
+        stream = BytesIO(file_content) if isinstance(file_content, (bytes, bytearray)) else file_content
+        name = filename.lower()
+        if name.endswith('.csv'):
+            reader = pd.read_csv(
+                stream, encoding='utf-8', chunksize=chunk_size, nrows=max_rows,
+                dtype=str if as_text else None,
+            )
+            with reader:
+                for chunk in reader:
+                    yield chunk.astype(object).where(chunk.notna(), None) if as_text else chunk
+        elif name.endswith('.xls'):
+            # O formato binário antigo não tem leitura em streaming
+            df = pd.read_excel(stream, nrows=max_rows)
+            for start in range(0, len(df), chunk_size):
+                chunk = df.iloc[start:start + chunk_size]
+                yield chunk.map(_cell_text) if as_text else chunk
+        else:
+            yield from self._iter_xlsx_chunks(stream, chunk_size, max_rows, as_text)
+
+    @staticmethod
+    def _count_rows(file_content: SpreadsheetSource, filename: str) -> int:
+        """Conta as linhas de dados sem montar DataFrames da planilha inteira.
+
+        Segue os mesmos critérios da importação: no XLSX, linhas totalmente
+        vazias não contam.
+        """
+        if isinstance(file_content, (bytes, bytearray)):
+            stream = BytesIO(file_content)
+        else:
+            stream = file_content
+            stream.seek(0)
+        name = filename.lower()
+        if name.endswith('.csv'):
+            reader = pd.read_csv(
+                stream, encoding='utf-8', chunksize=IMPORT_CHUNK_SIZE, usecols=[0], dtype=str,
+            )
+            with reader:
+                return sum(len(chunk) for chunk in reader)
+        if name.endswith('.xls'):
+            return len(pd.read_excel(stream))
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            next(rows, None)
+            return sum(1 for row in rows if any(value is not None for value in row))
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _iter_xlsx_chunks(stream: BinaryIO, chunk_size: int, max_rows: Optional[int],
+                          as_text: bool) -> Iterator[pd.DataFrame]:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = _column_names(header)
+            width = len(columns)
+            position = 0
+            while max_rows is None or position < max_rows:
+                limit = chunk_size if max_rows is None else min(chunk_size, max_rows - position)
+                block = list(islice(rows, limit))
+                if not block:
+                    return
+                # Linhas totalmente vazias (formatação no fim da aba) são ignoradas
+                indexed = [
+                    (position + offset, tuple(row[:width]) + (None,) * (width - len(row)))
+                    for offset, row in enumerate(block)
+                    if any(value is not None for value in row)
+                ]
+                position += len(block)
+                if not indexed:
+                    continue
+                index, values = zip(*indexed)
+                chunk = pd.DataFrame.from_records(list(values), columns=columns, index=list(index))
+                yield chunk.map(_cell_text) if as_text else chunk
+        finally:
+            workbook.close()
     
     def _analyze_columns(self, df: pd.DataFrame) -> Dict[str, Dict]:
         """Analisa cada coluna da planilha."""
@@ -221,55 +380,44 @@ class SpreadsheetService:
         
         return unique_values
     
-    def import_spreadsheet(self, file_content: bytes, filename: str, 
+    def import_spreadsheet(self, file_content: SpreadsheetSource, filename: str,
                            column_mapping: Dict[str, str], 
-                           normalization_config: Dict[str, Dict[str, str]] = None) -> Dict:
-        """Importa planilha completa com mapeamento configurado."""
-        try:
-            # Carregar planilha completa
-            if filename.endswith('.csv'):
-                df = pd.read_csv(BytesIO(file_content), encoding='utf-8')
-            else:
-                df = pd.read_excel(BytesIO(file_content))
-
-            # Normalizar mapeamento: aceitar índices numéricos (ou strings numéricas) e nomes
-            normalized_mapping: Dict[str, str] = {}
-            for field, value in (column_mapping or {}).items():
-                try:
-                    if isinstance(value, int) or (isinstance(value, str) and str(value).isdigit()):
-                        idx = int(value)
-                        if 0 <= idx < len(df.columns):
-                            normalized_mapping[field] = str(df.columns[idx])
-                    else:
-                        normalized_mapping[field] = str(value)
-                except Exception:
-                    continue
+                           normalization_config: Dict[str, Dict[str, str]] = None,
+                           chunk_size: int = None) -> Dict:
+        """Importa planilha completa com mapeamento configurado.
 
-            # Gerar ID do lote
+        A planilha é lida, normalizada e inserida chunk a chunk (um ``INSERT``
+        em lote e um commit por chunk). Tempo, linhas/s e pico de memória vão
+        para ``OptimizationService.get_performance_metrics`` e também saem na
+        chave ``performance`` da resposta.
+        """
+        try:
             batch_id = str(uuid.uuid4())
-            
-            # Processar em chunks para otimização
-            chunk_size = 1000
+            rules = normalization_config or self.normalization_rules
+            normalized_mapping: Optional[Dict[str, str]] = None
+            total_rows = 0
             total_imported = 0
             errors = []
-            
-            for i in range(0, len(df), chunk_size):
-                chunk = df.iloc[i:i+chunk_size]
-                chunk_result = self._process_chunk(
-                    chunk, normalized_mapping, batch_id, 
-                    normalization_config or self.normalization_rules
-                )
-                total_imported += chunk_result["imported"]
-                errors.extend(chunk_result["errors"])
-            
+
+            with get_optimization_service().track_operation("spreadsheet_import") as tracker:
+                for chunk in self._iter_chunks(file_content, filename, chunk_size or IMPORT_CHUNK_SIZE,
+                                               as_text=True):
+                    if normalized_mapping is None:
+                        normalized_mapping = self._normalize_mapping(column_mapping, chunk.columns)
+                    chunk_result = self._process_chunk(chunk, normalized_mapping, batch_id, rules)
+                    total_rows += len(chunk)
+                    total_imported += chunk_result["imported"]
+                    errors.extend(chunk_result["errors"])
+                    tracker.add_rows(len(chunk))
+
             # Salvar configuração de mapeamento
-            self._save_mapping_config(normalized_mapping, normalization_config)
+            self._save_mapping_config(normalized_mapping or {}, normalization_config)
             
             # Retornar chaves compatíveis com o frontend atual
             return {
                 "success": True,
                 "batch_id": batch_id,
-                "total_rows": len(df),
+                "total_rows": total_rows,
                 # chaves antigas usadas pelo template
                 "imported_rows": total_imported,
                 "warning_rows": 0,
@@ -278,77 +426,97 @@ class SpreadsheetService:
                 "imported_count": total_imported,
                 "error_count": len(errors),
                 "errors": errors[:10],  # Primeiros 10 erros
+                "performance": tracker.result,
             }
             
         except Exception as e:
+            db.session.rollback()
             return {
                 "success": False,
                 "error": str(e)
             }
+
+    @staticmethod
+    def _normalize_mapping(column_mapping: Dict[str, Any], columns: pd.Index) -> Dict[str, str]:
+        """Aceita índices numéricos (ou strings numéricas) e nomes de coluna."""
+        normalized_mapping: Dict[str, str] = {}
+        for field, value in (column_mapping or {}).items():
+            try:
+                if isinstance(value, int) or (isinstance(value, str) and str(value).isdigit()):
+                    idx = int(value)
+                    if 0 <= idx < len(columns):
+                        normalized_mapping[field] = str(columns[idx])
+                else:
+                    normalized_mapping[field] = str(value)
+            except Exception:
+                continue
+        return normalized_mapping
     
     def _process_chunk(self, chunk: pd.DataFrame, mapping: Dict[str, str], 
                       batch_id: str, normalization_rules: Dict) -> Dict:
-        """Processa um chunk da planilha."""
-        imported = 0
-        errors = []
-        
-        submissions_to_add = []
-        
-        for index, row in chunk.iterrows():
-            try:
-                # Extrair dados mapeados
-                submission_data = self._extract_submission_data(row, mapping, normalization_rules)
-                
-                # Validar dados obrigatórios
-                if not submission_data.get("title"):
-                    errors.append(f"Linha {index + 1}: Título obrigatório")
-                    continue
-                
-                # Criar objeto ImportedSubmission
-                imported_submission = ImportedSubmission(
-                    evento_id=self.evento_id,
-                    title=submission_data["title"],
-                    authors=submission_data.get("authors") or submission_data.get("author"),
-                    author_email=submission_data.get("email"),
-                    category=submission_data.get("category"),
-                    modality=submission_data.get("modality"),
-                    submission_type=submission_data.get("type"),
-                    keywords=submission_data.get("keywords"),
-                    abstract=submission_data.get("abstract"),
-                    import_batch_id=batch_id,
-                    original_row_data=row.to_dict(),
-                    mapping_config=mapping
-                )
-                
-                submissions_to_add.append(imported_submission)
-                imported += 1
-                
-            except Exception as e:
-                errors.append(f"Linha {index + 1}: {str(e)}")
-        
+        """Valida e insere um chunk (valores já em texto) com um único INSERT."""
+        fields = self._map_chunk(chunk, mapping, normalization_rules)
+
+        title = fields.get("title")
+        if title is None:
+            title = pd.Series(None, index=chunk.index, dtype=object)
+        title_limit = ImportedSubmission.__table__.c.title.type.length
+        missing = title.isna()
+        too_long = title.str.len().gt(title_limit).fillna(False).astype(bool) & ~missing
+        errors = [f"Linha {index + 1}: Título obrigatório" for index in chunk.index[missing]]
+        errors += [
+            f"Linha {index + 1}: Título excede {title_limit} caracteres"
+            for index in chunk.index[too_long]
+        ]
+        valid = ~(missing | too_long)
+        if not valid.any():
+            return {"imported": 0, "errors": errors}
+
+        data = pd.DataFrame(index=chunk.index[valid])
+        for target, sources in IMPORTED_FIELDS.items():
+            series = None
+            for source in sources:
+                if source in fields:
+                    series = fields[source] if series is None else series.fillna(fields[source])
+            data[target] = series[valid] if series is not None else None
+        rows = data.astype(object).where(data.notna(), None).to_dict('records')
+        originals = chunk[valid].to_dict('records')
+
+        imported_at = datetime.utcnow()
+        for row, original in zip(rows, originals):
+            row.update(
+                evento_id=self.evento_id,
+                import_batch_id=batch_id,
+                original_row_data=original,
+                mapping_config=mapping,
+                processed=False,
+                imported_at=imported_at,
+            )
+
         # Inserção em lote para performance
-        if submissions_to_add:
-            db.session.bulk_save_objects(submissions_to_add)
-            db.session.commit()
-        
-        return {"imported": imported, "errors": errors}
-    
-    def _extract_submission_data(self, row: pd.Series, mapping: Dict[str, str], 
-                               normalization_rules: Dict) -> Dict[str, str]:
-        """Extrai e normaliza dados de uma linha da planilha."""
-        data = {}
+        db.session.execute(insert(ImportedSubmission.__table__), rows)
+        db.session.commit()
         
+        return {"imported": len(rows), "errors": errors}
+
+    def _map_chunk(self, chunk: pd.DataFrame, mapping: Dict[str, str],
+                   normalization_rules: Dict) -> Dict[str, pd.Series]:
+        """Aplica mapeamento e normalização a colunas inteiras do chunk."""
+        fields = {}
         for field, column in mapping.items():
-            if column in row.index and pd.notna(row[column]):
-                value = str(row[column]).strip()
-                
-                # Aplicar normalização
-                if field in normalization_rules:
-                    value = self._normalize_value(value, normalization_rules[field])
-                
-                data[field] = value
-        
-        return data
+            if column not in chunk.columns:
+                continue
+            values = chunk[column].astype("string").str.strip()
+            values = values.mask(values == "")
+            if field in normalization_rules:
+                values = self._normalize_series(values, normalization_rules[field])
+            fields[field] = values.astype(object).where(values.notna(), None)
+        return fields
+
+    def _normalize_series(self, values: pd.Series, rules: Dict[str, str]) -> pd.Series:
+        """Normaliza cada valor distinto uma vez e mapeia a coluna inteira."""
+        normalized = {value: self._normalize_value(value, rules) for value in values.dropna().unique()}
+        return values.map(normalized, na_action='ignore')
     
     def _normalize_value(self, value: str, rules: Dict[str, str]) -> str:
         """Normaliza um valor usando as regras fornecidas."""
@@ -380,79 +548,153 @@ class SpreadsheetService:
         db.session.add(mapping)
         db.session.commit()
     
-    def process_imported_submissions(self, batch_id: str = None) -> Dict:
-        """Processa submissões importadas criando objetos Submission."""
+    def process_imported_submissions(self, batch_id: str = None, batch_size: int = None,
+                                     workers: int = None) -> Dict:
+        """Processa submissões importadas criando objetos Submission.
+
+        Trabalha em lotes de ``batch_size`` linhas pendentes: os códigos de
+        acesso são hasheados em paralelo, as submissões entram com um único
+        ``INSERT ... RETURNING id`` e as linhas importadas são marcadas com um
+        ``UPDATE`` em massa, tudo no mesmo commit. Se a execução cair no meio,
+        basta chamar de novo com o mesmo ``batch_id``: os lotes já gravados não
+        aparecem mais como pendentes e não são duplicados.
+        """
+        batch_size = batch_size or PROCESS_BATCH_SIZE
+        processed = 0
+        batches = 0
+        errors = []
         try:
-            query = ImportedSubmission.query.filter_by(
-                evento_id=self.evento_id,
-                processed=False
-            )
-            
-            if batch_id:
-                query = query.filter_by(import_batch_id=batch_id)
-            
-            imported_submissions = query.all()
-            
-            processed = 0
-            errors = []
-            
-            for imported in imported_submissions:
-                try:
-                    # Criar submissão real
-                    submission = self._create_submission_from_imported(imported)
-                    
-                    if submission:
-                        imported.mark_processed(submission.id)
-                        processed += 1
-                    
-                except Exception as e:
-                    imported.mark_processed(errors=[str(e)])
-                    errors.append(f"Submissão {imported.id}: {str(e)}")
-            
-            db.session.commit()
-            
-            return {
-                "success": True,
-                "processed_count": processed,
-                "created_submissions": processed,
-                "error_count": len(errors),
-                "errors": errors[:10],
-            }
-            
+            with GeradorHashes(workers, ACCESS_CODE_HASH_METHOD) as hashes:
+                while True:
+                    pending = self._next_pending_batch(batch_id, batch_size)
+                    if not pending:
+                        break
+                    created, batch_errors = self._materialize_batch(pending, hashes)
+                    db.session.commit()
+                    processed += created
+                    batches += 1
+                    errors.extend(batch_errors)
         except Exception as e:
+            db.session.rollback()
             return {
                 "success": False,
-                "error": str(e)
-            }
-    
-    def _create_submission_from_imported(self, imported: ImportedSubmission) -> Optional[Submission]:
-        """Cria objeto Submission a partir de ImportedSubmission."""
-        # Gerar código de acesso
-        access_code = str(uuid.uuid4())[:8].upper()
-        
-        # Criar submissão
-        submission = Submission(
-            title=imported.title,
-            abstract=imported.abstract,
-            evento_id=imported.evento_id,
-            status="submitted",
-            code_hash=generate_password_hash(access_code),
-            attributes={
-                "authors": imported.authors,
-                "author_email": imported.author_email,
-                "category": imported.category,
-                "modality": imported.modality,
-                "submission_type": imported.submission_type,
-                "keywords": imported.keywords,
-                "imported_from_batch": imported.import_batch_id
+                "error": str(e),
+                "processed_count": processed,
+                "remaining": self._pending_query(batch_id).count(),
             }
+
+        return {
+            "success": True,
+            "processed_count": processed,
+            "created_submissions": processed,
+            "batches": batches,
+            "error_count": len(errors),
+            "errors": errors[:10],
+        }
+
+    def _pending_query(self, batch_id: str = None):
+        query = ImportedSubmission.query.filter_by(evento_id=self.evento_id, processed=False)
+        if batch_id:
+            query = query.filter_by(import_batch_id=batch_id)
+        return query
+
+    def _next_pending_batch(self, batch_id: str, batch_size: int) -> List[Any]:
+        """Próximas linhas pendentes, só com as colunas usadas na submissão.
+
+        Em PostgreSQL as linhas ficam travadas até o commit e ``SKIP LOCKED``
+        deixa outra execução simultânea seguir com o lote seguinte.
+        """
+        stmt = (
+            select(
+                ImportedSubmission.id,
+                ImportedSubmission.title,
+                ImportedSubmission.abstract,
+                ImportedSubmission.authors,
+                ImportedSubmission.author_email,
+                ImportedSubmission.category,
+                ImportedSubmission.modality,
+                ImportedSubmission.submission_type,
+                ImportedSubmission.keywords,
+                ImportedSubmission.import_batch_id,
+            )
+            .where(
+                ImportedSubmission.evento_id == self.evento_id,
+                ImportedSubmission.processed.is_(False),
+            )
+            .order_by(ImportedSubmission.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
         )
-        
-        db.session.add(submission)
-        db.session.flush()  # Para obter o ID
-        
-        return submission
-    
+        if batch_id:
+            stmt = stmt.where(ImportedSubmission.import_batch_id == batch_id)
+        return db.session.execute(stmt).all()
+
+    def _materialize_batch(self, pending: List[Any], hashes: GeradorHashes) -> Tuple[int, List[str]]:
+        """Cria as submissões de um lote e marca as linhas importadas (sem commit)."""
+        title_limit = Submission.__table__.c.title.type.length
+        valid = []
+        errors = []
+        for row in pending:
+            if title_limit and len(row.title or "") > title_limit:
+                errors.append((row.id, f"Título excede {title_limit} caracteres"))
+            else:
+                valid.append(row)
+
+        codes = hashes.gerar(self._generate_access_code() for _ in valid)
+        submission_ids = self._insert_submissions([
+            {
+                "title": row.title,
+                "abstract": row.abstract,
+                "evento_id": self.evento_id,
+                "status": "submitted",
+                "code_hash": code_hash,
+                "attributes": {
+                    "authors": row.authors,
+                    "author_email": row.author_email,
+                    "category": row.category,
+                    "modality": row.modality,
+                    "submission_type": row.submission_type,
+                    "keywords": row.keywords,
+                    "imported_from_batch": row.import_batch_id,
+                },
+            }
+            for row, code_hash in zip(valid, codes)
+        ])
+
+        now = datetime.utcnow()
+        updates = [
+            {"id": row.id, "processed": True, "processed_at": now, "submission_id": submission_id}
+            for row, submission_id in zip(valid, submission_ids)
+        ] + [
+            {"id": row_id, "processed": True, "processed_at": now, "processing_errors": [message]}
+            for row_id, message in errors
+        ]
+        db.session.execute(update(ImportedSubmission), updates)
+        return len(submission_ids), [f"Submissão {row_id}: {message}" for row_id, message in errors]
+
+    @staticmethod
+    def _insert_submissions(rows: List[Dict[str, Any]]) -> List[int]:
+        """Insere as submissões e devolve os ids na ordem de ``rows``."""
+        if not rows:
+            return []
+        dialect = db.session.get_bind().dialect
+        if dialect.insert_executemany_returning:
+            # O RETURNING não garante a ordem das linhas; o locator (único) faz a ligação
+            for row in rows:
+                row["locator"] = str(uuid.uuid4())
+            stmt = insert(Submission).returning(Submission.locator, Submission.id)
+            ids = dict(db.session.execute(stmt, rows).all())
+            return [ids[row["locator"]] for row in rows]
+        # Sem RETURNING em lote (ex.: MySQL): o flush do ORM obtém os ids
+        submissions = [Submission(**row) for row in rows]
+        db.session.add_all(submissions)
+        db.session.flush()
+        return [submission.id for submission in submissions]
+
+    @staticmethod
+    def _generate_access_code() -> str:
+        return str(uuid.uuid4())[:8].upper()
+
     def get_import_stats(self, batch_id: str = None) -> Dict:
         """Retorna estatísticas de importação."""
         query = ImportedSubmission.query.filter_by(evento_id=self.evento_id)
@@ -4,13 +4,15 @@ Serviço para gerenciar o sistema de votação.
 
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
-from sqlalchemy import func, desc, asc
+from flask import current_app, has_app_context
+from sqlalchemy import case, func, desc, asc, literal, select, update
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
 from extensions import db
 from models import Usuario, Evento, Submission
+from services.comum import insert_dialeto
 from models.voting import (
     VotingEvent,
     VotingCategory,
@@ -25,6 +27,9 @@ from models.voting import (
 
 logger = logging.getLogger(__name__)
 
+CHAVE_RESULTADO = ('voting_event_id', 'category_id', 'work_id')
+LOTE_UPSERT = 500
+
 
 class VotingService:
     """Serviço para operações do sistema de votação."""
@@ -155,9 +160,15 @@ class VotingService:
     
     @staticmethod
     def save_vote(voting_event_id: int, category_id: int, work_id: int, 
-                  revisor_id: int, respostas: List[Dict], observacoes: str = '') -> VotingVote:
-        """Salva o voto de um revisor."""
+                  revisor_id: int, respostas: List[Dict], observacoes: str = '',
+                  incremental: Optional[bool] = None) -> VotingVote:
+        """Salva o voto de um revisor.
+
+        Com ``incremental`` (padrão ``VOTING_RESULTADOS_INCREMENTAIS``) o total
+        do trabalho em ``voting_result`` é atualizado na mesma transação.
+        """
         try:
+            pontuacao_anterior = None
             # Verificar se já existe voto
             existing_vote = VotingVote.query.filter_by(
                 voting_event_id=voting_event_id,
@@ -169,6 +180,7 @@ class VotingService:
             if existing_vote:
                 # Atualizar voto existente
                 vote = existing_vote
+                pontuacao_anterior = vote.pontuacao_final
                 # Remover respostas antigas
                 VotingResponse.query.filter_by(vote_id=vote.id).delete()
             else:
@@ -202,6 +214,13 @@ class VotingService:
             vote.pontuacao_final = pontuacao_total
             vote.observacoes = observacoes
             
+            if incremental is None:
+                incremental = VotingService.incremental_results_enabled()
+            if incremental:
+                VotingService.apply_vote_to_results(
+                    voting_event_id, category_id, work_id, pontuacao_anterior, pontuacao_total
+                )
+            
             db.session.commit()
             
             # Log de auditoria
@@ -225,69 +244,195 @@ class VotingService:
     
     @staticmethod
     def calculate_results(voting_event_id: int) -> List[VotingResult]:
-        """Calcula e atualiza resultados da votação."""
+        """Recalcula os resultados da votação a partir dos votos.
+
+        Uma agregação ``GROUP BY category_id, work_id`` alimenta um upsert em
+        ``voting_result`` e as posições vêm de ``RANK() OVER (PARTITION BY
+        category_id ...)``; nenhuma linha de voto é carregada em Python.
+        """
         try:
-            # Buscar todos os votos
-            votos = VotingVote.query.filter_by(voting_event_id=voting_event_id).all()
-            
-            # Agrupar por categoria e trabalho
-            votos_agrupados = {}
-            for voto in votos:
-                key = (voto.category_id, voto.work_id)
-                if key not in votos_agrupados:
-                    votos_agrupados[key] = []
-                votos_agrupados[key].append(voto)
-            
-            resultados = []
-            
-            # Calcular resultados
-            for (category_id, work_id), votos_grupo in votos_agrupados.items():
-                pontuacoes = [v.pontuacao_final for v in votos_grupo if v.pontuacao_final is not None]
-                
-                if pontuacoes:
-                    pontuacao_total = sum(pontuacoes)
-                    pontuacao_media = pontuacao_total / len(pontuacoes)
-                    numero_votos = len(pontuacoes)
-                    
-                    # Buscar ou criar resultado
-                    resultado = VotingResult.query.filter_by(
-                        voting_event_id=voting_event_id,
-                        category_id=category_id,
-                        work_id=work_id
-                    ).first()
-                    
-                    if not resultado:
-                        resultado = VotingResult(
-                            voting_event_id=voting_event_id,
-                            category_id=category_id,
-                            work_id=work_id
-                        )
-                        db.session.add(resultado)
-                    
-                    resultado.pontuacao_total = pontuacao_total
-                    resultado.pontuacao_media = pontuacao_media
-                    resultado.numero_votos = numero_votos
-                    resultados.append(resultado)
-            
-            # Calcular rankings
-            categorias = VotingCategory.query.filter_by(voting_event_id=voting_event_id, ativa=True).all()
-            for categoria in categorias:
-                resultados_categoria = VotingResult.query.filter_by(
-                    voting_event_id=voting_event_id,
-                    category_id=categoria.id
-                ).order_by(desc(VotingResult.pontuacao_total)).all()
-                
-                for posicao, resultado in enumerate(resultados_categoria, 1):
-                    resultado.posicao_ranking = posicao
-            
+            agregados = db.session.execute(
+                select(
+                    VotingVote.category_id,
+                    VotingVote.work_id,
+                    func.sum(VotingVote.pontuacao_final).label('total'),
+                    func.count(VotingVote.pontuacao_final).label('votos'),
+                )
+                .where(
+                    VotingVote.voting_event_id == voting_event_id,
+                    VotingVote.pontuacao_final.isnot(None),
+                )
+                .group_by(VotingVote.category_id, VotingVote.work_id)
+            ).all()
+            
+            agora = datetime.utcnow()
+            VotingService._upsert_results([
+                {
+                    'voting_event_id': voting_event_id,
+                    'category_id': linha.category_id,
+                    'work_id': linha.work_id,
+                    'pontuacao_total': linha.total,
+                    'pontuacao_media': linha.total / linha.votos,
+                    'numero_votos': linha.votos,
+                    'calculado_em': agora,
+                }
+                for linha in agregados
+            ])
+            VotingService._update_rankings(voting_event_id)
             db.session.commit()
-            return resultados
+            
+            return VotingResult.query.filter_by(voting_event_id=voting_event_id).order_by(
+                VotingResult.category_id, VotingResult.posicao_ranking
+            ).all()
             
         except SQLAlchemyError as e:
             db.session.rollback()
             logger.error(f"Erro ao calcular resultados: {e}")
             raise
     
+    @staticmethod
+    def incremental_results_enabled() -> bool:
+        """Indica se os totais de ``voting_result`` são mantidos a cada voto."""
+        if has_app_context():
+            return bool(current_app.config.get('VOTING_RESULTADOS_INCREMENTAIS'))
+        return False
+    
+    @staticmethod
+    def refresh_results(voting_event_id: int) -> None:
+        """Garante resultados atualizados antes de uma leitura.
+
+        No modo incremental os totais já estão em dia e só a primeira leitura
+        de uma votação ainda sem resultados faz a apuração completa.
+        """
+        if VotingService.incremental_results_enabled():
+            existe = db.session.execute(
+                select(VotingResult.id).where(VotingResult.voting_event_id == voting_event_id).limit(1)
+            ).first()
+            if existe:
+                return
+        VotingService.calculate_results(voting_event_id)
+    
+    @staticmethod
+    def apply_vote_to_results(voting_event_id: int, category_id: int, work_id: int,
+                              pontuacao_anterior: Optional[float], pontuacao_nova: Optional[float]) -> None:
+        """Aplica a diferença de um voto ao total do trabalho (sem commit).
+
+        A linha que ainda não existe é criada com a agregação dos votos já
+        gravados na transação (o voto corrente incluído); a que existe recebe
+        só a diferença, num único ``INSERT ... ON CONFLICT DO UPDATE``.
+        """
+        delta = (pontuacao_nova or 0) - (pontuacao_anterior or 0)
+        novos_votos = (pontuacao_nova is not None) - (pontuacao_anterior is not None)
+        if not delta and not novos_votos:
+            return
+        db.session.flush()
+        
+        agora = datetime.utcnow()
+        total = VotingResult.pontuacao_total + delta
+        votos = VotingResult.numero_votos + novos_votos
+        acumulado = {
+            'pontuacao_total': total,
+            'numero_votos': votos,
+            'pontuacao_media': case((votos > 0, total / votos), else_=0.0),
+            'calculado_em': agora,
+        }
+        chave = (
+            (VotingResult.voting_event_id == voting_event_id)
+            & (VotingResult.category_id == category_id)
+            & (VotingResult.work_id == work_id)
+        )
+        soma = func.sum(VotingVote.pontuacao_final)
+        contagem = func.count(VotingVote.pontuacao_final)
+        agregado = (
+            select(
+                literal(voting_event_id), literal(category_id), literal(work_id),
+                soma, soma / contagem, contagem, literal(agora),
+            )
+            .where(
+                VotingVote.voting_event_id == voting_event_id,
+                VotingVote.category_id == category_id,
+                VotingVote.work_id == work_id,
+                VotingVote.pontuacao_final.isnot(None),
+            )
+            .having(contagem > 0)
+        )
+        colunas = [*CHAVE_RESULTADO, 'pontuacao_total', 'pontuacao_media', 'numero_votos', 'calculado_em']
+        
+        dialeto_insert = insert_dialeto()
+        if dialeto_insert is None:
+            resultado = db.session.execute(
+                update(VotingResult).where(chave).values(**acumulado)
+                .execution_options(synchronize_session=False)
+            )
+            if not resultado.rowcount:
+                db.session.execute(VotingResult.__table__.insert().from_select(colunas, agregado))
+        else:
+            db.session.execute(
+                dialeto_insert(VotingResult.__table__)
+                .from_select(colunas, agregado)
+                .on_conflict_do_update(index_elements=list(CHAVE_RESULTADO), set_=acumulado)
+            )
+        VotingService._update_rankings(voting_event_id, category_id)
+    
+    @staticmethod
+    def _upsert_results(linhas: List[Dict]) -> None:
+        """Grava os totais apurados em ``voting_result`` (um upsert por lote)."""
+        if not linhas:
+            return
+        dialeto_insert = insert_dialeto()
+        if dialeto_insert is None:
+            existentes = {
+                (linha.category_id, linha.work_id): linha.id
+                for linha in db.session.execute(
+                    select(VotingResult.category_id, VotingResult.work_id, VotingResult.id)
+                    .where(VotingResult.voting_event_id == linhas[0]['voting_event_id'])
+                )
+            }
+            atualizar = [
+                {'id': existentes[(l['category_id'], l['work_id'])], **l}
+                for l in linhas if (l['category_id'], l['work_id']) in existentes
+            ]
+            inserir = [l for l in linhas if (l['category_id'], l['work_id']) not in existentes]
+            if atualizar:
+                db.session.execute(update(VotingResult), atualizar)
+            if inserir:
+                db.session.execute(VotingResult.__table__.insert(), inserir)
+            return
+        
+        for inicio in range(0, len(linhas), LOTE_UPSERT):
+            stmt = dialeto_insert(VotingResult.__table__).values(linhas[inicio:inicio + LOTE_UPSERT])
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=list(CHAVE_RESULTADO),
+                set_={
+                    coluna: stmt.excluded[coluna]
+                    for coluna in ('pontuacao_total', 'pontuacao_media', 'numero_votos', 'calculado_em')
+                },
+            ))
+    
+    @staticmethod
+    def _update_rankings(voting_event_id: int, category_id: Optional[int] = None) -> None:
+        """Atualiza ``posicao_ranking`` com ``RANK()`` por categoria ativa."""
+        ranking = (
+            select(
+                VotingResult.id,
+                func.rank().over(
+                    partition_by=VotingResult.category_id,
+                    order_by=desc(VotingResult.pontuacao_total),
+                ).label('posicao'),
+            )
+            .join(VotingCategory, VotingCategory.id == VotingResult.category_id)
+            .where(VotingResult.voting_event_id == voting_event_id, VotingCategory.ativa.is_(True))
+        )
+        if category_id is not None:
+            ranking = ranking.where(VotingResult.category_id == category_id)
+        ranking = ranking.subquery()
+        db.session.execute(
+            update(VotingResult)
+            .where(VotingResult.id == ranking.c.id)
+            .values(posicao_ranking=ranking.c.posicao)
+            .execution_options(synchronize_session=False)
+        )
+    
     @staticmethod
     def get_reviewer_assignments(revisor_id: int) -> Tuple[List[VotingAssignment], List[VotingAssignment]]:
         """Busca atribuições de um revisor separadas por status."""
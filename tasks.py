@@ -10,6 +10,29 @@ except ImportError:  # pragma: no cover - optional dependency
 from app import create_app
 
 
+class OutboxEmailTask:
+    """Envio de e-mail pela outbox, com a interface das tasks do Celery.
+
+    ``delay`` grava a mensagem em ``email_outbox`` na transação corrente (o
+    chamador faz o commit) e o worker agendado no ``app.py`` faz a entrega,
+    então nada se perde se o broker estiver fora do ar ou o processo
+    reiniciar. Chamar a task diretamente envia na hora.
+    """
+
+    def delay(self, *args, **kwargs):
+        from services.email_outbox_service import enfileirar_email
+
+        return enfileirar_email(*args, **kwargs)
+
+    def __call__(self, *args, **kwargs):
+        from utils import enviar_email
+
+        return enviar_email(*args, **kwargs)
+
+
+send_email_task = OutboxEmailTask()
+
+
 if Celery:
     def create_celery() -> Celery:
         """Factory for the Celery application.
@@ -55,12 +78,6 @@ if Celery:
 
     celery = create_celery()
 
-    @celery.task
-    def send_email_task(*args, **kwargs):
-        from utils import enviar_email
-
-        enviar_email(*args, **kwargs)
-
     @celery.task
     def gerar_comprovante_task(*args, **kwargs):
         from services.pdf_service import gerar_comprovante_pdf
@@ -69,12 +86,6 @@ if Celery:
 else:
     celery = None
 
-    def send_email_task(*args, **kwargs):
-        """Synchronous email sending fallback."""
-        from utils import enviar_email
-
-        enviar_email(*args, **kwargs)
-
     def gerar_comprovante_task(*args, **kwargs):
         from services.pdf_service import gerar_comprovante_pdf
 
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import logging
+
+from flask import Flask
+
+from services.bi_cache import BackendMemoria, BICache, _criar_backend
+
+
+def test_niveis_local_e_compartilhado():
+    backend = BackendMemoria()
+    processo_a = BICache(backend=backend)
+    processo_b = BICache(backend=backend)
+    chamadas = []
+
+    def calcular():
+        chamadas.append(1)
+        return {"total": 42}
+
+    assert processo_a.obter_ou_calcular("kpis", calcular, ["cliente:1"]) == {"total": 42}
+    assert processo_a.obter_ou_calcular("kpis", calcular, ["cliente:1"]) == {"total": 42}
+    assert processo_b.obter_ou_calcular("kpis", calcular, ["cliente:1"]) == {"total": 42}
+    assert len(chamadas) == 1
+
+    stats_a, stats_b = processo_a.estatisticas(), processo_b.estatisticas()
+    assert (stats_a["calculos"], stats_a["hits_local"]) == (1, 1)
+    assert stats_b["hits_compartilhado"] == 1
+    assert stats_a["backend"] == "memoria"
+
+
+def test_singleflight_calcula_uma_vez():
+    cache = BICache(backend=BackendMemoria())
+    chamadas = []
+    inicio = threading.Barrier(8)
+
+    def calcular():
+        chamadas.append(1)
+        time.sleep(0.2)
+        return [1, 2, 3]
+
+    resultados = []
+
+    def consultar():
+        inicio.wait()
+        resultados.append(cache.obter_ou_calcular("lenta", calcular, ["cliente:1"]))
+
+    threads = [threading.Thread(target=consultar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(chamadas) == 1
+    assert resultados == [[1, 2, 3]] * 8
+    assert cache.estatisticas()["esperas"] == 7
+
+
+def test_invalidacao_por_cliente():
+    backend = BackendMemoria()
+    cache, outro_processo = BICache(backend=backend), BICache(backend=backend)
+    valores = {"cliente:1": 1, "cliente:2": 2}
+
+    def consultar(instancia, etiqueta):
+        return instancia.obter_ou_calcular("kpis", lambda: valores[etiqueta], [etiqueta])
+
+    assert consultar(cache, "cliente:1") == 1
+    assert consultar(cache, "cliente:2") == 2
+    valores["cliente:1"] = 10
+    valores["cliente:2"] = 20
+
+    cache.invalidar_cliente(1)
+    assert consultar(cache, "cliente:1") == 10
+    assert consultar(cache, "cliente:2") == 2
+    # Outro processo enxerga a nova versão quando a sua cópia expira
+    outro_processo._versoes.clear()
+    assert consultar(outro_processo, "cliente:1") == 10
+
+    cache.limpar()
+    assert consultar(cache, "cliente:2") == 20
+    assert cache.estatisticas()["invalidacoes"] == 2
+
+
+def test_sem_redis_usa_memoria():
+    assert _criar_backend(None).nome == "memoria"
+    assert _criar_backend("redis://127.0.0.1:1/0").nome == "memoria"
+
+
+def test_memoria_com_varios_workers_avisa_e_encurta_o_ttl(monkeypatch, caplog):
+    app = Flask(__name__)
+    app.config.update(BI_CACHE_REDIS_URL=None, BI_CACHE_TTL=3600, BI_CACHE_TTL_MEMORIA=30)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    with app.app_context(), caplog.at_level(logging.WARNING, logger="services.bi_cache"):
+        cache = BICache()
+        assert cache.preparar() == "memoria"
+        assert cache.ttl == 30
+        assert BICache(ttl=3600).ttl == 3600
+    assert "vários workers" in caplog.text
@@ -0,0 +1,178 @@
+from datetime import date, datetime
+
+import pytest
+from flask import Flask
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import Checkin, Cliente, Evento, Feedback, Inscricao, InscricaoTipo, Oficina, Usuario
+from models.relatorio_bi import FatoDiarioBI, MarcaAtualizacaoBI
+from services import bi_fatos_service
+from services.bi_analytics_service import BIAnalyticsService
+from services.bi_cache import bi_cache
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        bi_cache.limpar()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _dados():
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    db.session.add(cliente)
+    db.session.flush()
+    evento = Evento(cliente_id=cliente.id, nome="Feira")
+    db.session.add(evento)
+    db.session.flush()
+    oficina = Oficina(
+        titulo="A", descricao="d", ministrante_id=None, vagas=10, carga_horaria="4",
+        estado="SP", cidade="SP", cliente_id=cliente.id, evento_id=evento.id,
+    )
+    usuarios = [
+        Usuario(nome=f"U{i}", cpf=str(i), email=f"u{i}@test", senha="x", formacao="x")
+        for i in range(4)
+    ]
+    db.session.add_all([oficina, *usuarios])
+    db.session.flush()
+    tipo = InscricaoTipo(oficina_id=oficina.id, nome="Geral", preco=40)
+    db.session.add(tipo)
+    db.session.flush()
+    return cliente, evento, oficina, usuarios, tipo
+
+
+def _inscrever(usuario, oficina, quando, status="pending", tipo=None):
+    inscricao = Inscricao(
+        usuario.id, oficina.cliente_id, oficina.id, status_pagamento=status,
+        tipo_inscricao_id=tipo.id if tipo else None,
+    )
+    inscricao.created_at = quando
+    db.session.add(inscricao)
+    return inscricao
+
+
+def test_atualizacao_incremental_por_watermark(app):
+    cliente, evento, oficina, usuarios, tipo = _dados()
+    _inscrever(usuarios[0], oficina, datetime(2025, 4, 10, 9), "approved", tipo)
+    pendente = _inscrever(usuarios[1], oficina, datetime(2025, 4, 10, 15), tipo=tipo)
+    _inscrever(usuarios[2], oficina, datetime(2025, 4, 12, 9))
+    db.session.add_all([
+        Checkin(usuario_id=usuarios[0].id, oficina_id=oficina.id, palavra_chave="x",
+                data_hora=datetime(2025, 4, 10, 10)),
+        Feedback(oficina_id=oficina.id, rating=5, created_at=datetime(2025, 4, 10, 11)),
+        Feedback(oficina_id=oficina.id, rating=2, created_at=datetime(2025, 4, 10, 12)),
+    ])
+    db.session.commit()
+
+    resumo = bi_fatos_service.atualizar_fatos(janela_dias=0)
+
+    assert resumo["fatos"] == 2
+    fato = FatoDiarioBI.query.filter_by(dia=date(2025, 4, 10)).one()
+    assert (fato.cliente_id, fato.evento_id) == (cliente.id, evento.id)
+    assert (fato.inscricoes, fato.pagamentos_aprovados, fato.receita) == (2, 1, 40.0)
+    assert (fato.checkins, fato.feedbacks, fato.soma_notas) == (1, 2, 7)
+    assert db.session.get(MarcaAtualizacaoBI, "inscricao").ultimo_id == 3
+
+    # Sem linhas novas nada é regravado
+    assert bi_fatos_service.atualizar_fatos(janela_dias=0)["fatos"] == 0
+
+    # Linha nova só toca o seu dia; a aprovação tardia entra pela janela
+    pendente.status_pagamento = "approved"
+    _inscrever(usuarios[3], oficina, datetime(2025, 4, 20, 9))
+    db.session.commit()
+    resumo = bi_fatos_service.atualizar_fatos(janela_dias=0)
+    assert resumo["fatos"] == 1
+    assert FatoDiarioBI.query.filter_by(dia=date(2025, 4, 10)).one().pagamentos_aprovados == 1
+
+    bi_fatos_service.atualizar_fatos(janela_dias=15, hoje=date(2025, 4, 21))
+    fato = FatoDiarioBI.query.filter_by(dia=date(2025, 4, 10)).one()
+    assert (fato.pagamentos_aprovados, fato.receita) == (2, 80.0)
+    assert FatoDiarioBI.query.count() == 3
+
+
+def test_regravacao_faz_upsert_e_indice_impede_fato_duplicado(app):
+    cliente, evento, oficina, usuarios, _ = _dados()
+    _inscrever(usuarios[0], oficina, datetime(2025, 4, 18, 9))
+    db.session.commit()
+    hoje = date(2025, 4, 21)
+    bi_fatos_service.atualizar_fatos(janela_dias=7, hoje=hoje)
+    fato_id = FatoDiarioBI.query.one().id
+
+    # Uma segunda passada sobre a mesma janela atualiza a linha em vez de recriá-la
+    _inscrever(usuarios[1], oficina, datetime(2025, 4, 18, 15))
+    db.session.commit()
+    bi_fatos_service.atualizar_fatos(janela_dias=7, hoje=hoje)
+    fato = FatoDiarioBI.query.one()
+    assert (fato.id, fato.inscricoes) == (fato_id, 2)
+
+    # Fatos sem evento também são únicos por cliente e dia
+    for _ in range(2):
+        db.session.add(FatoDiarioBI(cliente_id=cliente.id, evento_id=None, dia=date(2025, 4, 1)))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+    assert bi_fatos_service.reconstruir_fatos()["fatos"] == 1
+    assert FatoDiarioBI.query.count() == 1
+
+
+def test_janela_pega_linhas_abaixo_do_watermark_e_exclusoes(app):
+    _cliente, _, oficina, usuarios, _ = _dados()
+    _inscrever(usuarios[0], oficina, datetime(2025, 4, 18, 9))
+    removido = Feedback(oficina_id=oficina.id, rating=4, created_at=datetime(2025, 4, 19, 11))
+    db.session.add_all([
+        Checkin(id=1, usuario_id=usuarios[0].id, oficina_id=oficina.id, palavra_chave="x",
+                data_hora=datetime(2025, 4, 18, 10)),
+        Checkin(id=5, usuario_id=usuarios[1].id, oficina_id=oficina.id, palavra_chave="x",
+                data_hora=datetime(2025, 4, 18, 11)),
+        removido,
+    ])
+    db.session.commit()
+    hoje = date(2025, 4, 21)
+    bi_fatos_service.atualizar_fatos(janela_dias=7, hoje=hoje)
+    assert db.session.get(MarcaAtualizacaoBI, "checkin").ultimo_id == 5
+
+    # Check-in de uma transação que comitou depois, com id abaixo do watermark
+    db.session.add(Checkin(id=3, usuario_id=usuarios[2].id, oficina_id=oficina.id,
+                           palavra_chave="x", data_hora=datetime(2025, 4, 20, 10)))
+    db.session.delete(removido)
+    db.session.commit()
+    bi_fatos_service.atualizar_fatos(janela_dias=7, hoje=hoje)
+
+    assert FatoDiarioBI.query.filter_by(dia=date(2025, 4, 20)).one().checkins == 1
+    assert FatoDiarioBI.query.filter_by(dia=date(2025, 4, 18)).one().checkins == 2
+    # O único feedback do dia foi excluído: o fato do dia some
+    assert FatoDiarioBI.query.filter_by(dia=date(2025, 4, 19)).count() == 0
+
+
+def test_tendencias_crescimento_e_retencao_leem_os_fatos(app):
+    cliente, _, oficina, usuarios, _ = _dados()
+    for usuario in usuarios[:3]:
+        _inscrever(usuario, oficina, datetime(2025, 3, 15, 9))
+    for dia in (2, 3, 4, 5):
+        _inscrever(usuarios[dia - 2], oficina, datetime(2025, 4, dia, 9))
+    _inscrever(usuarios[0], oficina, datetime(2025, 4, 5, 10))
+    db.session.commit()
+    bi_fatos_service.atualizar_fatos(janela_dias=0)
+    servico = BIAnalyticsService()
+
+    dados = servico._obter_dados_diarios(cliente.id, datetime(2025, 4, 1), datetime(2025, 4, 5))
+    assert [d["inscricoes"] for d in dados] == [0, 1, 1, 1, 2]
+    assert servico._analisar_tendencia(dados, "inscricoes")["direcao"] == "alta"
+
+    base = {"cliente_id": cliente.id, "data_fim": "2025-04-14"}
+    # 5 inscrições de 16/03 a 14/04 contra 3 nos 30 dias anteriores
+    assert servico._calcular_crescimento_mensal(base) == pytest.approx(200 / 3)
+    # U0, U1 e U2 se inscreveram em março e os três voltaram em abril
+    assert servico._calcular_retencao_participantes(base) == 100.0
+    assert servico._calcular_retencao_participantes(
+        {"cliente_id": cliente.id, "data_fim": "2025-05-02"}
+    ) == 0.0
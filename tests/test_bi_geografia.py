@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import Checkin, Cliente, Evento, Feedback, Inscricao, InscricaoTipo, Oficina, Usuario
+from services.bi_analytics_service import BIAnalyticsService
+from services.bi_cache import bi_cache
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        bi_cache.limpar()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _dados():
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    outro = Cliente(nome="Outro", email="outro@test", senha="x")
+    db.session.add_all([cliente, outro])
+    db.session.flush()
+    evento_a = Evento(cliente_id=cliente.id, nome="A")
+    evento_b = Evento(cliente_id=cliente.id, nome="B")
+    db.session.add_all([evento_a, evento_b])
+    db.session.flush()
+
+    def oficina(cidade, estado, evento, dono=cliente):
+        return Oficina(
+            titulo=cidade, descricao="d", ministrante_id=None, vagas=10, carga_horaria="4",
+            estado=estado, cidade=cidade, cliente_id=dono.id, evento_id=evento.id if evento else None,
+        )
+
+    campinas = oficina("Campinas", "SP", evento_a)
+    capital = oficina("São Paulo", "SP", evento_b)
+    rio = oficina("Rio", "RJ", evento_a)
+    alheia = oficina("Campinas", "SP", None, outro)
+    usuario = Usuario(nome="U", cpf="1", email="u@test", senha="x", formacao="x")
+    db.session.add_all([campinas, capital, rio, alheia, usuario])
+    db.session.flush()
+    tipo = InscricaoTipo(oficina_id=campinas.id, nome="Geral", preco=50)
+    db.session.add(tipo)
+    db.session.flush()
+
+    def inscricao(of, status="pending", quando=datetime(2025, 3, 10), tipo_id=None):
+        nova = Inscricao(usuario.id, of.cliente_id, of.id, status_pagamento=status, tipo_inscricao_id=tipo_id)
+        nova.created_at = quando
+        return nova
+
+    db.session.add_all([
+        inscricao(campinas, "approved", tipo_id=tipo.id),
+        inscricao(campinas, "approved", tipo_id=tipo.id),
+        inscricao(campinas, quando=datetime(2024, 1, 1)),
+        inscricao(capital),
+        inscricao(rio),
+        inscricao(rio),
+        inscricao(alheia),
+        *[Checkin(usuario_id=usuario.id, oficina_id=of.id, palavra_chave="x", data_hora=datetime(2025, 3, 10))
+          for of in (campinas, campinas, rio, alheia)],
+        *[Feedback(oficina_id=of.id, rating=nota, created_at=datetime(2025, 3, 10))
+          for of, nota in ((campinas, 5), (campinas, 3), (rio, 4), (alheia, 1))],
+    ])
+    db.session.commit()
+    return cliente, evento_a
+
+
+def test_totais_sem_multiplicacao_por_joins(app):
+    cliente, _ = _dados()
+
+    dados = BIAnalyticsService().gerar_analise_geografica(cliente.id)
+
+    cidades = {c["cidade"]: c for c in dados["cidades"]}
+    assert cidades["Campinas"]["inscricoes"] == 3
+    assert cidades["Campinas"]["presencas"] == 2
+    assert cidades["Campinas"]["receita"] == 100.0
+    assert cidades["Campinas"]["satisfacao_media"] == 4.0
+    estados = {e["estado"]: e for e in dados["estados"]}
+    assert estados["SP"]["inscricoes"] == 4
+    assert estados["SP"]["presencas"] == 2
+    assert estados["RJ"]["taxa_presenca"] == 50.0
+    assert dados["rankings"]["estados"][0]["estado"] == "SP"
+    assert dados["metricas_gerais"] == {"total_estados": 2, "total_cidades": 3}
+
+
+def test_drill_down_e_cache_por_cliente(app):
+    cliente, evento_a = _dados()
+    servico = BIAnalyticsService()
+    antes = bi_cache.estatisticas()
+
+    por_evento = servico.gerar_analise_geografica(cliente.id, {"evento_id": str(evento_a.id)})
+    assert sorted(c["cidade"] for c in por_evento["cidades"]) == ["Campinas", "Rio"]
+
+    so_rj = servico.gerar_analise_geografica(cliente.id, {"estado": "rj"})
+    assert [c["cidade"] for c in so_rj["cidades"]] == ["Rio"]
+
+    periodo = servico.gerar_analise_geografica(
+        cliente.id, {"data_inicio": "2025-03-01", "data_fim": "2025-03-10"}
+    )
+    cidades = {c["cidade"]: c for c in periodo["cidades"]}
+    assert cidades["Campinas"]["inscricoes"] == 2
+    assert periodo["filtros"] == {"data_inicio": "2025-03-01", "data_fim": "2025-03-10"}
+
+    assert bi_cache.estatisticas()["calculos"] - antes["calculos"] == 3
+    assert servico.gerar_analise_geografica(cliente.id, {"estado": "RJ"}) == so_rj
+    depois = bi_cache.estatisticas()
+    assert depois["calculos"] - antes["calculos"] == 3
+    assert depois["hits_local"] - antes["hits_local"] == 1
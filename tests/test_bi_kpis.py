@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import Checkin, Cliente, Feedback, Inscricao, InscricaoTipo, Oficina, Usuario
+from services.bi_analytics_service import BIAnalyticsService
+from services.bi_cache import bi_cache
+from services.bi_kpi_benchmark import benchmark_kpis
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        bi_cache.limpar()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _oficina(cliente_id, titulo):
+    return Oficina(
+        titulo=titulo, descricao="d", ministrante_id=None, vagas=10,
+        carga_horaria="4", estado="SP", cidade="SP", cliente_id=cliente_id,
+    )
+
+
+def test_kpis_em_duas_consultas(app):
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    outro = Cliente(nome="Outro", email="outro@test", senha="x")
+    db.session.add_all([cliente, outro])
+    db.session.flush()
+    oficina, oficina_outro = _oficina(cliente.id, "A"), _oficina(outro.id, "B")
+    usuarios = [
+        Usuario(nome=f"U{i}", cpf=str(i), email=f"u{i}@test", senha="x", formacao="x")
+        for i in range(3)
+    ]
+    db.session.add_all([oficina, oficina_outro, *usuarios])
+    db.session.flush()
+    tipo = InscricaoTipo(oficina_id=oficina.id, nome="Geral", preco=100)
+    db.session.add(tipo)
+    db.session.flush()
+    db.session.add_all([
+        Inscricao(usuarios[0].id, cliente.id, oficina.id, status_pagamento="approved", tipo_inscricao_id=tipo.id),
+        Inscricao(usuarios[0].id, cliente.id, oficina.id, status_pagamento="pending", tipo_inscricao_id=tipo.id),
+        Inscricao(usuarios[1].id, cliente.id, oficina.id, status_pagamento="approved", tipo_inscricao_id=tipo.id),
+        Inscricao(usuarios[2].id, cliente.id, oficina.id, status_pagamento="pending"),
+        Inscricao(usuarios[2].id, outro.id, oficina_outro.id, status_pagamento="approved"),
+        Checkin(usuario_id=usuarios[0].id, oficina_id=oficina.id, palavra_chave="x"),
+        Checkin(usuario_id=usuarios[1].id, cliente_id=cliente.id, palavra_chave="x"),
+        Checkin(usuario_id=usuarios[2].id, oficina_id=oficina_outro.id, palavra_chave="x"),
+        *[Feedback(oficina_id=oficina.id, rating=nota) for nota in (5, 4, 3, 1)],
+        Feedback(oficina_id=oficina_outro.id, rating=1),
+    ])
+    db.session.commit()
+    consultas = []
+    db.event.listen(db.engine, "before_cursor_execute", lambda *a: consultas.append(1))
+
+    kpis = BIAnalyticsService()._calcular_kpis_agregados({"cliente_id": cliente.id})
+
+    assert len(consultas) == 2
+    assert kpis == {
+        "inscricoes_totais": 4,
+        "usuarios_unicos": 3,
+        "taxa_conversao": 50.0,
+        "receita_total": 200.0,
+        "ticket_medio": 100.0,
+        "taxa_presenca": 50.0,
+        "satisfacao_media": 3.25,
+        "nps": 25,
+    }
+
+    futuro = {"cliente_id": cliente.id, "data_inicio": datetime(2100, 1, 1)}
+    kpis = BIAnalyticsService()._calcular_kpis_agregados(futuro)
+    assert kpis["inscricoes_totais"] == 0
+    assert kpis["satisfacao_media"] == 0
+    assert kpis["nps"] == 25
+    assert BIAnalyticsService()._calcular_nps_detalhado(cliente.id) == {
+        "nps": 25, "promotores": 2, "neutros": 1, "detratores": 1,
+    }
+
+
+def test_benchmark_confere_com_consultas_separadas():
+    resultado = benchmark_kpis(total=3000, usuarios=500, clientes=2, oficinas_por_cliente=5)
+
+    assert resultado["kpis_iguais"]
+    assert resultado["agregado"]["consultas"] == 2
+    assert resultado["consultas_separadas"]["consultas"] >= 10
+    assert resultado["kpis"]["inscricoes_totais"] > 0
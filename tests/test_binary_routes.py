@@ -8,11 +8,13 @@ Config.SQLALCHEMY_ENGINE_OPTIONS = Config.build_engine_options(
 
 from app import create_app
 from extensions import db
+from models import ArquivoBinario, BlocoBinario, ConteudoBinario
 
 @pytest.fixture
-def app():
+def app(tmp_path):
     app = create_app()
     app.config['TESTING'] = True
+    app.config['UPLOADS_ROOT'] = str(tmp_path / 'uploads')
     app.config['WTF_CSRF_ENABLED'] = False
     app.config['LOGIN_DISABLED'] = True
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
@@ -33,3 +35,74 @@ def test_upload_and_download_binary(client):
     resp = client.get(f'/api/binarios/{arquivo_id}')
     assert resp.status_code == 200
     assert resp.data == b'\x01\x02\x03'
+
+
+def _enviar(client, conteudo, nome='dados.bin'):
+    data = {'file': (io.BytesIO(conteudo), nome)}
+    resp = client.post('/api/binarios', data=data, content_type='multipart/form-data')
+    assert resp.status_code == 201
+    return resp.get_json()['id']
+
+
+def test_upload_repetido_reaproveita_o_conteudo(app, client):
+    conteudo = bytes(range(256)) * 4000
+    primeiro = _enviar(client, conteudo, 'a.pdf')
+    segundo = _enviar(client, conteudo, 'b.pdf')
+
+    with app.app_context():
+        assert ConteudoBinario.query.count() == 1
+        a, b = db.session.get(ArquivoBinario, primeiro), db.session.get(ArquivoBinario, segundo)
+        assert a.conteudo is None and a.conteudo_id == b.conteudo_id
+        assert a.conteudo_binario.tamanho == len(conteudo)
+
+    resp = client.get(f'/api/binarios/{segundo}')
+    assert resp.data == conteudo
+    etag = resp.headers['ETag']
+
+    resp = client.get(f'/api/binarios/{segundo}', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+
+    resp = client.get(f'/api/binarios/{segundo}', headers={'Range': 'bytes=1000-1999'})
+    assert resp.status_code == 206
+    assert resp.data == conteudo[1000:2000]
+
+
+def test_armazenamento_em_blocos_serve_intervalos(app, client):
+    app.config['BINARIOS_ARMAZENAMENTO'] = 'blocos'
+    app.config['BINARIOS_BLOCO_BYTES'] = 1024
+    conteudo = bytes(i % 251 for i in range(10_000))
+    arquivo_id = _enviar(client, conteudo)
+
+    with app.app_context():
+        assert BlocoBinario.query.count() == 10
+
+    resp = client.get(f'/api/binarios/{arquivo_id}')
+    assert resp.status_code == 200
+    assert resp.headers['Content-Length'] == str(len(conteudo))
+    assert resp.data == conteudo
+
+    resp = client.get(f'/api/binarios/{arquivo_id}', headers={'Range': 'bytes=1500-4100'})
+    assert resp.status_code == 206
+    assert resp.headers['Content-Range'] == f'bytes 1500-4100/{len(conteudo)}'
+    assert resp.data == conteudo[1500:4101]
+
+
+def test_limite_vale_durante_a_leitura(app, client, monkeypatch):
+    import routes.binary_routes as binary_routes
+
+    monkeypatch.setattr(binary_routes, 'MAX_FILE_SIZE', 1024)
+    data = {'file': (io.BytesIO(b'x' * 2048), 'grande.bin')}
+    resp = client.post('/api/binarios', data=data, content_type='multipart/form-data')
+    assert resp.status_code == 400
+    with app.app_context():
+        assert ArquivoBinario.query.count() == 0
+
+
+def test_bloco_nao_positivo_e_rejeitado(app):
+    from services.armazenamento_binario_service import salvar_upload
+
+    app.config['BINARIOS_BLOCO_BYTES'] = 0
+    with app.app_context():
+        with pytest.raises(ValueError, match='BINARIOS_BLOCO_BYTES'):
+            salvar_upload(io.BytesIO(b'abc'), 'dados.bin', 'application/octet-stream')
+        assert ArquivoBinario.query.count() == 0
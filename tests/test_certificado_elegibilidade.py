@@ -0,0 +1,167 @@
+import os
+from datetime import date, time
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+os.environ.setdefault('GOOGLE_CLIENT_ID', 'dummy_id')
+os.environ.setdefault('GOOGLE_CLIENT_SECRET', 'dummy_secret')
+
+from extensions import db
+from models import CertificadoTemplate, Checkin, Cliente, Evento, Oficina, Usuario
+from models.atividade_multipla_data import AtividadeData, AtividadeMultiplaData, FrequenciaAtividade
+from models.certificado import CertificadoConfig, CertificadoParticipante
+from models.review import ConfiguracaoCertificadoEvento
+from services import certificado_service
+from services.certificado_lote_service import CertificadoLoteRenderer
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _carga_por_usuario(usuario_id, evento_id):
+    """Cálculo anterior, uma consulta por atividade e por participante."""
+    oficinas = db.session.query(Oficina).join(Checkin, Oficina.id == Checkin.oficina_id).filter(
+        Checkin.usuario_id == usuario_id, Oficina.evento_id == evento_id
+    ).all()
+    total = sum(certificado_service._parse_carga_horaria(o.carga_horaria) for o in oficinas)
+    for atividade in AtividadeMultiplaData.query.filter_by(evento_id=evento_id).all():
+        total += sum(
+            f.get_carga_horaria_presenca()
+            for f in FrequenciaAtividade.query.filter_by(atividade_id=atividade.id, usuario_id=usuario_id)
+        )
+    return total
+
+
+def _evento(participantes=12):
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    db.session.add(cliente)
+    db.session.flush()
+    evento = Evento(cliente_id=cliente.id, nome="Congresso")
+    db.session.add(evento)
+    db.session.flush()
+    oficinas = [
+        Oficina(
+            titulo=f"Oficina {i}", descricao="d", ministrante_id=None, vagas=50,
+            carga_horaria=carga, estado="SP", cidade="SP", cliente_id=cliente.id, evento_id=evento.id,
+        )
+        for i, carga in enumerate(["4", "2h", "3 horas", "x"])
+    ]
+    atividade = AtividadeMultiplaData(
+        titulo="Curso", carga_horaria_total="12", cliente_id=cliente.id, evento_id=evento.id,
+        estado="SP", cidade="SP",
+    )
+    db.session.add_all(oficinas + [atividade])
+    db.session.flush()
+    datas = [
+        AtividadeData(atividade_id=atividade.id, data=date(2025, 5, d), horario_inicio=time(8),
+                      horario_fim=time(17), carga_horaria_data=carga)
+        for d, carga in ((1, None), (2, "6"), (3, None))
+    ]
+    db.session.add_all(datas)
+    db.session.add(ConfiguracaoCertificadoEvento(
+        cliente_id=cliente.id, evento_id=evento.id, checkins_minimos=2,
+        percentual_minimo=50, oficinas_obrigatorias=str(oficinas[0].id),
+    ))
+    usuarios = [
+        Usuario(nome=f"U{i}", cpf=str(i), email=f"u{i}@test", senha="x", formacao="-", tipo="participante")
+        for i in range(participantes)
+    ]
+    db.session.add_all(usuarios)
+    db.session.flush()
+
+    for i, usuario in enumerate(usuarios):
+        for oficina in oficinas[: i % 5]:
+            db.session.add(Checkin(usuario_id=usuario.id, oficina_id=oficina.id, evento_id=evento.id,
+                                   palavra_chave="k"))
+        if i % 3:
+            db.session.add(Checkin(usuario_id=usuario.id, oficina_id=oficinas[i % 4].id,
+                                   evento_id=evento.id, palavra_chave="k"))
+        for j, data in enumerate(datas[: i % 4]):
+            db.session.add(FrequenciaAtividade(
+                atividade_id=atividade.id, data_atividade_id=data.id, usuario_id=usuario.id,
+                presente_manha=bool((i + j) % 2), presente_tarde=bool(j % 2), presente_dia_inteiro=i % 7 == 0,
+            ))
+    db.session.add(CertificadoParticipante(
+        usuario_id=usuarios[4].id, evento_id=evento.id, tipo='geral', titulo="t", carga_horaria=1,
+    ))
+    db.session.commit()
+    return evento
+
+
+def test_avaliacao_em_lote_confere_com_a_verificacao_individual(app):
+    evento = _evento()
+
+    avaliacao = certificado_service.avaliar_participantes_evento(evento.id)
+    participantes = {c.usuario_id for c in Checkin.query.filter_by(evento_id=evento.id)}
+    assert set(avaliacao) == participantes
+    for usuario_id, dados in avaliacao.items():
+        ok, pendencias = certificado_service.verificar_criterios_certificado(usuario_id, evento.id)
+        assert (dados["criterios_ok"], dados["pendencias"]) == (ok, pendencias)
+        assert dados["carga_horaria"] == pytest.approx(_carga_por_usuario(usuario_id, evento.id))
+        assert dados["carga_horaria"] == pytest.approx(
+            certificado_service._calcular_carga_horaria_participante(usuario_id, evento.id)
+        )
+
+    elegiveis = certificado_service._buscar_participantes_elegiveis(evento.id, None)
+    assert elegiveis == {
+        usuario_id: dados["carga_horaria"]
+        for usuario_id, dados in avaliacao.items()
+        if dados["criterios_ok"] and not dados["tem_certificado"]
+    }
+    assert elegiveis and any(d["tem_certificado"] and d["criterios_ok"] for d in avaliacao.values())
+
+
+def test_numero_de_consultas_nao_cresce_com_participantes(app):
+    evento = _evento(participantes=60)
+    consultas = []
+
+    def contar(*_args):
+        consultas.append(1)
+
+    event.listen(db.engine, "before_cursor_execute", contar)
+    try:
+        certificado_service._buscar_participantes_elegiveis(evento.id, None)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", contar)
+    assert len(consultas) <= 10
+
+
+def test_emissao_em_lote_e_individual_usam_o_mesmo_layout(app, tmp_path, monkeypatch):
+    evento = _evento(participantes=6)
+    db.session.add(CertificadoTemplate(
+        cliente_id=evento.cliente_id, titulo="t", conteudo="{NOME_PARTICIPANTE}: {CARGA_HORARIA}h", ativo=True,
+    ))
+    config = CertificadoConfig(evento_id=evento.id, cliente_id=evento.cliente_id, notificar_participantes=False)
+    db.session.add(config)
+    db.session.commit()
+    app.static_folder = str(tmp_path)
+    paginas = []
+    original = CertificadoLoteRenderer.adicionar_pagina
+
+    def registrar(self, cliente, texto):
+        paginas.append((self.estilo_paragrafo.alignment, texto))
+        return original(self, cliente, texto)
+
+    monkeypatch.setattr(CertificadoLoteRenderer, "adicionar_pagina", registrar)
+    cargas = certificado_service._buscar_participantes_elegiveis(evento.id, config)
+    usuario_id, carga = next(iter(cargas.items()))
+
+    certificado_service._gerar_certificado_participante(usuario_id, evento.id, config, carga)
+    individual = paginas.pop()
+    db.session.query(CertificadoParticipante).filter_by(usuario_id=usuario_id).delete()
+    certificado_service._gerar_certificados_em_lote(evento, {usuario_id: carga}, config, workers=1)
+
+    assert paginas == [individual]
+    assert CertificadoParticipante.query.filter_by(usuario_id=usuario_id).count() == 1
@@ -0,0 +1,100 @@
+import os
+import re
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from PIL import Image
+
+os.environ.setdefault('GOOGLE_CLIENT_ID', 'dummy_id')
+os.environ.setdefault('GOOGLE_CLIENT_SECRET', 'dummy_secret')
+
+from services.certificado_lote_service import (
+    TemplateCompilado,
+    benchmark_certificados,
+    renderizar_certificados,
+    renderizar_certificados_paralelo,
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__, root_path=str(tmp_path))
+    with app.app_context():
+        yield app
+
+
+def _imagem(tmp_path, nome, cor):
+    caminho = tmp_path / nome
+    Image.new('RGB', (64, 32), cor).save(caminho)
+    return nome
+
+
+def test_template_compilado_substitui_apenas_placeholders_conhecidos():
+    template = TemplateCompilado("Olá {NOME_PARTICIPANTE}, {CARGA_HORARIA}h {OUTRO}")
+    assert template.placeholders == {"NOME_PARTICIPANTE", "CARGA_HORARIA", "OUTRO"}
+    texto = template.renderizar({"NOME_PARTICIPANTE": "Ana", "CARGA_HORARIA": 4})
+    assert texto == "Olá Ana, 4h {OUTRO}"
+
+
+def test_imagens_compartilhadas_entre_paginas(app, tmp_path):
+    cliente = SimpleNamespace(
+        id=1,
+        fundo_certificado=_imagem(tmp_path, 'fundo.png', 'white'),
+        logo_certificado=_imagem(tmp_path, 'logo.png', 'blue'),
+        assinatura_certificado=_imagem(tmp_path, 'assinatura.png', 'black'),
+    )
+    pdf_path = tmp_path / 'certificados.pdf'
+    contextos = [{"NOME_PARTICIPANTE": f"Pessoa {i}"} for i in range(25)]
+
+    paginas = renderizar_certificados(cliente, "Certificamos {NOME_PARTICIPANTE}", contextos, str(pdf_path))
+
+    conteudo = pdf_path.read_bytes()
+    assert paginas == 25
+    assert len(re.findall(rb'/Type /Page\b(?!s)', conteudo)) == 25
+    assert conteudo.count(b'/Subtype /Image') == 3
+
+
+def test_benchmark_reporta_metricas(app):
+    resultado = benchmark_certificados(total=10)
+    assert resultado["paginas"] == 10
+    assert resultado["tamanho_bytes"] > 0
+    assert resultado["paginas_por_segundo"] > 0
+
+
+def test_paralelo_mescla_shards_em_um_pdf(app, tmp_path):
+    from pypdf import PdfReader
+
+    cliente = SimpleNamespace(
+        id=2,
+        fundo_certificado=_imagem(tmp_path, 'fundo.png', 'white'),
+        logo_certificado=None,
+        assinatura_certificado=None,
+    )
+    destino = tmp_path / 'mesclado.pdf'
+    contextos = [{"NOME_PARTICIPANTE": f"Pessoa {i}"} for i in range(9)]
+
+    renderizar_certificados_paralelo(
+        cliente, "Certificamos {NOME_PARTICIPANTE}", contextos, str(destino), workers=3
+    )
+
+    leitor = PdfReader(str(destino))
+    assert len(leitor.pages) == 9
+    assert "Pessoa 8" in leitor.pages[8].extract_text()
+
+
+def test_paralelo_zip_um_arquivo_por_usuario(app, tmp_path):
+    destino = tmp_path / 'certificados.zip'
+    contextos = [
+        {"NOME_PARTICIPANTE": f"Pessoa {i}", "ARQUIVO": f"usuario_{i}.pdf"}
+        for i in range(4)
+    ]
+
+    renderizar_certificados_paralelo(
+        None, "Certificamos {NOME_PARTICIPANTE}", contextos, str(destino), modo="zip", workers=2
+    )
+
+    with zipfile.ZipFile(destino) as zf:
+        assert sorted(zf.namelist()) == [f"usuario_{i}.pdf" for i in range(4)]
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in zf.infolist())
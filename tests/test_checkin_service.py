@@ -0,0 +1,242 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import Checkin, Cliente, Evento, Inscricao, Oficina, Usuario
+from services import checkin_service
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        checkin_service._cache_tokens.clear()
+        checkin_service._sincronizadas.clear()
+        checkin_service._feeds.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _dados():
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    db.session.add(cliente)
+    db.session.flush()
+    evento = Evento(cliente_id=cliente.id, nome="Congresso")
+    usuario = Usuario(
+        nome="Ana", cpf="1", email="ana@test", senha="x", formacao="x", tipo="participante"
+    )
+    db.session.add_all([evento, usuario])
+    db.session.flush()
+    oficina = Oficina(
+        titulo="Robótica", descricao="d", ministrante_id=None, vagas=10,
+        carga_horaria="4", estado="SP", cidade="SP",
+        cliente_id=cliente.id, evento_id=evento.id,
+    )
+    db.session.add(oficina)
+    db.session.flush()
+    insc_oficina = Inscricao(usuario_id=usuario.id, cliente_id=cliente.id, oficina_id=oficina.id)
+    insc_evento = Inscricao(usuario_id=usuario.id, cliente_id=cliente.id, evento_id=evento.id)
+    db.session.add_all([insc_oficina, insc_evento])
+    db.session.commit()
+    return cliente, evento, oficina, insc_oficina, insc_evento
+
+
+def test_leitura_duplicada_nao_gera_segundo_checkin(app):
+    cliente, evento, oficina, insc_oficina, _ = _dados()
+
+    primeiro = checkin_service.processar_leitura_qr(insc_oficina.qr_code_token, cliente.id)
+    db.session.commit()
+    segundo = checkin_service.processar_leitura_qr(insc_oficina.qr_code_token, cliente.id)
+
+    assert primeiro.status == "success"
+    assert primeiro.payload["oficina"] == "Robótica"
+    assert primeiro.cliente_id == cliente.id
+    assert segundo.status == "warning"
+    checkins = Checkin.query.all()
+    assert len(checkins) == 1
+    assert checkins[0].palavra_chave == "QR-OFICINA"
+    assert checkins[0].evento_id == evento.id
+
+
+def test_checkin_de_evento_e_token_de_outro_cliente(app):
+    cliente, evento, _, _, insc_evento = _dados()
+
+    negado = checkin_service.processar_leitura_qr(insc_evento.qr_code_token, cliente.id + 1)
+    assert negado.http_status == 403
+
+    resultado = checkin_service.processar_leitura_qr(insc_evento.qr_code_token, cliente.id)
+    db.session.commit()
+    assert resultado.status == "success"
+    assert resultado.payload["evento"] == "Congresso"
+    assert Checkin.query.filter_by(evento_id=evento.id, palavra_chave="QR-EVENTO").count() == 1
+
+
+def test_indice_unico_bloqueia_insert_concorrente(app):
+    cliente, _, oficina, insc_oficina, _ = _dados()
+
+    assert checkin_service.inserir_checkin_unico(
+        insc_oficina.qr_code_token, insc_oficina.usuario_id, cliente.id, "QR-OFICINA",
+        oficina_id=oficina.id,
+    )
+    # Simula outro leitor que passou pela guarda antes do commit do primeiro
+    db.session.add(Checkin(
+        usuario_id=insc_oficina.usuario_id, oficina_id=oficina.id, palavra_chave="QR-OFICINA"
+    ))
+    with pytest.raises(Exception):
+        db.session.flush()
+    db.session.rollback()
+
+
+def test_cache_aquecido_e_latencia(app):
+    cliente, evento, _, insc_oficina, insc_evento = _dados()
+
+    assert checkin_service.aquecer_cache_evento(evento.id) == 2
+    assert insc_oficina.qr_code_token in checkin_service._cache_tokens
+
+    checkin_service.processar_leitura_qr("inexistente", cliente.id)
+    estatisticas = checkin_service.estatisticas_latencia()
+    assert estatisticas["leituras"] >= 1
+    assert estatisticas["p99_ms"] >= estatisticas["p50_ms"]
+
+
+def test_token_em_cache_de_inscricao_removida_nao_gera_checkin(app):
+    cliente, evento, _, insc_oficina, insc_evento = _dados()
+    token_oficina, token_evento = insc_oficina.qr_code_token, insc_evento.qr_code_token
+    checkin_service.aquecer_cache_evento(evento.id)
+
+    # Outro worker: a remoção não passa pelo cache deste processo
+    db.session.execute(Inscricao.__table__.delete().where(Inscricao.id == insc_oficina.id))
+    db.session.commit()
+    assert token_oficina in checkin_service._cache_tokens
+    removida = checkin_service.processar_leitura_qr(token_oficina, cliente.id)
+    assert removida.http_status == 404
+    assert token_oficina not in checkin_service._cache_tokens
+
+    # Via ORM o token antigo sai do cache no commit
+    insc_evento.qr_code_token = "novo-token"
+    db.session.commit()
+    assert token_evento not in checkin_service._cache_tokens
+    assert checkin_service.processar_leitura_qr(token_evento, cliente.id).http_status == 404
+    assert checkin_service.processar_leitura_qr("novo-token", cliente.id).status == "success"
+    assert Checkin.query.count() == 1
+
+
+def test_registro_e_remocao_em_lote(app):
+    cliente, _, oficina, insc_oficina, _ = _dados()
+    usuario_id = insc_oficina.usuario_id
+    db.session.add(Checkin(
+        usuario_id=usuario_id, oficina_id=oficina.id, palavra_chave="manual-manha", turno="manha"
+    ))
+    db.session.commit()
+
+    inscricoes = checkin_service.carregar_inscricoes_lote(cliente.id, oficina_ids=[oficina.id])
+    assert inscricoes == {(usuario_id, oficina.id): (cliente.id, oficina.evento_id)}
+
+    faltantes, ignorados = checkin_service.planejar_checkins_lote(inscricoes, ["manha", "tarde"])
+    assert faltantes == [(usuario_id, oficina.id, "tarde")]
+    assert ignorados == 1
+
+    data_hora = datetime(2025, 5, 10, 14, 30)
+    totais = checkin_service.registrar_checkins_lote(inscricoes, ["manha", "tarde", "noite"], data_hora)
+    db.session.commit()
+    assert totais == {"criados": 2, "ignorados": 1}
+    assert Checkin.query.filter_by(usuario_id=usuario_id, oficina_id=oficina.id).count() == 3
+
+    assert checkin_service.contar_checkins_lote(inscricoes, data_hora=data_hora) == 2
+    assert checkin_service.remover_checkins_lote(inscricoes, ["tarde"]) == 1
+    assert checkin_service.remover_checkins_lote(inscricoes) == 2
+    db.session.commit()
+    assert Checkin.query.count() == 0
+
+
+def test_lote_ignora_inscricoes_de_outro_cliente(app):
+    cliente, _, oficina, _, _ = _dados()
+    assert checkin_service.carregar_inscricoes_lote(cliente.id + 1, oficina_ids=[oficina.id]) == {}
+
+
+def test_sincronizacao_offline_idempotente(app):
+    cliente, _, oficina, insc_oficina, insc_evento = _dados()
+    leituras = [
+        {"token": insc_evento.qr_code_token, "scanned_at": "2025-05-10T11:14:00Z", "device_id": "gate-1"},
+        {"token": insc_oficina.qr_code_token, "scanned_at": "2025-05-10T11:15:00Z", "device_id": "gate-1"},
+        {"token": insc_oficina.qr_code_token, "scanned_at": "2025-05-10T11:15:00Z", "device_id": "gate-1"},
+        {"token": "inexistente", "scanned_at": None, "device_id": "gate-1"},
+    ]
+
+    resultados, novos = checkin_service.sincronizar_leituras(leituras, cliente.id)
+
+    assert [r["status"] for r in resultados] == ["success", "success", "success", "error"]
+    assert resultados[2]["duplicada"] is True
+    assert len(novos[cliente.id]) == 2
+    checkin = Checkin.query.filter_by(oficina_id=oficina.id).one()
+    assert checkin.data_hora == datetime(2025, 5, 10, 11, 15)
+
+    # Reenvio do mesmo lote (ex.: timeout na resposta) não grava nada novo
+    reenvio, novos = checkin_service.sincronizar_leituras(leituras[:2], cliente.id)
+    assert all(r["duplicada"] for r in reenvio)
+    assert novos == {}
+    assert Checkin.query.count() == 2
+
+    # Outra leitura do mesmo participante é apenas um aviso
+    outra, _ = checkin_service.sincronizar_leituras(
+        [{"token": insc_oficina.qr_code_token, "scanned_at": "2025-05-10T12:00:00Z", "device_id": "gate-2"}],
+        cliente.id,
+    )
+    assert outra[0]["status"] == "warning"
+
+
+def test_checkin_sem_cliente_herda_da_oficina(app):
+    cliente, _, oficina, insc_oficina, _ = _dados()
+    checkin = Checkin(usuario_id=insc_oficina.usuario_id, oficina_id=oficina.id, palavra_chave="manual")
+    db.session.add(checkin)
+    db.session.commit()
+    assert checkin.cliente_id == cliente.id
+
+
+def test_feed_incremental_por_cursor(app, monkeypatch):
+    monkeypatch.setattr(checkin_service, "_FEED_INTERVALO_MINIMO", 0)
+    cliente, evento, oficina, insc_oficina, insc_evento = _dados()
+    outro = Cliente(nome="Outro", email="outro@test", senha="x")
+    db.session.add(outro)
+    db.session.flush()
+    db.session.add(Checkin(
+        usuario_id=insc_oficina.usuario_id, evento_id=evento.id, cliente_id=outro.id, palavra_chave="x"
+    ))
+    checkin_service.processar_leitura_qr(insc_oficina.qr_code_token, cliente.id)
+    db.session.commit()
+
+    itens, cursor = checkin_service.feed_checkins(cliente.id)
+    assert [i["oficina"] for i in itens] == ["Robótica"]
+
+    assert checkin_service.feed_checkins(cliente.id, since_id=cursor) == ([], cursor)
+
+    db.session.add(Checkin(usuario_id=insc_evento.usuario_id, evento_id=evento.id, palavra_chave="manual"))
+    db.session.commit()
+    delta, novo_cursor = checkin_service.feed_checkins(cliente.id, since_id=cursor)
+    assert [i["evento"] for i in delta] == ["Congresso"]
+    assert novo_cursor > cursor
+    # Cliente atrasado recebe tudo o que veio depois do seu cursor
+    assert len(checkin_service.feed_checkins(cliente.id, since_id=0)[0]) == 2
+
+
+def test_feed_inclui_checkin_antigo_sem_cliente_pelo_usuario(app, monkeypatch):
+    monkeypatch.setattr(checkin_service, "_FEED_INTERVALO_MINIMO", 0)
+    cliente, _, _, insc_oficina, _ = _dados()
+    usuario = db.session.get(Usuario, insc_oficina.usuario_id)
+    usuario.cliente_id = cliente.id
+    legado = Checkin(usuario_id=usuario.id, palavra_chave="legado")
+    db.session.add(legado)
+    db.session.commit()
+    # Linha anterior à materialização de Checkin.cliente_id
+    Checkin.query.filter_by(id=legado.id).update({"cliente_id": None})
+    db.session.commit()
+
+    itens, _ = checkin_service.feed_checkins(cliente.id)
+    assert [i["id"] for i in itens] == [legado.id]
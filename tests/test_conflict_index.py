@@ -0,0 +1,141 @@
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from extensions import db
+from models.review import Review, Submission
+from models.submission_system import ConflictIndexEntry, ReviewerProfile
+from models.user import Usuario
+from services.conflict_index import ConflictIndex
+from services.distribution_benchmark import criar_evento_sintetico
+from services.distribution_service import DistributionService
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + str(tmp_path / "app.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _usuario(n, email):
+    return Usuario(nome=f"Pessoa {n}", cpf=f"{n:011d}", email=email, senha="x", formacao="-", tipo="revisor")
+
+
+def _cenario():
+    usuarios = [
+        _usuario(1, "ana@ufrj.br"),
+        _usuario(2, "bruno@usp.br"),
+        _usuario(3, "carla@gmail.com"),
+        _usuario(4, "davi@unicamp.br"),
+        _usuario(5, "eva@gmail.com"),
+    ]
+    db.session.add_all(usuarios)
+    db.session.flush()
+    ana, bruno, carla, davi, eva = usuarios
+    db.session.add_all([
+        ReviewerProfile(usuario_id=bruno.id, evento_id=1, institution="Universidade de São Paulo"),
+        ReviewerProfile(usuario_id=carla.id, evento_id=1, excluded_authors=["autor@fiocruz.br"]),
+        ReviewerProfile(usuario_id=davi.id, evento_id=1, excluded_institutions=["UFMG"], excluded_authors=[ana.id]),
+        ReviewerProfile(usuario_id=eva.id, evento_id=1),
+    ])
+    trabalhos = [
+        Submission(title="Do autor", code_hash="x", evento_id=1, author_id=ana.id),
+        Submission(title="Mesmo domínio", code_hash="x", evento_id=1, attributes={"author_email": "X@USP.BR"}),
+        Submission(title="Instituição", code_hash="x", evento_id=1,
+                   attributes={"institution": "  universidade de  sao paulo "}),
+        Submission(title="Excluído", code_hash="x", evento_id=1,
+                   attributes={"author_email": "outro@x.org; autor@fiocruz.br"}),
+        Submission(title="Excluída", code_hash="x", evento_id=1, attributes={"institution": "ufmg"}),
+        Submission(title="Gmail", code_hash="x", evento_id=1, attributes={"author_email": "zeca@gmail.com"}),
+    ]
+    db.session.add_all(trabalhos)
+    db.session.commit()
+    return usuarios, trabalhos
+
+
+def test_indice_cobre_email_dominio_instituicao_e_exclusoes(app):
+    (ana, bruno, carla, davi, eva), trabalhos = _cenario()
+    revisores = [ana, bruno, carla, davi, eva]
+
+    conflitos = ConflictIndex().matrix(trabalhos, revisores)
+
+    assert conflitos.tolist() == [
+        [True, False, False, True, False],   # autora e autora excluída por id
+        [False, True, False, False, False],  # domínio usp.br
+        [False, True, False, False, False],  # instituição sem acento/caixa/espaços
+        [False, False, True, False, False],  # e-mail excluído
+        [False, False, False, True, False],  # instituição excluída
+        [False, False, False, False, False], # gmail não é vínculo
+    ]
+    indice = ConflictIndex()
+    assert [indice.has_conflict(t, r) for t in trabalhos for r in revisores] == conflitos.ravel().tolist()
+    assert indice.conflicting_reviewers(trabalhos[0]) == {ana.id, davi.id}
+
+
+def test_chaves_persistidas_sao_reaproveitadas_e_invalidadas(app):
+    (ana, bruno, carla, davi, eva), trabalhos = _cenario()
+    perfis = ReviewerProfile.query.order_by(ReviewerProfile.id).all()
+    primeiro = ConflictIndex().load(trabalhos, perfis)
+    db.session.commit()
+    assert primeiro.stats == {"reused": 0, "computed": 10}
+    assert ConflictIndexEntry.query.count() == 10
+    # Só digests: nada de e-mail em claro
+    assert all("@" not in chave for e in ConflictIndexEntry.query for chave in e.keys)
+
+    consultas = []
+
+    def contar(*_args):
+        consultas.append(1)
+
+    event.listen(db.engine, "before_cursor_execute", contar)
+    try:
+        segundo = ConflictIndex().load(trabalhos, perfis)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", contar)
+    assert segundo.stats == {"reused": 10, "computed": 0}
+    assert len(consultas) == 2
+    assert not segundo.has_conflict(trabalhos[5], perfis[3])
+
+    # E-mail do autor, perfil do revisor e atributos mudam: as entradas caem
+    eva.email = "eva@ufrj.br"
+    perfis[0].excluded_institutions = ["UFRJ"]
+    trabalhos[5].attributes = {"author_email": "zeca@ufrj.br"}
+    db.session.commit()
+    assert ConflictIndexEntry.query.count() == 7
+
+    terceiro = ConflictIndex().load(trabalhos, perfis)
+    assert terceiro.stats == {"reused": 7, "computed": 3}
+    assert terceiro.has_conflict(trabalhos[5], perfis[3])
+    assert not terceiro.has_conflict(trabalhos[0], perfis[0])
+
+
+def test_distribuicao_e_rebalanceamento_usam_o_indice(app):
+    criar_evento_sintetico(1, submissoes=40, revisores=20, semente=5)
+    servico = DistributionService(1)
+    trabalhos = Submission.query.order_by(Submission.id).all()
+    perfis = servico._load_available_reviewers()
+    trabalhos[0].author_id = perfis[0].usuario_id
+    trabalhos[0].attributes = {"category": "area 0"}
+    trabalhos[1].author_id, trabalhos[1].attributes = None, {"category": "area 0"}
+    db.session.add(Review(submission_id=trabalhos[0].id, reviewer_id=perfis[0].usuario_id))
+    db.session.add(Review(submission_id=trabalhos[1].id, reviewer_id=perfis[0].usuario_id))
+    db.session.commit()
+
+    conflitos = servico._conflict_matrix(trabalhos, perfis)
+    assert conflitos[0, 0] and servico._has_conflict(trabalhos[0], perfis[0])
+    # Mesmo domínio institucional do e-mail do autor
+    mesma_instituicao = [p.institution == perfis[0].institution for p in perfis]
+    assert conflitos[0].tolist() == mesma_instituicao
+
+    auditoria = DistributionService(1)._conflicting_reviews()
+    assert [(c["submission_id"], c["reviewer_id"]) for c in auditoria] == [
+        (trabalhos[0].id, perfis[0].usuario_id)
+    ]
+    assert ConflictIndexEntry.query.filter_by(entity_type="submission").count() == 40
@@ -0,0 +1,162 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import (
+    AgendamentoVisita,
+    Checkin,
+    Cliente,
+    Evento,
+    HorarioVisitacao,
+    Inscricao,
+    Oficina,
+    Usuario,
+)
+from services import dashboard_stats_service
+from services.reserva_vagas_service import encerrar_agendamento
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        dashboard_stats_service._cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+HOJE = date(2025, 5, 10)
+
+
+def _dados():
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    outro = Cliente(nome="Outro", email="outro@test", senha="x")
+    db.session.add_all([cliente, outro])
+    db.session.flush()
+    evento = Evento(cliente_id=cliente.id, nome="Museu")
+    evento_outro = Evento(cliente_id=outro.id, nome="Outro")
+    db.session.add_all([evento, evento_outro])
+    db.session.flush()
+    horario = HorarioVisitacao(
+        evento_id=evento.id, data=HOJE, horario_inicio=time(9), horario_fim=time(10),
+        capacidade_total=100, vagas_disponiveis=40,
+    )
+    horario_outro = HorarioVisitacao(
+        evento_id=evento_outro.id, data=HOJE, horario_inicio=time(9), horario_fim=time(10),
+        capacidade_total=10, vagas_disponiveis=0,
+    )
+    db.session.add_all([horario, horario_outro])
+    db.session.flush()
+    agendamentos = [
+        AgendamentoVisita(
+            horario_id=h.id, escola_nome="Escola", turma="T", nivel_ensino="F",
+            quantidade_alunos=alunos, status=status,
+        )
+        for h, alunos, status in [
+            (horario, 20, "confirmado"),
+            (horario, 10, "realizado"),
+            (horario, 30, "realizado"),
+            (horario, 5, "cancelado"),
+            (horario, 7, "pendente"),
+            (horario_outro, 10, "confirmado"),
+        ]
+    ]
+    db.session.add_all(agendamentos)
+    db.session.commit()
+    return cliente, horario, agendamentos
+
+
+def test_contadores_em_um_pacote(app):
+    cliente, _, _ = _dados()
+
+    pacote = dashboard_stats_service.estatisticas_cliente(cliente.id, HOJE)
+
+    assert pacote["agendamentos_totais"] == 5
+    assert pacote["agendamentos_confirmados"] == 1
+    assert pacote["agendamentos_realizados"] == 2
+    assert pacote["agendamentos_cancelados"] == 1
+    assert pacote["total_visitantes"] == 60
+    assert pacote["ocupacao_media"] == 60
+    assert pacote["total_inscricoes"] == 0
+
+
+def test_cache_invalidado_apos_commit(app):
+    cliente, _, agendamentos = _dados()
+    dashboard_stats_service.estatisticas_cliente(cliente.id, HOJE)
+
+    agendamentos[0].status = "realizado"
+    db.session.flush()
+    # Antes do commit o pacote em cache continua valendo
+    assert dashboard_stats_service.estatisticas_cliente(cliente.id, HOJE)["agendamentos_realizados"] == 2
+    db.session.commit()
+    assert dashboard_stats_service.estatisticas_cliente(cliente.id, HOJE)["agendamentos_realizados"] == 3
+
+    # UPDATE direto do cancelamento também invalida
+    encerrar_agendamento(agendamentos[1])
+    db.session.commit()
+    pacote = dashboard_stats_service.estatisticas_cliente(cliente.id, HOJE)
+    assert pacote["agendamentos_cancelados"] == 2
+    assert pacote["ocupacao_media"] == 50
+
+
+def test_listas_paginadas(app):
+    cliente, _, _ = _dados()
+    usuario = Usuario(nome="Ana", cpf="1", email="ana@test", senha="x", formacao="x", tipo="participante")
+    db.session.add(usuario)
+    db.session.flush()
+    oficinas = [
+        Oficina(
+            titulo=f"Of {i}", descricao="d", ministrante_id=None, vagas=10, carga_horaria="4",
+            estado="SP", cidade="SP", cliente_id=cliente.id,
+        )
+        for i in range(25)
+    ]
+    db.session.add_all(oficinas)
+    db.session.flush()
+    inicio = datetime(2025, 5, 10, 8)
+    db.session.add_all(
+        [
+            Inscricao(usuario_id=usuario.id, cliente_id=cliente.id, oficina_id=o.id)
+            for o in oficinas
+        ]
+        + [
+            Checkin(
+                usuario_id=usuario.id, oficina_id=o.id, cliente_id=cliente.id,
+                palavra_chave="QR-OFICINA", data_hora=inicio + timedelta(minutes=i),
+            )
+            for i, o in enumerate(oficinas)
+        ]
+    )
+    db.session.commit()
+
+    pagina = dashboard_stats_service.paginar_checkins_qr(cliente.id, 1, 10)
+    assert pagina.total == 25
+    assert pagina.pages == 3
+    assert pagina.items[0].oficina.titulo == "Of 24"
+
+    ultima = dashboard_stats_service.paginar_inscritos(cliente.id, 3, 10)
+    assert len(ultima.items) == 5
+
+    # Vale o dono da oficina/evento, não o cliente_id gravado na inscrição
+    outro = Cliente.query.filter_by(email="outro@test").one()
+    alheia = Oficina(
+        titulo="Alheia", descricao="d", ministrante_id=None, vagas=10, carga_horaria="4",
+        estado="SP", cidade="SP", cliente_id=outro.id,
+    )
+    db.session.add(alheia)
+    db.session.flush()
+    db.session.add(Inscricao(usuario_id=usuario.id, cliente_id=cliente.id, oficina_id=alheia.id))
+    db.session.add(Inscricao(usuario_id=usuario.id, cliente_id=outro.id, evento_id=Evento.query.filter_by(cliente_id=cliente.id).first().id))
+    db.session.commit()
+    pagina = dashboard_stats_service.paginar_inscritos(cliente.id, 1, 100)
+    assert pagina.total == 26
+    assert alheia.id not in {i.oficina_id for i in pagina.items}
+    assert dashboard_stats_service.paginar_inscritos(outro.id, 1, 100).total == 1
+    assert dashboard_stats_service.estatisticas_cliente(cliente.id, HOJE)["total_inscricoes"] == 25
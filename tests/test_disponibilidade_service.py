@@ -0,0 +1,86 @@
+from datetime import date, time
+
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import Cliente, Evento, HorarioVisitacao
+from services import disponibilidade_service
+from services.reserva_vagas_service import reservar_vagas
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        disponibilidade_service._cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _horarios():
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    db.session.add(cliente)
+    db.session.flush()
+    evento = Evento(cliente_id=cliente.id, nome="Museu")
+    db.session.add(evento)
+    db.session.flush()
+    horarios = [
+        HorarioVisitacao(
+            evento_id=evento.id, data=date(2025, 5, dia), horario_inicio=time(9),
+            horario_fim=time(10), capacidade_total=5, vagas_disponiveis=vagas, fechado=fechado,
+        )
+        for dia, vagas, fechado in [(10, 5, False), (11, 0, False), (12, 5, True), (20, 2, False)]
+    ]
+    db.session.add_all(horarios)
+    db.session.commit()
+    return evento, horarios
+
+
+def test_periodo_filtra_lotados_e_fechados(app):
+    evento, _ = _horarios()
+
+    maio = disponibilidade_service.horarios_disponiveis(evento.id, date(2025, 5, 1), date(2025, 5, 31))
+    assert [h["data"] for h in maio.horarios] == ["2025-05-10", "2025-05-20"]
+    assert maio.horarios[0]["horario_inicio"] == "09:00"
+
+    semana = disponibilidade_service.horarios_disponiveis(evento.id, date(2025, 5, 10), date(2025, 5, 16))
+    assert len(semana.horarios) == 1
+    assert semana.etag != maio.etag
+
+
+def test_snapshot_invalidado_apos_commit_da_reserva(app):
+    evento, horarios = _horarios()
+    periodo = (evento.id, date(2025, 5, 1), date(2025, 5, 31))
+
+    antes = disponibilidade_service.horarios_disponiveis(*periodo)
+    assert disponibilidade_service.horarios_disponiveis(*periodo) is antes
+
+    reservar_vagas(horarios[3].id, 2)
+    # Ainda não confirmado: o snapshot continua válido
+    assert disponibilidade_service.horarios_disponiveis(*periodo) is antes
+    db.session.commit()
+
+    depois = disponibilidade_service.horarios_disponiveis(*periodo)
+    assert depois.etag != antes.etag
+    assert [h["data"] for h in depois.horarios] == ["2025-05-10"]
+
+
+def test_alteracao_via_orm_e_rollback(app):
+    evento, horarios = _horarios()
+    periodo = (evento.id, None, None)
+    antes = disponibilidade_service.horarios_disponiveis(*periodo)
+
+    horarios[0].fechado = True
+    db.session.flush()
+    db.session.rollback()
+    assert disponibilidade_service.horarios_disponiveis(*periodo) is antes
+
+    horarios[1].vagas_disponiveis = 3
+    db.session.commit()
+    assert len(disponibilidade_service.horarios_disponiveis(*periodo).horarios) == 3
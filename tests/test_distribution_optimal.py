@@ -0,0 +1,140 @@
+import itertools
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from extensions import db
+from models.review import Submission
+from models.submission_system import AutoDistributionLog, ReviewerProfile
+from services.distribution_benchmark import benchmark_distribuicao, criar_evento_sintetico
+from services.distribution_service import DistributionService
+from services.distribution_solver import solve_assignment
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + str(tmp_path / "app.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _custo_total(custos, pares, base, passo):
+    cargas = pares.sum(axis=0)
+    return custos[pares].sum() + (base * cargas + passo * cargas * (cargas - 1) / 2).sum()
+
+
+def _forca_bruta(custos, k, capacidade, base, passo):
+    """Maior número de pares e, entre eles, o menor custo."""
+    n, r = custos.shape
+    opcoes = [
+        [c for m in range(k + 1) for c in itertools.combinations(range(r), m) if np.isfinite(custos[i, list(c)]).all()]
+        for i in range(n)
+    ]
+    melhor = (-1, np.inf)
+    for escolha in itertools.product(*opcoes):
+        pares = np.zeros(custos.shape, dtype=bool)
+        for i, revisores in enumerate(escolha):
+            pares[i, list(revisores)] = True
+        if (pares.sum(axis=0) > capacidade).any():
+            continue
+        chave = (int(pares.sum()), -_custo_total(custos, pares, base, passo))
+        if chave > (melhor[0], -melhor[1]):
+            melhor = (chave[0], -chave[1])
+    return melhor
+
+
+@pytest.mark.parametrize("semente", range(40))
+def test_solver_confere_com_forca_bruta(semente):
+    aleatorio = np.random.default_rng(semente)
+    n, r, k = aleatorio.integers(2, 5), aleatorio.integers(2, 5), int(aleatorio.integers(1, 3))
+    # Linhas repetidas exercitam o agrupamento de submissões iguais
+    linhas = aleatorio.random((3, r))
+    linhas[aleatorio.random((3, r)) < 0.2] = np.inf
+    custos = linhas[aleatorio.integers(0, 3, n)]
+    capacidade = aleatorio.integers(0, 4, r)
+    base, passo = aleatorio.random(r) * 0.3, aleatorio.random(r) * 0.5
+
+    pares, em_aberto = solve_assignment(custos, k, capacidade, base, passo)
+
+    assert (pares.sum(axis=0) <= capacidade).all()
+    assert (pares.sum(axis=1) + em_aberto == k).all()
+    assert np.isfinite(custos[pares]).all()
+    total, custo = _forca_bruta(custos, k, capacidade, base, passo)
+    assert pares.sum() == total
+    if not em_aberto.any():
+        assert _custo_total(custos, pares, base, passo) == pytest.approx(custo)
+
+
+def test_matriz_de_conflitos_segue_has_conflict(app):
+    criar_evento_sintetico(1, submissoes=80, revisores=20, semente=3)
+    servico = DistributionService(1)
+    trabalhos = Submission.query.order_by(Submission.id).all()
+    perfis = ReviewerProfile.query.order_by(ReviewerProfile.id).all()
+    perfis[0].excluded_authors = [trabalhos[5].author_id or perfis[1].usuario_id]
+    trabalhos[5].author_id = perfis[1].usuario_id
+
+    conflitos = servico._conflict_matrix(trabalhos, perfis)
+
+    esperado = [[servico._has_conflict(s, r) for r in perfis] for s in trabalhos]
+    assert conflitos.tolist() == esperado
+    assert conflitos.any()
+
+
+def test_modo_optimal_respeita_restricoes_e_relata_metricas(app):
+    criar_evento_sintetico(1, submissoes=90, revisores=30, categorias=4, max_assignments=8, semente=7)
+    servico = DistributionService(1)
+    servico.config.distribution_mode = "optimal"
+    servico.log_entry = AutoDistributionLog(
+        evento_id=1, total_submissions=90, total_assignments=0,
+        conflicts_detected=0, fallback_assignments=0, failed_assignments=0,
+    )
+    trabalhos = Submission.query.all()
+    perfis = servico._load_available_reviewers()
+    maximos = {p.usuario_id: p.max_assignments for p in perfis}
+    iniciais = {p.usuario_id: p.current_load for p in perfis}
+
+    atribuicoes = servico._execute_distribution(trabalhos, perfis)
+
+    por_trabalho = {}
+    for atribuicao in atribuicoes:
+        por_trabalho.setdefault(atribuicao["submission_id"], []).append(atribuicao["reviewer_id"])
+        assert atribuicao["assignment_type"] == "optimal"
+    assert all(len(set(r)) == len(r) == 2 for r in por_trabalho.values())
+    assert len(por_trabalho) == 90
+
+    trabalhos_por_id = {t.id: t for t in trabalhos}
+    perfis_por_usuario = {p.usuario_id: p for p in perfis}
+    for trabalho_id, revisores in por_trabalho.items():
+        for revisor in revisores:
+            assert not servico._has_conflict(trabalhos_por_id[trabalho_id], perfis_por_usuario[revisor])
+    for perfil in perfis:
+        novas = sum(a["reviewer_id"] == perfil.usuario_id for a in atribuicoes)
+        assert perfil.current_load == iniciais[perfil.usuario_id] + novas <= maximos[perfil.usuario_id]
+
+    estatisticas = servico.solver_stats
+    assert estatisticas["unfilled_slots"] == 0
+    assert estatisticas["objective"] == pytest.approx(sum(a["score"] for a in atribuicoes), abs=0.01)
+    assert estatisticas["load_variance"] == pytest.approx(
+        np.var([p.current_load for p in perfis]), abs=1e-3
+    )
+    assert estatisticas["solve_seconds"] >= 0
+
+
+def test_benchmark_compara_com_modos_gulosos():
+    resultado = benchmark_distribuicao(submissoes=150, revisores=25, categorias=5, max_assignments=20)
+
+    modos = resultado["modos"]
+    assert set(modos) == {"balanced", "stratified", "random", "optimal"}
+    otimo = modos["optimal"]
+    assert (otimo["vagas_em_aberto"], otimo["pares_em_conflito"], otimo["acima_do_limite"]) == (0, 0, 0)
+    for guloso in ("balanced", "random"):
+        assert modos[guloso]["vagas_em_aberto"] == 0
+        assert otimo["objetivo_com_carga"] >= modos[guloso]["objetivo_com_carga"] - 1e-6
+    assert otimo["solver"]["objective"] == pytest.approx(otimo["objetivo"], abs=0.01)
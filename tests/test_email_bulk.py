@@ -0,0 +1,188 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import Cliente, Inscricao, LembreteEnvio, LembreteOficina, Oficina, Usuario
+from models.reminder import StatusLembrete
+from services.email_benchmark import MailjetStandIn
+from services import email_service as email_service_module
+from services.email_service import EmailService, Recipient
+
+
+@pytest.fixture
+def standin():
+    with MailjetStandIn(falhas_429=2) as servidor:
+        yield servidor
+
+
+@pytest.fixture
+def app(standin):
+    templates = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+    app = Flask(__name__, template_folder=templates)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["MAILJET_API_KEY"] = "key"
+    app.config["MAILJET_SECRET_KEY"] = "secret"
+    app.config["MAILJET_API_URL"] = standin.url
+    app.config["MAIL_DEFAULT_SENDER"] = "eventos@example.com"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_send_bulk_agrupa_e_refaz_429(app, standin):
+    servico = EmailService()
+    mensagens = [
+        {"custom_id": i, "to": f"p{i}@example.com", "subject": "Oi", "html": "<p>oi</p>"}
+        for i in range(120)
+    ]
+    mensagens.append({"custom_id": "sem-destino", "to": None, "subject": "Oi"})
+    lotes = []
+
+    resultado = servico.send_bulk(
+        mensagens, sender=Recipient("eventos@example.com"), backoff=0, on_batch=lotes.append
+    )
+
+    assert resultado["batches"] == 3
+    assert resultado["sent"] == 120
+    assert resultado["failed"] == 1
+    assert standin.requisicoes == 5  # 3 lotes + 2 respostas 429 refeitas
+    assert sum(len(lote) for lote in lotes) == 121
+    falha = next(r for r in resultado["results"] if not r.success)
+    assert falha.custom_id == "sem-destino"
+    assert {r.custom_id for r in resultado["results"] if r.success} == set(range(120))
+
+
+def test_falha_no_on_batch_nao_descarta_os_outros_lotes(app, standin):
+    mensagens = [
+        {"custom_id": i, "to": f"p{i}@example.com", "subject": "Oi", "text": "oi"}
+        for i in range(120)
+    ]
+    vistos = []
+
+    def registrar(lote):
+        vistos.append(len(lote))
+        if len(vistos) == 1:
+            raise RuntimeError("banco indisponível")
+
+    resultado = EmailService().send_bulk(mensagens, backoff=0, on_batch=registrar)
+
+    assert len(vistos) == 3
+    assert resultado["sent"] == 120
+    assert {r.custom_id for r in resultado["results"]} == set(range(120))
+
+
+def test_lembrete_manual_grava_envios_em_lote(app, standin, monkeypatch):
+    from routes import reminder_routes
+    from services.email_service import email_service
+
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    db.session.add(cliente)
+    db.session.flush()
+    oficina = Oficina(
+        titulo="Robótica", descricao="d", ministrante_id=None, vagas=100,
+        carga_horaria="4", estado="SP", cidade="SP", cliente_id=cliente.id,
+    )
+    usuarios = [
+        Usuario(
+            nome=f"U{i}", cpf=str(i), email=f"u{i}@test" if i else "",
+            senha="x", formacao="x", tipo="participante",
+        )
+        for i in range(60)
+    ]
+    db.session.add_all([oficina, *usuarios])
+    db.session.flush()
+    db.session.add_all(
+        Inscricao(usuario_id=u.id, cliente_id=cliente.id, oficina_id=oficina.id) for u in usuarios
+    )
+    lembrete = LembreteOficina(
+        cliente_id=cliente.id, titulo="Amanhã!", mensagem="Traga o notebook",
+        oficina_ids=json.dumps([oficina.id]),
+    )
+    db.session.add(lembrete)
+    db.session.commit()
+    monkeypatch.setattr(email_service, "_mailjet_client", None)
+
+    reminder_routes.processar_lembrete_manual(lembrete.id)
+
+    lembrete = db.session.get(LembreteOficina, lembrete.id)
+    assert lembrete.total_destinatarios == 60
+    assert lembrete.total_enviados == 59
+    assert lembrete.total_falhas == 1
+    envios = LembreteEnvio.query.all()
+    assert sum(e.status == StatusLembrete.ENVIADO for e in envios) == 59
+    falha = next(e for e in envios if e.status == StatusLembrete.FALHOU)
+    assert falha.erro_mensagem
+    assert all(e.data_envio for e in envios if e.status == StatusLembrete.ENVIADO)
+
+
+def test_retry_after_longo_falha_o_lote_sem_esperar(monkeypatch):
+    resposta = SimpleNamespace(status_code=429, headers={"Retry-After": "3600"})
+    chamadas = []
+    cliente = SimpleNamespace(send=SimpleNamespace(create=lambda data: chamadas.append(data) or resposta))
+    monkeypatch.setattr(email_service_module.time, "sleep", lambda s: pytest.fail("não deveria esperar"))
+    lote = [(1, "a@example.com", {"sender": Recipient("eventos@example.com"),
+                                  "to": [Recipient("a@example.com")], "subject": "Oi",
+                                  "text": "oi", "html": None, "attachments": [],
+                                  "cc": [], "bcc": [], "reply_to": None})]
+
+    resultados = EmailService()._post_mailjet_batch(cliente, lote, max_retries=3, backoff=0.5)
+
+    assert len(chamadas) == 1
+    assert not resultados[0].success and "Retry-After" in resultados[0].error
+    # Sem Retry-After, o backoff exponencial também respeita o teto
+    assert EmailService._retry_delay(SimpleNamespace(headers={}), 12, 0.5, 60) == 60
+    assert EmailService._retry_delay(SimpleNamespace(headers={"Retry-After": "2"}), 1, 0.5, 60) == 2
+
+
+def test_send_bulk_reaproveita_template_e_anexo(standin, tmp_path):
+    (tmp_path / "aviso.html").write_text("<p>Olá, {{ nome }}!</p>", encoding="utf-8")
+    anexo = tmp_path / "programacao.pdf"
+    anexo.write_bytes(b"%PDF-1.4 programa")
+    app = Flask(__name__, template_folder=str(tmp_path))
+    app.config["MAILJET_API_KEY"] = "key"
+    app.config["MAILJET_SECRET_KEY"] = "secret"
+    app.config["MAILJET_API_URL"] = standin.url
+    app.config["MAIL_DEFAULT_SENDER"] = "eventos@example.com"
+    servico = EmailService()
+    mensagens = [
+        {
+            "custom_id": i,
+            "to": [{"email": f"p{i}@example.com", "name": f"P{i}"}],
+            "subject": "Programação",
+            "template": "aviso.html",
+            "template_context": {"nome": f"P{i}"},
+            "attachments": [str(anexo)],
+        }
+        for i in range(60)
+    ]
+
+    with app.app_context():
+        preparadas, rejeitadas = servico._prepare_bulk(mensagens, Recipient("eventos@example.com"))
+        assert not rejeitadas
+        assert preparadas[7][2]["html"] == "<p>Olá, P7!</p>"
+        anexos = {id(campos["attachments"][0]) for _, _, campos in preparadas}
+        assert len(anexos) == 1
+        assert servico.cache_stats() == {
+            "template_hits": 59, "template_misses": 1,
+            "attachment_hits": 59, "attachment_misses": 1, "templates": 1,
+        }
+
+        # Arquivo alterado: recompila na próxima renderização
+        caminho = tmp_path / "aviso.html"
+        caminho.write_text("<p>Oi, {{ nome }}!</p>", encoding="utf-8")
+        os.utime(caminho, ns=(0, caminho.stat().st_mtime_ns + 1_000_000))
+        assert servico._render_template("aviso.html", {"nome": "Ana"}) == "<p>Oi, Ana!</p>"
+        assert servico.cache_stats()["template_misses"] == 2
+        assert servico._validate_template("aviso.html")
+        assert not servico._validate_template("nao_existe.html")
+
+        resultado = servico.send_bulk(mensagens[:3], backoff=0)
+    assert resultado["sent"] == 3
@@ -0,0 +1,160 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import EmailOutbox
+from services import email_outbox_service
+from services.email_benchmark import MailjetStandIn
+from services.email_service import email_service
+
+
+@pytest.fixture
+def standin():
+    with MailjetStandIn() as servidor:
+        yield servidor
+
+
+@pytest.fixture
+def app(standin, monkeypatch):
+    templates = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+    app = Flask(__name__, template_folder=templates)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["MAILJET_API_KEY"] = "key"
+    app.config["MAILJET_SECRET_KEY"] = "secret"
+    app.config["MAILJET_API_URL"] = standin.url
+    app.config["MAIL_DEFAULT_SENDER"] = "eventos@example.com"
+    app.config["OUTBOX_MAX_TENTATIVAS"] = 2
+    db.init_app(app)
+    monkeypatch.setattr(email_service, "_mailjet_client", None)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_enfileirar_respeita_a_transacao(app, standin):
+    email_outbox_service.enfileirar_email("a@test", "Ana", "Oficina", "Assunto", "texto")
+    db.session.rollback()
+    assert EmailOutbox.query.count() == 0
+
+    mensagem = email_outbox_service.enfileirar_email(
+        "b@test", "Bia", "Robótica", "Assunto", "texto"
+    )
+    db.session.commit()
+    assert "Robótica" in mensagem.corpo_html
+    assert standin.requisicoes == 0
+
+    resumo = email_outbox_service.processar_outbox()
+    # A sessão do projeto não expira objetos no commit
+    db.session.expire_all()
+
+    assert resumo == {"reivindicados": 1, "enviados": 1, "reagendados": 0, "mortos": 0}
+    assert standin.mensagens == 1
+    enviada = db.session.get(EmailOutbox, mensagem.id)
+    assert enviada.status == EmailOutbox.ENVIADO
+    assert enviada.tentativas == 1
+    assert enviada.enviado_em and enviada.message_id is not None
+    # Nada mais a enviar
+    assert email_outbox_service.processar_outbox()["reivindicados"] == 0
+
+
+def test_falha_reagenda_e_depois_vai_para_dead_letter(app, standin):
+    ok = email_outbox_service.enfileirar_email("ok@test", assunto="Oi", corpo_html="<p>oi</p>")
+    ruim = email_outbox_service.enfileirar_email(
+        "ruim@test", assunto="Oi", template_path="emails/nao_existe.html"
+    )
+    db.session.commit()
+
+    resumo = email_outbox_service.processar_outbox()
+    assert resumo["enviados"] == 1
+    assert resumo["reagendados"] == 1
+    db.session.expire_all()
+    ruim = db.session.get(EmailOutbox, ruim.id)
+    assert ruim.status == EmailOutbox.PENDENTE
+    assert ruim.ultimo_erro
+    assert ruim.disponivel_em > datetime.utcnow()
+
+    # Ainda em backoff: não é reivindicada
+    assert email_outbox_service.processar_outbox()["reivindicados"] == 0
+
+    ruim.disponivel_em = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    resumo = email_outbox_service.processar_outbox()
+    db.session.expire_all()
+    assert resumo["mortos"] == 1
+    assert db.session.get(EmailOutbox, ruim.id).status == EmailOutbox.MORTO
+    assert db.session.get(EmailOutbox, ok.id).status == EmailOutbox.ENVIADO
+
+    assert email_outbox_service.reprocessar_mortos() == 1
+    db.session.expire_all()
+    reaberta = db.session.get(EmailOutbox, ruim.id)
+    assert reaberta.status == EmailOutbox.PENDENTE
+    assert reaberta.tentativas == 0
+    stats = email_outbox_service.estatisticas_outbox()
+    assert stats["por_status"] == {EmailOutbox.ENVIADO: 1, EmailOutbox.PENDENTE: 1}
+
+
+def test_lease_expirado_e_retomado(app, standin):
+    mensagem = email_outbox_service.enfileirar_email("c@test", assunto="Oi", corpo_html="<p>oi</p>")
+    db.session.commit()
+    mensagem.status = EmailOutbox.ENVIANDO
+    mensagem.tentativas = 1
+    mensagem.bloqueado_em = datetime.utcnow() - email_outbox_service.LEASE - timedelta(minutes=1)
+    db.session.commit()
+
+    resumo = email_outbox_service.processar_outbox()
+    db.session.expire_all()
+
+    assert resumo["enviados"] == 1
+    assert db.session.get(EmailOutbox, mensagem.id).tentativas == 2
+
+
+def test_enfileirar_mensagem_com_interface_de_send_email(app, standin, tmp_path):
+    anexo = tmp_path / "certificado.pdf"
+    anexo.write_bytes(b"%PDF-1.4")
+    mensagem = email_outbox_service.enfileirar_mensagem(
+        to=("d@test", "Davi"), subject="Código", text="Locator: x", attachments=[anexo]
+    )
+    db.session.commit()
+
+    # Só texto: sem o HTML padrão de confirmação de inscrição
+    assert mensagem.corpo_html is None
+    assert mensagem.nome_destinatario == "Davi"
+    assert mensagem.anexos == [str(anexo)]
+
+    resumo = email_outbox_service.processar_outbox()
+    assert resumo["enviados"] == 1
+    assert standin.mensagens == 1
+
+
+def test_anexo_enfileirado_mantem_o_nome_amigavel(app, standin, tmp_path):
+    anexo = tmp_path / "3f9c1a.pdf"
+    anexo.write_bytes(b"%PDF-1.4")
+    nome = "certificado_revisor_Ana_Lima.pdf"
+    mensagem = email_outbox_service.enfileirar_mensagem(
+        to="a@test", subject="Certificado", text="Segue",
+        attachments=[{"path": anexo, "filename": nome}],
+    )
+    db.session.commit()
+
+    assert mensagem.anexos == [{"path": str(anexo), "filename": nome}]
+    anexos = email_service._normalise_attachments(mensagem.anexos)
+    assert [(a.filename, a.content, a.content_type) for a in anexos] == [
+        (nome, b"%PDF-1.4", "application/pdf")
+    ]
+    assert email_outbox_service.processar_outbox()["enviados"] == 1
+
+
+def test_lote_ou_tentativas_nao_positivos_sao_rejeitados(app):
+    app.config["OUTBOX_LOTE"] = 0
+    with pytest.raises(ValueError, match="OUTBOX_LOTE"):
+        email_outbox_service.processar_outbox()
+    app.config["OUTBOX_MAX_TENTATIVAS"] = 0
+    with pytest.raises(ValueError, match="OUTBOX_MAX_TENTATIVAS"):
+        email_outbox_service.enfileirar_email("e@test", assunto="Oi", corpo_html="<p>oi</p>")
+    assert email_outbox_service.processar_outbox(limite=10, taxa=0)["reivindicados"] == 0
@@ -0,0 +1,153 @@
+import csv
+import io
+import os
+import time
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager
+from openpyxl import Workbook
+from werkzeug.security import check_password_hash
+
+os.environ.setdefault('GOOGLE_CLIENT_ID', 'dummy_id')
+os.environ.setdefault('GOOGLE_CLIENT_SECRET', 'dummy_secret')
+
+from extensions import db
+from models import ImportacaoUsuarios, Usuario
+from routes.importar_usuarios_routes import importar_usuarios_routes
+from services import hash_service, importacao_usuarios_service
+
+HASH_RAPIDO = "pbkdf2:sha256:1000"
+CABECALHO = ["nome", "cpf", "email", "senha", "formacao", "tipo"]
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + str(tmp_path / "app.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["UPLOAD_FOLDER"] = str(tmp_path / "uploads")
+    app.config["SECRET_KEY"] = "test"
+    app.config["LOGIN_DISABLED"] = True
+    db.init_app(app)
+    login_manager = LoginManager(app)
+    login_manager.user_loader(lambda _id: None)
+    app.register_blueprint(importar_usuarios_routes)
+    app.add_url_rule("/dashboard", "dashboard_routes.dashboard", lambda: "ok")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _csv(caminho, linhas):
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo, delimiter=";")
+        escritor.writerow(CABECALHO)
+        escritor.writerows(linhas)
+    return str(caminho)
+
+
+def _importar(caminho, **opcoes):
+    importacao = ImportacaoUsuarios(arquivo_nome="planilha")
+    db.session.add(importacao)
+    db.session.commit()
+    opcoes.setdefault("metodo_hash", HASH_RAPIDO)
+    return importacao_usuarios_service.executar_importacao(importacao.id, str(caminho), **opcoes)
+
+
+def test_importa_em_lotes_e_relata_linhas_rejeitadas(app, tmp_path):
+    db.session.add(Usuario(nome="Antigo", cpf="999", email="antigo@test", senha="x",
+                           formacao="-", tipo="participante"))
+    db.session.commit()
+    caminho = _csv(tmp_path / "usuarios.csv", [
+        ["Ana", "111", "ana@test", "s1", "Pedagogia", "participante"],
+        ["Bia", "222", "antigo@test", "s2", "Letras", "participante"],
+        ["", "", "", "", "", ""],
+        ["Caio", "333", "caio@test", "", "Letras", "participante"],
+        ["Dani", "999", "dani@test", "s4", "Física", "participante"],
+        ["Eva", "111", "eva@test", "s5", "Física", "professor"],
+        ["Fabi", "666", "fabi@test", "s6", "Química", "professor"],
+    ])
+
+    importacao = _importar(caminho, lote=2, workers=1)
+
+    assert importacao.status == ImportacaoUsuarios.CONCLUIDA
+    assert (importacao.linhas_processadas, importacao.importados, importacao.erros) == (6, 2, 4)
+    ana = Usuario.query.filter_by(email="ana@test").one()
+    assert check_password_hash(ana.senha, "s1")
+    assert Usuario.query.filter_by(email="fabi@test").one().tipo == "professor"
+
+    with open(importacao_usuarios_service.caminho_relatorio(importacao), encoding="utf-8") as arquivo:
+        erros = {int(l["linha"]): l["motivo"] for l in csv.DictReader(arquivo)}
+    assert erros == {
+        3: "E-mail já cadastrado",
+        5: "Campos obrigatórios vazios: senha",
+        6: "CPF já cadastrado",
+        7: "E-mail ou CPF repetido na planilha",
+    }
+    assert not (tmp_path / "usuarios.csv").exists()
+
+
+def test_lote_configurado_nao_positivo_falha_a_importacao(app, tmp_path):
+    app.config["IMPORTACAO_USUARIOS_LOTE"] = 0
+    caminho = _csv(tmp_path / "usuarios.csv", [["Ana", "111", "ana@test", "s1", "Pedagogia", "participante"]])
+
+    importacao = _importar(caminho, workers=1)
+
+    assert importacao.status == ImportacaoUsuarios.FALHOU
+    assert "IMPORTACAO_USUARIOS_LOTE" in importacao.mensagem
+    assert Usuario.query.count() == 0
+
+
+def test_xlsx_com_cpf_numerico_e_pool_de_hashes(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(hash_service, "PARALELO_MINIMO", 2)
+    planilha = Workbook()
+    aba = planilha.active
+    aba.append(CABECALHO)
+    for i in range(40):
+        aba.append([f"U{i}", 10_000_000_000 + i, f"u{i}@test", f"senha{i}", "-", "participante"])
+    caminho = tmp_path / "usuarios.xlsx"
+    planilha.save(caminho)
+
+    importacao = _importar(caminho, lote=16, workers=2)
+
+    assert (importacao.status, importacao.importados, importacao.erros) == (ImportacaoUsuarios.CONCLUIDA, 40, 0)
+    assert importacao.relatorio_erros is None
+    usuario = Usuario.query.filter_by(cpf="10000000007").one()
+    assert check_password_hash(usuario.senha, "senha7")
+
+
+def test_rota_inicia_importacao_em_segundo_plano(app, tmp_path):
+    cliente = app.test_client()
+    conteudo = io.StringIO()
+    csv.writer(conteudo).writerows([CABECALHO, ["Ana", "1", "ana@test", "s", "-", "participante"],
+                                    ["Bia", "2", "ana@test", "s", "-", "participante"]])
+
+    resposta = cliente.post(
+        "/importar_usuarios",
+        data={"arquivo": (io.BytesIO(conteudo.getvalue().encode()), "usuarios.csv")},
+        headers={"Accept": "application/json"},
+    )
+    assert resposta.status_code == 202
+    status_url = resposta.get_json()["status_url"]
+
+    for _ in range(100):
+        dados = cliente.get(status_url).get_json()
+        if dados["status"] == ImportacaoUsuarios.CONCLUIDA:
+            break
+        time.sleep(0.05)
+    assert (dados["importados"], dados["erros"]) == (1, 1)
+
+    relatorio = cliente.get(dados["relatorio_erros_url"])
+    assert relatorio.mimetype == "text/csv"
+    assert "repetido na planilha" in relatorio.get_data(as_text=True)
+
+    sem_colunas = cliente.post(
+        "/importar_usuarios",
+        data={"arquivo": (io.BytesIO(b"nome;email\nAna;a@test\n"), "usuarios.csv")},
+        headers={"Accept": "application/json"},
+    )
+    assert sem_colunas.status_code == 400
+    assert "cpf" in sem_colunas.get_json()["error"]
@@ -0,0 +1,76 @@
+from datetime import date, time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import Cliente, Evento, HorarioVisitacao
+from services import planejamento_horarios_service as planejamento
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _evento():
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    db.session.add(cliente)
+    db.session.flush()
+    evento = Evento(cliente_id=cliente.id, nome="Museu")
+    db.session.add(evento)
+    db.session.commit()
+    return evento
+
+
+def _config(**kwargs):
+    padrao = dict(
+        horario_inicio=time(9), horario_fim=time(11), intervalo_minutos=50,
+        dias_semana="1,2,3,4,5", capacidade_padrao=30,
+    )
+    padrao.update(kwargs)
+    return SimpleNamespace(**padrao)
+
+
+def test_livres_ignora_slots_sobrepostos():
+    grade = planejamento.grade_do_dia(time(9), time(11), 50)
+    assert grade == [(540, 590), (590, 640), (640, 660)]
+    # Intervalos existentes sobrepostos entre si são mesclados antes da varredura
+    assert planejamento.livres(grade, [(500, 560), (550, 595)]) == [(640, 660)]
+    assert planejamento.livres(grade, [(590, 600)]) == [(540, 590), (640, 660)]
+
+
+def test_dry_run_nao_grava_e_geracao_respeita_existentes(app):
+    evento = _evento()
+    db.session.add(HorarioVisitacao(
+        evento_id=evento.id, data=date(2023, 9, 25), horario_inicio=time(9, 30),
+        horario_fim=time(10), capacidade_total=5, vagas_disponiveis=5,
+    ))
+    db.session.commit()
+    config = _config()
+    # 24/09/2023 é domingo: a semana tem 5 dias úteis
+    inicio, fim = date(2023, 9, 24), date(2023, 9, 30)
+
+    previa = planejamento.gerar_horarios(evento.id, config, inicio, fim, dry_run=True)
+    assert previa == {
+        "criados": 13, "dry_run": True, "dias": 5, "candidatos": 15, "conflitos": 2,
+    }
+    assert HorarioVisitacao.query.count() == 1
+
+    resumo = planejamento.gerar_horarios(evento.id, config, inicio, fim)
+    db.session.commit()
+    assert resumo["criados"] == 13
+    assert HorarioVisitacao.query.count() == 14
+    assert {h.data.weekday() for h in HorarioVisitacao.query.all()} == {0, 1, 2, 3, 4}
+
+    # Rodar de novo não duplica nada
+    assert planejamento.gerar_horarios(evento.id, config, inicio, fim)["criados"] == 0
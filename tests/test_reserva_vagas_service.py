@@ -0,0 +1,90 @@
+from datetime import date, time
+
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import AgendamentoVisita, Cliente, Evento, HorarioVisitacao
+from services import reserva_vagas_service
+from services.reserva_vagas_service import VagasInsuficientesError
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    # Arquivo em disco para que as threads do benchmark compartilhem o banco
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'reservas.db'}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30}}
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _horario(vagas=10, capacidade=10):
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    db.session.add(cliente)
+    db.session.flush()
+    evento = Evento(cliente_id=cliente.id, nome="Museu")
+    db.session.add(evento)
+    db.session.flush()
+    horario = HorarioVisitacao(
+        evento_id=evento.id, data=date(2025, 5, 10),
+        horario_inicio=time(9), horario_fim=time(10),
+        capacidade_total=capacidade, vagas_disponiveis=vagas,
+    )
+    db.session.add(horario)
+    db.session.commit()
+    return horario
+
+
+def test_reserva_sem_saldo_nao_altera_vagas(app):
+    horario = _horario(vagas=10)
+
+    assert reserva_vagas_service.reservar_vagas(horario.id, 7) == 3
+    assert horario.vagas_disponiveis == 3
+    with pytest.raises(VagasInsuficientesError) as exc:
+        reserva_vagas_service.reservar_vagas(horario.id, 4)
+    assert exc.value.disponiveis == 3
+    db.session.commit()
+    assert db.session.get(HorarioVisitacao, horario.id).vagas_disponiveis == 3
+
+
+def test_cancelamento_libera_uma_unica_vez(app):
+    horario = _horario(vagas=4, capacidade=10)
+    agendamento = AgendamentoVisita(
+        horario_id=horario.id, escola_nome="Escola", turma="T1",
+        nivel_ensino="Fundamental", quantidade_alunos=6, status="confirmado",
+    )
+    db.session.add(agendamento)
+    db.session.commit()
+
+    assert reserva_vagas_service.encerrar_agendamento(agendamento) is True
+    assert reserva_vagas_service.encerrar_agendamento(agendamento, "recusado") is False
+    db.session.commit()
+
+    assert agendamento.status == "cancelado"
+    assert agendamento.data_cancelamento is not None
+    assert db.session.get(HorarioVisitacao, horario.id).vagas_disponiveis == 10
+
+
+def test_liberacao_respeita_capacidade(app):
+    horario = _horario(vagas=8, capacidade=10)
+    assert reserva_vagas_service.liberar_vagas(horario.id, 5) == 10
+
+
+def test_benchmark_concorrente_sem_overbooking(app):
+    horario = _horario(vagas=100, capacidade=100)
+
+    resultado = reserva_vagas_service.benchmark_reservas_concorrentes(
+        horario.id, tentativas=300, quantidade=1, workers=32
+    )
+
+    assert resultado["erros"] == 0
+    assert resultado["confirmadas"] == 100
+    assert resultado["recusadas"] == 200
+    assert resultado["vagas_finais"] == 0
+    assert resultado["oversell"] == 0
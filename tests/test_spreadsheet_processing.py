@@ -0,0 +1,195 @@
+import io
+
+import pandas as pd
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from werkzeug.security import check_password_hash
+
+from extensions import db
+from models import Cliente, Evento
+from models.review import Submission
+from models.submission_system import ImportedSubmission
+from services import optimization_service, spreadsheet_service
+from services.spreadsheet_service import SpreadsheetService
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(spreadsheet_service, "ACCESS_CODE_HASH_METHOD", "pbkdf2:sha256:1000")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + str(tmp_path / "app.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _importadas(total_por_lote=120):
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    db.session.add(cliente)
+    db.session.flush()
+    evento = Evento(cliente_id=cliente.id, nome="Congresso")
+    db.session.add(evento)
+    db.session.flush()
+    for lote in ("lote-a", "lote-b"):
+        db.session.add_all(
+            ImportedSubmission(
+                evento_id=evento.id, title=f"Trabalho {lote} {i}", authors=f"Autor {i}",
+                category="Matemática", import_batch_id=lote,
+            )
+            for i in range(total_por_lote)
+        )
+    db.session.add(ImportedSubmission(evento_id=evento.id, title="T" * 300, import_batch_id="lote-a"))
+    db.session.commit()
+    return evento
+
+
+def test_materializa_em_lotes_so_o_batch_pedido(app):
+    evento = _importadas()
+    consultas = []
+
+    def contar(*_args):
+        consultas.append(1)
+
+    event.listen(db.engine, "before_cursor_execute", contar)
+    try:
+        resultado = SpreadsheetService(evento.id).process_imported_submissions(
+            "lote-a", batch_size=50, workers=1
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", contar)
+
+    assert resultado["success"]
+    assert (resultado["processed_count"], resultado["batches"], resultado["error_count"]) == (120, 3, 1)
+    # Por lote: SELECT das pendentes, INSERT das submissões e UPDATE das importadas
+    assert len(consultas) <= 3 * 4 + 2
+
+    db.session.expire_all()
+    importadas = ImportedSubmission.query.filter_by(import_batch_id="lote-a").all()
+    assert all(i.processed for i in importadas)
+    longa = next(i for i in importadas if len(i.title) == 300)
+    assert longa.submission_id is None and "Título excede" in longa.processing_errors[0]
+    for importada in importadas:
+        if importada.submission_id:
+            submissao = importada.submission
+            assert submissao.title == importada.title
+            assert submissao.attributes["authors"] == importada.authors
+            assert submissao.code_hash.startswith("pbkdf2:sha256:1000$")
+    assert Submission.query.count() == 120
+    assert ImportedSubmission.query.filter_by(import_batch_id="lote-b", processed=False).count() == 120
+
+
+def test_retoma_o_batch_sem_duplicar_apos_falha(app, monkeypatch):
+    evento = _importadas(total_por_lote=100)
+    servico = SpreadsheetService(evento.id)
+    original = SpreadsheetService._materialize_batch
+    chamadas = []
+
+    def falhar_no_terceiro(self, pendentes, hashes):
+        chamadas.append(1)
+        if len(chamadas) == 3:
+            raise RuntimeError("queda no meio da importação")
+        return original(self, pendentes, hashes)
+
+    monkeypatch.setattr(SpreadsheetService, "_materialize_batch", falhar_no_terceiro)
+    resultado = servico.process_imported_submissions("lote-b", batch_size=30, workers=1)
+    assert not resultado["success"]
+    assert (resultado["processed_count"], resultado["remaining"]) == (60, 40)
+    assert Submission.query.count() == 60
+
+    monkeypatch.setattr(SpreadsheetService, "_materialize_batch", original)
+    resultado = servico.process_imported_submissions("lote-b", batch_size=30, workers=1)
+    assert resultado["success"] and resultado["processed_count"] == 40
+
+    db.session.expire_all()
+    ids = [i.submission_id for i in ImportedSubmission.query.filter_by(import_batch_id="lote-b")]
+    assert None not in ids and len(set(ids)) == 100
+    assert Submission.query.count() == 100
+    assert servico.get_import_stats("lote-b")["pending"] == 0
+
+
+def test_codigo_de_acesso_confere_com_o_hash():
+    from services.hash_service import GeradorHashes
+
+    with GeradorHashes(workers=1, metodo="pbkdf2:sha256:1000") as hashes:
+        gerados = hashes.gerar(["ABC123", "XYZ789"])
+    assert check_password_hash(gerados[0], "ABC123")
+    assert not check_password_hash(gerados[1], "ABC123")
+
+
+@pytest.fixture
+def metricas(tmp_path, monkeypatch):
+    # OptimizationService cria o diretório de cache no diretório atual
+    monkeypatch.chdir(tmp_path)
+    servico = optimization_service.OptimizationService()
+    monkeypatch.setattr(optimization_service, "_shared_service", servico)
+    return servico
+
+
+def _planilha(linhas):
+    return pd.DataFrame({
+        "Título": [f"Trabalho {i}" if i % 7 else None for i in range(linhas)],
+        "Autores": [f"Autora {i}" for i in range(linhas)],
+        "Categoria": [("mat", "Português", " port ", "Ciências")[i % 4] for i in range(linhas)],
+        "Ano": [2000 + i % 20 for i in range(linhas)],
+    })
+
+
+@pytest.mark.parametrize("formato", ["xlsx", "csv"])
+def test_importacao_em_chunks_normaliza_e_registra_metricas(app, metricas, formato):
+    evento = _importadas(total_por_lote=0)
+    tabela = _planilha(45)
+    if formato == "csv":
+        conteudo = io.BytesIO(tabela.to_csv(index=False).encode("utf-8"))
+    else:
+        conteudo = io.BytesIO()
+        tabela.to_excel(conteudo, index=False)
+        conteudo.seek(0)
+
+    resultado = SpreadsheetService(evento.id).import_spreadsheet(
+        conteudo, f"trabalhos.{formato}", {"title": "Título", "authors": 1, "category": "Categoria"},
+        chunk_size=10,
+    )
+
+    assert resultado["success"], resultado
+    assert (resultado["total_rows"], resultado["imported_count"], resultado["error_count"]) == (45, 38, 7)
+    assert resultado["errors"][0] == "Linha 1: Título obrigatório"
+    importadas = ImportedSubmission.query.filter_by(import_batch_id=resultado["batch_id"]).all()
+    assert len(importadas) == 38
+    por_titulo = {i.title: i for i in importadas}
+    assert por_titulo["Trabalho 1"].category == "Português"
+    assert por_titulo["Trabalho 2"].category == "Português"
+    assert por_titulo["Trabalho 4"].category == "Matemática"
+    assert por_titulo["Trabalho 1"].authors == "Autora 1"
+    assert por_titulo["Trabalho 3"].original_row_data == {
+        "Título": "Trabalho 3", "Autores": "Autora 3", "Categoria": "Ciências", "Ano": "2003",
+    }
+
+    desempenho = metricas.get_performance_metrics()
+    assert desempenho["operations"][-1] == resultado["performance"]
+    assert resultado["performance"]["rows"] == 45
+    assert desempenho["throughput"]["spreadsheet_import"]["runs"] == 1
+    assert desempenho["throughput"]["spreadsheet_import"]["peak_memory_mb"] > 0
+
+
+def test_analise_le_so_as_primeiras_linhas(app, metricas):
+    conteudo = io.BytesIO()
+    _planilha(300).to_excel(conteudo, index=False)
+
+    analise = SpreadsheetService(1).analyze_spreadsheet(conteudo.getvalue(), "trabalhos.xlsx")
+
+    assert analise["success"]
+    # Amostra limitada, mas o total é o da planilha inteira
+    assert analise["columns_analysis"]["Autores"]["non_null_count"] == spreadsheet_service.ANALYSIS_ROWS
+    assert analise["total_rows"] == 300
+    assert analise["columns"] == ["Título", "Autores", "Categoria", "Ano"]
+    assert analise["suggested_mapping"]["category"] == "Categoria"
+
+    # Stream de upload: a contagem relê o arquivo desde o início
+    csv = io.BytesIO(_planilha(250).to_csv(index=False).encode("utf-8"))
+    analise = SpreadsheetService(1).analyze_spreadsheet(csv, "trabalhos.csv")
+    assert analise["total_rows"] == 250
@@ -0,0 +1,116 @@
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import Cliente, Evento, Usuario
+from models.voting import VotingCategory, VotingEvent, VotingQuestion, VotingResult, VotingVote, VotingWork
+from services.voting_service import VotingService
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _votacao():
+    cliente = Cliente(nome="Cli", email="cli@test", senha="x")
+    db.session.add(cliente)
+    db.session.flush()
+    evento = Evento(cliente_id=cliente.id, nome="Congresso")
+    db.session.add(evento)
+    db.session.flush()
+    votacao = VotingEvent(cliente_id=cliente.id, evento_id=evento.id, nome="Prêmio")
+    db.session.add(votacao)
+    db.session.flush()
+    categorias = [
+        VotingCategory(voting_event_id=votacao.id, nome="Inovação"),
+        VotingCategory(voting_event_id=votacao.id, nome="Impacto"),
+    ]
+    trabalhos = [VotingWork(voting_event_id=votacao.id, titulo=f"T{i}") for i in range(4)]
+    revisores = [
+        Usuario(nome=f"R{i}", cpf=f"r{i}", email=f"r{i}@test", senha="x", formacao="-", tipo="revisor")
+        for i in range(3)
+    ]
+    db.session.add_all(categorias + trabalhos + revisores)
+    db.session.flush()
+    perguntas = [VotingQuestion(category_id=c.id, texto_pergunta="Nota") for c in categorias]
+    db.session.add_all(perguntas)
+    db.session.commit()
+    return votacao, categorias, trabalhos, revisores, perguntas
+
+
+def _votar(votacao, categoria, pergunta, trabalho, revisor, nota, incremental):
+    return VotingService.save_vote(
+        votacao.id, categoria.id, trabalho.id, revisor.id,
+        [{"question_id": pergunta.id, "valor_numerico": nota}], incremental=incremental,
+    )
+
+
+def _placar(votacao_id):
+    db.session.expire_all()
+    return {
+        (r.category_id, r.work_id): (r.pontuacao_total, r.pontuacao_media, r.numero_votos, r.posicao_ranking)
+        for r in VotingResult.query.filter_by(voting_event_id=votacao_id)
+    }
+
+
+def test_apuracao_agrega_e_ranqueia_por_categoria(app):
+    votacao, (inovacao, impacto), trabalhos, revisores, (p1, p2) = _votacao()
+    notas = {
+        (inovacao, 0): [8, 9], (inovacao, 1): [10, 7], (inovacao, 2): [5],
+        (impacto, 0): [6], (impacto, 3): [9, 9, 9],
+    }
+    for (categoria, t), valores in notas.items():
+        pergunta = p1 if categoria is inovacao else p2
+        for revisor, nota in zip(revisores, valores):
+            _votar(votacao, categoria, pergunta, trabalhos[t], revisor, nota, incremental=False)
+
+    resultados = VotingService.calculate_results(votacao.id)
+    assert len(resultados) == 5
+    placar = _placar(votacao.id)
+    assert placar[(inovacao.id, trabalhos[0].id)] == (17, 8.5, 2, 1)
+    assert placar[(inovacao.id, trabalhos[1].id)] == (17, 8.5, 2, 1)
+    assert placar[(inovacao.id, trabalhos[2].id)] == (5, 5, 1, 3)
+    assert placar[(impacto.id, trabalhos[3].id)] == (27, 9, 3, 1)
+    assert placar[(impacto.id, trabalhos[0].id)] == (6, 6, 1, 2)
+
+    # Reapurar não duplica linhas
+    _votar(votacao, inovacao, p1, trabalhos[2], revisores[1], 10, incremental=False)
+    VotingService.calculate_results(votacao.id)
+    assert VotingResult.query.filter_by(voting_event_id=votacao.id).count() == 5
+    assert _placar(votacao.id)[(inovacao.id, trabalhos[2].id)] == (15, 7.5, 2, 3)
+
+
+def test_modo_incremental_mantem_os_mesmos_totais(app):
+    votacao, (inovacao, impacto), trabalhos, revisores, (p1, p2) = _votacao()
+    app.config["VOTING_RESULTADOS_INCREMENTAIS"] = True
+
+    _votar(votacao, inovacao, p1, trabalhos[0], revisores[0], 6, incremental=None)
+    _votar(votacao, inovacao, p1, trabalhos[0], revisores[1], 8, incremental=None)
+    _votar(votacao, inovacao, p1, trabalhos[1], revisores[0], 9, incremental=None)
+    _votar(votacao, impacto, p2, trabalhos[2], revisores[2], 4, incremental=None)
+    # Revisor muda o voto: soma a diferença sem contar um voto novo
+    _votar(votacao, inovacao, p1, trabalhos[0], revisores[0], 10, incremental=None)
+
+    incremental = _placar(votacao.id)
+    assert incremental[(inovacao.id, trabalhos[0].id)] == (18, 9, 2, 1)
+    assert incremental[(inovacao.id, trabalhos[1].id)] == (9, 9, 1, 2)
+
+    # Com resultados já mantidos, a leitura não reapura
+    VotingVote.query.filter_by(work_id=trabalhos[2].id).delete()
+    db.session.commit()
+    VotingService.refresh_results(votacao.id)
+    assert _placar(votacao.id) == incremental
+
+    VotingService.calculate_results(votacao.id)
+    apurado = _placar(votacao.id)
+    del incremental[(impacto.id, trabalhos[2].id)], apurado[(impacto.id, trabalhos[2].id)]
+    assert apurado == incremental
@@ -510,6 +510,10 @@ def enviar_email(destinatario, nome_participante, nome_oficina, assunto, corpo_t
 
     Esta função agora usa o novo EmailService que suporta Mailjet e SMTP fallback,
     com logs detalhados e validação de templates.
+
+    O envio é síncrono: o request espera pelo provedor. Rotas devem usar
+    ``services.email_outbox_service.enfileirar_email``, que aceita os mesmos
+    argumentos e entrega pelo worker da outbox.
     """
     from services.email_service import email_service
     